@@ -0,0 +1,354 @@
+"""
+End-to-end benchmarks for the V2/V3 orchestrators against the fake LLM backend.
+
+Each case runs OrchestratorV2.run_debate_interaction or OrchestratorV3.run_full_debate
+on one report from data/reports (used as question document and as every agent's
+answer document), with the LLM served by src.utils.fake_llm. Per case we record
+wall-clock p50/p95 over the repeats, LLM calls, prompt/completion tokens (as
+billed by the fake) and peak RSS. Calls and tokens are deterministic for a given
+fake seed, so they are compared strictly against the JSON baseline; wall-clock
+time is compared with a tolerance.
+
+Run it with `python main.py benchmark` (see --help).
+"""
+import contextlib
+import itertools
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_path = os.path.join(project_root, "src")
+for path in (project_root, src_path):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from core.answer_agent import MODEL_NAME, ReportQAAgent
+from core.answer_agent_v3 import AnswerAgentV3
+from core.llm_interface import LLMInterface
+from core.orchestrator_v2 import OrchestratorV2
+from core.orchestrator_v3 import OrchestratorV3
+from core.question_agent import QuestionAgent
+from src.utils.document_store import DocumentStore
+from src.utils.fake_llm import get_fake_backend, reset_fake_backends # Same module object LLMInterface uses
+from src.utils.rate_limiter import reset_rate_limiters
+from src.utils.results_sink import MarkdownResultsSink
+from src.utils.retry import RetryPolicy
+
+REPORTS_DIR = os.path.join(project_root, "data", "reports")
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+DEFAULT_RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results.json")
+REPORT_VERSION = 1
+
+WORKFLOWS = ("v2", "v3")
+MATRICES = ("quick", "full")
+DEFAULT_REPEATS = 3
+# Wall-clock regressions smaller than this are treated as noise
+MIN_TIME_REGRESSION_SECONDS = 0.05
+RSS_SAMPLE_INTERVAL = 0.01
+
+# Fake backend used unless overridden: ~20 ms median latency, fast generation
+DEFAULT_FAKE_CONFIG: Dict[str, Any] = {
+    "seed": 0,
+    "latency": {"distribution": "lognormal", "median": 0.02, "sigma": 0.3},
+    "tokens_per_second": 5000,
+    "response_tokens": 80,
+}
+
+
+class BenchmarkCase(NamedTuple):
+    """One benchmark configuration (rounds is always 0 for V2, which has no debate rounds)."""
+    workflow: str
+    agents: int
+    rounds: int
+    questions: int
+    document: str
+
+    @property
+    def name(self) -> str:
+        stem = os.path.splitext(self.document)[0]
+        return f"{self.workflow}-a{self.agents}-r{self.rounds}-q{self.questions}-{stem}"
+
+
+def list_documents(reports_dir: str = REPORTS_DIR) -> List[str]:
+    """Report file names in reports_dir, smallest first (they serve as the document-size axis)."""
+    names = [n for n in os.listdir(reports_dir) if n.endswith((".md", ".txt"))]
+    return sorted(names, key=lambda n: os.path.getsize(os.path.join(reports_dir, n)))
+
+
+def _unique(cases: List[BenchmarkCase]) -> List[BenchmarkCase]:
+    """Drops repeated cases, keeping the first occurrence."""
+    unique: List[BenchmarkCase] = []
+    for case in cases:
+        if case not in unique:
+            unique.append(case)
+    return unique
+
+
+def build_matrix(matrix: str, documents: Sequence[str], workflows: Sequence[str] = WORKFLOWS) -> List[BenchmarkCase]:
+    """
+    Builds the benchmark cases.
+
+    "quick" varies one dimension at a time around a base case (3 agents, 2 rounds,
+    3 questions, middle-sized report): agents 1-16, rounds 0-5, questions 1-50 and every
+    report. "full" is the cartesian product of agents (1, 2, 4, 8, 16), rounds 0-5,
+    questions (1, 5, 10, 25, 50) and every report.
+    """
+    if matrix not in MATRICES:
+        raise ValueError(f"Unknown benchmark matrix '{matrix}'. Use one of {MATRICES}.")
+    if not documents:
+        raise ValueError("At least one report is needed to build the benchmark matrix.")
+    cases: List[BenchmarkCase] = []
+    for workflow in workflows:
+        if workflow not in WORKFLOWS:
+            raise ValueError(f"Unknown workflow '{workflow}'. Use one of {WORKFLOWS}.")
+        round_values = (0, 1, 2, 3, 4, 5) if workflow == "v3" else (0,)
+        if matrix == "full":
+            for agents, rounds, questions, document in itertools.product(
+                (1, 2, 4, 8, 16), round_values, (1, 5, 10, 25, 50), documents
+            ):
+                cases.append(BenchmarkCase(workflow, agents, rounds, questions, document))
+            continue
+        base = BenchmarkCase(workflow, 3, 2 if workflow == "v3" else 0, 3, documents[len(documents) // 2])
+        cases.append(base)
+        cases.extend(base._replace(agents=agents) for agents in (1, 4, 16))
+        if workflow == "v3":
+            cases.extend(base._replace(rounds=rounds) for rounds in (0, 5))
+        cases.extend(base._replace(questions=questions) for questions in (1, 10, 50))
+        cases.extend(base._replace(document=document) for document in documents)
+    return _unique(cases)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in [0, 100]) of a non-empty sequence."""
+    if not values:
+        raise ValueError("percentile() needs at least one value.")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakRSSSampler:
+    """
+    Samples the process RSS on a background thread while active and keeps the maximum.
+
+    Falls back to the process-lifetime peak (getrusage) where /proc is unavailable.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        rss = _current_rss_bytes()
+        if rss is None:
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        self.peak_bytes = max(self.peak_bytes, rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    """Silences agent/interface prints and INFO logging, which would otherwise dominate timings."""
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.INFO)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        logging.disable(previous_disable)
+
+
+def _write_fake_config(directory: str, fake_config: Dict[str, Any]) -> str:
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump({"model": {"fake_llm": {MODEL_NAME: fake_config}}}, f)
+    return config_path
+
+
+def _build_run(case: BenchmarkCase, llm_interface: LLMInterface, output_path: str) -> Iterator[Tuple[str, Any]]:
+    """Builds the case's agents and orchestrator and returns its event generator."""
+    document_path = os.path.join(REPORTS_DIR, case.document)
+    answer_doc_paths = [document_path] * case.agents
+    document_store = DocumentStore()
+    question_agent = QuestionAgent(llm_interface=llm_interface)
+    if case.workflow == "v2":
+        answer_agents = [ReportQAAgent(document_store=document_store, llm_interface=llm_interface)
+                         for _ in range(case.agents)]
+        orchestrator = OrchestratorV2(
+            question_agent=question_agent, answer_agents=answer_agents, output_file_path=output_path,
+            llm_interface=llm_interface, num_initial_questions=case.questions, max_concurrency=case.agents,
+        )
+        return orchestrator.run_debate_interaction(document_path, answer_doc_paths)
+    answer_agents = [AnswerAgentV3(llm_interface=llm_interface, document_store=document_store)
+                     for _ in range(case.agents)]
+    orchestrator = OrchestratorV3(
+        question_agent=question_agent, answer_agents=answer_agents, output_file_path=output_path,
+        llm_interface=llm_interface, num_initial_questions=case.questions, max_debate_rounds=case.rounds,
+        max_concurrency=case.agents, simultaneous_rounds=True, document_store=document_store,
+        results_sink=MarkdownResultsSink(output_path),
+    )
+    return orchestrator.run_full_debate(document_path, answer_doc_paths)
+
+
+def run_case(
+    case: BenchmarkCase,
+    fake_config: Optional[Dict[str, Any]] = None,
+    repeats: int = DEFAULT_REPEATS,
+) -> Dict[str, Any]:
+    """
+    Runs one case `repeats` times against a fresh fake backend and returns its metrics.
+
+    LLM calls and tokens are those of a single run (they are identical across repeats
+    for a given fake seed); times are wall-clock seconds for consuming the orchestrator's
+    events, excluding agent construction.
+    """
+    if repeats < 1:
+        raise ValueError("repeats must be at least 1.")
+    fake_config = dict(DEFAULT_FAKE_CONFIG if fake_config is None else fake_config)
+    durations: List[float] = []
+    peak_rss = 0
+    errors = 0
+    stats: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="llmdebater-bench-") as work_dir:
+        config_path = _write_fake_config(work_dir, fake_config)
+        for repeat in range(repeats):
+            with _quiet():
+                # Fresh counters, RPM window and limiter for every run
+                reset_fake_backends()
+                reset_rate_limiters()
+                llm_interface = LLMInterface(config_path=config_path, model_key=MODEL_NAME,
+                                             retry_policy=RetryPolicy(initial_backoff=0.01, max_backoff=0.1))
+                events = _build_run(case, llm_interface, os.path.join(work_dir, f"run-{repeat}.md"))
+                run_errors = 0
+                with PeakRSSSampler() as rss:
+                    start = time.perf_counter()
+                    for speaker, message in events:
+                        if speaker == "System" and str(message).startswith("Error"):
+                            run_errors += 1
+                    durations.append(time.perf_counter() - start)
+            peak_rss = max(peak_rss, rss.peak_bytes)
+            errors = max(errors, run_errors)
+            stats = get_fake_backend(MODEL_NAME, fake_config).stats()
+    reset_fake_backends()
+
+    return {
+        "name": case.name,
+        **case._asdict(),
+        "document_bytes": os.path.getsize(os.path.join(REPORTS_DIR, case.document)),
+        "repeats": repeats,
+        "p50_seconds": round(percentile(durations, 50), 4),
+        "p95_seconds": round(percentile(durations, 95), 4),
+        "llm_calls": stats.get("requests", 0),
+        "prompt_tokens": stats.get("prompt_tokens", 0),
+        "completion_tokens": stats.get("completion_tokens", 0),
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+        "errors": errors,
+    }
+
+
+def build_report(results: List[Dict[str, Any]], fake_config: Dict[str, Any], repeats: int) -> Dict[str, Any]:
+    """JSON report (also the baseline format): run settings plus results keyed by case name."""
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeats": repeats,
+        "fake_llm": fake_config,
+        "cases": {result["name"]: result for result in results},
+    }
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Loads a saved report to compare against, or returns None if path does not exist.
+
+    Raises:
+        ValueError: If the file is not a benchmark report of this version.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != REPORT_VERSION or not isinstance(baseline.get("cases"), dict):
+        raise ValueError(f"{path} is not a version {REPORT_VERSION} benchmark report.")
+    return baseline
+
+
+def compare_to_baseline(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], time_tolerance: float = 0.5
+) -> List[str]:
+    """
+    Lists regressions against the baseline: any increase in LLM calls or prompt tokens,
+    and p50 wall-clock more than time_tolerance (a fraction) above the baseline.
+    Cases missing from the baseline are skipped.
+    """
+    regressions = []
+    for result in results:
+        base = baseline["cases"].get(result["name"])
+        if base is None:
+            continue
+        for key in ("llm_calls", "prompt_tokens"):
+            if result[key] > base[key]:
+                regressions.append(f"{result['name']}: {key} {base[key]} -> {result[key]}")
+        slower_by = result["p50_seconds"] - base["p50_seconds"]
+        if result["p50_seconds"] > base["p50_seconds"] * (1 + time_tolerance) and slower_by > MIN_TIME_REGRESSION_SECONDS:
+            regressions.append(
+                f"{result['name']}: p50 {base['p50_seconds']:.3f}s -> {result['p50_seconds']:.3f}s "
+                f"(+{slower_by / base['p50_seconds']:.0%})"
+            )
+    return regressions
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Plain-text table of case results."""
+    header = f"{'case':<48} {'p50 s':>8} {'p95 s':>8} {'calls':>6} {'prompt tok':>11} {'RSS MB':>7} {'err':>4}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r['name']:<48} {r['p50_seconds']:>8.3f} {r['p95_seconds']:>8.3f} {r['llm_calls']:>6} "
+                     f"{r['prompt_tokens']:>11} {r['peak_rss_mb']:>7.1f} {r['errors']:>4}")
+    return "\n".join(lines)
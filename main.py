@@ -1,6 +1,7 @@
 import logging
 import sys
 import os
+import time
 import typer
 from typing import Optional, Annotated, List
 from pathlib import Path
@@ -14,11 +15,23 @@ from core.orchestrator import Orchestrator
 from core.orchestrator_v2 import OrchestratorV2
 from core.orchestrator_v3 import OrchestratorV3
 from core.answer_agent_v3 import AnswerAgentV3
-from core.llm_interface import LLMInterface
-from utils.file_handler import read_text_file
-from utils.token_utils import estimate_token_count
+from core.llm_interface import LLMInterface, register_llm_interface
+from core.batch import BatchJob, JOB_STATUS_FAILED, jobs_from_directory, load_manifest, run_batch, write_summary
+from src.utils.response_cache import ResponseCache
+from src.utils.retry import RetryPolicy
+from src.utils.retrieval import DEFAULT_CONTEXT_TOKEN_BUDGET
+from src.utils.convergence import DEFAULT_CONVERGENCE_THRESHOLD
+from src.utils.checkpoint import RunCheckpoint, default_checkpoint_path # Same module object the orchestrators use
+from src.utils.results_sink import build_results_sink
+from src.utils.document_store import DocumentStore
+from src.utils.streaming import PartialMessage # Same module object the orchestrators use
+from src.utils.llm_metrics import MetricsAggregator
+from src.utils.tracing import start_tracing, stop_tracing
+from src.utils.file_handler import read_text_file
+from src.utils.token_utils import check_token_limit
 from core.answer_agent import MAX_INPUT_TOKENS, MODEL_NAME, ContextLengthError
 from core.prompts import ANSWER_PROMPT_TEMPLATE
+from benchmarks import orchestrator_bench
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -33,10 +46,10 @@ def _handle_error(message: str, exit_code: int = 1):
     print(f"Error: {message}", file=sys.stderr)
     raise typer.Exit(code=exit_code)
 
-def _initialize_answer_agent() -> ReportQAAgent:
-    """Initializes and returns the Answer Agent."""
+def _initialize_answer_agent(llm_interface: Optional[LLMInterface] = None) -> ReportQAAgent:
+    """Initializes and returns the Answer Agent, on the shared LLM Interface if one is given."""
     try:
-        return ReportQAAgent()
+        return ReportQAAgent(llm_interface=llm_interface)
     except Exception as e:
         _handle_error(f"Initializing Answer Agent failed: {e}")
 
@@ -48,14 +61,92 @@ def _initialize_question_agent(llm_interface: LLMInterface) -> QuestionAgent:
     except Exception as e:
         _handle_error(f"Initializing Question Agent failed: {e}")
 
-def _initialize_llm_interface() -> LLMInterface:
-    """Initializes and returns the LLM Interface for the orchestrator."""
+def _initialize_response_cache(cache_path: Optional[Path], ttl_hours: Optional[float] = None) -> Optional[ResponseCache]:
+    """Opens the on-disk LLM response cache if a path was given."""
+    if cache_path is None:
+        return None
+    try:
+        ttl_seconds = ttl_hours * 3600 if ttl_hours else None
+        return ResponseCache(str(cache_path), ttl_seconds=ttl_seconds)
+    except Exception as e:
+        _handle_error(f"Opening response cache at {cache_path} failed: {e}")
+
+def _initialize_checkpoint(checkpoint_path: Optional[Path], output_path: Path, resume: bool) -> RunCheckpoint:
+    """Creates the run checkpoint journal (next to the output file unless a path was given)."""
+    path = str(checkpoint_path) if checkpoint_path is not None else default_checkpoint_path(str(output_path))
+    if resume and not os.path.exists(path):
+        print(f"No checkpoint found at {path}; starting a new run.")
+    else:
+        print(f"{'Resuming from' if resume else 'Writing'} checkpoint: {path}")
+    return RunCheckpoint(path, resume=resume)
+
+def _initialize_llm_interface(max_concurrent_requests: Optional[int] = None,
+                              response_cache: Optional[ResponseCache] = None,
+                              retry_policy: Optional[RetryPolicy] = None,
+                              metrics: Optional[MetricsAggregator] = None) -> LLMInterface:
+    """Initializes the LLM Interface shared by the orchestrator and its agents."""
     try:
         # Assuming orchestrator uses the same primary model for its own checks
-        return LLMInterface(model_key=MODEL_NAME)
+        llm_interface = LLMInterface(model_key=MODEL_NAME, max_concurrent_requests=max_concurrent_requests,
+                                     response_cache=response_cache, retry_policy=retry_policy,
+                                     metrics_callbacks=[metrics] if metrics is not None else None)
+        # Anything else looking up MODEL_NAME in the registry reuses this interface
+        register_llm_interface(llm_interface)
+        return llm_interface
     except Exception as e:
         _handle_error(f"Initializing LLM Interface failed: {e}")
 
+def _write_metrics(metrics: Optional[MetricsAggregator], metrics_path: Optional[Path]):
+    """Writes per-call LLM metrics (JSON, or Prometheus text for .prom/.txt) and prints the totals."""
+    if metrics is None or metrics_path is None:
+        return
+    try:
+        metrics.write(str(metrics_path))
+    except OSError as e:
+        logger.error(f"Writing LLM metrics to {metrics_path} failed: {e}")
+        return
+    totals = metrics.snapshot()["totals"]
+    print(f"LLM metrics written to: {metrics_path} ({totals['calls']} calls, "
+          f"{totals['prompt_tokens']} prompt / {totals['completion_tokens']} completion tokens, "
+          f"${totals['cost_usd']:.4f} estimated)")
+
+def _start_trace(trace_path: Optional[Path]):
+    """Starts tracing if a trace output file was given."""
+    if trace_path is not None:
+        start_tracing()
+
+def _write_trace(trace_path: Optional[Path]):
+    """Stops tracing and writes the timeline as Chrome trace-event JSON."""
+    tracer = stop_tracing()
+    if tracer is None or trace_path is None:
+        return
+    try:
+        tracer.write_chrome_trace(str(trace_path))
+    except OSError as e:
+        logger.error(f"Writing trace to {trace_path} failed: {e}")
+        return
+    print(f"Trace written to: {trace_path} ({len(tracer.spans())} spans; open in chrome://tracing or ui.perfetto.dev)")
+
+def _print_interaction(events):
+    """Prints orchestrator (speaker, message) events, writing streamed deltas inline."""
+    streaming_speaker = None
+    for speaker, message in events:
+        if isinstance(message, PartialMessage):
+            if speaker != streaming_speaker:
+                print(f"\n[{speaker}]")
+                streaming_speaker = speaker
+            print(message.delta, end="", flush=True)
+            continue
+        if streaming_speaker is not None:
+            print() # End the streamed line
+            if speaker == streaming_speaker:
+                # The complete message was already shown as it streamed
+                streaming_speaker = None
+                continue
+            streaming_speaker = None
+        print(f"\n[{speaker}]")
+        print(message)
+
 # --- Typer Commands --- #
 @app.command("chat", help="Run interactive chat with the Answer Agent based on a report.")
 def run_interactive_chat(
@@ -78,10 +169,11 @@ def run_interactive_chat(
     # Estimate base tokens - using the function from answer_agent for consistency?
     # Or keep the local helper? Let's keep it simple for now.
     base_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query="")
-    base_tokens = estimate_token_count(base_prompt, model_name=MODEL_NAME)
+    # Exact encoding only happens if the report's approximate size is close to the limit
+    fits, base_tokens = check_token_limit(base_prompt, MAX_INPUT_TOKENS, model_name=MODEL_NAME)
     if base_tokens == -1:
         _handle_error("Could not estimate base token count for the report.")
-    elif base_tokens > MAX_INPUT_TOKENS:
+    elif not fits:
         # Keep this warning as it's important user feedback
         print(
             f"Warning: The report content itself ({base_tokens} tokens) already exceeds the estimated maximum input tokens ({MAX_INPUT_TOKENS}). Queries may fail.",
@@ -133,7 +225,7 @@ def run_generate_questions(
     # logger.info(f"Generating {num_questions} questions for document: '{document_path}'") # Use logger if needed
     
     try:
-        question_agent = _initialize_question_agent()
+        question_agent = _initialize_question_agent(_initialize_llm_interface())
         # print(f"Loading document and generating {num_questions} questions...") # Removed status print
         # print("(This might take a moment...)") # Removed status print
         
@@ -175,9 +267,9 @@ def run_orchestration(
     # T3.2: Instantiate agents and orchestrator
     try:
         # print("Initializing agents...") # Removed status print
-        question_agent = _initialize_question_agent()
-        answer_agent = _initialize_answer_agent()
-        llm_interface = _initialize_llm_interface() # For Orchestrator's own calls
+        llm_interface = _initialize_llm_interface() # Shared by the orchestrator and both agents
+        question_agent = _initialize_question_agent(llm_interface)
+        answer_agent = _initialize_answer_agent(llm_interface)
         
         orchestrator = Orchestrator(
             question_agent=question_agent,
@@ -215,6 +307,19 @@ def run_orchestration_v2(
     answer_doc_paths: Annotated[List[Path], typer.Argument(help="Paths to the report documents for the Answer Agents.", exists=True, file_okay=True, dir_okay=False, readable=True)],
     output_path: Annotated[Path, typer.Argument(help="Path to the markdown file to save the debate results.", file_okay=True, dir_okay=False, writable=True)],
     num_initial_questions: Annotated[int, typer.Option(help="Number of initial questions to generate.", min=1)] = 5,
+    max_concurrency: Annotated[int, typer.Option(help="Maximum number of Answer Agents asked in parallel per question.", min=1)] = 1,
+    response_cache: Annotated[Optional[Path], typer.Option(help="SQLite file used to cache LLM responses across runs (disabled if omitted).", dir_okay=False)] = None,
+    cache_ttl_hours: Annotated[Optional[float], typer.Option(help="Expire cached responses after this many hours.", min=0)] = None,
+    max_retries: Annotated[int, typer.Option(help="Retries per LLM call on timeouts, connection errors, 429 and 5xx responses.", min=0)] = 3,
+    request_deadline: Annotated[Optional[float], typer.Option(help="Seconds allowed per LLM call, including retries and backoff.", min=1)] = None,
+    stream: Annotated[bool, typer.Option(help="Print answers and syntheses as they are generated.")] = False,
+    retrieval_top_k: Annotated[Optional[int], typer.Option(help="Send only the top-k report passages relevant to each question instead of the whole report.", min=1)] = None,
+    retrieval_token_budget: Annotated[int, typer.Option(help="Maximum tokens of report passages per prompt when --retrieval-top-k is set.", min=1)] = DEFAULT_CONTEXT_TOKEN_BUDGET,
+    map_reduce: Annotated[bool, typer.Option(help="Answer over reports that exceed the input token limit chunk by chunk, then combine, instead of rejecting them.")] = False,
+    resume: Annotated[bool, typer.Option(help="Continue an interrupted run from its checkpoint, skipping questions, answers and syntheses already completed.")] = False,
+    checkpoint_path: Annotated[Optional[Path], typer.Option("--checkpoint", help="Checkpoint journal file (defaults to the output path + '.checkpoint.jsonl').", dir_okay=False)] = None,
+    metrics_output: Annotated[Optional[Path], typer.Option(help="Write per-call LLM metrics (latency, tokens, cost by model and caller) to this file: Prometheus text for .prom/.txt, JSON otherwise.", dir_okay=False)] = None,
+    trace_output: Annotated[Optional[Path], typer.Option(help="Trace the run (debate, rounds, agent calls, token estimation, LLM calls) and write a Chrome trace-event JSON timeline to this file.", dir_okay=False)] = None,
 ):
     """Instantiates agents and runs the OrchestratorV2 debate loop."""
     logger.info("Starting V2 orchestrated debate workflow.")
@@ -222,21 +327,28 @@ def run_orchestration_v2(
     logger.info(f"Answering documents: {', '.join(map(str, answer_doc_paths))}")
     logger.info(f"Output file: {output_path}")
     logger.info(f"Number of initial questions: {num_initial_questions}")
+    logger.info(f"Max concurrent answer agents: {max_concurrency}")
 
     if not answer_doc_paths:
         _handle_error("At least one answer document path must be provided.")
 
     try:
         print("Initializing agents...")
-        llm_interface = _initialize_llm_interface() # Shared interface
+        cache = _initialize_response_cache(response_cache, cache_ttl_hours)
+        retry_policy = RetryPolicy(max_retries=max_retries, deadline=request_deadline)
+        metrics = MetricsAggregator() if metrics_output is not None else None
+        llm_interface = _initialize_llm_interface(response_cache=cache, retry_policy=retry_policy,
+                                                  metrics=metrics) # Shared interface
         question_agent = _initialize_question_agent(llm_interface)
 
-        # Initialize multiple answer agents
+        # Initialize multiple answer agents, sharing one document cache
+        document_store = DocumentStore()
         answer_agents = []
         for i, path in enumerate(answer_doc_paths):
             print(f"  Initializing Answer Agent {i+1} for {path}...")
-            # ReportQAAgent initializes its own LLMInterface
-            agent = ReportQAAgent()
+            agent = ReportQAAgent(retrieval_top_k=retrieval_top_k, retrieval_token_budget=retrieval_token_budget,
+                                  map_reduce=map_reduce, document_store=document_store,
+                                  llm_interface=llm_interface)
             answer_agents.append(agent)
 
         print(f"Initializing OrchestratorV2 with {len(answer_agents)} answer agents...")
@@ -245,7 +357,10 @@ def run_orchestration_v2(
             answer_agents=answer_agents,
             output_file_path=str(output_path),
             llm_interface=llm_interface,
-            num_initial_questions=num_initial_questions
+            num_initial_questions=num_initial_questions,
+            max_concurrency=max_concurrency,
+            stream_partial_messages=stream,
+            checkpoint=_initialize_checkpoint(checkpoint_path, output_path, resume)
         )
         print("Initialization complete.")
 
@@ -258,16 +373,24 @@ def run_orchestration_v2(
     # Run the interaction
     try:
         print("Running debate interaction...")
-        results = orchestrator_v2.run_debate_interaction(
+        _start_trace(trace_output)
+        # Iterate through the generator and print results
+        _print_interaction(orchestrator_v2.run_debate_interaction(
             question_doc_path=str(question_doc_path),
             answer_doc_paths=[str(p) for p in answer_doc_paths]
-        )
-        print(f"\nOrchestration V2 complete. Processed {len(results)} questions. Results saved to: {output_path}")
+        ))
+
+        print(f"\nOrchestration V2 complete. Results saved to: {output_path}")
+        if cache is not None:
+            print(f"Response cache stats: {cache.stats()}")
     except ContextLengthError as e:
         _handle_error(f"A context length error occurred during processing: {e}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during the V2 orchestrated interaction: {e}", exc_info=True)
         _handle_error(f"Interaction failed unexpectedly: {e}")
+    finally:
+        _write_trace(trace_output)
+        _write_metrics(metrics, metrics_output)
 
 
 # --- V3 Command --- 
@@ -277,7 +400,27 @@ def run_orchestration_v3(
     answer_doc_paths: Annotated[List[Path], typer.Argument(help="Paths to the report documents for the Answer Agents.", file_okay=True, dir_okay=False, readable=True)], # Allow non-existent for creation?
     output_path: Annotated[Path, typer.Argument(help="Path to the markdown file to save the debate results.", file_okay=True, dir_okay=False, writable=True)],
     num_initial_questions: Annotated[int, typer.Option(help="Number of initial questions to generate.", min=1)] = 5,
-    max_debate_rounds: Annotated[int, typer.Option(help="Maximum number of debate rounds (after initial answers).", min=0)] = 2 # New V3 option
+    max_debate_rounds: Annotated[int, typer.Option(help="Maximum number of debate rounds (after initial answers).", min=0)] = 2, # New V3 option
+    max_concurrency: Annotated[int, typer.Option(help="Maximum number of agent calls run in parallel.", min=1)] = 1,
+    simultaneous_rounds: Annotated[bool, typer.Option(help="Agents in round N only see history through round N-1, so each round runs concurrently.")] = False,
+    max_concurrent_questions: Annotated[int, typer.Option(help="Number of questions debated at the same time (results stay in question order).", min=1)] = 1,
+    max_concurrent_requests: Annotated[Optional[int], typer.Option(help="Global cap on in-flight LLM requests across all agents.", min=1)] = None,
+    response_cache: Annotated[Optional[Path], typer.Option(help="SQLite file used to cache LLM responses across runs (disabled if omitted).", dir_okay=False)] = None,
+    cache_ttl_hours: Annotated[Optional[float], typer.Option(help="Expire cached responses after this many hours.", min=0)] = None,
+    max_retries: Annotated[int, typer.Option(help="Retries per LLM call on timeouts, connection errors, 429 and 5xx responses.", min=0)] = 3,
+    request_deadline: Annotated[Optional[float], typer.Option(help="Seconds allowed per LLM call, including retries and backoff.", min=1)] = None,
+    stream: Annotated[bool, typer.Option(help="Print agent responses and syntheses as they are generated.")] = False,
+    retrieval_top_k: Annotated[Optional[int], typer.Option(help="Send only the top-k document passages relevant to each question instead of the whole document.", min=1)] = None,
+    retrieval_token_budget: Annotated[int, typer.Option(help="Maximum tokens of document passages per prompt when --retrieval-top-k is set.", min=1)] = DEFAULT_CONTEXT_TOKEN_BUDGET,
+    map_reduce: Annotated[bool, typer.Option(help="Answer over reports that exceed the input token limit chunk by chunk, then combine, instead of rejecting them.")] = False,
+    compress_history: Annotated[bool, typer.Option(help="Show agents the previous round verbatim and a rolling summary of older rounds instead of the full debate history.")] = False,
+    adaptive_rounds: Annotated[bool, typer.Option(help="Stop a question's debate early once every agent's response is similar to its previous one.")] = False,
+    convergence_threshold: Annotated[float, typer.Option(help="Minimum similarity (0-1) between consecutive responses for --adaptive-rounds to stop the debate.", min=0.0, max=1.0)] = DEFAULT_CONVERGENCE_THRESHOLD,
+    results_jsonl: Annotated[Optional[Path], typer.Option(help="Also write one structured JSON record per question (responses by round, timings, token counts) to this file.", dir_okay=False)] = None,
+    resume: Annotated[bool, typer.Option(help="Continue an interrupted run from its checkpoint, skipping questions, answers and syntheses already completed.")] = False,
+    checkpoint_path: Annotated[Optional[Path], typer.Option("--checkpoint", help="Checkpoint journal file (defaults to the output path + '.checkpoint.jsonl').", dir_okay=False)] = None,
+    metrics_output: Annotated[Optional[Path], typer.Option(help="Write per-call LLM metrics (latency, tokens, cost by model and caller) to this file: Prometheus text for .prom/.txt, JSON otherwise.", dir_okay=False)] = None,
+    trace_output: Annotated[Optional[Path], typer.Option(help="Trace the run (debate, rounds, agent calls, token estimation, LLM calls) and write a Chrome trace-event JSON timeline to this file.", dir_okay=False)] = None,
 ):
     """Instantiates V3 agents and runs the OrchestratorV3 multi-round debate loop."""
     logger.info("Starting V3 multi-round debate workflow.")
@@ -286,6 +429,8 @@ def run_orchestration_v3(
     logger.info(f"Output file: {output_path}")
     logger.info(f"Number of initial questions: {num_initial_questions}")
     logger.info(f"Maximum debate rounds: {max_debate_rounds}")
+    logger.info(f"Max concurrency: {max_concurrency}, simultaneous rounds: {simultaneous_rounds}")
+    logger.info(f"Max concurrent questions: {max_concurrent_questions}, max concurrent LLM requests: {max_concurrent_requests}")
 
     if not answer_doc_paths:
         _handle_error("At least one answer document path must be provided.")
@@ -297,15 +442,22 @@ def run_orchestration_v3(
     try:
         print("Initializing agents (V3)...")
         # Use a single shared LLM interface instance for all agents
-        llm_interface_shared = _initialize_llm_interface()
+        cache = _initialize_response_cache(response_cache, cache_ttl_hours)
+        retry_policy = RetryPolicy(max_retries=max_retries, deadline=request_deadline)
+        metrics = MetricsAggregator() if metrics_output is not None else None
+        llm_interface_shared = _initialize_llm_interface(max_concurrent_requests, response_cache=cache,
+                                                         retry_policy=retry_policy, metrics=metrics)
         question_agent = _initialize_question_agent(llm_interface_shared)
 
-        # Initialize multiple V3 answer agents
+        # Initialize multiple V3 answer agents; they share the orchestrator's document cache
+        document_store = DocumentStore()
         answer_agents_v3 = []
         for i, path in enumerate(answer_doc_paths):
             print(f"  Initializing Answer Agent V3 {i+1} for {path}...")
             # Pass the shared interface to V3 agents
-            agent = AnswerAgentV3(llm_interface=llm_interface_shared)
+            agent = AnswerAgentV3(llm_interface=llm_interface_shared, retrieval_top_k=retrieval_top_k,
+                                  retrieval_token_budget=retrieval_token_budget, map_reduce=map_reduce,
+                                  document_store=document_store)
             answer_agents_v3.append(agent)
 
         print(f"Initializing OrchestratorV3 with {len(answer_agents_v3)} answer agents...")
@@ -315,7 +467,17 @@ def run_orchestration_v3(
             output_file_path=str(output_path),
             llm_interface=llm_interface_shared, # Use shared for synthesis
             num_initial_questions=num_initial_questions,
-            max_debate_rounds=max_debate_rounds # Pass new param
+            max_debate_rounds=max_debate_rounds, # Pass new param
+            max_concurrency=max_concurrency,
+            simultaneous_rounds=simultaneous_rounds,
+            max_concurrent_questions=max_concurrent_questions,
+            stream_partial_messages=stream,
+            document_store=document_store,
+            compress_history=compress_history,
+            adaptive_rounds=adaptive_rounds,
+            convergence_threshold=convergence_threshold,
+            checkpoint=_initialize_checkpoint(checkpoint_path, output_path, resume),
+            results_sink=build_results_sink(str(output_path), str(results_jsonl) if results_jsonl else None)
         )
         print("Initialization complete.")
 
@@ -328,22 +490,189 @@ def run_orchestration_v3(
     # Run the interaction
     try:
         print("\nRunning V3 multi-round debate interaction...")
-        # Iterate through the generator and print results
-        for speaker, message in orchestrator_v3.run_full_debate(
+        _start_trace(trace_output)
+        # Iterate through the generator and print results (simple console formatting)
+        _print_interaction(orchestrator_v3.run_full_debate(
             question_doc_path=str(question_doc_path),
             answer_doc_paths=[str(p) for p in answer_doc_paths]
-        ):
-            # Simple console output formatting
-            print(f"\n[{speaker}]")
-            print(message)
+        ))
         
         print(f"\nOrchestration V3 complete. Results saved to: {output_path}")
+        if cache is not None:
+            print(f"Response cache stats: {cache.stats()}")
 
     except ContextLengthError as e:
         _handle_error(f"A context length error occurred during processing: {e}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during the V3 orchestrated interaction: {e}", exc_info=True)
         _handle_error(f"V3 Interaction failed unexpectedly: {e}")
+    finally:
+        _write_trace(trace_output)
+        _write_metrics(metrics, metrics_output)
+
+
+# --- Batch Command ---
+@app.command("orchestrate_batch", help="Run V2/V3 debates for many question documents on a worker pool.")
+def run_orchestration_batch(
+    jobs_source: Annotated[Path, typer.Argument(help="Directory of reports (one job per report) or a JSON manifest of jobs.", exists=True, readable=True)],
+    output_dir: Annotated[Path, typer.Argument(help="Directory for the per-job result files and the batch summary.", file_okay=False)],
+    answer_doc: Annotated[Optional[List[Path]], typer.Option(help="Directory mode: answer documents used by every job (defaults to each job's own report).", exists=True, dir_okay=False, readable=True)] = None,
+    workflow: Annotated[str, typer.Option(help="Debate workflow to run for each job: 'v3' or 'v2'.")] = "v3",
+    workers: Annotated[int, typer.Option(help="Number of jobs run at the same time.", min=1)] = 4,
+    max_concurrent_requests: Annotated[Optional[int], typer.Option(help="Global cap on in-flight LLM requests across all jobs.", min=1)] = None,
+    num_initial_questions: Annotated[int, typer.Option(help="Number of initial questions to generate per job.", min=1)] = 5,
+    max_debate_rounds: Annotated[int, typer.Option(help="V3: maximum number of debate rounds (after initial answers).", min=0)] = 2,
+    max_concurrency: Annotated[int, typer.Option(help="Maximum number of agent calls run in parallel within a job.", min=1)] = 1,
+    simultaneous_rounds: Annotated[bool, typer.Option(help="V3: agents in round N only see history through round N-1, so each round runs concurrently.")] = False,
+    response_cache: Annotated[Optional[Path], typer.Option(help="SQLite file used to cache LLM responses across runs (disabled if omitted).", dir_okay=False)] = None,
+    cache_ttl_hours: Annotated[Optional[float], typer.Option(help="Expire cached responses after this many hours.", min=0)] = None,
+    max_retries: Annotated[int, typer.Option(help="Retries per LLM call on timeouts, connection errors, 429 and 5xx responses.", min=0)] = 3,
+    request_deadline: Annotated[Optional[float], typer.Option(help="Seconds allowed per LLM call, including retries and backoff.", min=1)] = None,
+    retrieval_top_k: Annotated[Optional[int], typer.Option(help="Send only the top-k document passages relevant to each question instead of the whole document.", min=1)] = None,
+    retrieval_token_budget: Annotated[int, typer.Option(help="Maximum tokens of document passages per prompt when --retrieval-top-k is set.", min=1)] = DEFAULT_CONTEXT_TOKEN_BUDGET,
+    map_reduce: Annotated[bool, typer.Option(help="Answer over reports that exceed the input token limit chunk by chunk, then combine, instead of rejecting them.")] = False,
+    compress_history: Annotated[bool, typer.Option(help="V3: show agents the previous round verbatim and a rolling summary of older rounds.")] = False,
+    adaptive_rounds: Annotated[bool, typer.Option(help="V3: stop a question's debate early once agents converge.")] = False,
+    results_jsonl: Annotated[bool, typer.Option(help="V3: also write one structured JSON record per question to <job>.jsonl.")] = False,
+    resume: Annotated[bool, typer.Option(help="Continue interrupted jobs from their checkpoints.")] = False,
+    metrics_output: Annotated[Optional[Path], typer.Option(help="Write per-call LLM metrics (latency, tokens, cost by model and caller) to this file: Prometheus text for .prom/.txt, JSON otherwise.", dir_okay=False)] = None,
+    trace_output: Annotated[Optional[Path], typer.Option(help="Trace the run (debate, rounds, agent calls, token estimation, LLM calls) and write a Chrome trace-event JSON timeline to this file.", dir_okay=False)] = None,
+):
+    """Runs one debate per job under a shared LLM interface and writes a batch summary."""
+    if workflow not in ("v2", "v3"):
+        _handle_error(f"Unknown workflow '{workflow}'. Use 'v2' or 'v3'.")
+
+    try:
+        if jobs_source.is_dir() and jobs_source.resolve() == output_dir.resolve():
+            _handle_error("The output directory must differ from the reports directory.")
+        os.makedirs(output_dir, exist_ok=True)
+        if jobs_source.is_dir():
+            jobs = jobs_from_directory(str(jobs_source), str(output_dir),
+                                       answer_docs=[str(p) for p in answer_doc] if answer_doc else None)
+        else:
+            if answer_doc:
+                _handle_error("--answer-doc is only used with a directory of reports; list answer documents in the manifest.")
+            jobs = load_manifest(str(jobs_source), str(output_dir))
+    except typer.Exit:
+        raise
+    except Exception as e:
+        _handle_error(f"Loading batch jobs from {jobs_source} failed: {e}")
+    if not jobs:
+        _handle_error(f"No jobs found in {jobs_source}.")
+    logger.info(f"Batch: {len(jobs)} {workflow} jobs, {workers} workers, max concurrent LLM requests: {max_concurrent_requests}")
+
+    # One interface for every job: its request cap and the per-model rate limiter form the shared budget
+    cache = _initialize_response_cache(response_cache, cache_ttl_hours)
+    retry_policy = RetryPolicy(max_retries=max_retries, deadline=request_deadline)
+    metrics = MetricsAggregator() if metrics_output is not None else None
+    llm_interface_shared = _initialize_llm_interface(max_concurrent_requests, response_cache=cache,
+                                                     retry_policy=retry_policy, metrics=metrics)
+    document_store = DocumentStore()
+
+    def run_job(job: BatchJob):
+        question_agent = QuestionAgent(llm_interface=llm_interface_shared)
+        checkpoint = RunCheckpoint(default_checkpoint_path(job.output_path), resume=resume)
+        if workflow == "v2":
+            answer_agents = [ReportQAAgent(retrieval_top_k=retrieval_top_k, retrieval_token_budget=retrieval_token_budget,
+                                           map_reduce=map_reduce, document_store=document_store,
+                                           llm_interface=llm_interface_shared)
+                             for _ in job.answer_docs]
+            orchestrator = OrchestratorV2(
+                question_agent=question_agent, answer_agents=answer_agents, output_file_path=job.output_path,
+                llm_interface=llm_interface_shared, num_initial_questions=num_initial_questions,
+                max_concurrency=max_concurrency, checkpoint=checkpoint
+            )
+            return orchestrator.run_debate_interaction(job.question_doc, job.answer_docs)
+
+        answer_agents = [AnswerAgentV3(llm_interface=llm_interface_shared, retrieval_top_k=retrieval_top_k,
+                                       retrieval_token_budget=retrieval_token_budget, map_reduce=map_reduce,
+                                       document_store=document_store)
+                         for _ in job.answer_docs]
+        jsonl_path = os.path.splitext(job.output_path)[0] + ".jsonl" if results_jsonl else None
+        orchestrator = OrchestratorV3(
+            question_agent=question_agent, answer_agents=answer_agents, output_file_path=job.output_path,
+            llm_interface=llm_interface_shared, num_initial_questions=num_initial_questions,
+            max_debate_rounds=max_debate_rounds, max_concurrency=max_concurrency,
+            simultaneous_rounds=simultaneous_rounds, document_store=document_store,
+            compress_history=compress_history, adaptive_rounds=adaptive_rounds, checkpoint=checkpoint,
+            results_sink=build_results_sink(job.output_path, jsonl_path)
+        )
+        return orchestrator.run_full_debate(job.question_doc, job.answer_docs)
+
+    print(f"Running {len(jobs)} jobs with {workers} workers...")
+    _start_trace(trace_output)
+    start = time.perf_counter()
+    results_by_name = {}
+    for result in run_batch(jobs, run_job, max_workers=workers):
+        results_by_name[result.name] = result
+        print(f"[{len(results_by_name)}/{len(jobs)}] {result.name}: {result.status} "
+              f"({result.questions_answered} questions answered, {len(result.errors)} errors, {result.seconds:.1f}s)")
+    results = [results_by_name[job.name] for job in jobs]
+    summary_path = write_summary(results, str(output_dir), time.perf_counter() - start)
+    _write_trace(trace_output)
+
+    failed = [r.name for r in results if r.status == JOB_STATUS_FAILED]
+    print(f"\nBatch complete. Summary written to: {summary_path}")
+    if cache is not None:
+        print(f"Response cache stats: {cache.stats()}")
+    _write_metrics(metrics, metrics_output)
+    if failed:
+        _handle_error(f"{len(failed)} of {len(jobs)} jobs failed: {', '.join(failed)}")
+
+
+# --- Benchmark Command ---
+@app.command("benchmark", help="Benchmark the V2/V3 orchestrators offline against the fake LLM backend.")
+def run_benchmark(
+    matrix: Annotated[str, typer.Option(help="Case matrix: 'quick' (one dimension at a time) or 'full' (cartesian product).")] = "quick",
+    workflow: Annotated[Optional[List[str]], typer.Option(help="Workflow(s) to benchmark: 'v2' and/or 'v3' (default both).")] = None,
+    repeats: Annotated[int, typer.Option(help="Runs per case; p50/p95 are taken over these.", min=1)] = orchestrator_bench.DEFAULT_REPEATS,
+    latency: Annotated[float, typer.Option(help="Median fake LLM time to first token, in seconds (lognormal).", min=0)] = 0.02,
+    tokens_per_second: Annotated[float, typer.Option(help="Fake LLM generation speed.", min=1)] = 5000,
+    output_path: Annotated[Path, typer.Option("--output", help="JSON report of this run.", dir_okay=False)] = Path(orchestrator_bench.DEFAULT_RESULTS_PATH),
+    baseline_path: Annotated[Path, typer.Option("--baseline", help="Baseline report to compare against.", dir_okay=False)] = Path(orchestrator_bench.DEFAULT_BASELINE_PATH),
+    save_baseline: Annotated[bool, typer.Option(help="Write this run's report as the new baseline instead of comparing.")] = False,
+    time_tolerance: Annotated[float, typer.Option(help="Allowed p50 slowdown against the baseline, as a fraction.", min=0)] = 0.5,
+):
+    """Runs the benchmark matrix, writes a JSON report and fails on regressions against the baseline."""
+    try:
+        cases = orchestrator_bench.build_matrix(matrix, orchestrator_bench.list_documents(), workflow or orchestrator_bench.WORKFLOWS)
+    except ValueError as e:
+        _handle_error(str(e))
+    fake_config = dict(orchestrator_bench.DEFAULT_FAKE_CONFIG,
+                       latency={"distribution": "lognormal", "median": latency, "sigma": 0.3},
+                       tokens_per_second=tokens_per_second)
+
+    print(f"Running {len(cases)} benchmark cases x {repeats} repeats...")
+    results = []
+    for idx, case in enumerate(cases, start=1):
+        result = orchestrator_bench.run_case(case, fake_config, repeats=repeats)
+        print(f"  [{idx}/{len(cases)}] {case.name}: p50 {result['p50_seconds']:.3f}s, {result['llm_calls']} calls")
+        results.append(result)
+    print()
+    print(orchestrator_bench.format_results(results))
+
+    report = orchestrator_bench.build_report(results, fake_config, repeats)
+    orchestrator_bench.save_report(report, str(output_path))
+    print(f"\nReport written to {output_path}")
+    if save_baseline:
+        orchestrator_bench.save_report(report, str(baseline_path))
+        print(f"Baseline written to {baseline_path}")
+        return
+
+    try:
+        baseline = orchestrator_bench.load_baseline(str(baseline_path))
+    except ValueError as e:
+        _handle_error(str(e))
+    if baseline is None:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+        return
+    regressions = orchestrator_bench.compare_to_baseline(results, baseline, time_tolerance=time_tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        _handle_error(f"{len(regressions)} benchmark regressions.")
+    print("No regressions against the baseline.")
 
 
 if __name__ == "__main__":
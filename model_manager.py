@@ -5,8 +5,9 @@ from typing import Dict, List, Optional
 class ModelManager:
     def __init__(self, config_path: Optional[str] = None):
         if config_path is None:
+            # LLM_CONFIG_PATH 可指向其他配置文件（例如只含 fake_llm 的基准测试配置）
             current_dir = os.path.dirname(os.path.abspath(__file__))
-            config_path = os.path.join(current_dir, "config.json")
+            config_path = os.environ.get("LLM_CONFIG_PATH") or os.path.join(current_dir, "config.json")
         
         self.config = self._load_config(config_path)
         self.available_models = self._get_all_models()
@@ -57,6 +58,17 @@ class ModelManager:
                         "api_key": provider_config["api_key"]
                     }
         
+        # 获取模拟模型（离线基准/负载测试用，见 src/utils/fake_llm.py）
+        # 与真实模型同名时覆盖真实模型
+        if "fake_llm" in self.config["model"]:
+            for model_name, model_config in self.config["model"]["fake_llm"].items():
+                models[model_name] = {
+                    "type": "fake_llm",
+                    "provider": "fake",
+                    "config": dict(model_config, name=model_config.get("name", model_name)),
+                    "api_key": "fake"
+                }
+        
         return models
 
     def get_model_types(self) -> List[str]:
@@ -94,6 +106,13 @@ class ModelManager:
                 else:
                     model_name = config["config"].get("model_name", "unknown")
                     print(f"  - {name} ({provider}, 模型: {model_name})")
+        
+        # 显示模拟模型
+        fake_models = self.get_models_by_type("fake_llm")
+        if fake_models:
+            print("\n模拟模型:")
+            for name in fake_models:
+                print(f"  - {name} (fake)")
 
 def main():
     """测试ModelManager的功能"""
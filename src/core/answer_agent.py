@@ -1,11 +1,16 @@
 import logging
 import os
-from typing import Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 
-from .llm_interface import LLMInterface
-from .prompts import ANSWER_PROMPT_TEMPLATE
-from src.utils.token_utils import estimate_token_count
+from .llm_interface import LLMInterface, get_llm_interface
+from .prompts import ANSWER_PROMPT_TEMPLATE, MAP_REDUCE_COMBINE_PROMPT_TEMPLATE
+from src.utils.token_utils import estimate_prompt_tokens, estimate_token_count
 from src.utils.file_handler import read_text_file # Assuming this function exists
+from src.utils.document_store import DocumentStore
+from src.utils.retrieval import DEFAULT_CONTEXT_TOKEN_BUDGET, chunk_text, select_passages
+from src.utils.concurrency import run_concurrently
+from src.utils.streaming import stream_deltas
+from src.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -17,26 +22,167 @@ CONTEXT_LIMIT = 128 * 1024
 # Reserve tokens for the answer to prevent exceeding limit on output
 ANSWER_BUFFER = 4 * 1024
 MAX_INPUT_TOKENS = CONTEXT_LIMIT - ANSWER_BUFFER
+# Slack kept free per map-reduce chunk, since chunk sizes are approximate
+MAP_REDUCE_CHUNK_MARGIN = 512
+DEFAULT_MAP_REDUCE_CONCURRENCY = 4
 
 # --- Custom Error --- #
 class ContextLengthError(ValueError):
     "Custom exception for cases where the prompt exceeds the context limit."
     pass
 
+class AgentErrorResponse(str):
+    """
+    Error message returned by ask_with_content/ask_question in place of an answer.
+    It is a str, so callers that display it keep working; callers that persist
+    answers (e.g. run checkpoints) use isinstance to skip failures.
+    """
+    pass
+
+# --- Map-Reduce Answering --- #
+def map_reduce_answer(
+    llm_interface: LLMInterface,
+    question: str,
+    document: str,
+    build_prompt: Callable[[str], str],
+    model_name: str = MODEL_NAME,
+    max_input_tokens: int = MAX_INPUT_TOKENS,
+    max_workers: int = DEFAULT_MAP_REDUCE_CONCURRENCY,
+) -> str:
+    """
+    Answers a question over a document too large for one prompt.
+
+    The document is split into chunks that fit the token budget (map), the prompt
+    built by build_prompt(chunk) is answered for each chunk concurrently, and the
+    partial answers are merged with a combine call (reduce).
+
+    Args:
+        llm_interface: Interface used for all calls.
+        question: The question, passed to the combine step.
+        document: The oversized document content.
+        build_prompt: Formats the per-chunk prompt from a chunk of the document.
+        model_name: Model name used for token estimates.
+        max_input_tokens: Prompt token limit for every call.
+        max_workers: Maximum number of chunk prompts answered at the same time.
+
+    Returns:
+        The combined answer.
+
+    Raises:
+        ContextLengthError: If the prompt leaves no room for document content, or the
+                            partial answers cannot be combined within max_input_tokens.
+        RuntimeError: If every chunk call fails.
+    """
+    overhead = estimate_token_count(build_prompt(""), model_name=model_name)
+    chunk_budget = max_input_tokens - overhead - MAP_REDUCE_CHUNK_MARGIN
+    if overhead == -1 or chunk_budget <= 0:
+        raise ContextLengthError(
+            f"Prompt without document content leaves no room within {max_input_tokens} tokens for map-reduce."
+        )
+
+    chunks = chunk_text(document, max_tokens=chunk_budget, model_name=model_name)
+    logger.info(f"Map-reduce: answering over {len(chunks)} chunks of up to {chunk_budget} tokens.")
+
+    def answer_chunk(chunk: str) -> str:
+        prompt = build_prompt(chunk)
+        estimated_tokens = estimate_token_count(prompt, model_name=model_name)
+        # Only the combined answer is streamed to the caller
+        with stream_deltas(None):
+            return llm_interface.generate_chat_response(
+                [{"role": "user", "content": prompt}], estimated_prompt_tokens=estimated_tokens
+            )
+
+    partial_answers: List[Optional[str]] = [None] * len(chunks)
+    for index, result, error in run_concurrently(answer_chunk, [(c,) for c in chunks], max_workers=max_workers):
+        if error is not None:
+            logger.warning(f"Map-reduce: chunk {index + 1}/{len(chunks)} failed: {error}")
+        elif result:
+            partial_answers[index] = result.strip()
+
+    answers = [a for a in partial_answers if a]
+    if not answers:
+        raise RuntimeError("Map-reduce: no chunk of the document could be answered.")
+    if len(answers) == 1:
+        return answers[0]
+    return _combine_partial_answers(llm_interface, question, answers, model_name, max_input_tokens)
+
+
+def _combine_partial_answers(
+    llm_interface: LLMInterface, question: str, answers: List[str], model_name: str, max_input_tokens: int
+) -> str:
+    """
+    Merges partial answers with one combine call, first in halves if they don't fit one prompt.
+
+    Raises:
+        ContextLengthError: If two (or one) partial answers still exceed max_input_tokens,
+                            so halving cannot make the prompt fit.
+    """
+    partial_answers = "\n\n".join(f"Part {i}:\n{answer}" for i, answer in enumerate(answers, 1))
+    prompt = MAP_REDUCE_COMBINE_PROMPT_TEMPLATE.format(question=question, partial_answers=partial_answers)
+    estimated_tokens = estimate_token_count(prompt, model_name=model_name)
+    if estimated_tokens > max_input_tokens:
+        if len(answers) <= 2:
+            raise ContextLengthError(
+                f"Map-reduce: combine prompt with {len(answers)} partial answer(s) has {estimated_tokens} tokens, "
+                f"exceeding the limit of {max_input_tokens}."
+            )
+        middle = len(answers) // 2
+        answers = [
+            _combine_partial_answers(llm_interface, question, answers[:middle], model_name, max_input_tokens),
+            _combine_partial_answers(llm_interface, question, answers[middle:], model_name, max_input_tokens),
+        ]
+        return _combine_partial_answers(llm_interface, question, answers, model_name, max_input_tokens)
+
+    response = llm_interface.generate_chat_response(
+        [{"role": "user", "content": prompt}], estimated_prompt_tokens=estimated_tokens
+    )
+    if not response or not isinstance(response, str):
+        raise ValueError("Received invalid response from the language model.")
+    return response.strip()
+
+
 # --- Core Agent Logic --- #
 class ReportQAAgent:
-    def __init__(self, llm_config: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        llm_config: Optional[Dict[str, Any]] = None,
+        retrieval_top_k: Optional[int] = None,
+        retrieval_token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+        map_reduce: bool = False,
+        map_reduce_concurrency: int = DEFAULT_MAP_REDUCE_CONCURRENCY,
+        document_store: Optional[DocumentStore] = None,
+        llm_interface: Optional[LLMInterface] = None,
+    ):
         """
         Initializes the ReportQAAgent.
 
         Args:
             llm_config: **Deprecated/Ignored**. Configuration is handled by LLMInterface itself.
                         Kept for potential future use but currently ignored.
+            retrieval_top_k: If set, only the top-k report passages most relevant to the
+                             query (BM25) are sent instead of the whole report.
+            retrieval_token_budget: Maximum tokens of report passages sent in retrieval mode.
+            map_reduce: If True, reports exceeding MAX_INPUT_TOKENS are answered chunk by chunk
+                        and combined (see map_reduce_answer) instead of being rejected.
+            map_reduce_concurrency: Maximum number of chunks answered at the same time.
+            document_store: Shared cache used by ask_question to load reports; reports are
+                            read from disk on every call if omitted.
+            llm_interface: Shared LLM interface. If omitted, the process-wide interface for
+                           MODEL_NAME is used (see get_llm_interface), so agents never each
+                           build their own client.
         """
-        # Initialize the LLM interface, specifying the model key.
+        self.retrieval_top_k = retrieval_top_k
+        self.retrieval_token_budget = retrieval_token_budget
+        self.map_reduce = map_reduce
+        self.map_reduce_concurrency = map_reduce_concurrency
+        self.document_store = document_store
+        if llm_interface is not None:
+            self.llm_interface = llm_interface
+            logger.info(f"ReportQAAgent initialized using shared LLMInterface for model: {MODEL_NAME}")
+            return
         # LLMInterface is expected to handle loading config (API keys, proxy) internally.
         try:
-            self.llm_interface = LLMInterface(model_key=MODEL_NAME)
+            self.llm_interface = get_llm_interface(MODEL_NAME)
             logger.info(f"ReportQAAgent initialized for model: {MODEL_NAME}")
         except Exception as e:
              logger.error(f"Failed to initialize LLMInterface for model {MODEL_NAME}: {e}", exc_info=True)
@@ -50,17 +196,36 @@ class ReportQAAgent:
         Internal helper: format prompt, check tokens, call LLM.
         Raises ContextLengthError, RuntimeError.
         """
-        # 1. Format the Prompt
+        # 1. Format the Prompt (with only the relevant passages in retrieval mode)
+        report_content = self._select_context(query, report_content)
         prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
 
         # 2. Estimate Token Count and Check Limit
-        estimated_tokens = estimate_token_count(prompt, model_name=MODEL_NAME)
+        # Report and template token counts are memoized; only the query is encoded per call
+        estimated_tokens = estimate_prompt_tokens(
+            ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query
+        )
         if estimated_tokens == -1:
             # This indicates an error in the estimation function itself
             logger.error("Token estimation failed. Cannot proceed.")
             raise ValueError("Token estimation failed.") # Raise error, don't return string
         
         logger.info(f"Estimated prompt token count for query: {estimated_tokens}")
+        if estimated_tokens > MAX_INPUT_TOKENS and self.map_reduce:
+            logger.info("Report exceeds the input limit; answering with map-reduce.")
+            try:
+                return map_reduce_answer(
+                    self.llm_interface,
+                    query,
+                    report_content,
+                    lambda chunk: ANSWER_PROMPT_TEMPLATE.format(report_content=chunk, user_query=query),
+                    max_workers=self.map_reduce_concurrency,
+                )
+            except ContextLengthError:
+                raise
+            except Exception as e:
+                logger.error(f"Error during map-reduce answering: {e}", exc_info=True)
+                raise RuntimeError(f"Error getting response from language model: {e}")
         if estimated_tokens > MAX_INPUT_TOKENS:
             error_msg = (
                 f"Input (report + query) exceeds the maximum allowed tokens "
@@ -73,7 +238,9 @@ class ReportQAAgent:
         try:
             logger.info("Sending request to LLM...")
             messages = [{"role": "user", "content": prompt}]
-            llm_response = self.llm_interface.generate_chat_response(messages)
+            llm_response = self.llm_interface.generate_chat_response(
+                messages, estimated_prompt_tokens=estimated_tokens
+            )
             
             if not llm_response or not isinstance(llm_response, str):
                  logger.error(f"Received invalid response from LLM: {llm_response}")
@@ -89,6 +256,22 @@ class ReportQAAgent:
             # Re-raise as a runtime error for the caller
             raise RuntimeError(f"Error getting response from language model: {e}")
 
+    def _select_context(self, query: str, report_content: str) -> str:
+        """Returns the report passages relevant to query in retrieval mode, else the full report."""
+        if not self.retrieval_top_k:
+            return report_content
+        passages = select_passages(
+            report_content,
+            query,
+            top_k=self.retrieval_top_k,
+            token_budget=self.retrieval_token_budget,
+            model_name=MODEL_NAME,
+        )
+        if passages is None:
+            logger.info("No report passage matched the query; sending the full report.")
+            return report_content
+        return passages
+
     def ask_with_content(self, query: str, report_content: str) -> str:
         """
         Asks a question using pre-loaded report content.
@@ -99,27 +282,29 @@ class ReportQAAgent:
             report_content: The full text content of the report.
 
         Returns:
-            The answer string from the LLM or a user-friendly error message.
+            The answer string from the LLM or a user-friendly error message
+            (an AgentErrorResponse).
         """
         if not report_content:
-            return "Error: Report content is empty."
+            return AgentErrorResponse("Error: Report content is empty.")
         if not query:
-            return "Error: Query cannot be empty."
+            return AgentErrorResponse("Error: Query cannot be empty.")
             
         try:
             # Call the internal processing method
             return self._process_query_with_content(query, report_content)
         except ContextLengthError as e:
             # Return the specific context error message
-            return str(e) 
+            return AgentErrorResponse(str(e))
         except (RuntimeError, ValueError) as e:
             # Return other processing/LLM errors as strings
-            return str(e)
+            return AgentErrorResponse(str(e))
         except Exception as e:
             # Catch any other unexpected errors
             logger.error(f"Unexpected error in ask_with_content: {e}", exc_info=True)
-            return f"Error: An unexpected error occurred processing the query: {e}"
+            return AgentErrorResponse(f"Error: An unexpected error occurred processing the query: {e}")
 
+    @traced(category="agent")
     def ask_question(self, query: str, report_path: str) -> str:
         """
         Reads a report file and asks a question using its content.
@@ -130,7 +315,8 @@ class ReportQAAgent:
             report_path: The path to the report file (.txt, .md).
 
         Returns:
-            The answer string from the LLM or a user-friendly error message.
+            The answer string from the LLM or a user-friendly error message
+            (an AgentErrorResponse).
 
         Raises:
             FileNotFoundError: If the report_path does not exist.
@@ -140,7 +326,10 @@ class ReportQAAgent:
         logger.info(f"Processing query for report file: {report_path}")
         report_content = ""
         try:
-            report_content = read_text_file(report_path)
+            if self.document_store is not None:
+                report_content = self.document_store.get(report_path)
+            else:
+                report_content = read_text_file(report_path)
             if not report_content:
                 logger.error(f"Report file is empty: {report_path}")
                 raise ValueError(f"Report file is empty: {report_path}")
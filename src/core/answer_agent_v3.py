@@ -5,11 +5,16 @@ from typing import List, Tuple, Optional, Dict, Any
 # Assuming these are needed and accessible
 from .llm_interface import LLMInterface
 # Import both V3 and V2 templates
-from .prompts import DEBATE_PARTICIPATION_PROMPT_TEMPLATE, ANSWER_PROMPT_TEMPLATE 
-from src.utils.token_utils import estimate_token_count
+from .prompts import DEBATE_PARTICIPATION_PROMPT_TEMPLATE, ANSWER_PROMPT_TEMPLATE
+from src.utils.token_utils import estimate_prompt_tokens
 from src.utils.file_handler import read_text_file # Added for ask_question
+from src.utils.document_store import DocumentStore
+from src.utils.retrieval import DEFAULT_CONTEXT_TOKEN_BUDGET, select_passages
+from src.utils.tracing import set_span_attributes, traced
 # Import constants/errors - potentially define V3 specific ones later
-from .answer_agent import ContextLengthError, MAX_INPUT_TOKENS, MODEL_NAME 
+from .answer_agent import (
+    AgentErrorResponse, ContextLengthError, MAX_INPUT_TOKENS, MODEL_NAME, DEFAULT_MAP_REDUCE_CONCURRENCY, map_reduce_answer,
+)
 
 logger = logging.getLogger(__name__)
 # Basic config if running standalone, but relies on main app config
@@ -18,16 +23,44 @@ logger = logging.getLogger(__name__)
 # TODO: Define V3 specific context limits if different from V2/answer_agent
 MAX_INPUT_TOKENS_V3 = MAX_INPUT_TOKENS 
 
+# Speaker name of the rolling summary entry that stands in for older rounds
+# when the orchestrator compresses the debate history
+DEBATE_SUMMARY_SPEAKER = "Debate Summary"
+
 class AnswerAgentV3:
     """
     Answer Agent capable of participating in multi-round debates (V3).
     Uses debate history and its own document context to formulate responses.
     """
 
-    def __init__(self, llm_interface: LLMInterface):
+    def __init__(
+        self,
+        llm_interface: LLMInterface,
+        retrieval_top_k: Optional[int] = None,
+        retrieval_token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+        map_reduce: bool = False,
+        map_reduce_concurrency: int = DEFAULT_MAP_REDUCE_CONCURRENCY,
+        document_store: Optional[DocumentStore] = None,
+    ):
         """
         Initializes the AnswerAgentV3 with a shared LLMInterface.
+
+        Args:
+            llm_interface: The shared LLM interface.
+            retrieval_top_k: If set, only the top-k document passages most relevant to the
+                             question (BM25) are sent instead of the whole document.
+            retrieval_token_budget: Maximum tokens of document passages sent in retrieval mode.
+            map_reduce: If True, documents that push a prompt over the input limit are processed
+                        chunk by chunk and combined (see map_reduce_answer) instead of being rejected.
+            map_reduce_concurrency: Maximum number of chunks processed at the same time.
+            document_store: Shared cache used by ask_question to load reports; reports are
+                            read from disk on every call if omitted.
         """
+        self.retrieval_top_k = retrieval_top_k
+        self.retrieval_token_budget = retrieval_token_budget
+        self.map_reduce = map_reduce
+        self.map_reduce_concurrency = map_reduce_concurrency
+        self.document_store = document_store
         try:
             self.llm = llm_interface
             # Log the model name from the passed interface
@@ -43,9 +76,48 @@ class AnswerAgentV3:
         
         formatted_history = ""
         for agent_name, round_num, response in debate_history:
+            if agent_name == DEBATE_SUMMARY_SPEAKER:
+                # Summary entries carry the last round they cover
+                formatted_history += f"Summary of Rounds 0-{round_num}:\n{response}\n---\n"
+                continue
             formatted_history += f"Round {round_num} - {agent_name}:\n{response}\n---\n"
         return formatted_history.strip()
 
+    def _select_context(self, query: str, document_content: str) -> str:
+        """Returns the document passages relevant to query in retrieval mode, else the full document."""
+        if not self.retrieval_top_k:
+            return document_content
+        passages = select_passages(
+            document_content,
+            query,
+            top_k=self.retrieval_top_k,
+            token_budget=self.retrieval_token_budget,
+            model_name=self.llm.model_name,
+        )
+        if passages is None:
+            logger.info("No document passage matched the question; sending the full document.")
+            return document_content
+        return passages
+
+    def _map_reduce(self, question: str, document_content: str, build_prompt, max_input_tokens: int) -> str:
+        """Runs map_reduce_answer with this agent's settings, wrapping LLM failures in RuntimeError."""
+        try:
+            return map_reduce_answer(
+                self.llm,
+                question,
+                document_content,
+                build_prompt,
+                model_name=self.llm.model_name,
+                max_input_tokens=max_input_tokens,
+                max_workers=self.map_reduce_concurrency,
+            )
+        except ContextLengthError:
+            raise
+        except Exception as e:
+            logger.error(f"Error during map-reduce answering: {e}", exc_info=True)
+            raise RuntimeError(f"Error generating map-reduce response via LLM: {e}")
+
+    @traced(category="agent")
     def participate_in_debate(
         self, 
         question: str, 
@@ -72,6 +144,7 @@ class AnswerAgentV3:
             RuntimeError: For LLM communication errors.
         """
         logger.info(f"Agent participating in debate round {current_round} for question: {question[:50]}...")
+        set_span_attributes(round=current_round)
         
         if not document_content:
              logger.error("Document content cannot be empty for debate participation.")
@@ -84,21 +157,36 @@ class AnswerAgentV3:
         history_str = self._format_debate_history(debate_history)
 
         # 2. Format Prompt
-        prompt = DEBATE_PARTICIPATION_PROMPT_TEMPLATE.format(
-            question=question,
-            document_context=document_content, # Ensure this is passed correctly
-            debate_history=history_str,
-            current_round=current_round
-        )
+        document_context = self._select_context(question, document_content)
+
+        def prompt_fields(context: str) -> Dict[str, Any]:
+            return dict(
+                question=question,
+                document_context=context,
+                debate_history=history_str,
+                current_round=current_round
+            )
+
+        def build_prompt(context: str) -> str:
+            return DEBATE_PARTICIPATION_PROMPT_TEMPLATE.format(**prompt_fields(context))
+
+        prompt = build_prompt(document_context)
 
         # 3. Estimate Tokens & Check Limit (using V3 constant)
-        estimated_tokens = estimate_token_count(prompt, model_name=self.llm.model_name)
+        # Document and template token counts are memoized; only question and history are encoded
+        estimated_tokens = estimate_prompt_tokens(
+            DEBATE_PARTICIPATION_PROMPT_TEMPLATE, model_name=self.llm.model_name, **prompt_fields(document_context)
+        )
         if estimated_tokens == -1:
             logger.error("Token estimation failed for debate participation prompt.")
             raise ValueError("Token estimation failed.")
 
         logger.info(f"Estimated prompt token count for debate round {current_round}: {estimated_tokens}")
-        
+
+        if estimated_tokens > MAX_INPUT_TOKENS_V3 and self.map_reduce:
+            logger.info(f"Debate prompt exceeds the input limit; using map-reduce for round {current_round}.")
+            return self._map_reduce(question, document_context, build_prompt, MAX_INPUT_TOKENS_V3)
+
         if estimated_tokens > MAX_INPUT_TOKENS_V3:
             error_msg = (
                 f"Input context ({estimated_tokens} tokens) exceeds the maximum allowed tokens "
@@ -112,7 +200,7 @@ class AnswerAgentV3:
             logger.debug("Sending request to LLM for debate participation...")
             # Using generate_response as it's a single completion based on the prompt
             # If chat format is preferred, structure messages appropriately
-            llm_response = self.llm.generate_response(prompt=prompt)
+            llm_response = self.llm.generate_response(prompt=prompt, estimated_prompt_tokens=estimated_tokens)
 
             if not llm_response or not isinstance(llm_response, str):
                  logger.error(f"Received invalid response from LLM during debate: {llm_response}")
@@ -133,16 +221,27 @@ class AnswerAgentV3:
         Internal helper: format prompt, check tokens, call LLM (for initial answer).
         Raises ContextLengthError, RuntimeError.
         """
-        # 1. Format the Prompt (Use V2/Standard Answer Prompt)
+        # 1. Format the Prompt (Use V2/Standard Answer Prompt; relevant passages only in retrieval mode)
+        report_content = self._select_context(query, report_content)
         prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
 
         # 2. Estimate Token Count and Check Limit (Use standard limits for initial answer)
-        estimated_tokens = estimate_token_count(prompt, model_name=self.llm.model_name)
+        estimated_tokens = estimate_prompt_tokens(
+            ANSWER_PROMPT_TEMPLATE, model_name=self.llm.model_name, report_content=report_content, user_query=query
+        )
         if estimated_tokens == -1:
             logger.error("Token estimation failed for initial query. Cannot proceed.")
             raise ValueError("Token estimation failed.")
         
         logger.info(f"Estimated prompt token count for initial query: {estimated_tokens}")
+        if estimated_tokens > MAX_INPUT_TOKENS and self.map_reduce:
+            logger.info("Report exceeds the input limit; answering the initial query with map-reduce.")
+            return self._map_reduce(
+                query,
+                report_content,
+                lambda chunk: ANSWER_PROMPT_TEMPLATE.format(report_content=chunk, user_query=query),
+                MAX_INPUT_TOKENS,
+            )
         if estimated_tokens > MAX_INPUT_TOKENS:
             error_msg = (
                 f"Input (report + query) exceeds the maximum allowed tokens "
@@ -156,7 +255,7 @@ class AnswerAgentV3:
             logger.info("Sending request to LLM for initial answer...")
             # Assuming chat response is appropriate based on original agent
             messages = [{"role": "user", "content": prompt}]
-            llm_response = self.llm.generate_chat_response(messages)
+            llm_response = self.llm.generate_chat_response(messages, estimated_prompt_tokens=estimated_tokens)
             
             if not llm_response or not isinstance(llm_response, str):
                  logger.error(f"Received invalid initial response from LLM: {llm_response}")
@@ -172,30 +271,32 @@ class AnswerAgentV3:
     def ask_with_content(self, query: str, report_content: str) -> str:
         """
         Asks a question using pre-loaded report content (for initial answer).
-        Handles exceptions from _process_query_with_content and returns error strings.
+        Handles exceptions from _process_query_with_content and returns error strings
+        (as AgentErrorResponse).
         (Copied from ReportQAAgent)
         """
         if not report_content:
              logger.warning("Attempted to ask initial question with empty report content.")
              # Return error string consistent with original implementation
-             return "Error: Report content is empty."
+             return AgentErrorResponse("Error: Report content is empty.")
         if not query:
              logger.warning("Attempted to ask initial question with empty query.")
-             return "Error: Query cannot be empty."
+             return AgentErrorResponse("Error: Query cannot be empty.")
             
         try:
             # Call the internal processing method
             return self._process_query_with_content(query, report_content)
         except ContextLengthError as e:
             logger.warning(f"Context length error during initial answer generation: {e}")
-            return str(e) # Return the specific context error message
+            return AgentErrorResponse(str(e)) # Return the specific context error message
         except (RuntimeError, ValueError) as e:
             logger.error(f"Runtime/Value error during initial answer generation: {e}")
-            return str(e) # Return other processing/LLM errors as strings
+            return AgentErrorResponse(str(e)) # Return other processing/LLM errors as strings
         except Exception as e:
             logger.error(f"Unexpected error in ask_with_content: {e}", exc_info=True)
-            return f"Error: An unexpected error occurred processing the initial query: {e}"
+            return AgentErrorResponse(f"Error: An unexpected error occurred processing the initial query: {e}")
 
+    @traced(category="agent")
     def ask_question(self, query: str, report_path: str) -> str:
         """
         Reads a report file and asks a question using its content (for initial answer).
@@ -205,7 +306,10 @@ class AnswerAgentV3:
         logger.info(f"Processing initial query for report file: {report_path}")
         report_content = ""
         try:
-            report_content = read_text_file(report_path)
+            if self.document_store is not None:
+                report_content = self.document_store.get(report_path)
+            else:
+                report_content = read_text_file(report_path)
             if not report_content:
                 logger.error(f"Report file for initial answer is empty: {report_path}")
                 # Raise error consistent with original implementation
@@ -0,0 +1,199 @@
+"""
+Batch orchestration: runs many debate jobs (one question document and its answer
+documents each) on a worker pool.
+
+Jobs come from a manifest file or from a directory of reports. Every job writes
+its own result file into the batch output directory, and a summary of all jobs
+(status, questions answered, errors, duration) is written at the end. The LLM
+budget is shared simply by handing every job the same LLMInterface: its
+max_concurrent_requests semaphore and the per-model rate limiter then apply to
+the whole batch rather than to each job.
+"""
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.utils.concurrency import run_concurrently
+from src.utils.file_handler import list_files_in_directory
+from src.utils.streaming import PartialMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_EXTENSIONS = [".md", ".txt"]
+SUMMARY_FILE_NAME = "batch_summary.json"
+
+JOB_STATUS_OK = "ok"
+JOB_STATUS_PARTIAL = "partial"
+JOB_STATUS_FAILED = "failed"
+
+
+class BatchJob(NamedTuple):
+    """One debate run: a question document, its answer documents and the job's result file."""
+    name: str
+    question_doc: str
+    answer_docs: List[str]
+    output_path: str
+
+
+class JobResult(NamedTuple):
+    """Outcome of one batch job, as written to the batch summary."""
+    name: str
+    status: str
+    output_path: str
+    questions_answered: int
+    errors: List[str]
+    seconds: float
+
+
+def _job_name(path: str) -> str:
+    """File-name-safe job name derived from a document path."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"[^\w.-]+", "_", stem) or "job"
+
+
+def _unique_names(names: List[str]) -> List[str]:
+    """Suffixes duplicate job names with -2, -3, ... so result files don't collide."""
+    seen: Dict[str, int] = {}
+    unique = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append(name if seen[name] == 1 else f"{name}-{seen[name]}")
+    return unique
+
+
+def load_manifest(manifest_path: str, output_dir: str) -> List[BatchJob]:
+    """
+    Loads jobs from a JSON manifest: a list of objects with "question_doc", "answer_docs"
+    (list of paths) and an optional "name". Relative paths are resolved against the
+    manifest's directory.
+
+    Raises:
+        FileNotFoundError: If the manifest does not exist.
+        ValueError: If the manifest is malformed.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        try:
+            entries = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Manifest {manifest_path} is not valid JSON: {e}")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Manifest {manifest_path} must contain a non-empty list of jobs.")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    resolve = lambda path: path if os.path.isabs(path) else os.path.join(base_dir, path)
+    parsed: List[Tuple[str, str, List[str]]] = []
+    for idx, entry in enumerate(entries):
+        if not isinstance(entry, dict) or "question_doc" not in entry:
+            raise ValueError(f"Manifest job {idx + 1} must be an object with a 'question_doc'.")
+        answer_docs = entry.get("answer_docs")
+        if not isinstance(answer_docs, list) or not answer_docs:
+            raise ValueError(f"Manifest job {idx + 1} must list at least one path in 'answer_docs'.")
+        question_doc = resolve(entry["question_doc"])
+        name = _job_name(entry.get("name") or question_doc)
+        parsed.append((name, question_doc, [resolve(p) for p in answer_docs]))
+
+    names = _unique_names([name for name, _, _ in parsed])
+    return [
+        BatchJob(name, question_doc, answer_docs, os.path.join(output_dir, f"{name}.md"))
+        for name, (_, question_doc, answer_docs) in zip(names, parsed)
+    ]
+
+
+def jobs_from_directory(
+    directory: str,
+    output_dir: str,
+    answer_docs: Optional[List[str]] = None,
+    allowed_extensions: Optional[List[str]] = None,
+) -> List[BatchJob]:
+    """
+    Creates one job per report in directory. Each report is the job's question document;
+    its answer documents are answer_docs, or the report itself if none are given.
+    """
+    extensions = allowed_extensions or DEFAULT_REPORT_EXTENSIONS
+    reports = sorted(list_files_in_directory(directory, extensions))
+    names = _unique_names([_job_name(path) for path in reports])
+    return [
+        BatchJob(name, path, list(answer_docs) if answer_docs else [path], os.path.join(output_dir, f"{name}.md"))
+        for name, path in zip(names, reports)
+    ]
+
+
+def _run_job(job: BatchJob, run_job: Callable[[BatchJob], Iterator[Tuple[str, Any]]]) -> JobResult:
+    """
+    Consumes one job's orchestrator events. A question counts as answered for every
+    complete Synthesizer message; System messages starting with "Error" are collected.
+    """
+    start = time.perf_counter()
+    answered = 0
+    errors: List[str] = []
+    try:
+        for speaker, message in run_job(job):
+            if isinstance(message, PartialMessage):
+                continue
+            if speaker == "Synthesizer":
+                answered += 1
+            elif speaker == "System" and str(message).startswith("Error"):
+                errors.append(str(message))
+    except Exception as e:
+        logger.error(f"Batch job {job.name} failed: {e}", exc_info=True)
+        errors.append(f"Error: job failed: {e}")
+        status = JOB_STATUS_FAILED
+    else:
+        if answered == 0:
+            status = JOB_STATUS_FAILED
+        else:
+            status = JOB_STATUS_PARTIAL if errors else JOB_STATUS_OK
+    seconds = time.perf_counter() - start
+    logger.info(f"Batch job {job.name}: {status}, {answered} questions answered in {seconds:.1f}s")
+    return JobResult(job.name, status, job.output_path, answered, errors, seconds)
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    run_job: Callable[[BatchJob], Iterator[Tuple[str, Any]]],
+    max_workers: int = 4,
+) -> Iterator[JobResult]:
+    """
+    Runs jobs on a thread pool and yields each JobResult as the job finishes.
+
+    Args:
+        jobs: The jobs to run.
+        run_job: Builds and runs the orchestrator for a job, returning its (speaker, message)
+                 event generator. It is called from worker threads.
+        max_workers: Number of jobs run at the same time.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    for idx, result, error in run_concurrently(
+        _run_job, [(job, run_job) for job in jobs], max_workers=max_workers
+    ):
+        if error is not None:
+            # _run_job handles its own errors; this is a safety net
+            job = jobs[idx]
+            result = JobResult(job.name, JOB_STATUS_FAILED, job.output_path, 0, [f"Error: job failed: {error}"], 0.0)
+        yield result
+
+
+def write_summary(results: List[JobResult], output_dir: str, seconds: float) -> str:
+    """
+    Writes the batch summary (totals plus one entry per job, in job order) as JSON.
+
+    Returns:
+        The path of the summary file.
+    """
+    counts = {status: sum(1 for r in results if r.status == status)
+              for status in (JOB_STATUS_OK, JOB_STATUS_PARTIAL, JOB_STATUS_FAILED)}
+    summary = {
+        "jobs": len(results),
+        **counts,
+        "questions_answered": sum(r.questions_answered for r in results),
+        "seconds": round(seconds, 3),
+        "results": [dict(r._asdict(), seconds=round(r.seconds, 3)) for r in results],
+    }
+    path = os.path.join(output_dir, SUMMARY_FILE_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return path
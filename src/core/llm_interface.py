@@ -1,8 +1,12 @@
 import os
 import sys
 import json
-from typing import Dict, List, Optional, Any, Union
-from openai import OpenAI
+import threading
+import asyncio
+import time
+from typing import Dict, List, Optional, Any, Union, Tuple, Iterator, Sequence
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv  # Import load_dotenv
 
 # Add the project root to the Python path if needed
@@ -13,10 +17,87 @@ if project_root not in sys.path:
 
 # Import ModelManager from project root
 from model_manager import ModelManager
+from src.utils.response_cache import ResponseCache, make_cache_key
+from src.utils.rate_limiter import get_rate_limiter
+from src.utils.token_utils import estimate_token_counts
+from src.utils.retry import DeadlineExceededError, RetryPolicy, call_with_retry, async_call_with_retry
+from src.utils.streaming import get_delta_callback
+from src.utils.fake_llm import FAKE_PROVIDER, AsyncFakeOpenAIClient, FakeOpenAIClient, get_fake_backend
+from src.utils.llm_metrics import CallTimer, MetricsCallback, emit_metrics, estimate_cost
+from src.utils.tracing import set_span_attributes, traced
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Default connection pool settings for the shared HTTP clients
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0 # seconds an idle connection is kept open
+
+# Process-wide HTTP clients, keyed by pool limits and proxy so that every
+# LLMInterface (and every agent using one) reuses the same TCP/TLS connections.
+_shared_http_clients: Dict[Tuple, httpx.Client] = {}
+_shared_async_http_clients: Dict[Tuple, httpx.AsyncClient] = {}
+_shared_http_clients_lock = threading.Lock()
+
+
+def _pool_key(max_connections: int, max_keepalive_connections: int, keepalive_expiry: float) -> Tuple:
+    # Proxy env vars are read when an httpx client is created, so they are part of the key
+    return (max_connections, max_keepalive_connections, keepalive_expiry,
+            os.environ.get("HTTP_PROXY"), os.environ.get("HTTPS_PROXY"))
+
+
+def get_shared_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+) -> httpx.Client:
+    """
+    Returns the process-wide pooled HTTP client for the given limits, creating it once.
+
+    Args:
+        max_connections: Maximum number of concurrent connections in the pool.
+        max_keepalive_connections: Maximum number of idle connections kept alive.
+        keepalive_expiry: Seconds an idle keep-alive connection stays open.
+    """
+    key = _pool_key(max_connections, max_keepalive_connections, keepalive_expiry)
+    with _shared_http_clients_lock:
+        client = _shared_http_clients.get(key)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            )
+            client = httpx.Client(limits=limits, follow_redirects=True)
+            _shared_http_clients[key] = client
+        return client
+
+
+def get_shared_async_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+) -> httpx.AsyncClient:
+    """
+    Async counterpart of get_shared_http_client.
+
+    Note: an httpx.AsyncClient's pool is tied to the event loop it is used on,
+    so share it between coroutines running on the same loop.
+    """
+    key = _pool_key(max_connections, max_keepalive_connections, keepalive_expiry)
+    with _shared_http_clients_lock:
+        client = _shared_async_http_clients.get(key)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            )
+            client = httpx.AsyncClient(limits=limits, follow_redirects=True)
+            _shared_async_http_clients[key] = client
+        return client
+
 class LLMInterface:
     """
     Interface for interacting with LLMs, specifically configured for OpenAI models
@@ -31,6 +112,18 @@ class LLMInterface:
     - Converts system messages to user messages for models that don't support system roles
     - Handles temperature restrictions for models with fixed temperature requirements
     - Provides a consistent API across different OpenAI models
+    - Sends requests over a process-wide pooled HTTP client (keep-alive connection reuse)
+    - Optionally caps the number of in-flight requests shared by all callers of an instance
+    - Optionally serves repeated requests from a persistent on-disk response cache
+    - Applies client-side RPM/TPM rate limits configured per model ("rpm"/"tpm" in config.json)
+    - Retries transient failures (timeouts, connection errors, 429, 5xx) with exponential
+      backoff and jitter, honouring Retry-After, within an optional per-call deadline
+    - Streams completions as text deltas (generate_chat_response_stream)
+    - Serves "fake_llm" models from config.json with the deterministic offline backend
+      in src.utils.fake_llm (for benchmarks and load tests)
+    - Reports per-call metrics (caller, queue wait, time to first byte, latency, tokens,
+      estimated cost) to pluggable callbacks (see src.utils.llm_metrics)
+    - Traces every chat call as a span when tracing is on (see src.utils.tracing)
     """
     
     # OpenAI proxy configuration (used if USE_LLM_PROXY is True)
@@ -43,14 +136,37 @@ class LLMInterface:
     MODELS_WITHOUT_SYSTEM_ROLE = ["o1-mini", "gpt-o1-mini"]
     MODELS_WITH_FIXED_TEMPERATURE = ["o1-mini", "gpt-o1-mini", "o3-mini", "gpt-o3-mini"]
     
-    def __init__(self, config_path: Optional[str] = None, model_key: str = "gpt-o1-mini"):
+    def __init__(self, config_path: Optional[str] = None, model_key: str = "gpt-o1-mini",
+                 max_concurrent_requests: Optional[int] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+                 response_cache: Optional[ResponseCache] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 metrics_callbacks: Optional[Sequence[MetricsCallback]] = None):
         """
         Initialize the LLM interface with specified configuration and conditional proxy.
         
         Args:
             config_path: Path to the config.json file, if None will use default location
             model_key: The model key to use from config.json (default: "gpt-o1-mini")
+            max_concurrent_requests: Optional global cap on simultaneous API calls made through
+                                     this instance (e.g. by concurrent agents). None means no cap.
+            max_connections: Connection limit of the shared HTTP pool.
+            max_keepalive_connections: Idle keep-alive connection limit of the shared HTTP pool.
+            keepalive_expiry: Seconds an idle keep-alive connection stays open.
+            response_cache: Optional ResponseCache. When set, identical requests (same model,
+                            normalized messages, temperature and max_tokens) are answered
+                            from the cache instead of calling the API.
+            retry_policy: Retry/backoff/deadline settings for API calls. Defaults to
+                          RetryPolicy() (3 retries, no deadline).
+            metrics_callbacks: Callables receiving an LLMCallMetrics record after every call
+                               (e.g. a src.utils.llm_metrics.MetricsAggregator). Calls are
+                               only timed when at least one callback is set.
         """
+        if max_concurrent_requests is not None and max_concurrent_requests < 1:
+            raise ValueError("max_concurrent_requests must be at least 1 when set.")
+
         # Initialize ModelManager to access configuration
         self.model_manager = ModelManager(config_path)
         
@@ -62,8 +178,9 @@ class LLMInterface:
             available_models = list(self.model_manager.available_models.keys())
             raise ValueError(f"Model '{model_key}' not found in configuration. Available models: {available_models}")
             
-        # Verify this is an OpenAI model
-        if self.current_model_config.get("provider") != "openai":
+        # Verify this is an OpenAI model (or the OpenAI-compatible fake)
+        self.is_fake = self.current_model_config.get("provider") == FAKE_PROVIDER
+        if self.current_model_config.get("provider") != "openai" and not self.is_fake:
             raise ValueError(f"Model '{model_key}' is not an OpenAI model. Provider: {self.current_model_config.get('provider')}")
         
         # --- Conditional Proxy Setup ---
@@ -88,8 +205,14 @@ class LLMInterface:
             # self.client = OpenAI(api_key=self.current_model_config["api_key"]) # Initialize without proxy client
         # --- End Conditional Proxy Setup ---
 
-        # Initialize OpenAI client (will pick up env vars if set, otherwise direct connection)
-        self.client = OpenAI(api_key=self.current_model_config["api_key"])
+        # Initialize OpenAI client on the shared connection pool
+        # (the pool picks up proxy env vars if set, otherwise direct connection)
+        self.pool_limits = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+        }
+        self.client = self._create_client()
         
         # Get actual model name to use with the API
         self.model_name = self.current_model_config["config"]["name"]
@@ -99,8 +222,242 @@ class LLMInterface:
         self.supports_system_role = self.model_name not in self.MODELS_WITHOUT_SYSTEM_ROLE
         self.has_fixed_temperature = self.model_name in self.MODELS_WITH_FIXED_TEMPERATURE
 
+        # Shared limit on in-flight requests (None = unlimited)
+        self.max_concurrent_requests = max_concurrent_requests
+        self._request_semaphore = (
+            threading.BoundedSemaphore(max_concurrent_requests) if max_concurrent_requests else None
+        )
+
+        # Retries are handled by retry_policy (the SDK's own retries are disabled in _create_client)
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        # Opt-in persistent response cache (None = always call the API)
+        self.response_cache = response_cache
+
+        # Per-call metrics listeners (may be appended to after construction)
+        self.metrics_callbacks: List[MetricsCallback] = list(metrics_callbacks or [])
+
+        # Client-side rate limiting, shared by every interface using this model key
+        model_settings = self.current_model_config.get("config", {})
+        self.rate_limiter = get_rate_limiter(
+            self.current_model,
+            requests_per_minute=model_settings.get("rpm"),
+            tokens_per_minute=model_settings.get("tpm"),
+        )
+
+    def _create_client(self):
+        """ Creates the OpenAI client backed by the process-wide HTTP connection pool. """
+        if self.is_fake:
+            return FakeOpenAIClient(get_fake_backend(self.current_model, self.current_model_config["config"]))
+        return OpenAI(
+            api_key=self.current_model_config["api_key"],
+            http_client=get_shared_http_client(**self.pool_limits),
+            max_retries=0,
+        )
+
+    def _build_messages(self, prompt: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """ Builds the message list for a simple prompt, folding in the system prompt if needed. """
+        messages = []
+        
+        if system_prompt:
+            if self.supports_system_role:
+                messages.append({"role": "system", "content": system_prompt})
+            else:
+                # For models that don't support system roles, prepend to user message
+                prompt = f"[System instruction: {system_prompt}]\n\n{prompt}"
+        
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _build_request_params(self, messages: List[Dict[str, str]], 
+                              temperature: float = 0.7, 
+                              max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Adapts messages and parameters to the model's limitations:
+        - For models without system role support, system messages are converted to user messages
+        - For models with fixed temperature, the temperature parameter is omitted
+        """
+        # For models without system role support, convert system messages to user messages
+        if not self.supports_system_role:
+            converted_messages = []
+            system_instructions = []
+            
+            for msg in messages:
+                if msg["role"] == "system":
+                    system_instructions.append(msg["content"])
+                else:
+                    converted_messages.append(msg)
+            
+            # If there were system messages, prepend them to the first user message
+            if system_instructions and converted_messages:
+                for i, msg in enumerate(converted_messages):
+                    if msg["role"] == "user":
+                        system_text = "\n\n".join(system_instructions)
+                        converted_messages[i]["content"] = f"[System instructions: {system_text}]\n\n{msg['content']}"
+                        break
+            
+            messages = converted_messages
+        
+        # Prepare the request parameters
+        params: Dict[str, Any] = {
+            "model": self.model_name,
+            "messages": messages
+        }
+        
+        # Add temperature only for models that support it
+        if not self.has_fixed_temperature:
+            params["temperature"] = temperature
+        
+        # Add max_tokens if specified
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        
+        return params
+
+    def _estimate_prompt_tokens(self, params: Dict[str, Any], estimated_prompt_tokens: Optional[int]) -> int:
+        """ The caller's prompt token estimate, or one computed from the request messages. """
+        if estimated_prompt_tokens is not None and estimated_prompt_tokens >= 0:
+            return estimated_prompt_tokens
+        # Callers normally pass their own estimate; fall back to estimating here
+        counts = estimate_token_counts([msg["content"] for msg in params["messages"]], model_name=self.model_name)
+        return sum(max(count, 0) for count in counts)
+
+    def _reserved_tokens(self, params: Dict[str, Any], estimated_prompt_tokens: Optional[int]) -> int:
+        """ Tokens to reserve with the rate limiter: prompt estimate plus the completion cap. """
+        if self.rate_limiter is None or self.rate_limiter.tokens_per_minute is None:
+            return 0
+        return self._estimate_prompt_tokens(params, estimated_prompt_tokens) + (params.get("max_tokens") or 0)
+
+    def _record_usage(self, reserved_tokens: int, response: Any) -> None:
+        """ Settles a rate limiter reservation against the usage reported by the API. """
+        if not reserved_tokens:
+            return
+        usage = getattr(response, "usage", None)
+        actual_tokens = getattr(usage, "total_tokens", None)
+        if isinstance(actual_tokens, int):
+            self.rate_limiter.record_usage(reserved_tokens, actual_tokens)
+
+    def _stream_request_params(self, params: Dict[str, Any], reserved_tokens: int) -> Dict[str, Any]:
+        """ Request params for a streamed call; asks for a final usage chunk when a reservation needs settling. """
+        request_params = dict(params, stream=True)
+        if reserved_tokens:
+            request_params["stream_options"] = {"include_usage": True}
+        return request_params
+
+    def _record_stream_usage(self, reserved_tokens: int, params: Dict[str, Any],
+                             estimated_prompt_tokens: Optional[int], usage: Any, content: str) -> None:
+        """
+        Settles a streamed call's reservation against the usage chunk, or, if the stream
+        ended without one (provider without usage reporting, error or early close),
+        against estimates of the prompt and the text received so far.
+        """
+        if not reserved_tokens:
+            return
+        actual_tokens = getattr(usage, "total_tokens", None)
+        if not isinstance(actual_tokens, int):
+            actual_tokens = (self._estimate_prompt_tokens(params, estimated_prompt_tokens)
+                             + max(estimate_token_counts([content], model_name=self.model_name)[0], 0))
+        self.rate_limiter.record_usage(reserved_tokens, actual_tokens)
+
+    def _release_reservation(self, reserved_tokens: int) -> None:
+        """ Returns the tokens reserved for a failed attempt to the rate limiter. """
+        if reserved_tokens:
+            self.rate_limiter.record_usage(reserved_tokens, 0)
+
+    @staticmethod
+    def _deadline_at(timeout: Optional[float]) -> Optional[float]:
+        """ Converts an attempt's timeout into a time.monotonic() deadline (None = no deadline). """
+        return None if timeout is None else time.monotonic() + timeout
+
+    @staticmethod
+    def _time_left(deadline_at: Optional[float]) -> Optional[float]:
+        """ Seconds left before deadline_at; raises DeadlineExceededError once it has passed. """
+        if deadline_at is None:
+            return None
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError("LLM call deadline exceeded while waiting for rate limit budget "
+                                        "or a request slot.")
+        return remaining
+
+    def _acquire_rate_limit(self, reserved_tokens: int, deadline_at: Optional[float]) -> None:
+        """
+        Queues for rate limit budget, waiting no longer than deadline_at.
+
+        Raises:
+            DeadlineExceededError: if the deadline passed first (nothing is reserved then).
+        """
+        try:
+            self.rate_limiter.acquire(reserved_tokens, timeout=self._time_left(deadline_at))
+        except TimeoutError as e:
+            if isinstance(e, DeadlineExceededError):
+                raise
+            raise DeadlineExceededError("LLM call deadline exceeded while waiting for rate limit budget.") from e
+
+    def _acquire_request_slot(self, deadline_at: Optional[float]) -> Optional[float]:
+        """
+        Takes a max_concurrent_requests slot, waiting no longer than deadline_at.
+
+        The caller must release self._request_semaphore (if set) once the request is done.
+
+        Returns:
+            Seconds left for the request itself (None without a deadline).
+
+        Raises:
+            DeadlineExceededError: if the deadline passed before a slot was free.
+        """
+        semaphore = self._request_semaphore
+        if semaphore is not None and not semaphore.acquire(timeout=self._time_left(deadline_at)):
+            raise DeadlineExceededError("LLM call deadline exceeded while waiting for a request slot.")
+        try:
+            return self._time_left(deadline_at)
+        except DeadlineExceededError:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+
+    def _start_call_metrics(self, streamed: bool = False) -> Optional[CallTimer]:
+        """ Starts timing a call, or returns None when no metrics callback is listening. """
+        if not self.metrics_callbacks:
+            return None
+        return CallTimer(self.current_model, streamed=streamed)
+
+    def _emit_call_metrics(self, timer: Optional[CallTimer], params: Optional[Dict[str, Any]] = None,
+                           usage: Any = None, content: Optional[str] = None,
+                           estimated_prompt_tokens: Optional[int] = None,
+                           cached: bool = False, error: Optional[BaseException] = None) -> None:
+        """
+        Reports a finished call to the metrics callbacks. Token counts come from the API's
+        usage report, falling back to estimates of the prompt and the returned content.
+        """
+        if timer is None or timer.finished:
+            return
+        prompt_tokens = completion_tokens = cost = None
+        tokens_estimated = False
+        if error is None and not cached:
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            completion_tokens = getattr(usage, "completion_tokens", None)
+            if not (isinstance(prompt_tokens, int) and isinstance(completion_tokens, int)):
+                tokens_estimated = True
+                prompt_tokens = self._estimate_prompt_tokens(params, estimated_prompt_tokens)
+                completion_tokens = max(estimate_token_counts([content or ""], model_name=self.model_name)[0], 0)
+            cost = estimate_cost(self.current_model_config.get("config", {}), prompt_tokens, completion_tokens)
+        emit_metrics(self.metrics_callbacks, timer.finish(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            tokens_estimated=tokens_estimated, cost_usd=cost, cached=cached, error=error,
+        ))
+
+    def _cache_key(self, params: Dict[str, Any]) -> str:
+        """ Cache key for prepared request params (after model-specific adaptation). """
+        return make_cache_key(
+            params["model"], params["messages"],
+            temperature=params.get("temperature"), max_tokens=params.get("max_tokens"),
+        )
+
     def generate_response(self, prompt: str, system_prompt: Optional[str] = None, 
-                         temperature: float = 0.7, max_tokens: Optional[int] = None) -> str:
+                         temperature: float = 0.7, max_tokens: Optional[int] = None,
+                         estimated_prompt_tokens: Optional[int] = None,
+                         deadline: Optional[float] = None) -> str:
         """
         Generate a response from the LLM using a simple prompt.
         
@@ -113,26 +470,26 @@ class LLMInterface:
             temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
                          Note: Some models only support the default temperature of 1.0
             max_tokens: Maximum number of tokens to generate
+            estimated_prompt_tokens: Caller's token estimate for the prompt, used to reserve
+                                     TPM budget (estimated here if omitted)
+            deadline: Seconds allowed for the call including retries (overrides the
+                      retry policy's default deadline)
             
         Returns:
             The model's response as a string
         """
-        messages = []
-        
-        if system_prompt:
-            if self.supports_system_role:
-                messages.append({"role": "system", "content": system_prompt})
-            else:
-                # For models that don't support system roles, prepend to user message
-                prompt = f"[System instruction: {system_prompt}]\n\n{prompt}"
-        
-        messages.append({"role": "user", "content": prompt})
+        messages = self._build_messages(prompt, system_prompt)
         
-        return self.generate_chat_response(messages, temperature, max_tokens)
+        return self.generate_chat_response(messages, temperature, max_tokens,
+                                           estimated_prompt_tokens=estimated_prompt_tokens,
+                                           deadline=deadline)
     
+    @traced(category="llm")
     def generate_chat_response(self, messages: List[Dict[str, str]], 
                               temperature: float = 0.7, 
-                              max_tokens: Optional[int] = None) -> str:
+                              max_tokens: Optional[int] = None,
+                              estimated_prompt_tokens: Optional[int] = None,
+                              deadline: Optional[float] = None) -> str:
         """
         Generate a response from the LLM using a conversation history.
         
@@ -145,65 +502,407 @@ class LLMInterface:
             temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
                          Note: Some models only support the default temperature of 1.0
             max_tokens: Maximum number of tokens to generate
+            estimated_prompt_tokens: Caller's token estimate for the messages, used to reserve
+                                     TPM budget (estimated here if omitted)
+            deadline: Seconds allowed for the call including retries (overrides the
+                      retry policy's default deadline)
             
         Returns:
             The model's response as a string
         """
+        set_span_attributes(model=self.current_model)
+        on_delta = get_delta_callback()
+        if on_delta is not None:
+            # A caller up the stack (see src.utils.streaming.stream_call) wants deltas as they arrive
+            parts = []
+            for delta in self.generate_chat_response_stream(messages, temperature, max_tokens,
+                                                            estimated_prompt_tokens=estimated_prompt_tokens,
+                                                            deadline=deadline):
+                on_delta(delta)
+                parts.append(delta)
+            return "".join(parts)
+
+        timer = self._start_call_metrics()
         try:
-            # For models without system role support, convert system messages to user messages
-            if not self.supports_system_role:
-                converted_messages = []
-                system_instructions = []
-                
-                for msg in messages:
-                    if msg["role"] == "system":
-                        system_instructions.append(msg["content"])
-                    else:
-                        converted_messages.append(msg)
-                
-                # If there were system messages, prepend them to the first user message
-                if system_instructions and converted_messages:
-                    for i, msg in enumerate(converted_messages):
-                        if msg["role"] == "user":
-                            system_text = "\n\n".join(system_instructions)
-                            converted_messages[i]["content"] = f"[System instructions: {system_text}]\n\n{msg['content']}"
-                            break
-                
-                messages = converted_messages
-            
-            # Prepare the request parameters
-            params: Dict[str, Any] = {
-                "model": self.model_name,
-                "messages": messages
-            }
-            
-            # Add temperature only for models that support it
-            if not self.has_fixed_temperature:
-                params["temperature"] = temperature
-            
-            # Add max_tokens if specified
-            if max_tokens is not None:
-                params["max_tokens"] = max_tokens
+            params = self._build_request_params(messages, temperature, max_tokens)
+
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = self._cache_key(params)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    print(f"Using cached response for {self.model_name}.")
+                    self._emit_call_metrics(timer, cached=True)
+                    return cached
             
-            print(f"Sending request to {self.model_name}...")
-            response = self.client.chat.completions.create(**params)
+            reserved_tokens = self._reserved_tokens(params, estimated_prompt_tokens)
+
+            def send(timeout: Optional[float]):
+                waiting_since = time.perf_counter()
+                deadline_at = self._deadline_at(timeout)
+                # Every attempt is a request, so each one queues for rate limit budget
+                if self.rate_limiter is not None:
+                    # Queue (fairly) for RPM/TPM budget instead of triggering provider 429s
+                    self._acquire_rate_limit(reserved_tokens, deadline_at)
+                print(f"Sending request to {self.model_name}...")
+                try:
+                    # Queueing used part of the budget; the request only gets what is left
+                    timeout = self._acquire_request_slot(deadline_at)
+                    try:
+                        if timer is not None:
+                            timer.request_started(waiting_since)
+                        request_params = params if timeout is None else dict(params, timeout=timeout)
+                        response = self.client.chat.completions.create(**request_params)
+                    finally:
+                        if self._request_semaphore is not None:
+                            self._request_semaphore.release()
+                except Exception:
+                    self._release_reservation(reserved_tokens)
+                    raise
+                if timer is not None:
+                    # A non-streamed completion arrives in one piece
+                    timer.first_byte()
+                self._record_usage(reserved_tokens, response)
+                return response
+
+            response = call_with_retry(send, self.retry_policy, deadline=deadline)
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if cache_key is not None and content:
+                self.response_cache.put(cache_key, content, model_name=self.model_name)
+            self._emit_call_metrics(timer, params, getattr(response, "usage", None), content,
+                                    estimated_prompt_tokens)
+            return content
             
         except Exception as e:
             print(f"Error generating response: {e}")
+            self._emit_call_metrics(timer, error=e)
+            raise
+
+    def generate_response_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                                 temperature: float = 0.7, max_tokens: Optional[int] = None,
+                                 estimated_prompt_tokens: Optional[int] = None,
+                                 deadline: Optional[float] = None) -> Iterator[str]:
+        """
+        Streaming variant of generate_response; yields text deltas as they arrive.
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        return self.generate_chat_response_stream(messages, temperature, max_tokens,
+                                                  estimated_prompt_tokens=estimated_prompt_tokens,
+                                                  deadline=deadline)
+
+    @traced(category="llm")
+    def generate_chat_response_stream(self, messages: List[Dict[str, str]],
+                                      temperature: float = 0.7,
+                                      max_tokens: Optional[int] = None,
+                                      estimated_prompt_tokens: Optional[int] = None,
+                                      deadline: Optional[float] = None) -> Iterator[str]:
+        """
+        Streaming variant of generate_chat_response; yields text deltas as they arrive.
+
+        Opening the stream is retried like a normal request; once the first delta has
+        been yielded, errors propagate (a partial answer cannot be retried transparently).
+        A cache hit is yielded as a single delta, and a completed stream is cached.
+
+        Args:
+            Same as generate_chat_response.
+
+        Yields:
+            Text deltas of the model's response, in order.
+        """
+        set_span_attributes(model=self.current_model, streamed=True)
+        timer = self._start_call_metrics(streamed=True)
+        try:
+            params = self._build_request_params(messages, temperature, max_tokens)
+
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = self._cache_key(params)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    print(f"Using cached response for {self.model_name}.")
+                    self._emit_call_metrics(timer, cached=True)
+                    yield cached
+                    return
+
+            reserved_tokens = self._reserved_tokens(params, estimated_prompt_tokens)
+            semaphore = self._request_semaphore
+
+            def open_stream(timeout: Optional[float]):
+                waiting_since = time.perf_counter()
+                deadline_at = self._deadline_at(timeout)
+                if self.rate_limiter is not None:
+                    self._acquire_rate_limit(reserved_tokens, deadline_at)
+                print(f"Streaming request to {self.model_name}...")
+                # The request slot is held until the stream has been fully read
+                try:
+                    timeout = self._acquire_request_slot(deadline_at)
+                except DeadlineExceededError:
+                    self._release_reservation(reserved_tokens)
+                    raise
+                request_params = self._stream_request_params(params, reserved_tokens)
+                if timeout is not None:
+                    request_params["timeout"] = timeout
+                if timer is not None:
+                    timer.request_started(waiting_since)
+                try:
+                    return self.client.chat.completions.create(**request_params)
+                except Exception:
+                    if semaphore is not None:
+                        semaphore.release()
+                    self._release_reservation(reserved_tokens)
+                    raise
+
+            stream = call_with_retry(open_stream, self.retry_policy, deadline=deadline)
+            parts = []
+            usage = None
+            try:
+                for chunk in stream:
+                    # Only sent by providers asked to include usage; estimated otherwise
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if timer is not None:
+                            timer.first_byte()
+                        parts.append(delta)
+                        yield delta
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+                close = getattr(stream, "close", None)
+                if callable(close):
+                    close()
+                self._record_stream_usage(reserved_tokens, params, estimated_prompt_tokens, usage, "".join(parts))
+
+            content = "".join(parts)
+            if cache_key is not None and content:
+                self.response_cache.put(cache_key, content, model_name=self.model_name)
+            self._emit_call_metrics(timer, params, usage, content, estimated_prompt_tokens)
+
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            self._emit_call_metrics(timer, error=e)
             raise
 
     def close(self):
         """
         Clean up resources when done with the interface.
         """
-        # Current OpenAI client doesn't require explicit cleanup,
-        # but including this method for future-proofing and consistency
-        # with the resource management pattern
+        # The HTTP connection pool is shared process-wide and outlives any single
+        # interface, so there is nothing to release here.
         pass
 
 
+class AsyncLLMInterface(LLMInterface):
+    """
+    Asyncio variant of LLMInterface.
+
+    Uses AsyncOpenAI on the process-wide pooled httpx.AsyncClient, so many
+    concurrent coroutines reuse the same TCP/TLS connections. Configuration,
+    proxy handling and model-specific adaptations are inherited from LLMInterface;
+    generate_response and generate_chat_response are coroutines here.
+    """
+
+    def _create_client(self):
+        """ Creates the AsyncOpenAI client backed by the shared async connection pool. """
+        if self.is_fake:
+            return AsyncFakeOpenAIClient(get_fake_backend(self.current_model, self.current_model_config["config"]))
+        return AsyncOpenAI(
+            api_key=self.current_model_config["api_key"],
+            http_client=get_shared_async_http_client(**self.pool_limits),
+            max_retries=0,
+        )
+
+    async def generate_response(self, prompt: str, system_prompt: Optional[str] = None, 
+                                temperature: float = 0.7, max_tokens: Optional[int] = None,
+                                estimated_prompt_tokens: Optional[int] = None,
+                                deadline: Optional[float] = None) -> str:
+        """
+        Async version of LLMInterface.generate_response.
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        return await self.generate_chat_response(messages, temperature, max_tokens,
+                                                 estimated_prompt_tokens=estimated_prompt_tokens,
+                                                 deadline=deadline)
+
+    @traced(category="llm")
+    async def generate_chat_response(self, messages: List[Dict[str, str]], 
+                                     temperature: float = 0.7, 
+                                     max_tokens: Optional[int] = None,
+                                     estimated_prompt_tokens: Optional[int] = None,
+                                     deadline: Optional[float] = None) -> str:
+        """
+        Async version of LLMInterface.generate_chat_response.
+
+        max_concurrent_requests is not enforced here (its semaphore is a thread
+        primitive); bound concurrency with asyncio.Semaphore or the pool limits instead.
+        """
+        set_span_attributes(model=self.current_model)
+        timer = self._start_call_metrics()
+        try:
+            params = self._build_request_params(messages, temperature, max_tokens)
+
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = self._cache_key(params)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    print(f"Using cached response for {self.model_name}.")
+                    self._emit_call_metrics(timer, cached=True)
+                    return cached
+
+            reserved_tokens = self._reserved_tokens(params, estimated_prompt_tokens)
+
+            async def send(timeout: Optional[float]):
+                waiting_since = time.perf_counter()
+                deadline_at = self._deadline_at(timeout)
+                if self.rate_limiter is not None:
+                    # The limiter blocks, so wait for budget off the event loop
+                    await asyncio.to_thread(self._acquire_rate_limit, reserved_tokens, deadline_at)
+                print(f"Sending async request to {self.model_name}...")
+                if timer is not None:
+                    timer.request_started(waiting_since)
+                try:
+                    timeout = self._time_left(deadline_at)
+                    request_params = params if timeout is None else dict(params, timeout=timeout)
+                    response = await self.client.chat.completions.create(**request_params)
+                except Exception:
+                    self._release_reservation(reserved_tokens)
+                    raise
+                if timer is not None:
+                    timer.first_byte()
+                self._record_usage(reserved_tokens, response)
+                return response
+
+            response = await async_call_with_retry(send, self.retry_policy, deadline=deadline)
+
+            content = response.choices[0].message.content
+            if cache_key is not None and content:
+                self.response_cache.put(cache_key, content, model_name=self.model_name)
+            self._emit_call_metrics(timer, params, getattr(response, "usage", None), content,
+                                    estimated_prompt_tokens)
+            return content
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            self._emit_call_metrics(timer, error=e)
+            raise
+
+
+    @traced(category="llm")
+    async def generate_chat_response_stream(self, messages: List[Dict[str, str]],
+                                            temperature: float = 0.7,
+                                            max_tokens: Optional[int] = None,
+                                            estimated_prompt_tokens: Optional[int] = None,
+                                            deadline: Optional[float] = None):
+        """
+        Async version of LLMInterface.generate_chat_response_stream (an async generator).
+        """
+        set_span_attributes(model=self.current_model, streamed=True)
+        timer = self._start_call_metrics(streamed=True)
+        try:
+            params = self._build_request_params(messages, temperature, max_tokens)
+
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = self._cache_key(params)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    print(f"Using cached response for {self.model_name}.")
+                    self._emit_call_metrics(timer, cached=True)
+                    yield cached
+                    return
+
+            reserved_tokens = self._reserved_tokens(params, estimated_prompt_tokens)
+
+            async def open_stream(timeout: Optional[float]):
+                waiting_since = time.perf_counter()
+                deadline_at = self._deadline_at(timeout)
+                if self.rate_limiter is not None:
+                    await asyncio.to_thread(self._acquire_rate_limit, reserved_tokens, deadline_at)
+                print(f"Streaming async request to {self.model_name}...")
+                if timer is not None:
+                    timer.request_started(waiting_since)
+                try:
+                    request_params = self._stream_request_params(params, reserved_tokens)
+                    timeout = self._time_left(deadline_at)
+                    if timeout is not None:
+                        request_params["timeout"] = timeout
+                    return await self.client.chat.completions.create(**request_params)
+                except Exception:
+                    self._release_reservation(reserved_tokens)
+                    raise
+
+            stream = await async_call_with_retry(open_stream, self.retry_policy, deadline=deadline)
+            parts = []
+            usage = None
+            try:
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if timer is not None:
+                            timer.first_byte()
+                        parts.append(delta)
+                        yield delta
+            finally:
+                self._record_stream_usage(reserved_tokens, params, estimated_prompt_tokens, usage, "".join(parts))
+
+            content = "".join(parts)
+            if cache_key is not None and content:
+                self.response_cache.put(cache_key, content, model_name=self.model_name)
+            self._emit_call_metrics(timer, params, usage, content, estimated_prompt_tokens)
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            self._emit_call_metrics(timer, error=e)
+            raise
+
+
+# --- Process-wide registry --- #
+
+# Shared sync interfaces keyed by (model key, config path). Creating an LLMInterface
+# reads config.json, resets proxy env vars and builds an OpenAI client, so agents that
+# talk to the same model should share one instance (and its concurrency cap).
+_llm_interfaces: Dict[Tuple[str, Optional[str]], LLMInterface] = {}
+_llm_interfaces_lock = threading.Lock()
+
+
+def get_llm_interface(model_key: str = "gpt-o1-mini", config_path: Optional[str] = None,
+                      **kwargs: Any) -> LLMInterface:
+    """
+    Returns the shared LLMInterface for a model key, creating it on first use.
+
+    Extra keyword arguments (max_concurrent_requests, response_cache, retry_policy, ...)
+    are passed to LLMInterface on creation only: the settings of the first call for a
+    key win, later calls reuse the existing interface.
+
+    Raises:
+        ValueError: If the model key is not configured (nothing is registered then).
+    """
+    key = (model_key, config_path)
+    with _llm_interfaces_lock:
+        interface = _llm_interfaces.get(key)
+        if interface is None:
+            interface = LLMInterface(config_path=config_path, model_key=model_key, **kwargs)
+            _llm_interfaces[key] = interface
+        return interface
+
+
+def register_llm_interface(interface: LLMInterface, config_path: Optional[str] = None) -> None:
+    """Makes an already created interface the shared one for its model key."""
+    with _llm_interfaces_lock:
+        _llm_interfaces[(interface.current_model, config_path)] = interface
+
+
+def reset_llm_interfaces() -> None:
+    """Drops all shared interfaces (mainly for tests)."""
+    with _llm_interfaces_lock:
+        _llm_interfaces.clear()
+
+
 # Example usage
 if __name__ == "__main__":
     try:
@@ -4,6 +4,7 @@ from .answer_agent import ReportQAAgent
 from .question_agent import QuestionAgent
 from .llm_interface import LLMInterface
 from src.utils.file_handler import read_text_file
+from src.utils.llm_metrics import llm_caller
 import os
 import sys
 # Import exception and constants used
@@ -63,9 +64,10 @@ class Orchestrator:
             if not question_doc_content:
                 raise ValueError(f"Question document is empty: {self.question_doc_path}")
 
-            self.initial_questions = self.question_agent.generate_questions_from_content(
-                question_doc_content, num_questions=self.num_initial_questions_req
-            )
+            with llm_caller("Question Agent"):
+                self.initial_questions = self.question_agent.generate_questions_from_content(
+                    question_doc_content, num_questions=self.num_initial_questions_req
+                )
             self.current_q_index = -1 # Reset index after generation
             if not self.initial_questions:
                 logger.warning("Question Agent returned no initial questions.")
@@ -96,7 +98,8 @@ class Orchestrator:
         prompt = SATISFACTION_PROMPT_TEMPLATE.format(question=question, answer=answer)
         try:
             # Use a simple generation call, assuming the model can follow the format
-            response = self.llm_interface.generate_response(prompt)
+            with llm_caller("Satisfaction Check"):
+                response = self.llm_interface.generate_response(prompt)
             # logger.debug(f"Satisfaction LLM Raw Response: {response}")
 
             # Basic parsing (Consider more robust parsing, e.g., regex or Pydantic)
@@ -130,7 +133,8 @@ class Orchestrator:
         # logger.debug(f"Generating follow-up for Q: {question} A: {answer[:100]}...")
         prompt = FOLLOW_UP_PROMPT_TEMPLATE.format(question=question, answer=answer)
         try:
-            response = self.llm_interface.generate_response(prompt)
+            with llm_caller("Follow-up Generator"):
+                response = self.llm_interface.generate_response(prompt)
             # logger.debug(f"Follow-up LLM Raw Response: {response}")
 
             # Basic parsing: Assume the follow-up question is the main part of the response
@@ -162,7 +166,8 @@ class Orchestrator:
 
             # 2. Generate Initial Questions
             print(f"Generating {num_initial_questions} initial questions from {os.path.basename(question_doc_path)}...")
-            initial_questions = self.question_agent.generate_questions(question_doc_path, num_initial_questions)
+            with llm_caller("Question Agent"):
+                initial_questions = self.question_agent.generate_questions(question_doc_path, num_initial_questions)
             if not initial_questions:
                 print("No initial questions were generated. Exiting.")
                 return
@@ -184,7 +189,8 @@ class Orchestrator:
                     
                     # Ask the current question (initial or follow-up)
                     print(f"  Asking: {current_question}")
-                    answer = self.answer_agent.ask_with_content(current_question, self.answer_doc_content)
+                    with llm_caller("Answer Agent"):
+                        answer = self.answer_agent.ask_with_content(current_question, self.answer_doc_content)
                     print(f"  Received Answer: {answer}")
 
                     # Check satisfaction
@@ -1,10 +1,15 @@
 import os
-from typing import List, Dict, Any, Iterator, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
 from .llm_interface import LLMInterface
-from .answer_agent import ReportQAAgent, ContextLengthError
+from .answer_agent import AgentErrorResponse, ReportQAAgent, ContextLengthError
 from .question_agent import QuestionAgent
 from .prompts import DEBATE_SYNTHESIS_PROMPT_TEMPLATE
+from src.utils.checkpoint import CheckpointMismatchError, RunCheckpoint
+from src.utils.concurrency import run_concurrently
+from src.utils.llm_metrics import llm_caller
+from src.utils.streaming import call_maybe_streaming
+from src.utils.tracing import traced
 
 
 class OrchestratorV2:
@@ -23,6 +28,9 @@ class OrchestratorV2:
         output_file_path: str,
         llm_interface: LLMInterface, # For the debate/synthesis step
         num_initial_questions: int = 5,
+        max_concurrency: int = 1,
+        stream_partial_messages: bool = False,
+        checkpoint: Optional[RunCheckpoint] = None,
     ):
         """
         Initializes the OrchestratorV2.
@@ -33,21 +41,35 @@ class OrchestratorV2:
             output_file_path: Path to the markdown file for storing results.
             llm_interface: An instance of LLMInterface for the debate/synthesis call.
             num_initial_questions: The number of initial questions to generate.
+            max_concurrency: Maximum number of Answer Agents asked in parallel per question.
+                             1 (default) asks them one at a time.
+            stream_partial_messages: If True, answers asked one at a time and the synthesis
+                                     are streamed: PartialMessage events carrying the text so
+                                     far are yielded before each complete message.
+            checkpoint: If given, the generated questions, every successful answer and every
+                        final answer are recorded in it as they complete. When it was created
+                        with resume=True, recorded steps are reused instead of calling the LLM.
         """
         if not answer_agents:
             raise ValueError("At least one ReportQAAgent must be provided.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
 
         self.question_agent = question_agent
         self.answer_agents = answer_agents
         self.output_file_path = output_file_path
         self.llm = llm_interface
         self.num_initial_questions = num_initial_questions
+        self.max_concurrency = max_concurrency
+        self.stream_partial_messages = stream_partial_messages
+        self.checkpoint = checkpoint
 
         # Initial messages will be yielded by the generator
         # print(f"OrchestratorV2 initialized with {len(self.answer_agents)} Answer Agents.")
         # print(f"Output log file: {self.output_file_path}")
 
     # --- Main interaction method (NOW A GENERATOR) ---
+    @traced(category="orchestrator")
     def run_debate_interaction(self, question_doc_path: str, answer_doc_paths: List[str]) -> Iterator[Tuple[str, str]]:
         """
         Runs the full multi-agent debate workflow as a generator, yielding messages.
@@ -58,7 +80,8 @@ class OrchestratorV2:
             answer_doc_paths: A list of paths for the AnswerAgents.
 
         Yields:
-            Tuples of (speaker: str, message: str) representing each step.
+            Tuples of (speaker: str, message: str) representing each step. With
+            stream_partial_messages, message may be a PartialMessage (text so far).
 
         Returns:
             None. (Final results are implicitly logged to file or managed by caller)
@@ -70,91 +93,183 @@ class OrchestratorV2:
             yield "System", err_msg
             return # Stop generation
 
-        # 1. Get initial questions
-        yield "Orchestrator", f"Generating {self.num_initial_questions} questions from {os.path.basename(question_doc_path)}..."
-        initial_questions = []
         try:
-            initial_questions = self.question_agent.generate_questions(
-                question_doc_path, self.num_initial_questions
-            )
-            if initial_questions:
+            if self.checkpoint is not None:
+                try:
+                    run_info = {
+                        "workflow": "orchestrate_v2",
+                        "question_doc": os.path.abspath(question_doc_path),
+                        "answer_docs": [os.path.abspath(p) for p in answer_doc_paths],
+                        "num_initial_questions": self.num_initial_questions,
+                    }
+                    if self.checkpoint.start(run_info):
+                        yield "System", f"Resuming from checkpoint {self.checkpoint.path} ({self.checkpoint.stats()})."
+                except (CheckpointMismatchError, IOError) as e:
+                    yield "System", f"Error opening checkpoint: {e}"
+                    return # Stop generation
+
+            # 1. Get initial questions
+            initial_questions = []
+            if self.checkpoint is not None and self.checkpoint.questions is not None:
+                initial_questions = self.checkpoint.questions
                 questions_list_str = "\n".join([f"- {q}" for q in initial_questions])
-                yield "Question Agent", f"Generated {len(initial_questions)} initial questions:\n{questions_list_str}"
+                yield "Question Agent", f"Restored {len(initial_questions)} initial questions from checkpoint:\n{questions_list_str}"
             else:
-                 yield "Question Agent", "No initial questions were generated."
-        except Exception as e:
-            err_msg = f"Error generating initial questions: {e}"
-            yield "System", err_msg
-            return # Stop generation
+                yield "Orchestrator", f"Generating {self.num_initial_questions} questions from {os.path.basename(question_doc_path)}..."
+                try:
+                    with llm_caller("Question Agent"):
+                        initial_questions = self.question_agent.generate_questions(
+                            question_doc_path, self.num_initial_questions
+                        )
+                    if initial_questions:
+                        questions_list_str = "\n".join([f"- {q}" for q in initial_questions])
+                        yield "Question Agent", f"Generated {len(initial_questions)} initial questions:\n{questions_list_str}"
+                        if self.checkpoint is not None:
+                            self.checkpoint.record_questions(initial_questions)
+                    else:
+                         yield "Question Agent", "No initial questions were generated."
+                except Exception as e:
+                    err_msg = f"Error generating initial questions: {e}"
+                    yield "System", err_msg
+                    return # Stop generation
 
-        if not initial_questions:
-            yield "System", "No initial questions generated. Exiting."
-            return # Stop generation
+            if not initial_questions:
+                yield "System", "No initial questions generated. Exiting."
+                return # Stop generation
 
-        # Initialize output file (clear or add header)
-        try:
-            with open(self.output_file_path, "w", encoding="utf-8") as f:
-                f.write(f"# Multi-Agent Debate Log for {os.path.basename(question_doc_path)}\n\n")
-            yield "System", f"Initialized output log file: {self.output_file_path}"
-        except IOError as e:
-            err_msg = f"Error creating/accessing output file {self.output_file_path}: {e}. Exiting."
-            yield "System", err_msg
-            return # Stop generation
+            # Initialize output file (clear or add header)
+            try:
+                with open(self.output_file_path, "w", encoding="utf-8") as f:
+                    f.write(f"# Multi-Agent Debate Log for {os.path.basename(question_doc_path)}\n\n")
+                yield "System", f"Initialized output log file: {self.output_file_path}"
+            except IOError as e:
+                err_msg = f"Error creating/accessing output file {self.output_file_path}: {e}. Exiting."
+                yield "System", err_msg
+                return # Stop generation
+
+            # 2. Loop through each initial question
+            for i, question in enumerate(initial_questions):
+                yield "Orchestrator", f"--- Processing Question {i+1}/{len(initial_questions)} ---\n{question}"
+                current_answers = []
 
-        # 2. Loop through each initial question
-        for i, question in enumerate(initial_questions):
-            yield "Orchestrator", f"--- Processing Question {i+1}/{len(initial_questions)} ---\n{question}"
-            current_answers = []
+                # 3. Get answers from all AnswerAgents
+                if self.max_concurrency > 1 and len(self.answer_agents) > 1:
+                    # Fan out: ask all agents at once, yield answers as they arrive.
+                    # Answers are stored by agent index so synthesis order stays stable.
+                    yield "Orchestrator", f"Asking {len(self.answer_agents)} Answer Agents in parallel (max {self.max_concurrency} at a time)..."
+                    answers_by_idx: List[str] = [""] * len(self.answer_agents)
+                    for agent_idx, result, error in run_concurrently(
+                        self._ask_answer_agent,
+                        [(idx, question, answer_doc_paths[idx]) for idx in range(len(self.answer_agents))],
+                        max_workers=self.max_concurrency,
+                    ):
+                        if error is not None:
+                            # _ask_answer_agent handles its own errors; this is a safety net
+                            agent_name = f"Answer Agent {agent_idx + 1}"
+                            yield "System", f"Error getting answer from {agent_name}: {error}"
+                            answers_by_idx[agent_idx] = f"Error: {agent_name} failed to generate an answer."
+                            continue
+                        answer, message = result
+                        answers_by_idx[agent_idx] = answer
+                        yield message
+                    current_answers = answers_by_idx
+                else:
+                    for agent_idx in range(len(self.answer_agents)):
+                        doc_name = os.path.basename(answer_doc_paths[agent_idx])
+                        yield "Orchestrator", f"Asking Answer Agent {agent_idx + 1} (using {doc_name})..."
+                        answer, message = yield from call_maybe_streaming(
+                            self.stream_partial_messages, f"Answer Agent {agent_idx + 1}",
+                            self._ask_answer_agent, agent_idx, question, answer_doc_paths[agent_idx]
+                        )
+                        current_answers.append(answer)
+                        yield message
 
-            # 3. Get answers from all AnswerAgents
-            for agent_idx, answer_agent in enumerate(self.answer_agents):
-                agent_name = f"Answer Agent {agent_idx + 1}"
-                doc_name = os.path.basename(answer_doc_paths[agent_idx])
-                yield "Orchestrator", f"Asking {agent_name} (using {doc_name})..."
+                if not current_answers or all("Error:" in ans for ans in current_answers):
+                    yield "Orchestrator", "No valid answers received from any agent for this question. Skipping synthesis."
+                    final_answer = "Error: No valid answers obtained from agents."
+                    self._write_output(question, final_answer)
+                    # No need to store results log here, caller manages display
+                    continue # Move to the next question
+
+                # 4. Synthesize final answer
+                yield "Orchestrator", f"Synthesizing final answer for Question {i+1}..."
+                final_answer = "Error: Failed to synthesize final answer." # Default error
+                restored_answer = self.checkpoint.get_final_answer(question) if self.checkpoint is not None else None
                 try:
-                    answer = answer_agent.ask_question(question, answer_doc_paths[agent_idx])
-                    current_answers.append(answer)
-                    yield agent_name, answer
-                except FileNotFoundError:
-                    err_msg = f"Error for {agent_name}: Report file not found at {answer_doc_paths[agent_idx]}"
-                    yield "System", err_msg
-                    current_answers.append(f"Error: Report file not found for {agent_name}.")
-                except ContextLengthError as cle:
-                    err_msg = f"Error for {agent_name}: Context Length Error - {cle}"
-                    yield "System", err_msg
-                    current_answers.append(f"Error: Context Length Error for {agent_name}.")
+                    if restored_answer is not None:
+                        final_answer = restored_answer
+                    else:
+                        final_answer = yield from call_maybe_streaming(
+                            self.stream_partial_messages, "Synthesizer",
+                            self._synthesize_final_answer, question, current_answers
+                        )
+                        # A synthesis of failed answers is recomputed on resume, like the answers themselves
+                        if (self.checkpoint is not None and not isinstance(final_answer, AgentErrorResponse)
+                                and self._answers_checkpointed(question)):
+                            self.checkpoint.record_final_answer(question, final_answer)
+                    yield "Synthesizer", final_answer # Report final synthesized answer
                 except Exception as e:
-                    err_msg = f"Error getting answer from {agent_name}: {e}"
+                    err_msg = f"Error during final answer synthesis: {e}"
                     yield "System", err_msg
-                    current_answers.append(f"Error: {agent_name} failed to generate an answer.")
+                    # final_answer remains the default error message
 
-            if not current_answers or all("Error:" in ans for ans in current_answers):
-                yield "Orchestrator", "No valid answers received from any agent for this question. Skipping synthesis."
-                final_answer = "Error: No valid answers obtained from agents."
+                # 5. Write output to file
                 self._write_output(question, final_answer)
-                # No need to store results log here, caller manages display
-                continue # Move to the next question
 
-            # 4. Synthesize final answer
-            yield "Orchestrator", f"Synthesizing final answer for Question {i+1}..."
-            final_answer = "Error: Failed to synthesize final answer." # Default error
-            try:
-                final_answer = self._synthesize_final_answer(question, current_answers)
-                yield "Synthesizer", final_answer # Report final synthesized answer
-            except Exception as e:
-                err_msg = f"Error during final answer synthesis: {e}"
-                yield "System", err_msg
-                # final_answer remains the default error message
+                # 6. Loop continues for next question
 
-            # 5. Write output to file
-            self._write_output(question, final_answer)
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+            yield "System", "Debate interaction finished."
+        finally:
+            # Also runs on early returns, errors and when the consumer closes the generator
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+        # Generator implicitly returns None when done
 
-            # 6. Loop continues for next question
+    def _ask_answer_agent(self, agent_idx: int, question: str, doc_path: str) -> Tuple[str, Tuple[str, str]]:
+        """
+        Asks a single Answer Agent a question. Safe to call from worker threads.
 
-        yield "System", "Debate interaction finished."
-        # Generator implicitly returns None when done
+        Args:
+            agent_idx: Index of the agent in self.answer_agents.
+            question: The question to ask.
+            doc_path: Path of the report assigned to this agent.
+
+        Returns:
+            A tuple of (answer used for synthesis, (speaker, message) to yield).
+        """
+        agent_name = f"Answer Agent {agent_idx + 1}"
+        if self.checkpoint is not None:
+            restored = self.checkpoint.get_response(question, agent_name, 0)
+            if restored is not None:
+                return restored, (agent_name, restored)
+        try:
+            with llm_caller(agent_name):
+                answer = self.answer_agents[agent_idx].ask_question(question, doc_path)
+        except FileNotFoundError:
+            err_msg = f"Error for {agent_name}: Report file not found at {doc_path}"
+            return f"Error: Report file not found for {agent_name}.", ("System", err_msg)
+        except ContextLengthError as cle:
+            err_msg = f"Error for {agent_name}: Context Length Error - {cle}"
+            return f"Error: Context Length Error for {agent_name}.", ("System", err_msg)
+        except Exception as e:
+            err_msg = f"Error getting answer from {agent_name}: {e}"
+            return f"Error: {agent_name} failed to generate an answer.", ("System", err_msg)
+        # Failed answers are not checkpointed, so a resumed run asks again
+        if self.checkpoint is not None and not isinstance(answer, AgentErrorResponse):
+            self.checkpoint.record_response(question, agent_name, 0, answer)
+        return answer, (agent_name, answer)
+
+    def _answers_checkpointed(self, question: str) -> bool:
+        """True if every agent's answer to question is in the checkpoint, i.e. none of them failed."""
+        return all(
+            self.checkpoint.get_response(question, f"Answer Agent {agent_idx + 1}", 0) is not None
+            for agent_idx in range(len(self.answer_agents))
+        )
 
     # --- Debate/synthesis method ---
+    @traced(category="orchestrator")
     def _synthesize_final_answer(self, question: str, answers: List[str]) -> str:
         """
         Uses the LLM to synthesize a final answer from multiple agent answers.
@@ -187,11 +302,12 @@ class OrchestratorV2:
 
         try:
             # Use generate_response as it's a single completion task
-            final_answer = self.llm.generate_response(prompt=formatted_prompt)
+            with llm_caller("Synthesizer"):
+                final_answer = self.llm.generate_response(prompt=formatted_prompt)
             if not final_answer:
                 # Send error via callback? No, let the main loop handle it.
                 # print("Warning: LLM returned empty response for synthesis.")
-                return "Error: Failed to get synthesized answer from LLM."
+                return AgentErrorResponse("Error: Failed to get synthesized answer from LLM.")
             return final_answer.strip()
         except Exception as e:
             # Error will be caught and sent via callback in the main loop
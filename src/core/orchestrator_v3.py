@@ -1,12 +1,22 @@
 import os
 import logging
-from typing import List, Dict, Any, Iterator, Tuple
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
 # Core components for V3
 from .llm_interface import LLMInterface
-from .answer_agent_v3 import AnswerAgentV3, ContextLengthError # Use the V3 Answer Agent
+from .answer_agent_v3 import AgentErrorResponse, AnswerAgentV3, ContextLengthError, DEBATE_SUMMARY_SPEAKER, MODEL_NAME # Use the V3 Answer Agent
 from .question_agent import QuestionAgent
-from .prompts import FINAL_SYNTHESIS_PROMPT_TEMPLATE_V3
+from .prompts import FINAL_SYNTHESIS_PROMPT_TEMPLATE_V3, DEBATE_HISTORY_SUMMARY_PROMPT_TEMPLATE
+from src.utils.checkpoint import CheckpointMismatchError, RunCheckpoint
+from src.utils.concurrency import run_concurrently
+from src.utils.convergence import DEFAULT_CONVERGENCE_THRESHOLD, responses_by_agent, round_convergence
+from src.utils.document_store import DocumentStore
+from src.utils.llm_metrics import llm_caller
+from src.utils.results_sink import MarkdownResultsSink, ResultsSink
+from src.utils.streaming import call_maybe_streaming
+from src.utils.token_utils import estimate_token_count
+from src.utils.tracing import end_span, set_span_attributes, start_span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +28,9 @@ SPEAKER_QUESTION_AGENT = "Question Agent"
 SPEAKER_ANSWER_AGENT = "Answer Agent V3"
 SPEAKER_SYNTHESIZER = "Synthesizer"
 
+# Word limit requested for the rolling debate summary (compress_history mode)
+HISTORY_SUMMARY_MAX_WORDS = 400
+
 class OrchestratorV3:
     """
     Orchestrates the V3 multi-round debate workflow:
@@ -37,6 +50,16 @@ class OrchestratorV3:
         llm_interface: LLMInterface, # For the final synthesis step
         num_initial_questions: int = 5,
         max_debate_rounds: int = 2, # New parameter for V3
+        max_concurrency: int = 1,
+        simultaneous_rounds: bool = False,
+        max_concurrent_questions: int = 1,
+        stream_partial_messages: bool = False,
+        document_store: Optional[DocumentStore] = None,
+        compress_history: bool = False,
+        adaptive_rounds: bool = False,
+        convergence_threshold: float = DEFAULT_CONVERGENCE_THRESHOLD,
+        checkpoint: Optional[RunCheckpoint] = None,
+        results_sink: Optional[ResultsSink] = None,
     ):
         """
         Initializes the OrchestratorV3.
@@ -48,11 +71,53 @@ class OrchestratorV3:
             llm_interface: An instance of LLMInterface for the final synthesis call.
             num_initial_questions: The number of initial questions to generate.
             max_debate_rounds: The maximum number of debate rounds (after initial answers).
+            max_concurrency: Maximum number of agent calls run in parallel. Round 0 answers
+                             are independent and are fanned out whenever this is above 1.
+            simultaneous_rounds: If True, every agent in round N only sees the history through
+                                 round N-1, so all of a round's calls can run concurrently.
+                                 If False (default), agents are polled one after another and
+                                 each sees the responses given earlier in the same round.
+            max_concurrent_questions: Number of questions debated at the same time. Results are
+                                      still yielded and written in original question order.
+                                      Use LLMInterface(max_concurrent_requests=...) to cap the
+                                      total number of in-flight LLM calls.
+            stream_partial_messages: If True, agent calls made one at a time and the synthesis
+                                     are streamed: PartialMessage events carrying the text so
+                                     far are yielded before each complete message. Concurrent
+                                     calls and pipelined questions are not streamed.
+            document_store: Cache the answer documents are loaded from, so each file is read
+                            once per run. Pass the same store to the agents to share it with
+                            their Round 0 reads. A private store is created if omitted.
+            compress_history: If True, agents see the previous round verbatim and a rolling
+                              summary of all older rounds instead of the full history, so
+                              per-round prompt size stays roughly flat as rounds are added.
+                              The summary is updated with one LLM call per round (from
+                              round 2 on) and shared by all agents. Synthesis and the
+                              output file still use the full history.
+            adaptive_rounds: If True, a question's debate stops before max_debate_rounds once
+                             every agent's response is lexically similar to its response in
+                             the previous round (see src.utils.convergence). The reason the
+                             debate stopped is recorded as a final Orchestrator history entry.
+            convergence_threshold: Minimum similarity (0-1) between each agent's consecutive
+                                   responses for the debate to count as converged.
+            checkpoint: If given, the generated questions, every successful agent response
+                        and every final answer are recorded in it as they complete. When it
+                        was created with resume=True, recorded steps are reused instead of
+                        calling the LLM (history summaries are regenerated).
+            results_sink: Receives one structured record per completed question (see
+                          src.utils.results_sink). Defaults to the markdown log at
+                          output_file_path.
         """
         if not answer_agents:
             raise ValueError("At least one AnswerAgentV3 must be provided.")
         if max_debate_rounds < 0:
              raise ValueError("Maximum debate rounds cannot be negative.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if max_concurrent_questions < 1:
+            raise ValueError("max_concurrent_questions must be at least 1.")
+        if not 0.0 <= convergence_threshold <= 1.0:
+            raise ValueError("convergence_threshold must be between 0 and 1.")
 
         self.question_agent = question_agent
         self.answer_agents = answer_agents
@@ -60,10 +125,24 @@ class OrchestratorV3:
         self.llm = llm_interface
         self.num_initial_questions = num_initial_questions
         self.max_debate_rounds = max_debate_rounds # Store the new parameter
+        self.max_concurrency = max_concurrency
+        self.simultaneous_rounds = simultaneous_rounds
+        self.max_concurrent_questions = max_concurrent_questions
+        self.stream_partial_messages = stream_partial_messages
+        self.document_store = document_store if document_store is not None else DocumentStore()
+        self.compress_history = compress_history
+        self.adaptive_rounds = adaptive_rounds
+        self.convergence_threshold = convergence_threshold
+        self.checkpoint = checkpoint
+        self.results_sink = results_sink if results_sink is not None else MarkdownResultsSink(output_file_path)
 
-        logger.info(f"OrchestratorV3 initialized with {len(self.answer_agents)} Answer Agents. Max debate rounds: {self.max_debate_rounds}")
+        logger.info(f"OrchestratorV3 initialized with {len(self.answer_agents)} Answer Agents. Max debate rounds: {self.max_debate_rounds}, "
+                    f"max concurrency: {self.max_concurrency}, simultaneous rounds: {self.simultaneous_rounds}, "
+                    f"max concurrent questions: {self.max_concurrent_questions}, compress history: {self.compress_history}, "
+                    f"adaptive rounds: {self.adaptive_rounds} (threshold {self.convergence_threshold})")
 
     # --- Main interaction method (Generator) ---
+    @traced(category="orchestrator")
     def run_full_debate(
         self, 
         question_doc_path: str, 
@@ -80,193 +159,522 @@ class OrchestratorV3:
             answer_doc_paths: A list of paths for the AnswerAgents (must match agent list).
 
         Yields:
-            Tuples of (speaker: str, message: str) representing each step.
+            Tuples of (speaker: str, message: str) representing each step. With
+            stream_partial_messages, message may be a PartialMessage (text so far).
         """
         
-        # --- T6.5.1: Initial Checks --- 
-        yield SPEAKER_SYSTEM, f"Starting V3 multi-round debate for document: {os.path.basename(question_doc_path)}"
-        
-        if len(self.answer_agents) != len(answer_doc_paths):
-            err_msg = f"Error: The number of Answer Agents ({len(self.answer_agents)}) does not match the number of answer document paths ({len(answer_doc_paths)}).";
-            logger.error(err_msg)
-            yield SPEAKER_SYSTEM, err_msg
-            return # Stop the generator
-            
-        # --- T6.5.2: Generate Initial Questions --- 
-        yield SPEAKER_ORCHESTRATOR, f"Generating {self.num_initial_questions} initial questions from {os.path.basename(question_doc_path)}..."
-        initial_questions = []
         try:
-            # Assuming QuestionAgent has a generate_questions method similar to V2
-            initial_questions = self.question_agent.generate_questions(
-                question_doc_path, self.num_initial_questions
-            )
-            
-            # Yield each question individually
-            if initial_questions:
-                yield SPEAKER_QUESTION_AGENT, f"Generated {len(initial_questions)} initial questions:"
+            # --- T6.5.1: Initial Checks --- 
+            yield SPEAKER_SYSTEM, f"Starting V3 multi-round debate for document: {os.path.basename(question_doc_path)}"
+        
+            if len(self.answer_agents) != len(answer_doc_paths):
+                err_msg = f"Error: The number of Answer Agents ({len(self.answer_agents)}) does not match the number of answer document paths ({len(answer_doc_paths)}).";
+                logger.error(err_msg)
+                yield SPEAKER_SYSTEM, err_msg
+                return # Stop the generator
+
+            if self.checkpoint is not None:
+                try:
+                    run_info = {
+                        "workflow": "orchestrate_v3",
+                        "question_doc": os.path.abspath(question_doc_path),
+                        "answer_docs": [os.path.abspath(p) for p in answer_doc_paths],
+                        "num_initial_questions": self.num_initial_questions,
+                        "max_debate_rounds": self.max_debate_rounds,
+                        "simultaneous_rounds": self.simultaneous_rounds,
+                        "compress_history": self.compress_history,
+                        "adaptive_rounds": self.adaptive_rounds,
+                        "convergence_threshold": self.convergence_threshold if self.adaptive_rounds else None,
+                    }
+                    if self.checkpoint.start(run_info):
+                        yield SPEAKER_SYSTEM, f"Resuming from checkpoint {self.checkpoint.path} ({self.checkpoint.stats()})."
+                except (CheckpointMismatchError, IOError) as e:
+                    err_msg = f"Error opening checkpoint: {e}"
+                    logger.error(err_msg)
+                    yield SPEAKER_SYSTEM, err_msg
+                    return # Stop the generator
+
+            # --- T6.5.2: Generate Initial Questions --- 
+            initial_questions = []
+            if self.checkpoint is not None and self.checkpoint.questions is not None:
+                initial_questions = self.checkpoint.questions
+                yield SPEAKER_QUESTION_AGENT, f"Restored {len(initial_questions)} initial questions from checkpoint:"
                 for q_idx, q in enumerate(initial_questions):
                     yield SPEAKER_QUESTION_AGENT, f"Question {q_idx+1}: {q}"
             else:
-                 yield SPEAKER_QUESTION_AGENT, "Warning: No initial questions were generated."
-                 logger.warning("Question Agent returned no initial questions.")
-        except Exception as e:
-            err_msg = f"Error generating initial questions: {e}"
-            logger.error(err_msg, exc_info=True)
-            yield SPEAKER_SYSTEM, err_msg
-            return # Stop the generator if question generation fails
+                yield SPEAKER_ORCHESTRATOR, f"Generating {self.num_initial_questions} initial questions from {os.path.basename(question_doc_path)}..."
+                try:
+                    # Assuming QuestionAgent has a generate_questions method similar to V2
+                    with llm_caller(SPEAKER_QUESTION_AGENT):
+                        initial_questions = self.question_agent.generate_questions(
+                            question_doc_path, self.num_initial_questions
+                        )
+
+                    # Yield each question individually
+                    if initial_questions:
+                        yield SPEAKER_QUESTION_AGENT, f"Generated {len(initial_questions)} initial questions:"
+                        for q_idx, q in enumerate(initial_questions):
+                            yield SPEAKER_QUESTION_AGENT, f"Question {q_idx+1}: {q}"
+                        if self.checkpoint is not None:
+                            self.checkpoint.record_questions(initial_questions)
+                    else:
+                         yield SPEAKER_QUESTION_AGENT, "Warning: No initial questions were generated."
+                         logger.warning("Question Agent returned no initial questions.")
+                except Exception as e:
+                    err_msg = f"Error generating initial questions: {e}"
+                    logger.error(err_msg, exc_info=True)
+                    yield SPEAKER_SYSTEM, err_msg
+                    return # Stop the generator if question generation fails
 
-        # Exit if no questions were generated and we decide that's an error
-        if not initial_questions:
-             yield SPEAKER_SYSTEM, "No initial questions generated. Stopping workflow."
-             return
+            # Exit if no questions were generated and we decide that's an error
+            if not initial_questions:
+                 yield SPEAKER_SYSTEM, "No initial questions generated. Stopping workflow."
+                 return
              
-        # --- T6.5.3: Initialize Output File ---
-        try:
-            # Use 'w' to overwrite/clear the file initially
-            with open(self.output_file_path, "w", encoding="utf-8") as f:
-                f.write(f"# Multi-Round Debate Log (V3) for {os.path.basename(question_doc_path)}\n")
-                f.write(f"* Max Rounds: {self.max_debate_rounds}\n")
-                f.write(f"* Answer Agents: {len(self.answer_agents)}\n\n")
-            yield SPEAKER_SYSTEM, f"Initialized output log file: {self.output_file_path}"
-        except IOError as e:
-            err_msg = f"Error creating/accessing output file {self.output_file_path}: {e}. Cannot save results. Stopping workflow."
-            logger.error(err_msg, exc_info=True)
-            yield SPEAKER_SYSTEM, err_msg
-            return # Stop the generator if output file fails
-            
-        # --- T6.5.4: Loop Through Initial Questions --- 
-        final_results = [] # To potentially store final Q/A pairs if needed
-        for i, question in enumerate(initial_questions):
-            yield SPEAKER_ORCHESTRATOR, f"--- Processing Question {i+1}/{len(initial_questions)} ---"
-            yield SPEAKER_QUESTION_AGENT, question # Yield the question itself
-            
-            # --- T6.5.5: Initialize Debate History --- 
-            # History stores tuples of (agent_identifier, round_number, response_text)
-            debate_history: List[Tuple[str, int, str]] = []
-            
-            # --- T6.5.6: Round 0 - Get Initial Answers --- 
-            yield SPEAKER_ORCHESTRATOR, "--- Round 0: Gathering Initial Answers ---"
-            initial_answers_current_q = [] # Temp storage for this question
+            # --- T6.5.3: Initialize Output File ---
+            try:
+                # The sink keeps its file(s) open for the whole run
+                self.results_sink.open({
+                    "workflow": "orchestrate_v3",
+                    "question_doc": os.path.basename(question_doc_path),
+                    "max_debate_rounds": self.max_debate_rounds,
+                    "answer_agents": len(self.answer_agents),
+                })
+                yield SPEAKER_SYSTEM, f"Initialized output log file: {self.output_file_path}"
+            except IOError as e:
+                err_msg = f"Error creating/accessing output file {self.output_file_path}: {e}. Cannot save results. Stopping workflow."
+                logger.error(err_msg, exc_info=True)
+                yield SPEAKER_SYSTEM, err_msg
+                return # Stop the generator if output file fails
             
+            # --- T6.5.4: Loop Through Initial Questions --- 
+            num_questions = len(initial_questions)
+            if self.max_concurrent_questions > 1 and num_questions > 1:
+                # Pipeline: keep several questions in flight, but release each question's
+                # messages and output block strictly in original question order.
+                yield SPEAKER_ORCHESTRATOR, f"Running up to {self.max_concurrent_questions} questions concurrently..."
+                completed = {}
+                next_to_release = 0
+                for q_idx, result, error in run_concurrently(
+                    self._collect_question_events,
+                    [(i, num_questions, question, answer_doc_paths) for i, question in enumerate(initial_questions)],
+                    max_workers=self.max_concurrent_questions
+                ):
+                    completed[q_idx] = (result, error)
+                    while next_to_release in completed:
+                        result, error = completed.pop(next_to_release)
+                        question = initial_questions[next_to_release]
+                        if error is not None:
+                            err_msg = f"Error processing question {next_to_release+1}: {error}"
+                            logger.error(err_msg)
+                            yield SPEAKER_SYSTEM, err_msg
+                        else:
+                            events, (debate_history, final_answer_for_q, timings) = result
+                            for event in events:
+                                yield event
+                            yield from self._finish_question(next_to_release, num_questions, question, debate_history,
+                                                             final_answer_for_q, timings)
+                        next_to_release += 1
+            else:
+                for i, question in enumerate(initial_questions):
+                    debate_history, final_answer_for_q, timings = yield from self._debate_question(
+                        i, num_questions, question, answer_doc_paths, stream=self.stream_partial_messages
+                    )
+                    yield from self._finish_question(i, num_questions, question, debate_history, final_answer_for_q, timings)
+        
+            # All questions processed
+            self._close_run_outputs()
+            yield SPEAKER_SYSTEM, f"Multi-round debate complete. Results saved to {self.output_file_path}"
+        finally:
+            # Also runs on early returns, errors and when the consumer closes the generator
+            self._close_run_outputs()
+
+    def _close_run_outputs(self) -> None:
+        """Closes the results sink and the checkpoint file (safe to call more than once)."""
+        self.results_sink.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        
+    # --- Helper methods (e.g., for synthesis, output writing) will be added here --- 
+    @traced(category="orchestrator")
+    def _debate_question(
+        self, i: int, num_questions: int, question: str, answer_doc_paths: List[str],
+        stream: bool = False
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Runs Round 0, the debate rounds and the final synthesis for one question,
+        yielding interaction steps. If stream is True, sequential agent calls and the
+        synthesis also yield PartialMessage events.
+
+        Returns:
+            A tuple of (debate_history, final_answer, timings). final_answer is None if synthesis
+            failed. timings holds wall-clock seconds per round ("rounds"), for the synthesis and
+            for the whole question.
+        """
+        question_start = time.perf_counter()
+        set_span_attributes(question=i + 1)
+        round_seconds: Dict[int, float] = {}
+        yield SPEAKER_ORCHESTRATOR, f"--- Processing Question {i+1}/{num_questions} ---"
+        yield SPEAKER_QUESTION_AGENT, question # Yield the question itself
+
+        # --- T6.5.5: Initialize Debate History --- 
+        # History stores tuples of (agent_identifier, round_number, response_text)
+        debate_history: List[Tuple[str, int, str]] = []
+
+        # --- T6.5.6: Round 0 - Get Initial Answers --- 
+        round_start = time.perf_counter()
+        round_span = start_span("Round 0", "round", round=0)
+        yield SPEAKER_ORCHESTRATOR, "--- Round 0: Gathering Initial Answers ---"
+
+        if self.max_concurrency > 1 and len(self.answer_agents) > 1:
+            # Initial answers don't depend on each other, so ask all agents at once
+            yield SPEAKER_ORCHESTRATOR, f"Asking {len(self.answer_agents)} agents in parallel (max {self.max_concurrency} at a time)..."
+            round_entries = yield from self._run_agents_concurrently(
+                self._get_initial_answer,
+                [(agent_idx, question, answer_doc_paths[agent_idx]) for agent_idx in range(len(self.answer_agents))],
+                round_num=0
+            )
+            debate_history.extend(round_entries)
+        else:
             # Process each agent independently, yielding after each response
-            for agent_idx, answer_agent in enumerate(self.answer_agents):
+            for agent_idx in range(len(self.answer_agents)):
                 agent_name = f"{SPEAKER_ANSWER_AGENT} {agent_idx + 1}" # e.g., "Answer Agent V3 1"
-                doc_path = answer_doc_paths[agent_idx]
-                doc_name = os.path.basename(doc_path)
-                
+                doc_name = os.path.basename(answer_doc_paths[agent_idx])
+
                 # Yield BEFORE getting answer
                 yield SPEAKER_ORCHESTRATOR, f"Asking {agent_name} (using {doc_name})..."
-                
-                try:
-                    # Use the ask_question method for the initial answer
-                    answer = answer_agent.ask_question(question, doc_path)
-                    initial_answers_current_q.append(answer) # Store raw answer
-                    
-                    # Add to history with round 0
-                    history_entry = (agent_name, 0, answer)
-                    debate_history.append(history_entry)
-                    
-                    # Yield formatted message for UI
-                    yield agent_name, f"Initial Answer (R0): {answer}"
-                except FileNotFoundError:
-                    err_msg = f"Error for {agent_name}: Report file not found at {doc_path}"
-                    logger.error(err_msg)
-                    yield SPEAKER_SYSTEM, err_msg
-                    debate_history.append((agent_name, 0, f"Error: File Not Found - {doc_name}"))
-                except ContextLengthError as cle:
-                    err_msg = f"Error for {agent_name} (R0): Context Length Error - {cle}"
-                    logger.error(err_msg)
-                    yield SPEAKER_SYSTEM, err_msg
-                    debate_history.append((agent_name, 0, f"Error: Context Length Error - {doc_name}"))
-                except Exception as e:
-                    err_msg = f"Error getting initial answer from {agent_name}: {e}"
-                    logger.error(err_msg, exc_info=True)
-                    yield SPEAKER_SYSTEM, err_msg
-                    debate_history.append((agent_name, 0, f"Error: Failed to generate initial answer - {doc_name}"))
-            
-            # --- T6.5.7: Debate Rounds Loop (1 to max_debate_rounds) --- 
-            for round_num in range(1, self.max_debate_rounds + 1):
-                yield SPEAKER_ORCHESTRATOR, f"--- Starting Debate Round {round_num}/{self.max_debate_rounds} ---"
-                
+                history_entry, messages = yield from call_maybe_streaming(
+                    stream, agent_name, self._get_initial_answer, agent_idx, question, answer_doc_paths[agent_idx]
+                )
+                debate_history.append(history_entry)
+                for message in messages:
+                    yield message
+
+        round_seconds[0] = time.perf_counter() - round_start
+        end_span(round_span)
+
+        # Rolling summary of older rounds (compress_history mode), as a history entry
+        history_summary: Optional[Tuple[str, int, str]] = None
+
+        # --- T6.5.7: Debate Rounds Loop (1 to max_debate_rounds) --- 
+        for round_num in range(1, self.max_debate_rounds + 1):
+            yield SPEAKER_ORCHESTRATOR, f"--- Starting Debate Round {round_num}/{self.max_debate_rounds} ---"
+            round_start = time.perf_counter()
+            round_span = start_span(f"Round {round_num}", "round", round=round_num)
+
+            if self.compress_history and round_num >= 2:
+                # Fold the round that just dropped out of the verbatim window into the summary
+                history_summary = yield from self._update_history_summary(
+                    question, debate_history, history_summary, through_round=round_num - 2
+                )
+
+            if self.simultaneous_rounds:
+                # Every agent sees the same snapshot (history through round N-1),
+                # so the round's calls are independent and can run together.
+                history_snapshot = list(self._history_for_agents(debate_history, history_summary))
+                yield SPEAKER_ORCHESTRATOR, f"Polling {len(self.answer_agents)} agents simultaneously for Round {round_num}..."
+                round_entries = yield from self._run_agents_concurrently(
+                    self._get_debate_response,
+                    [(agent_idx, question, answer_doc_paths[agent_idx], history_snapshot, round_num)
+                     for agent_idx in range(len(self.answer_agents))],
+                    round_num=round_num
+                )
+                debate_history.extend(round_entries)
+            else:
                 # Process each agent individually within the round
-                for agent_idx, answer_agent in enumerate(self.answer_agents):
+                for agent_idx in range(len(self.answer_agents)):
                     agent_name = f"{SPEAKER_ANSWER_AGENT} {agent_idx + 1}"
-                    doc_path = answer_doc_paths[agent_idx]
-                    doc_name = os.path.basename(doc_path)
-                    
+                    doc_name = os.path.basename(answer_doc_paths[agent_idx])
+
                     # Yield BEFORE getting response
                     yield SPEAKER_ORCHESTRATOR, f"Polling {agent_name} (using {doc_name}) for Round {round_num}..."
-                    
-                    # Need document content for participate_in_debate
-                    try:
-                        # Read document content for this agent - Caching could optimize this
-                        with open(doc_path, 'r', encoding='utf-8') as f:
-                            document_content = f.read()
-                        if not document_content:
-                             # Handle empty file, maybe skip agent for this round?
-                             err_msg = f"Warning: Document file for {agent_name} ({doc_name}) is empty for round {round_num}. Skipping participation."
-                             logger.warning(err_msg)
-                             yield SPEAKER_SYSTEM, err_msg
-                             debate_history.append((agent_name, round_num, "Error: Agent document was empty."))
-                             continue # Skip to next agent
-                             
-                        # Call participate_in_debate
-                        response = answer_agent.participate_in_debate(
-                            question=question,
-                            debate_history=debate_history, # Pass history accumulated so far
-                            document_content=document_content,
-                            current_round=round_num
-                        )
-                        
-                        # Add response to history immediately
-                        history_entry = (agent_name, round_num, response)
-                        debate_history.append(history_entry)
-                        
-                        # Yield formatted message for UI
-                        yield agent_name, f"Round {round_num}: {response}"
-                        
-                    except FileNotFoundError:
-                        err_msg = f"Error for {agent_name}: Report file not found at {doc_path} during round {round_num}."
-                        logger.error(err_msg)
-                        yield SPEAKER_SYSTEM, err_msg
-                        debate_history.append((agent_name, round_num, f"Error: File Not Found - {doc_name}"))
-                    except ContextLengthError as cle:
-                        err_msg = f"Error for {agent_name} (R{round_num}): Context Length Error - {cle}"
-                        logger.error(err_msg)
-                        yield SPEAKER_SYSTEM, err_msg
-                        debate_history.append((agent_name, round_num, f"Error: Context Length Error - {doc_name}"))
-                    except Exception as e:
-                        err_msg = f"Error getting response from {agent_name} in round {round_num}: {e}"
-                        logger.error(err_msg, exc_info=True)
-                        yield SPEAKER_SYSTEM, err_msg
-                        debate_history.append((agent_name, round_num, f"Error: Failed to generate response - {doc_name}"))
-            
-            # --- T6.5.8: Final Synthesis --- 
-            yield SPEAKER_ORCHESTRATOR, f"--- Synthesizing Final Answer for Question {i+1} ---"
-            
-            final_answer_for_q = "Error: Failed to synthesize final answer." # Default error
-            try:
+
+                    # Pass history accumulated so far, including earlier agents in this round
+                    history_entry, messages = yield from call_maybe_streaming(
+                        stream, agent_name, self._get_debate_response,
+                        agent_idx, question, answer_doc_paths[agent_idx],
+                        self._history_for_agents(debate_history, history_summary), round_num
+                    )
+                    # Add response to history immediately
+                    debate_history.append(history_entry)
+                    for message in messages:
+                        yield message
+            round_seconds[round_num] = time.perf_counter() - round_start
+            end_span(round_span)
+
+            if self.adaptive_rounds:
+                stop_reason = self._convergence_stop_reason(debate_history, round_num)
+                if stop_reason is None and round_num == self.max_debate_rounds:
+                    stop_reason = f"Debate ran all {self.max_debate_rounds} rounds without converging."
+                if stop_reason is not None:
+                    # Recorded in the history so the synthesis and output file show why the debate ended
+                    debate_history.append((SPEAKER_ORCHESTRATOR, round_num, stop_reason))
+                    yield SPEAKER_ORCHESTRATOR, stop_reason
+                    break
+
+        # --- T6.5.8: Final Synthesis --- 
+        yield SPEAKER_ORCHESTRATOR, f"--- Synthesizing Final Answer for Question {i+1} ---"
+        
+        synthesis_start = time.perf_counter()
+        restored_answer = self.checkpoint.get_final_answer(question) if self.checkpoint is not None else None
+        try:
+            if restored_answer is not None:
+                final_answer_for_q = restored_answer
+            else:
                 # Pass the full history to the synthesis method
-                final_answer_for_q = self._synthesize_final_answer_v3(question, debate_history)
-                yield SPEAKER_SYNTHESIZER, final_answer_for_q
-                
-                # Update the output file with this Q&A pair
-                self._write_output(question, debate_history, final_answer_for_q)
-                yield SPEAKER_SYSTEM, f"Results for Question {i+1} written to output file."
-                
-                # Add separator between questions
-                if i < len(initial_questions) - 1:
-                    yield SPEAKER_SYSTEM, "-------------------------------------------"
-                
-            except Exception as e:
-                err_msg = f"Error during final synthesis or output writing: {e}"
-                logger.error(err_msg, exc_info=True)
+                final_answer_for_q = yield from call_maybe_streaming(
+                    stream, SPEAKER_SYNTHESIZER, self._synthesize_final_answer_v3, question, debate_history
+                )
+                # A synthesis of failed responses is recomputed on resume, like the responses themselves
+                if (self.checkpoint is not None and not isinstance(final_answer_for_q, AgentErrorResponse)
+                        and self._history_checkpointed(question, debate_history)):
+                    self.checkpoint.record_final_answer(question, final_answer_for_q)
+            yield SPEAKER_SYNTHESIZER, final_answer_for_q
+        except Exception as e:
+            err_msg = f"Error during final synthesis or output writing: {e}"
+            logger.error(err_msg, exc_info=True)
+            yield SPEAKER_SYSTEM, err_msg
+            return debate_history, None, None
+        now = time.perf_counter()
+        timings = {"rounds": round_seconds, "synthesis_seconds": now - synthesis_start, "total_seconds": now - question_start}
+        return debate_history, final_answer_for_q, timings
+
+    def _history_checkpointed(self, question: str, debate_history: List[Tuple[str, int, str]]) -> bool:
+        """True if every agent response in debate_history is in the checkpoint, i.e. none of them failed."""
+        return all(
+            self.checkpoint.get_response(question, speaker, round_num) is not None
+            for speaker, round_num, _ in debate_history if speaker.startswith(SPEAKER_ANSWER_AGENT)
+        )
+
+    def _convergence_stop_reason(self, debate_history: List[Tuple[str, int, str]], round_num: int) -> Optional[str]:
+        """
+        Returns why the debate should stop after round_num if every agent's response is at
+        least convergence_threshold similar to its previous one, else None.
+        """
+        convergence = round_convergence(
+            responses_by_agent(debate_history, round_num - 1), responses_by_agent(debate_history, round_num)
+        )
+        if convergence is None:
+            return None
+        min_similarity, similarities = convergence
+        logger.info(f"Round {round_num} similarity to previous round: "
+                    + ", ".join(f"{name}={value:.2f}" for name, value in similarities.items()))
+        if min_similarity < self.convergence_threshold:
+            return None
+        if round_num == self.max_debate_rounds:
+            return (f"Debate converged in round {round_num}, the last round (minimum similarity to the previous "
+                    f"round {min_similarity:.2f} >= {self.convergence_threshold:.2f}).")
+        return (f"Debate stopped early after round {round_num} of {self.max_debate_rounds}: agents converged "
+                f"(minimum similarity to the previous round {min_similarity:.2f} >= {self.convergence_threshold:.2f}).")
+
+    def _history_for_agents(
+        self, debate_history: List[Tuple[str, int, str]], history_summary: Optional[Tuple[str, int, str]]
+    ) -> List[Tuple[str, int, str]]:
+        """
+        Returns the history shown to agents: the full history, or with a rolling summary,
+        the summary entry followed by the rounds it does not cover yet.
+        """
+        if history_summary is None:
+            return debate_history
+        summarized_through = history_summary[1]
+        return [history_summary] + [entry for entry in debate_history if entry[1] > summarized_through]
+
+    @traced(category="orchestrator")
+    def _update_history_summary(
+        self,
+        question: str,
+        debate_history: List[Tuple[str, int, str]],
+        history_summary: Optional[Tuple[str, int, str]],
+        through_round: int,
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Folds the rounds not yet covered by history_summary, up to through_round, into
+        the rolling summary with one LLM call.
+
+        Returns:
+            The new summary entry (DEBATE_SUMMARY_SPEAKER, through_round, summary). If the
+            call fails, the previous summary is returned and the rounds it does not cover
+            stay verbatim in the agents' history.
+        """
+        summarized_through = history_summary[1] if history_summary is not None else -1
+        new_entries = [entry for entry in debate_history if summarized_through < entry[1] <= through_round]
+        if not new_entries:
+            return history_summary
+
+        yield SPEAKER_ORCHESTRATOR, f"Summarizing debate history through Round {through_round}..."
+        formatter = self.answer_agents[0]
+        prompt = DEBATE_HISTORY_SUMMARY_PROMPT_TEMPLATE.format(
+            question=question,
+            previous_summary=history_summary[2] if history_summary is not None else "None yet.",
+            new_turns=formatter._format_debate_history(new_entries),
+            through_round=through_round,
+            max_words=HISTORY_SUMMARY_MAX_WORDS,
+        )
+        try:
+            with llm_caller(DEBATE_SUMMARY_SPEAKER):
+                summary = self.llm.generate_response(prompt=prompt)
+        except Exception as e:
+            err_msg = f"Error summarizing debate history through round {through_round}: {e}. Keeping those rounds verbatim."
+            logger.error(err_msg, exc_info=True)
+            yield SPEAKER_SYSTEM, err_msg
+            return history_summary
+        if not summary or not summary.strip():
+            logger.warning(f"LLM returned an empty debate summary for rounds up to {through_round}; keeping them verbatim.")
+            return history_summary
+        logger.info(f"Debate history summarized through round {through_round} ({len(new_entries)} new entries).")
+        return DEBATE_SUMMARY_SPEAKER, through_round, summary.strip()
+
+    def _collect_question_events(
+        self, i: int, num_questions: int, question: str, answer_doc_paths: List[str]
+    ) -> Tuple[List[Tuple[str, str]], Tuple[List[Tuple[str, int, str]], Any, Any]]:
+        """
+        Runs _debate_question to completion (e.g. in a worker thread), buffering its
+        yielded messages so the caller can release them in question order.
+        """
+        events = []
+        question_gen = self._debate_question(i, num_questions, question, answer_doc_paths)
+        while True:
+            try:
+                events.append(next(question_gen))
+            except StopIteration as stop:
+                return events, stop.value
+
+    def _finish_question(
+        self, i: int, num_questions: int, question: str,
+        debate_history: List[Tuple[str, int, str]], final_answer_for_q,
+        timings: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Tuple[str, str]]:
+        """ Writes a completed question's results to the results sink. """
+        if final_answer_for_q is None:
+            return # Synthesis failed; the error was already yielded
+        try:
+            # Update the output file with this Q&A pair
+            self._write_output(question, debate_history, final_answer_for_q, timings=timings, index=i + 1)
+            yield SPEAKER_SYSTEM, f"Results for Question {i+1} written to output file."
+            
+            # Add separator between questions
+            if i < num_questions - 1:
+                yield SPEAKER_SYSTEM, "-------------------------------------------"
+        except Exception as e:
+            err_msg = f"Error during final synthesis or output writing: {e}"
+            logger.error(err_msg, exc_info=True)
+            yield SPEAKER_SYSTEM, err_msg
+
+    def _run_agents_concurrently(
+        self, func, args_list: List[Tuple], round_num: int
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Runs one agent call per args tuple on a thread pool, yielding each agent's
+        messages as it completes. Returns the history entries in agent order so that
+        the debate history is deterministic regardless of completion order.
+        """
+        entries: List[Tuple[str, int, str]] = [None] * len(args_list)
+        for agent_idx, result, error in run_concurrently(func, args_list, max_workers=self.max_concurrency):
+            if error is not None:
+                # The helpers handle their own errors; this is a safety net
+                agent_name = f"{SPEAKER_ANSWER_AGENT} {agent_idx + 1}"
+                err_msg = f"Error getting response from {agent_name} in round {round_num}: {error}"
+                logger.error(err_msg)
                 yield SPEAKER_SYSTEM, err_msg
-        
-        # All questions processed
-        yield SPEAKER_SYSTEM, f"Multi-round debate complete. Results saved to {self.output_file_path}"
-        
-    # --- Helper methods (e.g., for synthesis, output writing) will be added here --- 
+                entries[agent_idx] = (agent_name, round_num, "Error: Failed to generate response.")
+                continue
+            history_entry, messages = result
+            entries[agent_idx] = history_entry
+            for message in messages:
+                yield message
+        return entries
+
+    def _get_initial_answer(
+        self, agent_idx: int, question: str, doc_path: str
+    ) -> Tuple[Tuple[str, int, str], List[Tuple[str, str]]]:
+        """
+        Gets the Round 0 answer from one agent. Safe to call from worker threads.
+
+        Returns:
+            A tuple of (history entry, list of (speaker, message) tuples to yield).
+        """
+        agent_name = f"{SPEAKER_ANSWER_AGENT} {agent_idx + 1}"
+        doc_name = os.path.basename(doc_path)
+        restored = self.checkpoint.get_response(question, agent_name, 0) if self.checkpoint is not None else None
+        if restored is not None:
+            return (agent_name, 0, restored), [(agent_name, f"Initial Answer (R0): {restored}")]
+        try:
+            # Use the ask_question method for the initial answer
+            with llm_caller(agent_name):
+                answer = self.answer_agents[agent_idx].ask_question(question, doc_path)
+            if isinstance(answer, AgentErrorResponse):
+                # Kept in the history, but not checkpointed, so a resumed run asks again
+                logger.error(f"Error getting initial answer from {agent_name}: {answer}")
+            elif self.checkpoint is not None:
+                self.checkpoint.record_response(question, agent_name, 0, answer)
+            return (agent_name, 0, answer), [(agent_name, f"Initial Answer (R0): {answer}")]
+        except FileNotFoundError:
+            err_msg = f"Error for {agent_name}: Report file not found at {doc_path}"
+            logger.error(err_msg)
+            return (agent_name, 0, f"Error: File Not Found - {doc_name}"), [(SPEAKER_SYSTEM, err_msg)]
+        except ContextLengthError as cle:
+            err_msg = f"Error for {agent_name} (R0): Context Length Error - {cle}"
+            logger.error(err_msg)
+            return (agent_name, 0, f"Error: Context Length Error - {doc_name}"), [(SPEAKER_SYSTEM, err_msg)]
+        except Exception as e:
+            err_msg = f"Error getting initial answer from {agent_name}: {e}"
+            logger.error(err_msg, exc_info=True)
+            return (agent_name, 0, f"Error: Failed to generate initial answer - {doc_name}"), [(SPEAKER_SYSTEM, err_msg)]
+
+    def _get_debate_response(
+        self,
+        agent_idx: int,
+        question: str,
+        doc_path: str,
+        debate_history: List[Tuple[str, int, str]],
+        round_num: int
+    ) -> Tuple[Tuple[str, int, str], List[Tuple[str, str]]]:
+        """
+        Gets one agent's response for a debate round. Safe to call from worker threads
+        as long as debate_history is not mutated while the call runs.
+
+        Returns:
+            A tuple of (history entry, list of (speaker, message) tuples to yield).
+        """
+        agent_name = f"{SPEAKER_ANSWER_AGENT} {agent_idx + 1}"
+        doc_name = os.path.basename(doc_path)
+        restored = self.checkpoint.get_response(question, agent_name, round_num) if self.checkpoint is not None else None
+        if restored is not None:
+            return (agent_name, round_num, restored), [(agent_name, f"Round {round_num}: {restored}")]
+        try:
+            # Loaded from disk once per run, then served from the document store
+            document_content = self.document_store.get(doc_path)
+            if not document_content:
+                # Handle empty file by skipping the agent for this round
+                err_msg = f"Warning: Document file for {agent_name} ({doc_name}) is empty for round {round_num}. Skipping participation."
+                logger.warning(err_msg)
+                return (agent_name, round_num, "Error: Agent document was empty."), [(SPEAKER_SYSTEM, err_msg)]
+
+            # Call participate_in_debate
+            with llm_caller(agent_name):
+                response = self.answer_agents[agent_idx].participate_in_debate(
+                    question=question,
+                    debate_history=debate_history,
+                    document_content=document_content,
+                    current_round=round_num
+                )
+            if self.checkpoint is not None:
+                self.checkpoint.record_response(question, agent_name, round_num, response)
+            return (agent_name, round_num, response), [(agent_name, f"Round {round_num}: {response}")]
+        except FileNotFoundError:
+            err_msg = f"Error for {agent_name}: Report file not found at {doc_path} during round {round_num}."
+            logger.error(err_msg)
+            return (agent_name, round_num, f"Error: File Not Found - {doc_name}"), [(SPEAKER_SYSTEM, err_msg)]
+        except ContextLengthError as cle:
+            err_msg = f"Error for {agent_name} (R{round_num}): Context Length Error - {cle}"
+            logger.error(err_msg)
+            return (agent_name, round_num, f"Error: Context Length Error - {doc_name}"), [(SPEAKER_SYSTEM, err_msg)]
+        except Exception as e:
+            err_msg = f"Error getting response from {agent_name} in round {round_num}: {e}"
+            logger.error(err_msg, exc_info=True)
+            return (agent_name, round_num, f"Error: Failed to generate response - {doc_name}"), [(SPEAKER_SYSTEM, err_msg)]
+
+    @traced(category="orchestrator")
     def _synthesize_final_answer_v3(self, question: str, debate_history: List[Tuple[str, int, str]]) -> str:
         """ Synthesizes a final answer using the full debate history. """
         logger.info(f"Synthesizing final answer for question: {question[:50]}...")
@@ -298,10 +706,11 @@ class OrchestratorV3:
         # 3. Call LLM
         try:
             logger.debug("Sending request to LLM for final synthesis...")
-            final_answer = self.llm.generate_response(prompt=prompt)
+            with llm_caller(SPEAKER_SYNTHESIZER):
+                final_answer = self.llm.generate_response(prompt=prompt)
             if not final_answer:
                 logger.warning("LLM returned empty response for final synthesis.")
-                return "Error: Failed to get synthesized answer from LLM."
+                return AgentErrorResponse("Error: Failed to get synthesized answer from LLM.")
             logger.info("Received synthesized final answer from LLM.")
             return final_answer.strip()
         except Exception as e:
@@ -309,42 +718,48 @@ class OrchestratorV3:
             # Re-raise for the main loop to catch and yield error message
             raise RuntimeError(f"LLM final synthesis failed: {e}")
         
-    def _write_output(self, question: str, debate_history: List[Tuple[str, int, str]], final_answer: str):
-        """ Appends a question, its full debate history, and final answer to the output file. """
-        # logger.debug(f"Writing output for question: {question[:50]}...")
+    def _write_output(
+        self, question: str, debate_history: List[Tuple[str, int, str]], final_answer: str,
+        timings: Optional[Dict[str, Any]] = None, index: Optional[int] = None
+    ):
+        """ Sends a question's record (history by round, final answer, timings, token counts) to the results sink. """
+        record = self._build_record(question, debate_history, final_answer, timings, index)
         try:
-            # Use 'a' mode to append
-            with open(self.output_file_path, "a", encoding="utf-8") as f:
-                f.write(f"## Question:\n{question}\n\n")
-                
-                # --- Write Debate History --- 
-                f.write(f"### Debate History ({len(debate_history)} entries):\n\n")
-                if not debate_history:
-                    f.write("(No history recorded)\n\n")
-                else:
-                    # Group by round for better readability
-                    rounds = {}
-                    for agent_name, round_num, response in debate_history:
-                        if round_num not in rounds:
-                            rounds[round_num] = []
-                        rounds[round_num].append((agent_name, response))
-                        
-                    for round_num in sorted(rounds.keys()):
-                        f.write(f"\n#### Round {round_num}:\n\n")
-                        for agent_name, response in rounds[round_num]:
-                            f.write(f"> **{agent_name}:**\n\n")
-                            # Indent response for clarity
-                            indented_response = '\n'.join([f"> {line}" for line in response.split('\n')])
-                            f.write(f"{indented_response}\n\n")
-                            f.write(f">\n\n") # Add a small separator
-                f.write("\n") # Space before final answer
-                # --- End Debate History --- 
-                
-                f.write(f"### Final Answer (Synthesized V3):\n{final_answer}\n\n") # Added V3 marker
-                f.write("---\n\n")
-            # logger.debug(f"Successfully wrote V3 result to {self.output_file_path}")
+            self.results_sink.write(record)
         except IOError as e:
             # Log the error but allow the main loop to continue if possible
-            logger.error(f"[OrchestratorV3 IO Error] Error writing to output file {self.output_file_path}: {e}")
+            logger.error(f"[OrchestratorV3 IO Error] Error writing results for question {question[:50]}: {e}")
             # Re-raise the error to be caught by the main loop's write handler
-            raise 
\ No newline at end of file
+            raise
+
+    def _build_record(
+        self, question: str, debate_history: List[Tuple[str, int, str]], final_answer: str,
+        timings: Optional[Dict[str, Any]] = None, index: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """ Builds the structured results record of one question (see src.utils.results_sink). """
+        timings = timings or {}
+        round_seconds = timings.get("rounds", {})
+        rounds: Dict[int, List[Dict[str, Any]]] = {}
+        response_tokens = 0
+        for agent_name, round_num, response in debate_history:
+            tokens = estimate_token_count(response, model_name=MODEL_NAME)
+            response_tokens += max(tokens, 0)
+            rounds.setdefault(round_num, []).append({"agent": agent_name, "response": response, "tokens": tokens})
+        return {
+            "type": "question",
+            "index": index,
+            "question": question,
+            "rounds": [
+                {"round": round_num, "seconds": round_seconds.get(round_num), "responses": rounds[round_num]}
+                for round_num in sorted(rounds)
+            ],
+            "final_answer": final_answer,
+            "timings": {
+                "synthesis_seconds": timings.get("synthesis_seconds"),
+                "total_seconds": timings.get("total_seconds"),
+            },
+            "tokens": {
+                "responses": response_tokens,
+                "final_answer": estimate_token_count(final_answer, model_name=MODEL_NAME),
+            },
+        }
@@ -137,4 +137,47 @@ Your Synthesis Task:
 6. Ensure the final answer directly addresses the 'Original Question'.
 
 --- Final Synthesized Answer ---
-""" 
\ No newline at end of file
+""" 
+MAP_REDUCE_COMBINE_PROMPT_TEMPLATE = """
+You are acting as a senior financial analyst. A report was too long to read in one pass, so it was split into consecutive parts and the question below was answered separately for each part.
+
+Question: {question}
+
+--- BEGIN PARTIAL ANSWERS ---
+
+{partial_answers}
+
+--- END PARTIAL ANSWERS ---
+
+Your Task:
+1. Combine the partial answers into a single, coherent answer to the question.
+2. Ignore parts that state the information is not available, unless no part provides it; in that case, state clearly that the information is not available in the report.
+3. If parts contradict each other, mention the discrepancy.
+4. Do not introduce any information that is not present in the partial answers.
+
+Combined Answer:
+"""
+
+DEBATE_HISTORY_SUMMARY_PROMPT_TEMPLATE = """
+You are a neutral and objective note-taker for a multi-round debate between agents answering the question below from different source documents. Keep a running summary of the debate so the agents do not need to re-read every earlier turn.
+
+Original Question:
+\"{question}\"
+
+--- Summary So Far ---
+{previous_summary}
+--- End Summary So Far ---
+
+--- New Debate Turns ---
+{new_turns}
+--- End New Debate Turns ---
+
+Your Task:
+1. Update the 'Summary So Far' with the 'New Debate Turns' into a single summary of the debate up to Round {through_round}.
+2. For each agent, keep its key claims, figures and cited evidence, and how its position changed across rounds.
+3. Keep points of agreement, open disagreements and unanswered challenges between agents.
+4. Do not add any information that is not present in the summary or the new turns.
+5. Use at most {max_words} words.
+
+Updated Summary:
+"""
@@ -9,8 +9,9 @@ import re # Import regex for better parsing
 from .llm_interface import LLMInterface
 # Import the prompt from the new module
 from .prompts import QUESTION_PROMPT_TEMPLATE
-from src.utils.token_utils import estimate_token_count
+from src.utils.token_utils import estimate_prompt_tokens
 from src.utils.file_handler import read_text_file
+from src.utils.tracing import traced
 from .answer_agent import ContextLengthError, MAX_INPUT_TOKENS, MODEL_NAME # Reusing constants
 
 logger = logging.getLogger(__name__)
@@ -31,13 +32,13 @@ class QuestionAgent:
             logger.error(f"Error during QuestionAgent initialization with LLMInterface: {e}", exc_info=True)
             raise RuntimeError(f"Could not initialize QuestionAgent: {e}")
 
-    def _generate_questions_from_llm(self, prompt: str) -> str:
+    def _generate_questions_from_llm(self, prompt: str, estimated_tokens: Optional[int] = None) -> str:
         """Internal helper to call the LLM and get the raw response."""
         try:
             logger.info("Sending request to LLM for question generation...")
             messages = [{"role": "user", "content": prompt}]
             # Use the shared self.llm interface
-            llm_response = self.llm.generate_chat_response(messages)
+            llm_response = self.llm.generate_chat_response(messages, estimated_prompt_tokens=estimated_tokens)
 
             if not llm_response or not isinstance(llm_response, str):
                  logger.error(f"Received invalid response from LLM: {llm_response}")
@@ -74,6 +75,7 @@ class QuestionAgent:
         
         return questions
 
+    @traced(category="agent")
     def generate_questions_from_content(
         self, document_content: str, num_questions: int = 5
     ) -> List[str]: # Return type will be list after parsing (T2.7)
@@ -105,7 +107,13 @@ class QuestionAgent:
 
         # 2. Estimate Tokens & Check Limit
         # Use the model name from the LLM interface
-        estimated_tokens = estimate_token_count(prompt, model_name=self.llm.model_name)
+        # The document's token count is memoized across calls
+        estimated_tokens = estimate_prompt_tokens(
+            QUESTION_PROMPT_TEMPLATE,
+            model_name=self.llm.model_name,
+            num_questions=num_questions,
+            document_content=document_content
+        )
         if estimated_tokens == -1:
             logger.error("Token estimation failed for question generation prompt.")
             raise ValueError("Token estimation failed.")
@@ -123,7 +131,7 @@ class QuestionAgent:
 
         # 3. Call LLM (Internal Helper)
         try:
-            raw_llm_output = self._generate_questions_from_llm(prompt)
+            raw_llm_output = self._generate_questions_from_llm(prompt, estimated_tokens)
         except (RuntimeError, ValueError) as e:
             # Handle errors from LLM call
             logger.error(f"Failed to generate questions from LLM: {e}")
@@ -143,6 +151,7 @@ class QuestionAgent:
             # Optionally return raw output or empty list on parsing error
             return [f"Error: Failed to parse LLM output. Raw: {raw_llm_output}"]
 
+    @traced(category="agent")
     def generate_questions(self, document_path: str, num_questions: int = 5) -> List[str]:
         """
         Reads a document file and generates questions based on its content.
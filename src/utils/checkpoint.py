@@ -0,0 +1,173 @@
+"""
+Crash-safe checkpoints for debate runs.
+
+A V2/V3 run makes dozens of LLM calls per question, so a crash or Ctrl-C late
+in a run used to throw away everything but the partial markdown output.
+RunCheckpoint appends one JSON record per completed step (generated questions,
+each successful agent response, each final answer) to a JSONL journal and
+flushes it immediately. A resumed run replays the journal and only calls the
+LLM for steps that are not in it yet.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = ".checkpoint.jsonl"
+
+
+class CheckpointMismatchError(ValueError):
+    """Raised when resuming from a checkpoint that was written for a different run."""
+    pass
+
+
+def default_checkpoint_path(output_path: str) -> str:
+    """Returns the checkpoint journal path used alongside an output file."""
+    return f"{output_path}{CHECKPOINT_SUFFIX}"
+
+
+class RunCheckpoint:
+    """
+    Append-only JSONL journal of the completed steps of one debate run.
+
+    Responses are keyed by (question, agent name, round), so lookups do not depend
+    on question order or concurrency. Only successful responses should be recorded;
+    anything missing from the journal is simply recomputed on resume.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Args:
+            path: The JSONL journal file.
+            resume: If True, steps recorded in an existing journal are reused. If False,
+                    any existing journal is overwritten when the run starts.
+        """
+        self.path = path
+        self.resume = resume
+        self.questions: Optional[List[str]] = None
+        self._responses: Dict[Tuple[str, str, int], str] = {}
+        self._final_answers: Dict[str, str] = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def start(self, run_info: Dict[str, Any]) -> bool:
+        """
+        Opens the journal for a run described by run_info (a JSON-serializable dict of the
+        settings that must match for a resume, e.g. documents and number of questions).
+
+        Returns:
+            True if completed steps were restored from an existing journal.
+
+        Raises:
+            CheckpointMismatchError: If resuming and the journal belongs to a different run.
+            IOError: If the journal cannot be read or written.
+        """
+        run_info = json.loads(json.dumps(run_info)) # Normalize (e.g. tuples -> lists) for comparison
+        restored = False
+        with self._lock:
+            if self.resume and os.path.exists(self.path):
+                restored = self._load(run_info)
+            if not restored:
+                self.questions = None
+                self._responses.clear()
+                self._final_answers.clear()
+                self._open("w")
+                self._write({"type": "run", "version": CHECKPOINT_VERSION, "run": run_info})
+            else:
+                self._open("a")
+        if restored:
+            logger.info(f"Resuming from checkpoint {self.path}: {len(self._responses)} responses, "
+                        f"{len(self._final_answers)} final answers restored.")
+        return restored
+
+    def _load(self, run_info: Dict[str, Any]) -> bool:
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        records = []
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash during a write can leave a truncated last record
+                logger.warning(f"Ignoring unreadable record on line {line_no} of checkpoint {self.path}.")
+        if not records:
+            return False
+        header = records[0]
+        if header.get("type") != "run" or header.get("version") != CHECKPOINT_VERSION:
+            raise CheckpointMismatchError(f"{self.path} is not a version {CHECKPOINT_VERSION} run checkpoint.")
+        if header.get("run") != run_info:
+            raise CheckpointMismatchError(
+                f"Checkpoint {self.path} was written for a different run ({header.get('run')}); "
+                f"delete it or run without resuming."
+            )
+        for record in records[1:]:
+            record_type = record.get("type")
+            if record_type == "questions":
+                self.questions = record["questions"]
+            elif record_type == "response":
+                self._responses[(record["question"], record["agent"], record["round"])] = record["response"]
+            elif record_type == "final":
+                self._final_answers[record["question"]] = record["final_answer"]
+        return True
+
+    def _open(self, mode: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, mode, encoding="utf-8")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        # Callers hold the lock; flushing per record keeps the journal usable after a crash
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("RunCheckpoint.start() must be called before recording steps.")
+            self._write(record)
+
+    def record_questions(self, questions: List[str]) -> None:
+        self.questions = list(questions)
+        self._append({"type": "questions", "questions": self.questions})
+
+    def get_response(self, question: str, agent_name: str, round_num: int) -> Optional[str]:
+        """Returns the recorded response of an agent to a question in a round, if any."""
+        with self._lock:
+            return self._responses.get((question, agent_name, round_num))
+
+    def record_response(self, question: str, agent_name: str, round_num: int, response: str) -> None:
+        with self._lock:
+            self._responses[(question, agent_name, round_num)] = response
+        self._append({"type": "response", "question": question, "agent": agent_name, "round": round_num,
+                      "response": response})
+
+    def get_final_answer(self, question: str) -> Optional[str]:
+        with self._lock:
+            return self._final_answers.get(question)
+
+    def record_final_answer(self, question: str, final_answer: str) -> None:
+        with self._lock:
+            self._final_answers[question] = final_answer
+        self._append({"type": "final", "question": question, "final_answer": final_answer})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of questions, responses and final answers in the checkpoint."""
+        with self._lock:
+            return {
+                "questions": len(self.questions or []),
+                "responses": len(self._responses),
+                "final_answers": len(self._final_answers),
+            }
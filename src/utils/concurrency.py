@@ -0,0 +1,58 @@
+"""
+Concurrency helpers for fanning out blocking agent/LLM calls.
+
+The agents and LLMInterface are synchronous, so parallelism is achieved with a
+thread pool rather than asyncio. Results are handed back as they complete so
+that the orchestrator generators can keep yielding messages incrementally.
+Each call runs in a copy of the caller's context, so context variables (such
+as the LLM caller tag and streaming callbacks) carry over to the pool threads.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def run_concurrently(
+    func: Callable[..., Any],
+    args_list: Sequence[Tuple[Any, ...]],
+    max_workers: int = 4,
+) -> Iterator[Tuple[int, Any, Optional[BaseException]]]:
+    """
+    Runs func(*args) for every args tuple and yields results as they complete.
+
+    Args:
+        func: The blocking callable to run.
+        args_list: One tuple of positional arguments per call.
+        max_workers: Maximum number of calls running at the same time.
+                     A value of 1 (or a single call) runs everything inline, in order.
+
+    Yields:
+        Tuples of (index, result, error) in completion order, where index is the
+        position of the call in args_list. Exactly one of result/error is set.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+
+    if max_workers == 1 or len(args_list) <= 1:
+        for index, args in enumerate(args_list):
+            try:
+                yield index, func(*args), None
+            except Exception as e:
+                yield index, None, e
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(args_list)))
+    try:
+        futures = {executor.submit(contextvars.copy_context().run, func, *args): index for index, args in enumerate(args_list)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result(), None
+            except Exception as e:
+                yield index, None, e
+    finally:
+        # If the consumer stops early, don't start calls that haven't begun yet
+        executor.shutdown(wait=True, cancel_futures=True)
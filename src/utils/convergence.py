@@ -0,0 +1,65 @@
+"""
+Convergence detection for multi-round debates.
+
+Once agents stop changing their positions, further debate rounds mostly restate
+the previous ones. These helpers compare each agent's consecutive responses
+with a cheap lexical similarity (cosine over term counts, no embeddings or LLM
+calls), so the orchestrator can stop a question's debate early.
+"""
+import math
+from collections import Counter
+from typing import Dict, Optional, Sequence, Tuple
+
+from src.utils.retrieval import tokenize
+
+DEFAULT_CONVERGENCE_THRESHOLD = 0.8
+
+# Responses starting with this prefix are orchestrator error placeholders, not positions
+ERROR_RESPONSE_PREFIX = "Error:"
+
+
+def response_similarity(first: str, second: str) -> float:
+    """
+    Cosine similarity between the term counts of two responses, in [0, 1].
+
+    Two empty (or stopword-only) responses are considered identical.
+    """
+    first_terms = Counter(tokenize(first))
+    second_terms = Counter(tokenize(second))
+    if not first_terms and not second_terms:
+        return 1.0
+    if not first_terms or not second_terms:
+        return 0.0
+    dot = sum(count * second_terms[term] for term, count in first_terms.items() if term in second_terms)
+    norm = math.sqrt(sum(c * c for c in first_terms.values())) * math.sqrt(sum(c * c for c in second_terms.values()))
+    return dot / norm
+
+
+def round_convergence(
+    previous: Dict[str, str], current: Dict[str, str]
+) -> Optional[Tuple[float, Dict[str, float]]]:
+    """
+    Compares each agent's response in the current round with its previous one.
+
+    Args:
+        previous: Agent name -> response in the previous round.
+        current: Agent name -> response in the current round.
+
+    Returns:
+        (minimum similarity, per-agent similarity), or None if convergence cannot be
+        judged: an agent is missing from either round or one of its responses is an error.
+    """
+    if not current or set(previous) != set(current):
+        return None
+    similarities: Dict[str, float] = {}
+    for agent_name, response in current.items():
+        earlier = previous[agent_name]
+        if response.startswith(ERROR_RESPONSE_PREFIX) or earlier.startswith(ERROR_RESPONSE_PREFIX):
+            return None
+        similarities[agent_name] = response_similarity(earlier, response)
+    return min(similarities.values()), similarities
+
+
+def responses_by_agent(debate_history: Sequence[Tuple[str, int, str]], round_num: int) -> Dict[str, str]:
+    """Returns agent name -> response for the entries of one round of a debate history."""
+    return {agent_name: response for agent_name, entry_round, response in debate_history if entry_round == round_num}
@@ -0,0 +1,72 @@
+"""
+In-memory cache of document contents.
+
+A V3 debate asks every answer agent about its document once per question and
+round, so without caching the same files are re-read from disk N x (R+1) times.
+DocumentStore loads each document once and hands out the same (immutable)
+string until the file changes on disk, detected by its modification time and
+size. One store is meant to be shared by an orchestrator and its agents.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+from src.utils.file_handler import read_text_file
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentStore:
+    """
+    Thread-safe cache of text documents keyed by path, modification time and size.
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        """
+        Args:
+            encoding: Encoding used to read documents.
+        """
+        self.encoding = encoding
+        self.reads = 0
+        self.hits = 0
+        self._documents: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> str:
+        """
+        Returns the content of the document at path, reading it only if it is not
+        cached yet or has changed on disk since it was read.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            Other errors from read_text_file (e.g. IOError) if the file cannot be read.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._documents.get(key)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.hits += 1
+                return cached[2]
+
+            # Reading under the lock keeps concurrent first requests to a single read
+            content = read_text_file(key, encoding=self.encoding)
+            self._documents[key] = (stat.st_mtime_ns, stat.st_size, content)
+            self.reads += 1
+            logger.debug(f"Loaded document {path} ({len(content)} characters)")
+            return content
+
+    def clear(self) -> None:
+        """Drops all cached documents (counters are kept)."""
+        with self._lock:
+            self._documents.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of disk reads, cache hits and cached documents."""
+        with self._lock:
+            return {"reads": self.reads, "hits": self.hits, "documents": len(self._documents)}
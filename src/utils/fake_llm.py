@@ -0,0 +1,461 @@
+"""
+Deterministic fake LLM backend for offline load tests and benchmarks.
+
+Models listed under "fake_llm" in config.json are served by an in-process
+stand-in for the OpenAI client instead of the API (see ModelManager and
+LLMInterface._create_client). Responses depend only on the seed and the
+request, and every latency, error and 429 draw comes from a generator seeded
+by the request (and how often it has been sent before), so a run with the same
+requests replays the same way regardless of thread scheduling.
+
+Example config.json entry (a fake entry replaces a real model with the same key):
+
+    "model": {
+        "fake_llm": {
+            "gpt-o3-mini": {
+                "seed": 7,
+                "latency": {"distribution": "lognormal", "median": 0.8, "sigma": 0.5},
+                "tokens_per_second": 80,
+                "response_tokens": 120,
+                "error_rate": 0.02,
+                "rate_limit_rate": 0.05,
+                "retry_after": 1,
+                "context_limit": 131072,
+                "server_rpm": 600,
+                "rpm": 500
+            }
+        }
+    }
+
+"rpm"/"tpm" configure the client-side rate limiter as for real models;
+"server_rpm" makes the fake itself answer 429 once more requests than that
+arrive within a minute, which is what the limiter is meant to prevent.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional
+
+import httpx
+from openai import APITimeoutError, BadRequestError, InternalServerError, RateLimitError
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+FAKE_PROVIDER = "fake"
+FAKE_API_URL = "http://fake-llm.invalid/v1/chat/completions"
+# Rough OpenAI rule of thumb; the fake does not need a real tokenizer
+CHARS_PER_TOKEN = 4
+RPM_WINDOW_SECONDS = 60.0
+# Prompts asking for "a list of N ..." (e.g. question generation) get N numbered lines
+DEFAULT_LIST_PATTERN = r"\blist of (\d+)\b"
+MAX_LIST_ITEMS = 100
+
+_FILLER_WORDS = ["the", "report", "states", "that", "revenue", "growth", "risk", "margin", "and",
+                 "outlook", "remains", "stable", "according", "to", "section", "analysis"]
+
+
+def approximate_tokens(text: str) -> int:
+    """Token count the fake bills for a text (about CHARS_PER_TOKEN characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class LatencyDistribution:
+    """
+    Time to first token, in seconds.
+
+    Config forms: a number (constant), or {"distribution": "constant", "seconds": s},
+    {"distribution": "uniform", "min": a, "max": b},
+    {"distribution": "normal", "mean": m, "stddev": s} (clamped at 0), or
+    {"distribution": "lognormal", "median": m, "sigma": s}.
+    """
+
+    DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+    def __init__(self, distribution: str = "constant", **params: float):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'. Use one of {self.DISTRIBUTIONS}.")
+        required = {
+            "constant": ("seconds",),
+            "uniform": ("min", "max"),
+            "normal": ("mean", "stddev"),
+            "lognormal": ("median", "sigma"),
+        }[distribution]
+        missing = [name for name in required if name not in params]
+        if missing:
+            raise ValueError(f"Latency distribution '{distribution}' needs {', '.join(missing)}.")
+        values = {name: float(params[name]) for name in required}
+        if any(value < 0 for value in values.values()):
+            raise ValueError("Latency parameters cannot be negative.")
+        if distribution == "uniform" and values["min"] > values["max"]:
+            raise ValueError("Uniform latency needs min <= max.")
+        self.distribution = distribution
+        self.params = values
+
+    @classmethod
+    def from_config(cls, config: Any) -> "LatencyDistribution":
+        if isinstance(config, (int, float)):
+            return cls("constant", seconds=config)
+        if not isinstance(config, dict):
+            raise ValueError(f"Invalid latency setting: {config!r}")
+        config = dict(config)
+        return cls(config.pop("distribution", "constant"), **config)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.distribution == "constant":
+            return p["seconds"]
+        if self.distribution == "uniform":
+            return rng.uniform(p["min"], p["max"])
+        if self.distribution == "normal":
+            return max(0.0, rng.gauss(p["mean"], p["stddev"]))
+        if p["median"] == 0:
+            return 0.0
+        return rng.lognormvariate(math.log(p["median"]), p["sigma"])
+
+
+class FakeLLMSettings:
+    """Behaviour of a fake model, read from its config.json entry."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: Any = 0.0,
+        tokens_per_second: Optional[float] = None,
+        response_tokens: int = 64,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        context_limit: Optional[int] = None,
+        server_rpm: Optional[int] = None,
+        time_scale: float = 1.0,
+        list_pattern: Optional[str] = DEFAULT_LIST_PATTERN,
+    ):
+        """
+        Args:
+            seed: Seed for response text and all random draws.
+            latency: Time-to-first-token distribution (see LatencyDistribution).
+            tokens_per_second: Generation speed after the first token. None means the
+                               whole completion arrives with the first token.
+            response_tokens: Completion length, capped by the request's max_tokens.
+            error_rate: Fraction of requests failing with a 500 after the first-token latency.
+            rate_limit_rate: Fraction of requests rejected at once with a 429.
+            retry_after: Retry-After seconds sent with 429 responses (no header if None).
+            context_limit: Prompt plus max_tokens limit; larger requests get a 400
+                           context_length_exceeded error. None means unlimited.
+            server_rpm: Requests per rolling minute accepted before answering 429.
+            time_scale: Multiplier for every simulated delay (0 runs without sleeping).
+            list_pattern: Regex whose first group, if found in the last message, is the number
+                          of numbered lines to answer with (None disables list answers).
+        """
+        for name, rate in (("error_rate", error_rate), ("rate_limit_rate", rate_limit_rate)):
+            if not 0 <= rate <= 1:
+                raise ValueError(f"{name} must be between 0 and 1.")
+        if tokens_per_second is not None and tokens_per_second <= 0:
+            raise ValueError("tokens_per_second must be positive when set.")
+        if response_tokens < 1:
+            raise ValueError("response_tokens must be at least 1.")
+        if context_limit is not None and context_limit < 1:
+            raise ValueError("context_limit must be at least 1 when set.")
+        if server_rpm is not None and server_rpm < 1:
+            raise ValueError("server_rpm must be at least 1 when set.")
+        if time_scale < 0:
+            raise ValueError("time_scale cannot be negative.")
+        self.seed = seed
+        self.latency = latency if isinstance(latency, LatencyDistribution) else LatencyDistribution.from_config(latency)
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.context_limit = context_limit
+        self.server_rpm = server_rpm
+        self.time_scale = time_scale
+        self.list_pattern = re.compile(list_pattern) if list_pattern else None
+
+    SETTINGS_KEYS = ("seed", "latency", "tokens_per_second", "response_tokens", "error_rate",
+                     "rate_limit_rate", "retry_after", "context_limit", "server_rpm", "time_scale",
+                     "list_pattern")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FakeLLMSettings":
+        """Builds settings from a model config, ignoring keys meant for LLMInterface (name, rpm, tpm)."""
+        return cls(**{key: config[key] for key in cls.SETTINGS_KEYS if key in config})
+
+
+class _Plan(NamedTuple):
+    """What the fake does for one request: wait, then fail or return the chunks."""
+    first_token_delay: float
+    token_delay: float
+    error: Optional[Exception]
+    chunks: List[str]
+    prompt_tokens: int
+
+
+def _status_error(error_class, status_code: int, message: str, code: str, headers: Optional[Dict[str, str]] = None):
+    request = httpx.Request("POST", FAKE_API_URL)
+    response = httpx.Response(status_code, request=request, headers=headers or {})
+    body = {"message": message, "type": "fake_error", "code": code}
+    return error_class(message, response=response, body=body)
+
+
+class FakeLLMBackend:
+    """
+    Plans responses for one fake model and keeps its counters.
+
+    Shared by all clients for the model key (see get_fake_backend), so the server-side
+    RPM window and the statistics cover every interface in the process.
+    """
+
+    def __init__(self, settings: FakeLLMSettings, model_name: str = "fake-model"):
+        self.settings = settings
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._occurrences: Dict[str, int] = {}
+        self._recent_requests: List[float] = []
+        self._ids = itertools.count(1)
+        self._stats = {"requests": 0, "responses": 0, "errors": 0, "rate_limited": 0, "context_errors": 0,
+                       "prompt_tokens": 0, "completion_tokens": 0, "simulated_seconds": 0.0}
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns request/outcome counts, billed tokens and total simulated delay."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _digest(self, params: Dict[str, Any]) -> str:
+        request = {key: params.get(key) for key in ("model", "messages", "temperature", "max_tokens")}
+        return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _over_server_rpm(self, now: float) -> bool:
+        # Callers hold the lock
+        if self.settings.server_rpm is None:
+            return False
+        self._recent_requests = [t for t in self._recent_requests if now - t < RPM_WINDOW_SECONDS]
+        if len(self._recent_requests) >= self.settings.server_rpm:
+            return True
+        self._recent_requests.append(now)
+        return False
+
+    def _response_text(self, digest: str, messages: List[Dict[str, str]], num_tokens: int) -> List[str]:
+        """Deterministic completion (one word per token) built from the request's own vocabulary."""
+        rng = random.Random(f"{self.settings.seed}:{digest}")
+        vocabulary = [word for msg in messages for word in str(msg.get("content", "")).split() if word.isalpha()]
+        vocabulary = vocabulary or _FILLER_WORDS
+        words = [f"[{self.model_name}:{digest[:8]}]"] + [rng.choice(vocabulary) for _ in range(num_tokens - 1)]
+        chunks = [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+        match = self.settings.list_pattern.search(str(messages[-1].get("content", ""))) \
+            if self.settings.list_pattern and messages else None
+        num_items = min(int(match.group(1)), MAX_LIST_ITEMS, num_tokens) if match else 0
+        if num_items > 1:
+            # Start a new numbered line every len/num_items words; each item ends with a question mark
+            per_item = num_tokens // num_items
+            for item in range(num_items):
+                first = item * per_item
+                chunks[first] = ("\n" if item else "") + f"{item + 1}. " + chunks[first].lstrip()
+                last = num_tokens - 1 if item == num_items - 1 else first + per_item - 1
+                chunks[last] += "?"
+        return chunks
+
+    def plan(self, params: Dict[str, Any]) -> _Plan:
+        """Decides the outcome and timing of a chat completion request."""
+        settings = self.settings
+        messages = params.get("messages") or []
+        digest = self._digest(params)
+        prompt_tokens = sum(approximate_tokens(str(msg.get("content", ""))) for msg in messages)
+        max_tokens = params.get("max_tokens")
+        completion_tokens = min(settings.response_tokens, max_tokens) if max_tokens else settings.response_tokens
+
+        with self._lock:
+            occurrence = self._occurrences.get(digest, 0)
+            self._occurrences[digest] = occurrence + 1
+            self._stats["requests"] += 1
+            over_rpm = self._over_server_rpm(time.monotonic())
+        # Retries of the same request draw fresh outcomes, reproducibly
+        rng = random.Random(f"{settings.seed}:{digest}:{occurrence}")
+        first_token_delay = settings.latency.sample(rng) * settings.time_scale
+        token_delay = (1.0 / settings.tokens_per_second * settings.time_scale) if settings.tokens_per_second else 0.0
+        rate_limit_draw, error_draw = rng.random(), rng.random()
+
+        error = None
+        if over_rpm or rate_limit_draw < settings.rate_limit_rate:
+            headers = {"retry-after": str(settings.retry_after)} if settings.retry_after is not None else None
+            error = _status_error(RateLimitError, 429, "Fake rate limit reached.", "rate_limit_exceeded", headers)
+            first_token_delay = 0.0
+            counter = "rate_limited"
+        elif settings.context_limit is not None and prompt_tokens + (max_tokens or 0) > settings.context_limit:
+            error = _status_error(
+                BadRequestError, 400,
+                f"This model's maximum context length is {settings.context_limit} tokens. However, you requested "
+                f"{prompt_tokens + (max_tokens or 0)} tokens.", "context_length_exceeded",
+            )
+            first_token_delay = 0.0
+            counter = "context_errors"
+        elif error_draw < settings.error_rate:
+            error = _status_error(InternalServerError, 500, "Fake server error.", "server_error")
+            counter = "errors"
+        else:
+            counter = "responses"
+
+        chunks = [] if error else self._response_text(digest, messages, completion_tokens)
+        with self._lock:
+            self._stats[counter] += 1
+            self._stats["simulated_seconds"] += first_token_delay + token_delay * max(len(chunks) - 1, 0)
+            if not error:
+                self._stats["prompt_tokens"] += prompt_tokens
+                self._stats["completion_tokens"] += len(chunks)
+        return _Plan(first_token_delay, token_delay, error, chunks, prompt_tokens)
+
+    def next_id(self) -> str:
+        return f"fake-{next(self._ids)}"
+
+    def _usage(self, plan: _Plan) -> CompletionUsage:
+        return CompletionUsage(prompt_tokens=plan.prompt_tokens, completion_tokens=len(plan.chunks),
+                               total_tokens=plan.prompt_tokens + len(plan.chunks))
+
+    def completion(self, plan: _Plan) -> ChatCompletion:
+        return ChatCompletion(
+            id=self.next_id(),
+            object="chat.completion",
+            created=int(time.time()),
+            model=self.model_name,
+            choices=[Choice(index=0, finish_reason="stop",
+                            message=ChatCompletionMessage(role="assistant", content="".join(plan.chunks)))],
+            usage=self._usage(plan),
+        )
+
+    def chunk(self, completion_id: str, content: Optional[str], finish_reason: Optional[str] = None) -> ChatCompletionChunk:
+        return ChatCompletionChunk(
+            id=completion_id,
+            object="chat.completion.chunk",
+            created=int(time.time()),
+            model=self.model_name,
+            choices=[ChunkChoice(index=0, delta=ChoiceDelta(content=content), finish_reason=finish_reason)],
+        )
+
+    def usage_chunk(self, completion_id: str, plan: _Plan) -> ChatCompletionChunk:
+        """The final chunk sent with stream_options={"include_usage": True}: no choices, only usage."""
+        return ChatCompletionChunk(
+            id=completion_id,
+            object="chat.completion.chunk",
+            created=int(time.time()),
+            model=self.model_name,
+            choices=[],
+            usage=self._usage(plan),
+        )
+
+
+class _SyncCompletions:
+    def __init__(self, backend: FakeLLMBackend):
+        self._backend = backend
+
+    def _prepare(self, params: Dict[str, Any]):
+        """Plans the request; returns (plan, seconds to wait before answering, whether that times out)."""
+        plan = self._backend.plan(params)
+        delay = plan.first_token_delay
+        if not params.get("stream"):
+            delay += plan.token_delay * max(len(plan.chunks) - 1, 0)
+        timeout = params.get("timeout")
+        if timeout is not None and delay > timeout:
+            return plan, timeout, True
+        return plan, delay, False
+
+    def _finish(self, plan: _Plan, timed_out: bool, params: Dict[str, Any]):
+        if timed_out:
+            raise APITimeoutError(request=httpx.Request("POST", FAKE_API_URL))
+        if plan.error:
+            raise plan.error
+        if not params.get("stream"):
+            return self._backend.completion(plan)
+        include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+        return self._stream(plan, include_usage)
+
+    def create(self, **params: Any):
+        plan, delay, timed_out = self._prepare(params)
+        time.sleep(delay)
+        return self._finish(plan, timed_out, params)
+
+    def _stream(self, plan: _Plan, include_usage: bool) -> Iterator[ChatCompletionChunk]:
+        completion_id = self._backend.next_id()
+        for i, text in enumerate(plan.chunks):
+            if i:
+                time.sleep(plan.token_delay)
+            yield self._backend.chunk(completion_id, text)
+        yield self._backend.chunk(completion_id, None, finish_reason="stop")
+        if include_usage:
+            yield self._backend.usage_chunk(completion_id, plan)
+
+
+class _AsyncCompletions(_SyncCompletions):
+    async def create(self, **params: Any):
+        plan, delay, timed_out = self._prepare(params)
+        await asyncio.sleep(delay)
+        return self._finish(plan, timed_out, params)
+
+    async def _stream(self, plan: _Plan, include_usage: bool) -> AsyncIterator[ChatCompletionChunk]:
+        completion_id = self._backend.next_id()
+        for i, text in enumerate(plan.chunks):
+            if i:
+                await asyncio.sleep(plan.token_delay)
+            yield self._backend.chunk(completion_id, text)
+        yield self._backend.chunk(completion_id, None, finish_reason="stop")
+        if include_usage:
+            yield self._backend.usage_chunk(completion_id, plan)
+
+
+class _Chat:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class FakeOpenAIClient:
+    """Drop-in for openai.OpenAI as used by LLMInterface: client.chat.completions.create(**params)."""
+
+    def __init__(self, backend: FakeLLMBackend):
+        self.backend = backend
+        self.chat = _Chat(_SyncCompletions(backend))
+
+
+class AsyncFakeOpenAIClient:
+    """Drop-in for openai.AsyncOpenAI as used by AsyncLLMInterface."""
+
+    def __init__(self, backend: FakeLLMBackend):
+        self.backend = backend
+        self.chat = _Chat(_AsyncCompletions(backend))
+
+
+# --- Process-wide registry --- #
+
+_fake_backends: Dict[str, FakeLLMBackend] = {}
+_fake_backends_lock = threading.Lock()
+
+
+def get_fake_backend(model_key: str, model_config: Dict[str, Any]) -> FakeLLMBackend:
+    """
+    Returns the shared fake backend for a model key, creating it on first use.
+
+    The settings of the first call for a key win.
+
+    Raises:
+        ValueError: If the fake settings are invalid.
+    """
+    with _fake_backends_lock:
+        backend = _fake_backends.get(model_key)
+        if backend is None:
+            backend = FakeLLMBackend(FakeLLMSettings.from_config(model_config),
+                                     model_name=model_config.get("name", model_key))
+            _fake_backends[model_key] = backend
+        return backend
+
+
+def reset_fake_backends() -> None:
+    """Drops all shared fake backends (mainly for tests)."""
+    with _fake_backends_lock:
+        _fake_backends.clear()
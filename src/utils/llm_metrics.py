@@ -0,0 +1,297 @@
+"""
+Per-call metrics for LLM requests.
+
+LLMInterface reports one LLMCallMetrics record per call (covering all retry
+attempts; cache hits and failures included) to the callbacks in its
+metrics_callbacks list. Callers tag their calls with llm_caller(...), a context
+variable like the streaming delta callback, so records can be attributed to the
+question agent, a specific answer agent, the synthesizer, and so on.
+MetricsAggregator is a ready-made callback that sums the records per model and
+caller and exports them as JSON or in the Prometheus text format.
+
+Estimated cost needs per-model prices in config.json (USD per million tokens):
+    "gpt-o3-mini": {"name": "o3-mini", "input_price_per_1m": 1.1, "output_price_per_1m": 4.4}
+"""
+import contextvars
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+UNTAGGED_CALLER = "untagged"
+PROMETHEUS_PREFIX = "llmdebater_llm"
+
+# Tag of the component making LLM calls in the current context
+_llm_caller: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_caller", default=None)
+
+
+@contextmanager
+def llm_caller(tag: str):
+    """Within this block, LLM calls are attributed to tag (e.g. "Answer Agent 2")."""
+    token = _llm_caller.set(tag)
+    try:
+        yield
+    finally:
+        _llm_caller.reset(token)
+
+
+def get_llm_caller() -> Optional[str]:
+    """Returns the caller tag installed for the current context, if any."""
+    return _llm_caller.get()
+
+
+class LLMCallMetrics(NamedTuple):
+    """
+    Measurements of one LLM call.
+
+    queue_wait_seconds is the time spent waiting for rate limit budget and a request slot,
+    summed over attempts. ttfb_seconds is measured from the start of the final attempt's
+    request to its first streamed delta; a non-streamed completion arrives in one piece,
+    so there it is the final attempt's response time. Token counts come from the API's
+    usage report, or are estimates (tokens_estimated) when it has none.
+    """
+    model: str
+    caller: Optional[str]
+    started_at: float
+    queue_wait_seconds: float
+    ttfb_seconds: Optional[float]
+    latency_seconds: float
+    attempts: int
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    tokens_estimated: bool
+    cost_usd: Optional[float]
+    streamed: bool
+    cached: bool
+    error: Optional[str]
+
+
+MetricsCallback = Callable[[LLMCallMetrics], None]
+
+
+def estimate_cost(
+    model_settings: Dict[str, Any], prompt_tokens: Optional[int], completion_tokens: Optional[int]
+) -> Optional[float]:
+    """Cost in USD from the model's input/output_price_per_1m settings, or None if unpriced."""
+    input_price = model_settings.get("input_price_per_1m")
+    output_price = model_settings.get("output_price_per_1m")
+    if input_price is None and output_price is None:
+        return None
+    return ((prompt_tokens or 0) * (input_price or 0) + (completion_tokens or 0) * (output_price or 0)) / 1_000_000
+
+
+class CallTimer:
+    """Collects the timings of one LLM call across its attempts."""
+
+    def __init__(self, model: str, streamed: bool = False):
+        self.model = model
+        self.caller = get_llm_caller()
+        self.streamed = streamed
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._request_start: Optional[float] = None
+        self.queue_wait = 0.0
+        self.attempts = 0
+        self.ttfb: Optional[float] = None
+        self.finished = False
+
+    def request_started(self, waiting_since: float) -> None:
+        """Marks an attempt's request as sent; waiting_since is when it began queueing for budget."""
+        now = time.perf_counter()
+        self.queue_wait += now - waiting_since
+        self.attempts += 1
+        self._request_start = now
+        self.ttfb = None
+
+    def first_byte(self) -> None:
+        if self.ttfb is None and self._request_start is not None:
+            self.ttfb = time.perf_counter() - self._request_start
+
+    def finish(
+        self,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        tokens_estimated: bool = False,
+        cost_usd: Optional[float] = None,
+        cached: bool = False,
+        error: Optional[BaseException] = None,
+    ) -> LLMCallMetrics:
+        self.finished = True
+        return LLMCallMetrics(
+            model=self.model,
+            caller=self.caller,
+            started_at=self.started_at,
+            queue_wait_seconds=self.queue_wait,
+            ttfb_seconds=self.ttfb,
+            latency_seconds=time.perf_counter() - self._start,
+            attempts=self.attempts,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=tokens_estimated,
+            cost_usd=cost_usd,
+            streamed=self.streamed,
+            cached=cached,
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+        )
+
+
+def emit_metrics(callbacks: Sequence[MetricsCallback], metrics: LLMCallMetrics) -> None:
+    """Passes a record to every callback; a failing callback is logged, never raised."""
+    for callback in callbacks:
+        try:
+            callback(metrics)
+        except Exception as e:
+            logger.warning(f"LLM metrics callback {callback!r} failed: {e}")
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class _CallerStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cached = 0
+        self.attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.queue_wait_seconds = 0.0
+        self.ttfb_seconds: List[float] = []
+        self.latency_seconds: List[float] = []
+
+    def add(self, m: LLMCallMetrics) -> None:
+        self.calls += 1
+        self.errors += m.error is not None
+        self.cached += m.cached
+        self.attempts += m.attempts
+        self.prompt_tokens += m.prompt_tokens or 0
+        self.completion_tokens += m.completion_tokens or 0
+        self.cost_usd += m.cost_usd or 0.0
+        self.queue_wait_seconds += m.queue_wait_seconds
+        if m.ttfb_seconds is not None:
+            self.ttfb_seconds.append(m.ttfb_seconds)
+        self.latency_seconds.append(m.latency_seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        latencies = self.latency_seconds
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cached": self.cached,
+            "attempts": self.attempts,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "queue_wait_seconds": round(self.queue_wait_seconds, 4),
+            "ttfb_seconds_mean": round(sum(self.ttfb_seconds) / len(self.ttfb_seconds), 4) if self.ttfb_seconds else None,
+            "latency_seconds_total": round(sum(latencies), 4),
+            "latency_seconds_p50": round(_percentile(latencies, 50), 4) if latencies else None,
+            "latency_seconds_p95": round(_percentile(latencies, 95), 4) if latencies else None,
+        }
+
+
+class MetricsAggregator:
+    """
+    In-memory metrics callback: pass it in LLMInterface(metrics_callbacks=[...]).
+
+    Sums records per (model, caller); thread-safe, since agents call the LLM from
+    worker threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _CallerStats] = {}
+
+    def __call__(self, metrics: LLMCallMetrics) -> None:
+        key = (metrics.model, metrics.caller or UNTAGGED_CALLER)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _CallerStats()
+            stats.add(metrics)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-(model, caller) stats plus totals over all calls."""
+        with self._lock:
+            groups = [dict(model=model, caller=caller, **stats.as_dict())
+                      for (model, caller), stats in sorted(self._stats.items())]
+            totals = _CallerStats()
+            for stats in self._stats.values():
+                totals.calls += stats.calls
+                totals.errors += stats.errors
+                totals.cached += stats.cached
+                totals.attempts += stats.attempts
+                totals.prompt_tokens += stats.prompt_tokens
+                totals.completion_tokens += stats.completion_tokens
+                totals.cost_usd += stats.cost_usd
+                totals.queue_wait_seconds += stats.queue_wait_seconds
+                totals.ttfb_seconds.extend(stats.ttfb_seconds)
+                totals.latency_seconds.extend(stats.latency_seconds)
+        return {"callers": groups, "totals": totals.as_dict()}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Prometheus text exposition format, labelled by model and caller."""
+        with self._lock:
+            items = sorted(self._stats.items())
+            counters = [
+                ("calls_total", "LLM calls.", lambda s: s.calls),
+                ("errors_total", "LLM calls that failed after all retries.", lambda s: s.errors),
+                ("cached_total", "LLM calls served from the response cache.", lambda s: s.cached),
+                ("attempts_total", "LLM request attempts, including retries.", lambda s: s.attempts),
+                ("prompt_tokens_total", "Prompt tokens.", lambda s: s.prompt_tokens),
+                ("completion_tokens_total", "Completion tokens.", lambda s: s.completion_tokens),
+                ("cost_usd_total", "Estimated cost in USD.", lambda s: round(s.cost_usd, 6)),
+                ("queue_wait_seconds_total", "Seconds spent waiting for rate limit budget and request slots.",
+                 lambda s: round(s.queue_wait_seconds, 6)),
+            ]
+            lines = []
+            for name, help_text, value in counters:
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (model, caller), stats in items:
+                    lines.append(f"{prefix}_{name}{{{_labels(model, caller)}}} {value(stats)}")
+            for name, help_text, values in (
+                ("latency_seconds", "End-to-end LLM call latency, including queueing and retries.",
+                 lambda s: s.latency_seconds),
+                ("ttfb_seconds", "Time to first byte of the final attempt.", lambda s: s.ttfb_seconds),
+            ):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} summary")
+                for (model, caller), stats in items:
+                    observed = values(stats)
+                    labels = _labels(model, caller)
+                    if observed:
+                        for quantile in (0.5, 0.95):
+                            lines.append(f'{prefix}_{name}{{{labels},quantile="{quantile}"}} '
+                                         f"{round(_percentile(observed, quantile * 100), 6)}")
+                    lines.append(f"{prefix}_{name}_sum{{{labels}}} {round(sum(observed), 6)}")
+                    lines.append(f"{prefix}_{name}_count{{{labels}}} {len(observed)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Writes the metrics to path: Prometheus text for .prom/.txt files, JSON otherwise."""
+        content = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json() + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _labels(model: str, caller: str) -> str:
+    escape = lambda value: value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'model="{escape(model)}",caller="{escape(caller)}"'
@@ -0,0 +1,205 @@
+"""
+Client-side rate limiting for LLM requests.
+
+Providers enforce both requests-per-minute (RPM) and tokens-per-minute (TPM)
+limits; exceeding either returns HTTP 429. TokenBucketRateLimiter budgets both
+with token buckets and makes concurrent callers wait their turn (first come,
+first served) instead of failing, so parallel orchestrators stay at the
+provider ceiling without error storms.
+
+Limiters are shared process-wide per model key via get_rate_limiter(), since
+the provider limit applies to the account/model, not to a single LLMInterface.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bucket capacity expressed in seconds of refill: 60 allows a full minute's
+# quota as a burst, matching how providers account their per-minute limits.
+DEFAULT_BURST_SECONDS = 60.0
+
+
+class _Bucket:
+    """A single token bucket refilled continuously at rate_per_minute / 60 per second."""
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float, now: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe RPM/TPM limiter with fair (FIFO) queuing.
+
+    Each acquire() reserves one request and an estimated number of tokens. Callers
+    are served strictly in arrival order: a large request at the head of the queue
+    is not starved by smaller ones behind it.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = DEFAULT_BURST_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            requests_per_minute: RPM budget. None disables the request limit.
+            tokens_per_minute: TPM budget. None disables the token limit.
+            burst_seconds: Bucket capacity in seconds of refill (see DEFAULT_BURST_SECONDS).
+            clock: Monotonic time source, injectable for tests.
+        """
+        if requests_per_minute is not None and requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive when set.")
+        if tokens_per_minute is not None and tokens_per_minute <= 0:
+            raise ValueError("tokens_per_minute must be positive when set.")
+        if burst_seconds <= 0:
+            raise ValueError("burst_seconds must be positive.")
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+
+        now = clock()
+        self._requests = _Bucket(requests_per_minute, burst_seconds, now) if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute, burst_seconds, now) if tokens_per_minute else None
+
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> float:
+        """
+        Blocks until one request and `tokens` tokens fit within the budget, then reserves them.
+
+        Requests larger than the token bucket capacity are clamped to the capacity,
+        so they wait for a full bucket rather than forever.
+
+        Args:
+            tokens: Estimated tokens for the request (prompt plus expected completion).
+            timeout: Maximum seconds to wait (None waits as long as needed).
+
+        Returns:
+            Seconds spent waiting in the queue.
+
+        Raises:
+            TimeoutError: if the budget did not free up within timeout; nothing is reserved
+                          and the caller leaves the queue.
+        """
+        start = self._clock()
+        # Real time, like the condition waits (the bucket clock may be a test double)
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._queue[0] is ticket:
+                        now = self._clock()
+                        wait = self._time_until_available(tokens, now)
+                        if wait <= 0:
+                            self._consume(tokens)
+                            break
+                    if give_up_at is not None:
+                        remaining = give_up_at - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(f"Timed out after {timeout:.2f}s waiting for rate limit budget.")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._queue.remove(ticket)
+                # Wake the next caller in line (and anyone waiting on a refund)
+                self._cond.notify_all()
+
+        waited = self._clock() - start
+        if waited > 0.01:
+            logger.info(f"Rate limiter delayed request by {waited:.2f}s")
+        return waited
+
+    def record_usage(self, reserved_tokens: int, actual_tokens: int) -> None:
+        """
+        Corrects a reservation once the real token usage is known.
+
+        Unused reserved tokens are returned to the budget; overruns are charged.
+        Corrections are made against what acquire() actually took, i.e. a
+        reservation clamped to the bucket capacity.
+        """
+        if self._tokens is None:
+            return
+        with self._cond:
+            self._tokens.refill(self._clock())
+            consumed = self._consumed_tokens(reserved_tokens)
+            self._tokens.level = min(
+                self._tokens.capacity, self._tokens.level + (consumed - actual_tokens)
+            )
+            self._cond.notify_all()
+
+    def _time_until_available(self, tokens: int, now: float) -> float:
+        wait = 0.0
+        if self._requests is not None:
+            self._requests.refill(now)
+            wait = max(wait, self._requests.time_until(1))
+        if self._tokens is not None and tokens > 0:
+            self._tokens.refill(now)
+            wait = max(wait, self._tokens.time_until(min(tokens, self._tokens.capacity)))
+        return wait
+
+    def _consumed_tokens(self, tokens: int) -> int:
+        """Tokens acquire() takes from the bucket for a reservation of `tokens`."""
+        return min(max(tokens, 0), self._tokens.capacity)
+
+    def _consume(self, tokens: int) -> None:
+        if self._requests is not None:
+            self._requests.level -= 1
+        if self._tokens is not None and tokens > 0:
+            self._tokens.level -= self._consumed_tokens(tokens)
+
+
+# --- Process-wide registry --- #
+
+_rate_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    model_key: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> Optional[TokenBucketRateLimiter]:
+    """
+    Returns the shared limiter for a model key, creating it on first use.
+
+    Returns None when neither limit is configured. The limits of the first call for
+    a key win; later calls with different limits reuse the existing limiter.
+    """
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model_key)
+        if limiter is None:
+            limiter = TokenBucketRateLimiter(requests_per_minute, tokens_per_minute)
+            _rate_limiters[model_key] = limiter
+        return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Drops all shared limiters (mainly for tests)."""
+    with _rate_limiters_lock:
+        _rate_limiters.clear()
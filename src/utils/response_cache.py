@@ -0,0 +1,236 @@
+"""
+Persistent on-disk cache for LLM responses.
+
+Re-running a debate on the same reports sends many identical prompts (same
+template, same report, same question). ResponseCache stores completed responses
+in a local SQLite file keyed by a hash of the request, so re-runs and regression
+runs can skip the API call entirely. Entries expire after a TTL and the least
+recently used entries are evicted once the cache grows past its size limits.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Normalizes chat messages so that cosmetic differences don't change the cache key.
+
+    Only role and content are kept; line endings are unified and surrounding
+    whitespace is stripped from the content.
+    """
+    normalized = []
+    for msg in messages:
+        content = str(msg.get("content", "")).replace("\r\n", "\n").strip()
+        normalized.append({"role": str(msg.get("role", "")), "content": content})
+    return normalized
+
+
+def make_cache_key(
+    model_name: str,
+    messages: List[Dict[str, Any]],
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Builds the cache key for a chat completion request.
+
+    Args:
+        model_name: The API model name the request is sent to.
+        messages: The chat messages (normalized before hashing).
+        temperature: The temperature sent to the API (None if omitted).
+        max_tokens: The max_tokens sent to the API (None if omitted).
+
+    Returns:
+        A hex SHA-256 digest identifying the request.
+    """
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "messages": normalize_messages(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LLM response cache with TTL and size-based (LRU) eviction.
+
+    Safe to share between threads and between LLMInterface instances. Hit, miss,
+    store and eviction counters are kept per instance and exposed via stats().
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path: Location of the SQLite file. Parent directories are created.
+            ttl_seconds: Entries older than this are treated as misses and removed.
+                         None keeps entries forever.
+            max_entries: Maximum number of cached responses. None means unlimited.
+            max_bytes: Maximum total size of cached responses (UTF-8 bytes). None means unlimited.
+        """
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive when set.")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1 when set.")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1 when set.")
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # A cache can tolerate losing the last few writes on power loss, so trade
+        # per-commit fsyncs for throughput.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for key, or None on a miss (including expired entries).
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return response
+
+    def put(self, key: str, response: str, model_name: str = "") -> None:
+        """
+        Stores a response, then evicts expired and least recently used entries as needed.
+        """
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, size, now, now),
+            )
+            self.stores += 1
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Removes expired entries, then LRU entries until size limits hold. Caller holds the lock."""
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        if self.max_entries is not None:
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+        if self.max_bytes is not None:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_access ASC"
+                ).fetchall()
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes every cached response (counters are kept)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/store/eviction counters plus the current entry count and size.
+        """
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._conn.close()
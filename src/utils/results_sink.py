@@ -0,0 +1,161 @@
+"""
+Pluggable sinks for debate results.
+
+The orchestrator builds one structured record per completed question (question,
+per-round responses, final answer, timings and token counts) and hands it to a
+ResultsSink. JSONLResultsSink stores the records as-is for analytics;
+MarkdownResultsSink renders them into the human-readable debate log. Both keep
+one buffered file handle open for the whole run and flush after each record.
+
+Record layout:
+    {
+        "type": "question",
+        "index": 1,
+        "question": "...",
+        "rounds": [{"round": 0, "seconds": 1.2,
+                    "responses": [{"agent": "Answer Agent V3 1", "response": "...", "tokens": 87}]}],
+        "final_answer": "...",
+        "timings": {"synthesis_seconds": 2.1, "total_seconds": 9.4},
+        "tokens": {"responses": 640, "final_answer": 210}
+    }
+"""
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsSink(ABC):
+    """
+    Receives the results of a run: open() once with the run settings, write() once per
+    completed question record, close() at the end of the run. close() may be called
+    more than once, and without a prior open() if the run stopped early.
+    """
+
+    def open(self, run_info: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, record: Dict[str, Any]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _FileResultsSink(ResultsSink):
+    """Base for sinks that write to a single file kept open for the run."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self, run_info: Dict[str, Any]) -> None:
+        """Creates (or truncates) the output file and writes the run header."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(self._render_header(run_info))
+            self._file.flush()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError(f"{type(self).__name__}.open() must be called before write().")
+            self._file.write(self._render_record(record))
+            # One flush per question keeps results on disk if the run dies
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @abstractmethod
+    def _render_header(self, run_info: Dict[str, Any]) -> str:
+        pass
+
+    @abstractmethod
+    def _render_record(self, record: Dict[str, Any]) -> str:
+        pass
+
+
+class JSONLResultsSink(_FileResultsSink):
+    """Writes a {"type": "run", ...} header line, then one JSON line per question record."""
+
+    def _render_header(self, run_info: Dict[str, Any]) -> str:
+        return json.dumps({"type": "run", **run_info}, ensure_ascii=False) + "\n"
+
+    def _render_record(self, record: Dict[str, Any]) -> str:
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class MarkdownResultsSink(_FileResultsSink):
+    """Renders question records as the markdown debate log."""
+
+    def _render_header(self, run_info: Dict[str, Any]) -> str:
+        return (
+            f"# Multi-Round Debate Log (V3) for {os.path.basename(run_info.get('question_doc', ''))}\n"
+            f"* Max Rounds: {run_info.get('max_debate_rounds')}\n"
+            f"* Answer Agents: {run_info.get('answer_agents')}\n\n"
+        )
+
+    def _render_record(self, record: Dict[str, Any]) -> str:
+        return render_markdown_record(record)
+
+
+def render_markdown_record(record: Dict[str, Any]) -> str:
+    """Renders one question record as a markdown block (question, history by round, final answer)."""
+    rounds = record.get("rounds", [])
+    num_entries = sum(len(r["responses"]) for r in rounds)
+    parts: List[str] = [f"## Question:\n{record['question']}\n\n", f"### Debate History ({num_entries} entries):\n\n"]
+    if not num_entries:
+        parts.append("(No history recorded)\n\n")
+    for round_record in rounds:
+        parts.append(f"\n#### Round {round_record['round']}:\n\n")
+        for entry in round_record["responses"]:
+            parts.append(f"> **{entry['agent']}:**\n\n")
+            # Quote the response for clarity
+            parts.append("> " + entry["response"].replace("\n", "\n> ") + "\n\n")
+            parts.append(">\n\n") # Small separator
+    parts.append("\n") # Space before final answer
+    parts.append(f"### Final Answer (Synthesized V3):\n{record['final_answer']}\n\n")
+    parts.append("---\n\n")
+    return "".join(parts)
+
+
+class MultiResultsSink(ResultsSink):
+    """Forwards every call to several sinks (e.g. markdown and JSONL)."""
+
+    def __init__(self, sinks: List[ResultsSink]):
+        self.sinks = list(sinks)
+
+    def open(self, run_info: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            sink.open(run_info)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            sink.write(record)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def build_results_sink(markdown_path: str, jsonl_path: Optional[str] = None) -> ResultsSink:
+    """Returns the markdown sink for markdown_path, plus a JSONL sink if jsonl_path is given."""
+    markdown_sink = MarkdownResultsSink(markdown_path)
+    if jsonl_path is None:
+        return markdown_sink
+    return MultiResultsSink([markdown_sink, JSONLResultsSink(jsonl_path)])
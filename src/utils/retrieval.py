@@ -0,0 +1,204 @@
+"""
+Passage retrieval for answer agents.
+
+Embedding a whole report in every prompt is the main driver of prompt size.
+This module splits a document into token-bounded chunks once, indexes them with
+BM25, and selects the top-k passages for a question under a token budget, so
+agents can send only the relevant parts of a long report.
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.token_utils import check_token_limit, estimate_token_count, estimate_token_counts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_TOKENS = 300
+DEFAULT_TOP_K = 8
+DEFAULT_CONTEXT_TOKEN_BUDGET = 4000
+PASSAGE_SEPARATOR = "\n\n[...]\n\n"
+
+# Words for Latin-script text; single characters for CJK text (no spaces to split on)
+_TOKEN_PATTERN = re.compile(r"[一-鿿㐀-䶿]|[^\W_]+", re.UNICODE)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。！？])\s+")
+
+# Small set of very common English words that carry no retrieval signal
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "what which who how why when where with does do did".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word/CJK-character terms used for BM25 scoring."""
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def chunk_text(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS, model_name: str = "o3-mini") -> List[str]:
+    """
+    Splits text into chunks of at most ~max_tokens, on paragraph boundaries where possible.
+
+    Paragraphs (blank-line separated) are packed greedily; a paragraph that is too
+    large by itself is split on sentence boundaries, then on words as a last resort.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1.")
+    if not text or not text.strip():
+        return []
+
+    def tokens(piece: str) -> int:
+        return max(estimate_token_count(piece, model_name=model_name), 0)
+
+    # Break into pieces that each fit the budget (paragraphs are counted in one batch)
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    pieces: List[Tuple[str, int]] = []
+    for paragraph, count in zip(paragraphs, estimate_token_counts(paragraphs, model_name=model_name)):
+        if count <= max_tokens:
+            pieces.append((paragraph, count))
+            continue
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            count = tokens(sentence)
+            if count <= max_tokens:
+                pieces.append((sentence, count))
+                continue
+            words = sentence.split()
+            # Rough split for very long sentences/tables; pieces are re-measured below
+            step = max(1, len(words) * max_tokens // (count + 1))
+            for start in range(0, len(words), step):
+                part = " ".join(words[start:start + step])
+                pieces.append((part, tokens(part)))
+
+    # Pack pieces into chunks
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece, count in pieces:
+        if current and current_tokens + count > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += count
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index over a list of chunks.
+
+    Postings are kept per term, so scoring a query only touches chunks that
+    contain at least one query term.
+    """
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75, model_name: str = "o3-mini"):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        # Token size of each chunk, for budgeted passage selection
+        self.chunk_tokens = [max(c, 0) for c in estimate_token_counts(chunks, model_name=model_name)]
+
+        self._doc_lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for idx, chunk in enumerate(chunks):
+            terms = tokenize(chunk)
+            self._doc_lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                self._postings.setdefault(term, []).append((idx, freq))
+
+        self._avg_length = (sum(self._doc_lengths) / len(chunks)) if chunks else 0.0
+        n = len(chunks)
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[Tuple[int, float]]:
+        """
+        Returns up to top_k (chunk index, score) pairs, best first. Chunks without any
+        query term are not returned.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for idx, freq in postings:
+                norm = 1 - self.b + self.b * (self._doc_lengths[idx] / self._avg_length if self._avg_length else 1)
+                scores[idx] = scores.get(idx, 0.0) + idf * freq * (self.k1 + 1) / (freq + self.k1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
+
+
+# --- Index cache: each document is chunked and indexed once per process --- #
+
+_MAX_CACHED_INDEXES = 32
+_index_cache: "OrderedDict[Tuple[str, int, str], BM25Index]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_index(document: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS, model_name: str = "o3-mini") -> BM25Index:
+    """Returns the (cached) BM25 index for a document's content."""
+    key = (hashlib.sha256(document.encode("utf-8")).hexdigest(), chunk_tokens, model_name)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    # Build outside the lock; a rare duplicate build is harmless
+    index = BM25Index(chunk_text(document, max_tokens=chunk_tokens, model_name=model_name), model_name=model_name)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > _MAX_CACHED_INDEXES:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def select_passages(
+    document: str,
+    query: str,
+    top_k: int = DEFAULT_TOP_K,
+    token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    model_name: str = "o3-mini",
+) -> Optional[str]:
+    """
+    Builds a reduced context from the passages of document most relevant to query.
+
+    Takes the top_k BM25 passages that fit within token_budget and joins them in
+    document order.
+
+    Returns:
+        The selected passages, the whole document if it already fits the budget, or
+        None if no passage matches the query (callers should fall back to the document).
+    """
+    if top_k < 1:
+        raise ValueError("top_k must be at least 1.")
+    if not document:
+        return document
+    fits, _ = check_token_limit(document, token_budget, model_name=model_name)
+    if fits:
+        return document
+
+    index = get_index(document, chunk_tokens=chunk_tokens, model_name=model_name)
+    selected: List[int] = []
+    used_tokens = 0
+    for idx, _score in index.search(query, top_k=top_k):
+        count = index.chunk_tokens[idx]
+        if used_tokens + count > token_budget:
+            continue
+        selected.append(idx)
+        used_tokens += count
+    if not selected:
+        return None
+
+    logger.info(f"Retrieved {len(selected)} passages ({used_tokens} tokens) out of {len(index.chunks)} chunks.")
+    return PASSAGE_SEPARATOR.join(index.chunks[idx] for idx in sorted(selected))
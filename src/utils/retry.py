@@ -0,0 +1,209 @@
+"""
+Retry helpers for transient LLM API failures.
+
+A single 5xx, timeout or 429 should not cost an agent its answer. RetryPolicy
+describes how often to retry and how long to back off (exponential with full
+jitter, honouring Retry-After headers), and call_with_retry /
+async_call_with_retry run a request under that policy and an optional per-call
+deadline.
+"""
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes worth retrying: request timeout, conflict, rate limit, server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class DeadlineExceededError(TimeoutError):
+    "Raised when a call's deadline passes before a response could be obtained."
+    pass
+
+
+class RetryPolicy:
+    """
+    Retry settings for LLM calls.
+
+    Backoff for attempt n (0-based) is drawn uniformly from
+    [0, min(max_backoff, initial_backoff * multiplier ** n)] ("full jitter"), unless the
+    server sent a Retry-After header, which is honoured (capped at max_backoff).
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Args:
+            max_retries: Retries after the first attempt (0 disables retrying).
+            initial_backoff: Base delay in seconds before the first retry.
+            max_backoff: Upper bound for any single delay, including Retry-After.
+            multiplier: Growth factor of the delay per attempt.
+            jitter: Randomize delays to avoid synchronized retries from parallel agents.
+            deadline: Default per-call time budget in seconds, covering all attempts
+                      and backoff. None means no deadline.
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries cannot be negative.")
+        if initial_backoff < 0 or max_backoff < 0:
+            raise ValueError("Backoff delays cannot be negative.")
+        if multiplier < 1:
+            raise ValueError("multiplier must be at least 1.")
+        if deadline is not None and deadline <= 0:
+            raise ValueError("deadline must be positive when set.")
+
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Returns the delay in seconds before retry number `attempt` (0-based)."""
+        retry_after = retry_after_seconds(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff, self.initial_backoff * (self.multiplier ** attempt))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an exception from the OpenAI client is worth retrying."""
+    if isinstance(error, (APITimeoutError, APIConnectionError, RateLimitError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Extracts the server-requested delay from Retry-After / retry-after-ms headers.
+
+    Returns None if the error carries no usable header.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000.0)
+        except (TypeError, ValueError):
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        pass
+    try:
+        # HTTP-date form, e.g. "Wed, 21 Oct 2015 07:28:00 GMT"
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _next_delay(
+    policy: RetryPolicy, attempt: int, error: BaseException, deadline_at: Optional[float], now: float
+) -> Optional[float]:
+    """Delay before the next attempt, or None if the error should be raised instead."""
+    if attempt >= policy.max_retries or not is_retryable(error):
+        return None
+    delay = policy.backoff(attempt, error)
+    if deadline_at is not None and now + delay >= deadline_at:
+        return None
+    return delay
+
+
+def call_with_retry(
+    func: Callable[[Optional[float]], Any],
+    policy: RetryPolicy,
+    deadline: Optional[float] = None,
+    sleep: Optional[Callable[[float], None]] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> Any:
+    """
+    Calls func(timeout) until it succeeds, retrying transient errors per the policy.
+
+    Args:
+        func: The request. Receives the seconds left before the deadline (or None),
+              to use as its own request timeout.
+        policy: Retry settings.
+        deadline: Per-call time budget in seconds, overriding policy.deadline.
+        sleep: Sleep function, injectable for tests (defaults to time.sleep).
+        clock: Monotonic time source, injectable for tests.
+
+    Returns:
+        The result of the first successful call.
+
+    Raises:
+        The last error if it is not retryable, retries are exhausted or the next
+        backoff would pass the deadline; DeadlineExceededError if the deadline
+        passed before an attempt could start.
+    """
+    budget = deadline if deadline is not None else policy.deadline
+    deadline_at = clock() + budget if budget is not None else None
+    attempt = 0
+    while True:
+        remaining = None
+        if deadline_at is not None:
+            remaining = deadline_at - clock()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"LLM call deadline of {budget}s exceeded.")
+        try:
+            return func(remaining)
+        except Exception as e:
+            delay = _next_delay(policy, attempt, e, deadline_at, clock())
+            if delay is None:
+                raise
+            attempt += 1
+            logger.warning(f"Transient LLM error ({e}); retry {attempt}/{policy.max_retries} in {delay:.2f}s")
+            (sleep or time.sleep)(delay)
+
+
+async def async_call_with_retry(
+    func: Callable[[Optional[float]], Awaitable[Any]],
+    policy: RetryPolicy,
+    deadline: Optional[float] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> Any:
+    """
+    Async counterpart of call_with_retry; backs off with asyncio.sleep.
+    """
+    budget = deadline if deadline is not None else policy.deadline
+    deadline_at = clock() + budget if budget is not None else None
+    attempt = 0
+    while True:
+        remaining = None
+        if deadline_at is not None:
+            remaining = deadline_at - clock()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"LLM call deadline of {budget}s exceeded.")
+        try:
+            return await func(remaining)
+        except Exception as e:
+            delay = _next_delay(policy, attempt, e, deadline_at, clock())
+            if delay is None:
+                raise
+            attempt += 1
+            logger.warning(f"Transient LLM error ({e}); retry {attempt}/{policy.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
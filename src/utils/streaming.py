@@ -0,0 +1,181 @@
+"""
+Streaming support for surfacing LLM output before a completion finishes.
+
+Agents call LLMInterface.generate_chat_response and only see the final text, so
+streaming is threaded through implicitly: stream_call() runs an agent call in a
+background thread with a delta callback installed (via a context variable),
+LLMInterface streams the completion and reports each delta to that callback,
+and stream_call() yields the growing text as PartialMessage events. Agents and
+their return values stay unchanged.
+
+BackgroundGenerator runs a whole orchestrator generator on a worker thread, so a
+UI can drain its events in batches instead of advancing it one item per redraw.
+"""
+import contextvars
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+# Callback receiving each text delta of LLM calls made in the current context
+_delta_callback: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "llm_delta_callback", default=None
+)
+
+_DONE = object()
+
+
+class PartialMessage(str):
+    """
+    An in-progress message: the text received so far for a speaker.
+
+    Being a str, it is displayed like any other message by consumers that don't
+    know about streaming. Each run of partial events for a speaker is followed by
+    that speaker's complete (non-partial) message, or by a System error message.
+    """
+
+    def __new__(cls, text: str, delta: str = ""):
+        obj = super().__new__(cls, text)
+        obj.delta = delta
+        return obj
+
+
+@contextmanager
+def stream_deltas(callback: Optional[Callable[[str], None]]):
+    """
+    Within this block, LLMInterface streams completions and passes each delta to callback.
+
+    Passing None disables streaming for the block (e.g. for intermediate calls whose
+    output should not be shown).
+    """
+    token = _delta_callback.set(callback)
+    try:
+        yield
+    finally:
+        _delta_callback.reset(token)
+
+
+def get_delta_callback() -> Optional[Callable[[str], None]]:
+    """Returns the delta callback installed for the current context, if any."""
+    return _delta_callback.get()
+
+
+def stream_call(speaker: str, func: Callable[..., Any], *args: Any) -> Iterator[Tuple[str, PartialMessage]]:
+    """
+    Runs func(*args) in a background thread, yielding (speaker, PartialMessage) for
+    every streamed delta, and returns func's result (or raises its exception).
+
+    Use with `result = yield from stream_call(...)` inside an orchestrator generator.
+    """
+    events: "queue.Queue[Any]" = queue.Queue()
+    outcome = {}
+
+    def worker():
+        try:
+            with stream_deltas(events.put):
+                outcome["result"] = func(*args)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            events.put(_DONE)
+
+    # The worker runs in a copy of this context, keeping context variables set by the caller
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(worker,), name=f"stream-{speaker}", daemon=True)
+    thread.start()
+
+    text = ""
+    while True:
+        delta = events.get()
+        if delta is _DONE:
+            break
+        text += delta
+        yield speaker, PartialMessage(text, delta=delta)
+    thread.join()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def call_maybe_streaming(
+    stream: bool, speaker: str, func: Callable[..., Any], *args: Any
+) -> Iterator[Tuple[str, PartialMessage]]:
+    """
+    Generator helper: stream_call() when stream is True, otherwise a plain call of func(*args).
+
+    Lets orchestrators write `result = yield from call_maybe_streaming(...)` once for both modes.
+    """
+    if not stream:
+        return func(*args)
+    return (yield from stream_call(speaker, func, *args))
+
+
+class BackgroundGenerator:
+    """
+    Iterates a generator on a daemon thread and queues its items for another thread
+    (e.g. a Streamlit script run) to collect with drain(). The generator runs in a
+    copy of the creating context, like stream_call's worker.
+    """
+
+    def __init__(self, generator: Iterator[Any], name: str = "background-generator"):
+        self.error: Optional[BaseException] = None
+        self._events: "queue.Queue[Any]" = queue.Queue()
+        self._stop_requested = threading.Event()
+        self._finished = False
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._run, generator), name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self, generator: Iterator[Any]) -> None:
+        try:
+            for item in generator:
+                self._events.put(item)
+                if self._stop_requested.is_set():
+                    close = getattr(generator, "close", None)
+                    if callable(close):
+                        close()
+                    break
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._events.put(_DONE)
+
+    def drain(self, max_items: Optional[int] = None, timeout: Optional[float] = 0) -> List[Any]:
+        """
+        Returns the items produced since the last drain (at most max_items), in order.
+
+        Waits up to timeout seconds for the first item (0 = don't wait, None = wait
+        indefinitely); returns an empty list if none arrived or the generator is done.
+        """
+        items: List[Any] = []
+        if self._finished:
+            return items
+        try:
+            item = self._events.get(block=timeout != 0, timeout=timeout)
+        except queue.Empty:
+            return items
+        while True:
+            if item is _DONE:
+                self._finished = True
+                break
+            items.append(item)
+            if max_items is not None and len(items) >= max_items:
+                break
+            try:
+                item = self._events.get_nowait()
+            except queue.Empty:
+                break
+        return items
+
+    @property
+    def done(self) -> bool:
+        """True once the generator has finished (or failed; see error) and every item was drained."""
+        return self._finished
+
+    def stop(self) -> None:
+        """Asks the worker to close the generator after the item it is producing."""
+        self._stop_requested.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
@@ -1,5 +1,14 @@
 import tiktoken
 import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.utils.tracing import traced
 
 # TODO: Confirm the correct encoding for o3-mini. Using cl100k_base as a default.
 # Other possibilities might include 'o200k_base' if it's based on newer models.
@@ -12,36 +21,70 @@ MODEL_TO_ENCODING = {
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO) # Basic logging setup
 
-def estimate_token_count(text: str, model_name: str = "o3-mini") -> int:
-    """
-    Estimates the number of tokens in a given text string using tiktoken.
+# Default thread count for batch encoding (tiktoken releases the GIL while encoding)
+DEFAULT_BATCH_THREADS = 8
 
-    Args:
-        text: The text string to estimate tokens for.
-        model_name: The name of the model (used to determine the correct encoding).
-                    Defaults to "o3-mini".
+# Encodings are loaded lazily, once per process
+_encodings: Dict[str, "tiktoken.Encoding"] = {}
+_encodings_lock = threading.Lock()
 
-    Returns:
-        The estimated number of tokens. Returns -1 on error, 0 if text is empty.
+
+def _load_encoding(encoding_name: str) -> "tiktoken.Encoding":
+    """Returns the cached Encoding for encoding_name, loading it on first use. Raises ValueError if unknown."""
+    encoding = _encodings.get(encoding_name)
+    if encoding is None:
+        with _encodings_lock:
+            encoding = _encodings.get(encoding_name)
+            if encoding is None:
+                encoding = tiktoken.get_encoding(encoding_name)
+                _encodings[encoding_name] = encoding
+    return encoding
+
+
+def get_encoding(model_name: str = "o3-mini") -> Optional["tiktoken.Encoding"]:
     """
-    if not text:
-        return 0
+    Returns the (cached) tiktoken Encoding for a model, falling back to DEFAULT_ENCODING.
 
+    Returns:
+        The Encoding, or None if not even the default encoding can be loaded.
+    """
     encoding_name = MODEL_TO_ENCODING.get(model_name, DEFAULT_ENCODING)
     try:
         # Attempt to get the encoding for the specified model or default
-        encoding = tiktoken.get_encoding(encoding_name)
+        return _load_encoding(encoding_name)
     except ValueError:
         logger.warning(
             f"Encoding '{encoding_name}' not found for model '{model_name}'. "
             f"Falling back to default '{DEFAULT_ENCODING}'."
         )
         try:
-            encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            return _load_encoding(DEFAULT_ENCODING)
         except ValueError:
             logger.error(f"Default encoding '{DEFAULT_ENCODING}' not found. "
                          "Tiktoken might be improperly installed or configured.")
-            return -1 # Indicate critical setup error
+            return None
+
+
+@traced(category="tokens")
+def estimate_token_count(text: str, model_name: str = "o3-mini") -> int:
+    """
+    Estimates the number of tokens in a given text string using tiktoken.
+
+    Args:
+        text: The text string to estimate tokens for.
+        model_name: The name of the model (used to determine the correct encoding).
+                    Defaults to "o3-mini".
+
+    Returns:
+        The estimated number of tokens. Returns -1 on error, 0 if text is empty.
+    """
+    if not text:
+        return 0
+
+    encoding_name = MODEL_TO_ENCODING.get(model_name, DEFAULT_ENCODING)
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return -1 # Indicate critical setup error
 
     try:
         token_integers = encoding.encode(text)
@@ -51,6 +94,289 @@ def estimate_token_count(text: str, model_name: str = "o3-mini") -> int:
         logger.error(f"Error encoding text with '{encoding_name}': {e}", exc_info=True)
         return -1 # Indicate encoding error
 
+def estimate_token_counts(
+    texts: List[str], model_name: str = "o3-mini", num_threads: int = DEFAULT_BATCH_THREADS
+) -> List[int]:
+    """
+    Counts the tokens of many strings at once with tiktoken's multi-threaded batch encoder.
+
+    Special-token markers (e.g. "<|endoftext|>") are counted as ordinary text.
+
+    Args:
+        texts: The strings to count. Empty or None entries count as 0.
+        model_name: The name of the model (used to determine the correct encoding).
+        num_threads: Number of encoder threads.
+
+    Returns:
+        One token count per input text, in order; all -1 on error.
+    """
+    if not texts:
+        return []
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return [-1] * len(texts)
+    try:
+        batch = encoding.encode_ordinary_batch([text or "" for text in texts], num_threads=num_threads)
+        return [len(tokens) for tokens in batch]
+    except Exception as e:
+        logger.error(f"Error batch encoding {len(texts)} texts for model '{model_name}': {e}", exc_info=True)
+        return [-1] * len(texts)
+
+
+# --- Approximate token estimator --- #
+# For budget pre-checks an exact BPE encode is overkill: estimate_token_count on a
+# 128k-token prompt encodes ~500 KB of text. approximate_token_count instead counts
+# a few character classes with C-level regexes, and on long texts only inspects a
+# fixed number of evenly spaced windows, so its cost is bounded regardless of size.
+#
+# The estimate mirrors cl100k_base pre-tokenization: every word piece, group of up
+# to three digits, punctuation run and whitespace run is (about) one token. Text
+# where that undercounts gets extra margin rather than a fitted weight: non-ASCII
+# characters are bounded by their UTF-8 bytes (byte-level BPE never needs more
+# tokens than bytes), and mixed-case runs, capitals, long words, long alphanumeric
+# runs, punctuation and whitespace runs and vowel-poor (random-looking) letters add
+# margin per character. The bounds were checked against data/reports (paragraphs,
+# windows, whole and concatenated documents) and against numeric tables, code,
+# URLs, hex, base64, UUIDs, random letters and punctuation, long whitespace runs,
+# Cyrillic, Latin accents, kana, Hangul, CJK and emoji.
+_APPROX_CHUNK = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d{1,3}|[^\w\s]+|\s{2,}")
+_APPROX_SPACED_DIGIT = re.compile(r"\s\d")  # A space before a number is a token of its own
+_APPROX_CASE_CHANGE = re.compile(r"[a-z][A-Z]")
+_APPROX_CAPS = re.compile(r"[A-Z]{4,}")
+_APPROX_LONG_WORD = re.compile(r"[A-Za-z]{13,}")
+# Identifiers, hashes and encoded blobs: BPE splits these into pieces of ~1.3-3 characters
+_APPROX_LONG_RUN = re.compile(r"[A-Za-z0-9]{24,}")
+_APPROX_WHITESPACE_RUN = re.compile(r"\s{2,}")
+_APPROX_PUNCT_RUN = re.compile(r"[^\w\s]{2,}")
+_APPROX_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_APPROX_LOWERCASE = "abcdefghijklmnopqrstuvwxyz"
+_APPROX_VOWELS = "aeiouy"
+_ASCII_BYTES = bytes(range(128))
+_NON_ASCII_BYTES = bytes(range(128, 256))
+# Tokens per character (CJK) or UTF-8 byte (other non-ASCII): estimate and margin.
+# CJK prose is ~1.1 tokens per character, rare characters up to 3 (their byte count).
+_APPROX_CJK_WEIGHTS = (1.1, 1.9)
+_APPROX_NON_ASCII_WEIGHTS = (0.35, 0.65)
+# Extra margin per occurrence or character of text the chunk count undercounts
+_APPROX_EXTRA_MARGIN = {
+    "case_changes": 1.5, "caps_chars": 0.6, "long_word_chars": 0.3,
+    "punct_extra_chars": 0.5, "long_punct_chars": 0.5, "repeated_punct_chars": 0.125,
+    "long_run_chars": 0.75, "whitespace_changes": 1.0, "whitespace_chars": 0.125,
+}
+# English letters are ~40% vowels; below _APPROX_MIN_VOWEL_SHARE each missing vowel adds margin
+_APPROX_MIN_VOWEL_SHARE = 0.33
+_APPROX_VOWEL_DEFICIT_MARGIN = 5.0
+# Error margin: relative + sqrt + constant terms, plus extra relative slack when sampling
+_APPROX_MARGIN = (0.07, 3.0, 10.0)
+_APPROX_SAMPLING_MARGIN = 0.04
+# Texts longer than this are estimated from _APPROX_SAMPLES windows of _APPROX_WINDOW chars
+_APPROX_SAMPLE_THRESHOLD = 16 * 1024
+_APPROX_SAMPLES = 16
+_APPROX_WINDOW = 1024
+
+
+class TokenEstimate(NamedTuple):
+    """An approximate token count and its error margin (the exact count lies within estimate ± margin)."""
+    estimate: int
+    margin: int
+
+    @property
+    def upper_bound(self) -> int:
+        return self.estimate + self.margin
+
+    @property
+    def lower_bound(self) -> int:
+        return max(0, self.estimate - self.margin)
+
+
+def _approximate_ascii(text: str) -> Tuple[float, float]:
+    """Token estimate and extra margin of ASCII text."""
+    estimate = len(_APPROX_CHUNK.findall(text)) + len(_APPROX_SPACED_DIGIT.findall(text))
+    extra = _APPROX_EXTRA_MARGIN
+    margin = (
+        extra["case_changes"] * len(_APPROX_CASE_CHANGE.findall(text))
+        + extra["caps_chars"] * sum(map(len, _APPROX_CAPS.findall(text)))
+        + extra["long_word_chars"] * sum(map(len, _APPROX_LONG_WORD.findall(text)))
+        + extra["long_run_chars"] * sum(map(len, _APPROX_LONG_RUN.findall(text)))
+    )
+    for run in _APPROX_WHITESPACE_RUN.findall(text):
+        # Counted as one chunk, but cl100k merges at most ~8 repeats of a whitespace
+        # character per token, and a change of character (e.g. "\r\n") starts a new one
+        changes = sum(map(str.__ne__, run, run[1:]))
+        margin += extra["whitespace_changes"] * changes + extra["whitespace_chars"] * len(run)
+    for run in _APPROX_PUNCT_RUN.findall(text):
+        if len(run) >= 4 and 5 * max(map(run.count, set(run))) >= 4 * len(run):
+            # Mostly one character, e.g. a markdown rule: many characters per token
+            margin += extra["repeated_punct_chars"] * len(run)
+            continue
+        margin += extra["punct_extra_chars"] * (len(run) - 1)
+        if len(run) >= 4:
+            margin += extra["long_punct_chars"] * len(run)
+    lowercase = sum(map(text.count, _APPROX_LOWERCASE))
+    vowels = sum(map(text.count, _APPROX_VOWELS))
+    margin += _APPROX_VOWEL_DEFICIT_MARGIN * max(0.0, _APPROX_MIN_VOWEL_SHARE * lowercase - vowels)
+    return estimate, margin
+
+
+def approximate_token_count(text: str) -> TokenEstimate:
+    """
+    Estimates the cl100k_base token count of text from character statistics, without encoding.
+
+    ASCII text up to _APPROX_SAMPLE_THRESHOLD characters is fully scanned; longer text is
+    estimated from a fixed number of evenly spaced windows, so the cost is bounded.
+    Non-ASCII characters are always counted in full.
+
+    Returns:
+        A TokenEstimate; use upper_bound for budget checks.
+    """
+    if not text:
+        return TokenEstimate(0, 0)
+
+    cjk_chars = other_bytes = 0
+    if not text.isascii():
+        utf8 = text.encode("utf-8")
+        non_ascii = utf8.translate(None, _ASCII_BYTES)
+        cjk_chars = len(_APPROX_CJK.findall(non_ascii.decode("utf-8")))
+        other_bytes = len(non_ascii) - 3 * cjk_chars  # CJK characters are 3 bytes in UTF-8
+        text = utf8.translate(None, _NON_ASCII_BYTES).decode("ascii")
+
+    relative, sqrt_term, constant = _APPROX_MARGIN
+    if len(text) <= _APPROX_SAMPLE_THRESHOLD:
+        raw, extra_margin = _approximate_ascii(text)
+    else:
+        step = (len(text) - _APPROX_WINDOW) / (_APPROX_SAMPLES - 1)
+        raw = extra_margin = 0.0
+        for i in range(_APPROX_SAMPLES):
+            window_raw, window_margin = _approximate_ascii(text[int(i * step):int(i * step) + _APPROX_WINDOW])
+            raw += window_raw
+            extra_margin += window_margin
+        scale = len(text) / (_APPROX_SAMPLES * _APPROX_WINDOW)
+        raw *= scale
+        extra_margin *= scale
+        relative += _APPROX_SAMPLING_MARGIN
+
+    margin = relative * raw + sqrt_term * math.sqrt(raw) + constant + extra_margin
+    for count, (weight, weight_margin) in ((cjk_chars, _APPROX_CJK_WEIGHTS), (other_bytes, _APPROX_NON_ASCII_WEIGHTS)):
+        raw += weight * count
+        margin += weight_margin * count
+    return TokenEstimate(max(1, round(raw)), math.ceil(margin))
+
+
+def check_token_limit(text: str, limit: int, model_name: str = "o3-mini") -> Tuple[bool, int]:
+    """
+    Checks whether text fits within limit tokens, encoding exactly only when needed.
+
+    The approximate estimate decides when its error bounds lie entirely on one side
+    of the limit; only texts whose estimate lands near the limit are encoded.
+
+    Returns:
+        (fits, tokens): tokens is the exact count if the text was encoded, otherwise the
+        approximate upper bound (when it fits) or lower bound (when it does not).
+        On encoding errors, (False, -1).
+    """
+    approx = approximate_token_count(text)
+    if approx.upper_bound <= limit:
+        return True, approx.upper_bound
+    if approx.lower_bound > limit:
+        return False, approx.lower_bound
+    exact = estimate_token_count(text, model_name=model_name)
+    if exact == -1:
+        return False, -1
+    return exact <= limit, exact
+
+
+# --- Segment token cache --- #
+# Prompts are built from static template text plus a few large, repeated values
+# (the report); counting those segments once and summing the cached counts avoids
+# re-encoding the whole report for every question, round and agent.
+
+# Values shorter than this are cheap to encode and not worth memoizing
+SEGMENT_CACHE_MIN_CHARS = 256
+MAX_CACHED_SEGMENTS = 1024
+
+_segment_counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+_segment_counts_lock = threading.Lock()
+
+
+def count_tokens_cached(text: str, model_name: str = "o3-mini") -> int:
+    """
+    Like estimate_token_count, but memoizes the result per (encoding, text).
+
+    Lookups hash the text; Python caches a str's hash on the object, so repeated
+    lookups of the same string (e.g. a document from DocumentStore) are O(1).
+
+    Returns:
+        The token count, 0 if text is empty, -1 on error (errors are not cached).
+    """
+    if not text:
+        return 0
+    key = (MODEL_TO_ENCODING.get(model_name, DEFAULT_ENCODING), text)
+    with _segment_counts_lock:
+        count = _segment_counts.get(key)
+        if count is not None:
+            _segment_counts.move_to_end(key)
+            return count
+
+    count = estimate_token_count(text, model_name=model_name)
+    if count >= 0:
+        with _segment_counts_lock:
+            _segment_counts[key] = count
+            while len(_segment_counts) > MAX_CACHED_SEGMENTS:
+                _segment_counts.popitem(last=False)
+    return count
+
+
+@lru_cache(maxsize=64)
+def _parse_template(template: str) -> List[Tuple[str, Optional[str], str, Optional[str]]]:
+    """Splits a str.format template into (literal, field, format_spec, conversion) parts."""
+    return list(Formatter().parse(template))
+
+
+@traced(category="tokens")
+def estimate_prompt_tokens(template: str, model_name: str = "o3-mini", **fields: Any) -> int:
+    """
+    Estimates the tokens of template.format(**fields) without encoding the full prompt.
+
+    The static template text and large field values are counted once and memoized;
+    only short values (e.g. the question) are encoded on each call. The result is
+    the sum of the segment counts, which can differ from encoding the formatted
+    prompt by a few tokens where BPE merges across segment boundaries.
+
+    Args:
+        template: A str.format template, e.g. ANSWER_PROMPT_TEMPLATE.
+        model_name: The model name (determines the encoding).
+        **fields: The values for the template's fields.
+
+    Returns:
+        The estimated number of tokens, or -1 on error.
+
+    Raises:
+        KeyError: If a field used by the template is missing (as str.format would).
+    """
+    total = 0
+    for literal, field_name, format_spec, conversion in _parse_template(template):
+        counts = [count_tokens_cached(literal, model_name=model_name)]
+        if field_name is not None:
+            value = Formatter().convert_field(fields[field_name], conversion)
+            text = format(value, format_spec or "")
+            if len(text) >= SEGMENT_CACHE_MIN_CHARS:
+                counts.append(count_tokens_cached(text, model_name=model_name))
+            else:
+                counts.append(estimate_token_count(text, model_name=model_name))
+        if min(counts) < 0:
+            return -1
+        total += sum(counts)
+    return total
+
+
+def clear_token_cache() -> None:
+    """Drops all memoized segment counts and loaded encodings (mainly for tests)."""
+    with _segment_counts_lock:
+        _segment_counts.clear()
+    with _encodings_lock:
+        _encodings.clear()
+
+
 # Example usage (can be kept under __main__ guard)
 if __name__ == "__main__":
     sample_text = "This is a sample financial report text."
@@ -0,0 +1,358 @@
+"""
+Lightweight tracing: nested spans exported as a Chrome trace-event timeline.
+
+Tracing is off until start_tracing() installs a process-wide Tracer; until then
+span() and @traced cost one global lookup. The current span is a context
+variable, so spans opened in worker threads started by run_concurrently or
+stream_call (which copy the caller's context) and in asyncio tasks nest under
+the span that started them. Each span also records the LLM caller tag in effect
+(see src.utils.llm_metrics), so an agent's work is labelled with the agent.
+
+The export (Tracer.write_chrome_trace) opens in chrome://tracing or
+https://ui.perfetto.dev: one lane per thread or asyncio task, with flow arrows
+where work hops to another lane.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.llm_metrics import get_llm_caller
+
+DEFAULT_MAX_SPANS = 500_000
+
+# Innermost open span of the current context
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+_tracer: Optional["Tracer"] = None
+_tracer_lock = threading.Lock()
+
+
+def _current_lane() -> Tuple[str, int, str]:
+    """The timeline lane of the running code: its asyncio task if any, else its thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return ("task", id(task), f"asyncio task {task.get_name()}")
+    thread = threading.current_thread()
+    return ("thread", thread.ident, thread.name)
+
+
+class Span:
+    """One timed operation. Created by start_span(); call end() exactly once."""
+
+    __slots__ = ("tracer", "name", "category", "span_id", "parent", "lane",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, parent: Optional["Span"],
+                 attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.span_id = tracer._new_id()
+        self.parent = parent
+        self.lane = _current_lane()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns is not None else None
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Closes the span, records it, and makes its parent the current span again."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.perf_counter_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        # Also pops spans opened inside this one but never ended (e.g. an exception skipped end())
+        current = _current_span.get()
+        while current is not None and current is not self:
+            current = current.parent
+        if current is self:
+            _current_span.set(self.parent)
+        self.tracer._record(self)
+
+
+class Tracer:
+    """Collects finished spans; thread-safe."""
+
+    def __init__(self, max_spans: int = DEFAULT_MAX_SPANS):
+        self.max_spans = max_spans
+        self.start_ns = time.perf_counter_ns()
+        self.dropped = 0
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _new_id(self) -> int:
+        return next(self._ids)
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            if len(self._spans) < self.max_spans:
+                self._spans.append(span)
+            else:
+                self.dropped += 1
+
+    def spans(self) -> List[Span]:
+        """Finished spans, in the order they ended."""
+        with self._lock:
+            return list(self._spans)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """The spans as a Chrome trace-event document (complete events, lane names and flow arrows)."""
+        pid = os.getpid()
+        spans = sorted(self.spans(), key=lambda s: s.start_ns)
+        tids: Dict[Tuple[str, int, str], int] = {}
+        events: List[Dict[str, Any]] = []
+
+        def tid_of(lane: Tuple[str, int, str]) -> int:
+            # Keyed by name too: thread idents are reused once a thread exits
+            if lane not in tids:
+                tids[lane] = len(tids) + 1
+                events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tids[lane],
+                               "args": {"name": lane[2]}})
+            return tids[lane]
+
+        def micros(ns: int) -> float:
+            return (ns - self.start_ns) / 1000
+
+        for span in spans:
+            tid = tid_of(span.lane)
+            args = dict(span.attributes, span_id=span.span_id)
+            if span.parent is not None:
+                args["parent_id"] = span.parent.span_id
+            if span.error is not None:
+                args["error"] = span.error
+            events.append({"ph": "X", "name": span.name, "cat": span.category, "pid": pid, "tid": tid,
+                           "ts": micros(span.start_ns), "dur": (span.end_ns - span.start_ns) / 1000, "args": args})
+            if span.parent is not None and span.parent.lane != span.lane:
+                # Arrow from the parent's lane to the lane that picked up the work
+                flow = {"name": "spawn", "cat": "flow", "id": span.span_id, "pid": pid, "ts": micros(span.start_ns)}
+                events.append(dict(flow, ph="s", tid=tid_of(span.parent.lane)))
+                events.append(dict(flow, ph="f", bp="e", tid=tid))
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"spans": len(spans), "dropped_spans": self.dropped}}
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+def start_tracing(tracer: Optional[Tracer] = None) -> Tracer:
+    """Installs tracer (or a new Tracer) as the process-wide tracer and returns it."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer or Tracer()
+        return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    """Stops tracing and returns the tracer that was active, if any."""
+    global _tracer
+    with _tracer_lock:
+        tracer, _tracer = _tracer, None
+        return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def start_span(name: str, category: str = "function", **attributes: Any) -> Optional[Span]:
+    """
+    Opens a span under the current one and makes it current, or returns None when
+    tracing is off. For code that cannot use span() as a block, such as a section
+    of a generator; close it with end_span().
+    """
+    tracer = _tracer
+    if tracer is None:
+        return None
+    parent = _current_span.get()
+    if parent is not None and parent.tracer is not tracer:
+        parent = None # Left over from an earlier tracing session
+    caller = get_llm_caller()
+    if caller is not None:
+        attributes.setdefault("caller", caller)
+    span = Span(tracer, name, category, parent, attributes)
+    _current_span.set(span)
+    return span
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    """Closes a span from start_span(); a no-op for None (tracing off)."""
+    if span is not None:
+        span.end(error)
+
+
+@contextmanager
+def span(name: str, category: str = "function", **attributes: Any):
+    """Traces the block as a span (yields the Span, or None when tracing is off)."""
+    current = start_span(name, category, **attributes)
+    if current is None:
+        yield None
+        return
+    try:
+        yield current
+    except GeneratorExit:
+        # The enclosing generator was closed early, which is not a failure
+        current.end()
+        raise
+    except BaseException as e:
+        current.end(e)
+        raise
+    current.end()
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Adds attributes to the current span, if tracing is on."""
+    current = _current_span.get()
+    if current is not None and _tracer is not None:
+        current.set_attributes(**attributes)
+
+
+def traced(name: Optional[str] = None, category: str = "function") -> Callable[[Callable], Callable]:
+    """
+    Decorator tracing every call of a function as a span named name (default: its
+    qualified name). Generators and async generators are traced from first resume
+    until exhausted or closed, and are the current span only while resumed;
+    coroutines while they run.
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.isasyncgenfunction(func):
+            async def traced_async_gen(*args, **kwargs):
+                # Same resume-by-resume handling of the current span as traced_generator
+                outer = _current_span.get()
+                current = start_span(span_name, category)
+                generator = func(*args, **kwargs)
+                resume = functools.partial(generator.asend, None)
+                error = None
+                try:
+                    while True:
+                        try:
+                            item = await resume()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            inner = _current_span.get()
+                            _current_span.set(outer)
+                        try:
+                            sent = yield item
+                        except GeneratorExit:
+                            _current_span.set(inner)
+                            try:
+                                await generator.aclose()
+                            finally:
+                                _current_span.set(outer)
+                            raise
+                        except BaseException as e:
+                            resume = functools.partial(generator.athrow, e)
+                        else:
+                            resume = functools.partial(generator.asend, sent)
+                        outer = _current_span.get()
+                        _current_span.set(inner)
+                except GeneratorExit:
+                    raise
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    end_span(current, error)
+
+            @functools.wraps(func)
+            def async_gen_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return func(*args, **kwargs)
+                return traced_async_gen(*args, **kwargs)
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            async def traced_coroutine(*args, **kwargs):
+                with span(span_name, category):
+                    return await func(*args, **kwargs)
+
+            @functools.wraps(func)
+            def coroutine_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return func(*args, **kwargs)
+                return traced_coroutine(*args, **kwargs)
+            return coroutine_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            def traced_generator(*args, **kwargs):
+                # The span stays open while the generator is suspended, but the
+                # generator's spans are current only while its own code runs: each
+                # resume restores the generator's innermost span, and each yield the
+                # consumer's.
+                outer = _current_span.get()
+                current = start_span(span_name, category)
+                generator = func(*args, **kwargs)
+                resume = functools.partial(generator.send, None)
+                error = None
+                try:
+                    while True:
+                        try:
+                            item = resume()
+                        except StopIteration as stop:
+                            return stop.value
+                        finally:
+                            inner = _current_span.get()
+                            _current_span.set(outer)
+                        try:
+                            sent = yield item
+                        except GeneratorExit:
+                            # Closed by the consumer: an early but normal end
+                            _current_span.set(inner)
+                            try:
+                                generator.close()
+                            finally:
+                                _current_span.set(outer)
+                            raise
+                        except BaseException as e:
+                            resume = functools.partial(generator.throw, e)
+                        else:
+                            resume = functools.partial(generator.send, sent)
+                        outer = _current_span.get()
+                        _current_span.set(inner)
+                except GeneratorExit:
+                    raise
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    end_span(current, error)
+
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return func(*args, **kwargs)
+                return traced_generator(*args, **kwargs)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'
 from core.answer_agent import ReportQAAgent as AnswerAgent
 from core.question_agent import QuestionAgent
 from core.orchestrator import Orchestrator
-from core.llm_interface import LLMInterface
+from core.llm_interface import get_llm_interface
 from core.answer_agent import MODEL_NAME, ContextLengthError
 
 # Setup logging (optional for Streamlit, but can be helpful)
@@ -168,9 +168,10 @@ with col2:
 def initialize_agents():
     """Initializes the agents and LLM interface."""
     try:
-        question_agent = QuestionAgent()
-        answer_agent = AnswerAgent()
-        llm_interface = LLMInterface(model_key=MODEL_NAME)
+        # Process-wide interface: reused across Streamlit reruns and sessions
+        llm_interface = get_llm_interface(MODEL_NAME)
+        question_agent = QuestionAgent(llm_interface)
+        answer_agent = AnswerAgent(llm_interface=llm_interface)
         st.session_state.question_agent = question_agent
         st.session_state.answer_agent = answer_agent
         return question_agent, answer_agent, llm_interface
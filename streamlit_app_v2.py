@@ -15,8 +15,9 @@ from core.answer_agent import ReportQAAgent # V2 uses this directly
 from core.question_agent import QuestionAgent
 # from core.orchestrator import Orchestrator # V1 - Remove
 from core.orchestrator_v2 import OrchestratorV2 # V2
-from core.llm_interface import LLMInterface
+from core.llm_interface import get_llm_interface
 from core.answer_agent import MODEL_NAME, ContextLengthError
+from src.utils.streaming import PartialMessage # Same module object the orchestrator uses
 
 # Setup logging (optional for Streamlit, but can be helpful)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -128,6 +129,18 @@ num_initial_questions = st.sidebar.number_input(
     min_value=1, max_value=20, value=3, step=1, key="num_q_v2",
     disabled=st.session_state.is_running # Disable during run
 )
+max_parallel_agents = st.sidebar.number_input(
+    "Max Parallel Answer Agents",
+    min_value=1, max_value=16, value=4, step=1, key="max_parallel_v2",
+    help="How many Answer Agents are asked at the same time for each question (1 = one after another).",
+    disabled=st.session_state.is_running # Disable during run
+)
+stream_answers = st.sidebar.checkbox(
+    "Stream Answers",
+    value=True, key="stream_answers_v2",
+    help="Show answers while they are being generated (applies to agents asked one after another and to the synthesis).",
+    disabled=st.session_state.is_running # Disable during run
+)
 st.session_state.output_file_path_config = st.sidebar.text_input(
     "Output Filename (.md)",
     value=st.session_state.output_file_path_config,
@@ -152,7 +165,8 @@ with col2:
 def initialize_llm_interface():
     """Initializes only the LLM Interface."""
     try:
-        llm_interface = LLMInterface(model_key=MODEL_NAME)
+        # Process-wide interface: reused across Streamlit reruns and sessions
+        llm_interface = get_llm_interface(MODEL_NAME)
         return llm_interface
     except Exception as e:
         st.error(f"Fatal Error initializing LLM Interface: {e}")
@@ -288,9 +302,9 @@ def run_v2_workflow_setup():
         # Initialize Question Agent
         st.session_state.question_agent = QuestionAgent(llm_interface)
 
-        # Initialize Answer Agents (each initializes own LLMInterface)
+        # Initialize Answer Agents on the shared LLMInterface
         st.session_state.answer_agents = [
-            ReportQAAgent() for _ in st.session_state.a_temp_paths
+            ReportQAAgent(llm_interface=llm_interface) for _ in st.session_state.a_temp_paths
         ]
         add_chat_message(SYSTEM_NAME, f"Initialized {len(st.session_state.answer_agents)} Answer Agents.")
 
@@ -306,7 +320,9 @@ def run_v2_workflow_setup():
             answer_agents=st.session_state.answer_agents,
             output_file_path=output_file_path, # Pass the full path
             llm_interface=llm_interface,
-            num_initial_questions=num_initial_questions
+            num_initial_questions=num_initial_questions,
+            max_concurrency=max_parallel_agents,
+            stream_partial_messages=stream_answers
         )
         st.session_state.orchestrator_v2 = orchestrator
         add_chat_message(SYSTEM_NAME, "Orchestrator initialized.")
@@ -388,6 +404,18 @@ with chat_container:
 
 
 # --- Generator Processing Logic --- #
+def drain_partial_messages(generator, speaker: str, message: str) -> Tuple[str, str]:
+    """
+    Shows streamed PartialMessage events in a placeholder inside the chat container
+    until the complete message arrives, then returns that (speaker, message).
+    """
+    placeholder = chat_container.empty()
+    while isinstance(message, PartialMessage):
+        placeholder.markdown(f"**{speaker}** _(streaming...)_\n\n{message}")
+        speaker, message = next(generator)
+    placeholder.empty()
+    return speaker, message
+
 if st.session_state.is_running and st.session_state.current_step == 'running_generator':
     generator = st.session_state.workflow_generator
     if generator:
@@ -396,6 +424,8 @@ if st.session_state.is_running and st.session_state.current_step == 'running_gen
             # Use st.spinner while waiting for the next step
             with st.spinner("Processing next step..."):
                 speaker, message = next(generator)
+                if isinstance(message, PartialMessage):
+                    speaker, message = drain_partial_messages(generator, speaker, message)
             # Display the message
             add_chat_message(speaker, message)
             # Rerun immediately to process the *next* step
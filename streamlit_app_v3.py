@@ -1,10 +1,10 @@
 # <CURSOR_TASK_START>
 import streamlit as st
 import os
+import html
 import tempfile
 import logging
 import sys
-import time
 from typing import List, Dict, Callable, Iterator, Tuple # Add Iterator, Tuple
 
 # Add src directory to path (consider a better packaging approach later)
@@ -14,8 +14,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'
 from core.answer_agent_v3 import AnswerAgentV3, ContextLengthError # V3 Agent
 from core.question_agent import QuestionAgent
 from core.orchestrator_v3 import OrchestratorV3 # V3 Orchestrator
-from core.llm_interface import LLMInterface
+from core.llm_interface import get_llm_interface
 from core.answer_agent import MODEL_NAME
+from src.utils.streaming import BackgroundGenerator, PartialMessage # Same module object the orchestrator uses
+from src.utils.document_store import DocumentStore # Shared by the orchestrator and agents
 
 # Setup logging (optional for Streamlit, but can be helpful)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -38,6 +40,11 @@ AGENT_COLORS = {
     "DEFAULT": "#FFFFFF" # White or default
 }
 
+# The debate runs on a background thread; each UI update appends at most this many
+# new messages, waiting up to DRAIN_WAIT_SECONDS for the first one.
+DRAIN_BATCH_SIZE = 200
+DRAIN_WAIT_SECONDS = 0.1
+
 
 # --- Auto-scroll JavaScript for Chat Container (Revised Selector & Retries) ---
 # Targeting the scrollable div within the fixed-height container
@@ -90,7 +97,7 @@ def initialize_session_state(force_reset=False):
         'a_temp_paths': [],
         'output_file_path_config': "debate_results_v3.md",
         'results_log': [], # Keep for potential summary
-        'workflow_generator': None # State for the generator object
+        'workflow_worker': None # BackgroundGenerator running the orchestrator's generator
     }
      # Add default system message if chat history is empty or reset
     if force_reset or 'chat_history' not in st.session_state or not st.session_state.chat_history:
@@ -135,6 +142,41 @@ max_debate_rounds = st.sidebar.number_input(
     help="Number of debate rounds after initial answers (0 means only initial answers + synthesis).",
     disabled=st.session_state.is_running
 )
+max_parallel_agents = st.sidebar.number_input(
+    "Max Parallel Agent Calls",
+    min_value=1, max_value=16, value=4, step=1,
+    key="max_parallel_v3",
+    help="How many agent calls may run at the same time (1 = one after another).",
+    disabled=st.session_state.is_running
+)
+simultaneous_rounds = st.sidebar.checkbox(
+    "Simultaneous Debate Rounds",
+    value=True,
+    key="simultaneous_rounds_v3",
+    help="Agents in a round only see earlier rounds, so all agents in a round answer in parallel.",
+    disabled=st.session_state.is_running
+)
+compress_history = st.sidebar.checkbox(
+    "Compress Debate History",
+    value=False,
+    key="compress_history_v3",
+    help="Agents see the previous round in full and a rolling summary of older rounds (one extra LLM call per round).",
+    disabled=st.session_state.is_running
+)
+adaptive_rounds = st.sidebar.checkbox(
+    "Stop When Agents Converge",
+    value=False,
+    key="adaptive_rounds_v3",
+    help="End a question's debate early once every agent's response barely changes from the previous round.",
+    disabled=st.session_state.is_running
+)
+stream_answers = st.sidebar.checkbox(
+    "Stream Answers",
+    value=True,
+    key="stream_answers_v3",
+    help="Show responses while they are being generated (applies to agents polled one after another and to the synthesis).",
+    disabled=st.session_state.is_running
+)
 st.session_state.output_file_path_config = st.sidebar.text_input(
     "Output Filename (.md)",
     value=st.session_state.output_file_path_config,
@@ -159,7 +201,8 @@ with col2:
 def initialize_llm_interface():
     """Initializes only the LLM Interface."""
     try:
-        llm_interface = LLMInterface(model_key=MODEL_NAME)
+        # Process-wide interface: reused across Streamlit reruns and sessions
+        llm_interface = get_llm_interface(MODEL_NAME)
         return llm_interface
     except Exception as e:
         st.error(f"Fatal Error initializing LLM Interface: {e}")
@@ -204,9 +247,10 @@ def reset_state():
     """Resets the application state and cleans up resources."""
     add_chat_message(SYSTEM_NAME, "Resetting workflow state...")
     try:
+        worker = st.session_state.get('workflow_worker')
+        if worker is not None:
+            worker.stop()
         cleanup_temp_files()
-        if 'workflow_generator' in st.session_state:
-            st.session_state.workflow_generator = None
         initialize_session_state(force_reset=True)
         logger.info("Application state has been fully reset")
         # Don't add message here, let the initial state handle it
@@ -227,7 +271,7 @@ def run_v3_workflow_setup():
     st.session_state.error_message = None
     st.session_state.is_running = False
     st.session_state.current_step = 'setup'
-    st.session_state.workflow_generator = None
+    st.session_state.workflow_worker = None
     st.session_state.results_log = []
     st.session_state.setup_done = False
     cleanup_temp_files() # Clean up previous run's files
@@ -300,11 +344,11 @@ def run_v3_workflow_setup():
         st.session_state.question_agent = QuestionAgent(llm_interface=llm_interface_shared)
         add_chat_message(SYSTEM_NAME, "Question Agent initialized.")
 
-        # Initialize Answer Agents
+        # Initialize Answer Agents (sharing one document cache with the orchestrator)
+        document_store = DocumentStore()
         st.session_state.answer_agents_v3 = []
         for i, path in enumerate(temp_answer_paths): # Use paths saved in this run
-            # ReportQAAgent currently initializes its own LLM interface
-            agent = AnswerAgentV3(llm_interface=llm_interface_shared)
+            agent = AnswerAgentV3(llm_interface=llm_interface_shared, document_store=document_store)
             st.session_state.answer_agents_v3.append(agent)
             add_chat_message(SYSTEM_NAME, f"Answer Agent V3 {i+1} initialized.")
 
@@ -319,7 +363,13 @@ def run_v3_workflow_setup():
             output_file_path=final_output_path,
             llm_interface=llm_interface_shared,
             num_initial_questions=num_initial_questions,
-            max_debate_rounds=max_debate_rounds # Pass widget value
+            max_debate_rounds=max_debate_rounds, # Pass widget value
+            max_concurrency=max_parallel_agents,
+            simultaneous_rounds=simultaneous_rounds,
+            stream_partial_messages=stream_answers,
+            document_store=document_store,
+            compress_history=compress_history,
+            adaptive_rounds=adaptive_rounds
         )
         add_chat_message(SYSTEM_NAME, "Orchestrator V3 initialized.")
 
@@ -328,10 +378,13 @@ def run_v3_workflow_setup():
         st.session_state.current_step = 'running_generator'
         add_chat_message(SYSTEM_NAME, "Setup complete. Starting V3 debate interaction...")
 
-        # --- 4. Prepare Generator --- #
-        st.session_state.workflow_generator = st.session_state.orchestrator_v3.run_full_debate(
-            question_doc_path=st.session_state.q_temp_path,
-            answer_doc_paths=st.session_state.a_temp_paths
+        # --- 4. Start the Debate on a Background Thread --- #
+        st.session_state.workflow_worker = BackgroundGenerator(
+            st.session_state.orchestrator_v3.run_full_debate(
+                question_doc_path=st.session_state.q_temp_path,
+                answer_doc_paths=st.session_state.a_temp_paths
+            ),
+            name="orchestrator-v3"
         )
 
     except Exception as e:
@@ -353,6 +406,48 @@ if start_button and not st.session_state.is_running:
         st.rerun()
 
 # --- Main UI Area (Chat Display) --- #
+def render_chat_message(message: Dict[str, str]):
+    """Renders one chat history entry in the current container."""
+    role = message["role"]
+    content = message["content"]
+
+    # Escape HTML content once
+    escaped_content = html.escape(content).replace("\n", "<br>")
+
+    if role == SYSTEM_NAME:
+        # Render System messages directly with custom style (no avatar/placeholder)
+        display_content = f"-- {escaped_content} --"
+        style = f"background-color: transparent; color: white; text-align: center; width: 90%; margin-left: auto; margin-right: auto; padding: 5px; border-radius: 8px; margin-bottom: 2px; word-wrap: break-word;"
+        st.markdown(f'<div style="{style}">{display_content}</div>', unsafe_allow_html=True)
+    else:
+        # Render other agent messages using st.chat_message with avatars
+        avatar = "👤" # Default
+        if role == ORCHESTRATOR_NAME: avatar = "🤖"
+        elif role == QUESTION_AGENT_NAME: avatar = "❓"
+        elif role.startswith(ANSWER_AGENT_NAME): avatar = "📝"
+        elif role == SYNTHESIZER_NAME: avatar = "✨"
+        
+        with st.chat_message(name=role, avatar=avatar):
+            # Determine background color based on role
+            base_role = role
+            if role.startswith(ANSWER_AGENT_NAME):
+                base_role = ANSWER_AGENT_NAME
+            color = AGENT_COLORS.get(base_role, AGENT_COLORS["DEFAULT"])
+            
+            # Define base style
+            style = f"color: #333; padding: 10px; border-radius: 8px; margin-bottom: 5px; word-wrap: break-word;"
+            
+            # Apply role-specific alignment and width
+            if role.startswith(ANSWER_AGENT_NAME):
+                # Answer Agent(s): RIGHT-aligned box
+                style += f" background-color: {color}; width: 70%; margin-left: auto; margin-right: 0;"
+            else:
+                # Other agents (Question, Orchestrator, Synthesizer): LEFT-aligned box
+                style += f" background-color: {color}; width: 70%; margin-right: auto; margin-left: 0;"
+            
+            # Apply the combined style within the chat message
+            st.markdown(f'<div style="{style}">{escaped_content}</div>', unsafe_allow_html=True)
+
 # Create the container WITHOUT any placeholders above it
 chat_container = st.container(height=600, border=True)
 
@@ -366,81 +461,70 @@ with chat_container:
     else:
         # Display messages from history
         for message in st.session_state.chat_history:
-            role = message["role"]
-            content = message["content"]
-
-            # Escape HTML content once
-            import html
-            escaped_content = html.escape(content).replace("\n", "<br>")
-
-            if role == SYSTEM_NAME:
-                # Render System messages directly with custom style (no avatar/placeholder)
-                display_content = f"-- {escaped_content} --"
-                style = f"background-color: transparent; color: white; text-align: center; width: 90%; margin-left: auto; margin-right: auto; padding: 5px; border-radius: 8px; margin-bottom: 2px; word-wrap: break-word;"
-                st.markdown(f'<div style="{style}">{display_content}</div>', unsafe_allow_html=True)
-            else:
-                # Render other agent messages using st.chat_message with avatars
-                avatar = "👤" # Default
-                if role == ORCHESTRATOR_NAME: avatar = "🤖"
-                elif role == QUESTION_AGENT_NAME: avatar = "❓"
-                elif role.startswith(ANSWER_AGENT_NAME): avatar = "📝"
-                elif role == SYNTHESIZER_NAME: avatar = "✨"
-                
-                with st.chat_message(name=role, avatar=avatar):
-                    # Determine background color based on role
-                    base_role = role
-                    if role.startswith(ANSWER_AGENT_NAME):
-                        base_role = ANSWER_AGENT_NAME
-                    color = AGENT_COLORS.get(base_role, AGENT_COLORS["DEFAULT"])
-                    
-                    # Define base style
-                    style = f"color: #333; padding: 10px; border-radius: 8px; margin-bottom: 5px; word-wrap: break-word;"
-                    
-                    # Apply role-specific alignment and width
-                    if role.startswith(ANSWER_AGENT_NAME):
-                        # Answer Agent(s): RIGHT-aligned box
-                        style += f" background-color: {color}; width: 70%; margin-left: auto; margin-right: 0;"
-                    else:
-                        # Other agents (Question, Orchestrator, Synthesizer): LEFT-aligned box
-                        style += f" background-color: {color}; width: 70%; margin-right: auto; margin-left: 0;"
-                    
-                    # Apply the combined style within the chat message
-                    st.markdown(f'<div style="{style}">{escaped_content}</div>', unsafe_allow_html=True)
+            render_chat_message(message)
 
 # Add a small empty space after the container
 st.markdown("")
 
-# --- Generator Processing --- #
-if st.session_state.current_step == 'running_generator' and st.session_state.workflow_generator:
-    try:
-        # Process one step from the generator at a time
-        speaker, message = next(st.session_state.workflow_generator)
-        add_chat_message(speaker, message)
-        
-        # Add a small delay to make message sequence visible (optional)
-        time.sleep(0.2)
-        
-        # Force a rerun to display the message immediately and get the next message
-        st.rerun()
-
-    except StopIteration:
+# --- Background Worker Draining --- #
+def drain_worker_batch(worker: BackgroundGenerator, partial_placeholder):
+    """
+    Appends the worker's next batch of complete messages to the chat (rendering only
+    those), and shows the latest streamed text of an unfinished message in
+    partial_placeholder. Returns the placeholder to use for the next batch.
+    """
+    batch = worker.drain(max_items=DRAIN_BATCH_SIZE, timeout=DRAIN_WAIT_SECONDS)
+    if not batch:
+        return partial_placeholder
+
+    new_messages = []
+    streaming = None # Latest (speaker, text so far) of a message still being generated
+    for speaker, message in batch:
+        if isinstance(message, PartialMessage):
+            streaming = (speaker, message)
+        else:
+            streaming = None # The complete message replaces its partials
+            new_messages.append({"role": speaker, "content": message})
+
+    if new_messages:
+        # Record first: a rerun interrupting the rendering below must not lose them
+        st.session_state.chat_history.extend(new_messages)
+        partial_placeholder.empty()
+        with chat_container:
+            for message in new_messages:
+                render_chat_message(message)
+        partial_placeholder = chat_container.empty() # Keep streamed text below the new messages
+        st.components.v1.html(auto_scroll_js, height=0, width=0)
+    if streaming is not None:
+        speaker, text = streaming
+        partial_placeholder.markdown(f"**{speaker}** _(streaming...)_\n\n{text}")
+    else:
+        partial_placeholder.empty()
+    return partial_placeholder
+
+if st.session_state.current_step == 'running_generator' and st.session_state.workflow_worker:
+    # One script run follows the whole debate: history above was rendered once, and
+    # each batch from the background thread only appends what is new.
+    worker = st.session_state.workflow_worker
+    partial_placeholder = chat_container.empty()
+    while not worker.done:
+        partial_placeholder = drain_worker_batch(worker, partial_placeholder)
+    partial_placeholder.empty()
+
+    if worker.error is None:
         add_chat_message(SYSTEM_NAME, "Workflow finished successfully.")
-        st.session_state.is_running = False
         st.session_state.current_step = 'finished'
-        st.session_state.workflow_generator = None
-        cleanup_temp_files()
-        st.rerun()
-
-    except Exception as e:
-        logger.error(f"Error during workflow execution: {e}", exc_info=True)
-        error_message = f"Runtime Error: {e}"
+    else:
+        logger.error(f"Error during workflow execution: {worker.error}", exc_info=worker.error)
+        error_message = f"Runtime Error: {worker.error}"
         add_chat_message(SYSTEM_NAME, error_message)
         st.error(error_message)
-        st.session_state.is_running = False
+        st.session_state.error_message = error_message
         st.session_state.current_step = 'error'
-        st.session_state.workflow_generator = None
-        cleanup_temp_files()
-        st.rerun()
+    st.session_state.is_running = False
+    st.session_state.workflow_worker = None
+    cleanup_temp_files()
+    st.rerun() # Re-enable the sidebar controls
 
 # --- Final State Display --- #
 if st.session_state.current_step == 'finished':
@@ -15,8 +15,10 @@ if src_path not in sys.path:
 # Now imports from src/core should work directly
 # Import PROMPT_TEMPLATE directly
 # Also import MODEL_NAME constant
-from core.answer_agent import ReportQAAgent, ContextLengthError, MAX_INPUT_TOKENS, MODEL_NAME
-from core.prompts import ANSWER_PROMPT_TEMPLATE # Import the correct template
+from core.answer_agent import (
+    ReportQAAgent, ContextLengthError, MAX_INPUT_TOKENS, MODEL_NAME, MAP_REDUCE_CHUNK_MARGIN, map_reduce_answer,
+)
+from core.prompts import ANSWER_PROMPT_TEMPLATE, MAP_REDUCE_COMBINE_PROMPT_TEMPLATE # Import the correct template
 from core.llm_interface import LLMInterface # Import directly from core
 
 # --- Fixtures --- #
@@ -27,10 +29,10 @@ def mock_dependencies():
     # Ensure mock paths target the module as imported (e.g., 'core.answer_agent...')
     with (
         patch('core.answer_agent.read_text_file') as mock_read,
-        patch('core.answer_agent.estimate_token_count') as mock_estimate,
-        patch('core.answer_agent.LLMInterface') as MockLLMInterface
+        patch('core.answer_agent.estimate_prompt_tokens') as mock_estimate,
+        patch('core.answer_agent.get_llm_interface') as mock_get_llm_interface
     ):
-        mock_llm_instance = MockLLMInterface.return_value
+        mock_llm_instance = mock_get_llm_interface.return_value
         mock_llm_instance.generate_chat_response = MagicMock()
         yield mock_read, mock_estimate, mock_llm_instance
 
@@ -67,14 +69,14 @@ def test_ask_question_success(agent, mock_dependencies):
     # Assertions
     assert answer == expected_answer
     mock_read.assert_called_once_with(report_path)
-    # Check that estimate_token_count was called with the correctly formatted prompt
+    # Check that the prompt token estimate was made from the template and its fields
     # Use the imported PROMPT_TEMPLATE
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
     # Use the imported MODEL_NAME
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
     # Check that llm was called with the correct message structure
     expected_messages = [{"role": "user", "content": expected_prompt}]
-    mock_llm.generate_chat_response.assert_called_once_with(expected_messages)
+    mock_llm.generate_chat_response.assert_called_once_with(expected_messages, estimated_prompt_tokens=estimated_tokens)
 
 def test_ask_question_file_not_found(agent, mock_dependencies):
     """Tests handling when the report file is not found."""
@@ -152,7 +154,7 @@ def test_ask_question_context_length_exceeded(agent, mock_dependencies):
     # Check estimate was still called
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
     # Use the imported MODEL_NAME
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
 
 def test_ask_question_token_estimation_error(agent, mock_dependencies):
     """Tests handling when token estimation itself fails."""
@@ -172,7 +174,7 @@ def test_ask_question_token_estimation_error(agent, mock_dependencies):
     mock_read.assert_called_once_with(report_path)
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
     # Use the imported MODEL_NAME
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
 
 def test_ask_question_llm_error(agent, mock_dependencies):
     """Tests handling when the LLM call raises an exception."""
@@ -196,9 +198,9 @@ def test_ask_question_llm_error(agent, mock_dependencies):
     mock_read.assert_called_once_with(report_path)
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
     # Use the imported MODEL_NAME
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
     expected_messages = [{"role": "user", "content": expected_prompt}]
-    mock_llm.generate_chat_response.assert_called_once_with(expected_messages)
+    mock_llm.generate_chat_response.assert_called_once_with(expected_messages, estimated_prompt_tokens=estimated_tokens)
 
 def test_ask_question_llm_invalid_response(agent, mock_dependencies):
     """Tests handling when the LLM returns an invalid response (e.g., None)."""
@@ -222,6 +224,156 @@ def test_ask_question_llm_invalid_response(agent, mock_dependencies):
     mock_read.assert_called_once_with(report_path)
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
     # Use the imported MODEL_NAME
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
     expected_messages = [{"role": "user", "content": expected_prompt}]
-    mock_llm.generate_chat_response.assert_called_once_with(expected_messages) 
\ No newline at end of file
+    mock_llm.generate_chat_response.assert_called_once_with(expected_messages, estimated_prompt_tokens=estimated_tokens) 
+def test_ask_with_content_retrieval_mode_sends_selected_passages(mock_dependencies):
+    """Tests that retrieval mode replaces the report with the selected passages."""
+    _, mock_estimate, mock_llm = mock_dependencies
+    agent = ReportQAAgent(retrieval_top_k=4, retrieval_token_budget=1000)
+    query = "What is the revenue?"
+    report_content = "Full report text."
+    mock_estimate.return_value = 100
+    mock_llm.generate_chat_response.return_value = "Revenue was $10M."
+
+    with patch('core.answer_agent.select_passages', return_value="Revenue passage.") as mock_select:
+        answer = agent.ask_with_content(query, report_content)
+
+    assert answer == "Revenue was $10M."
+    mock_select.assert_called_once_with(report_content, query, top_k=4, token_budget=1000, model_name=MODEL_NAME)
+    expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content="Revenue passage.", user_query=query)
+    mock_llm.generate_chat_response.assert_called_once_with(
+        [{"role": "user", "content": expected_prompt}], estimated_prompt_tokens=100
+    )
+
+def test_ask_with_content_retrieval_mode_falls_back_without_match(mock_dependencies):
+    """Tests that the full report is sent when no passage matches the query."""
+    _, mock_estimate, mock_llm = mock_dependencies
+    agent = ReportQAAgent(retrieval_top_k=4)
+    mock_estimate.return_value = 100
+    mock_llm.generate_chat_response.return_value = "Answer."
+
+    with patch('core.answer_agent.select_passages', return_value=None):
+        agent.ask_with_content("Query?", "Full report text.")
+
+    expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content="Full report text.", user_query="Query?")
+    mock_llm.generate_chat_response.assert_called_once_with(
+        [{"role": "user", "content": expected_prompt}], estimated_prompt_tokens=100
+    )
+
+# --- Map-Reduce Tests --- #
+
+def test_map_reduce_answer_combines_partial_answers():
+    """Tests that each chunk is answered and the partial answers are combined in order."""
+    mock_llm = MagicMock()
+    mock_llm.generate_chat_response.side_effect = lambda messages, estimated_prompt_tokens: (
+        "Combined answer." if "PARTIAL ANSWERS" in messages[0]["content"]
+        else f"Answer from {messages[0]['content'].split('|')[1]}"
+    )
+
+    with (
+        patch('core.answer_agent.chunk_text', return_value=["part-a", "part-b", "part-c"]) as mock_chunk,
+        patch('core.answer_agent.estimate_token_count', return_value=10),
+    ):
+        answer = map_reduce_answer(
+            mock_llm, "Question?", "Big document", lambda chunk: f"Prompt |{chunk}|",
+            max_input_tokens=1000, max_workers=3,
+        )
+
+    assert answer == "Combined answer."
+    mock_chunk.assert_called_once_with("Big document", max_tokens=1000 - 10 - MAP_REDUCE_CHUNK_MARGIN, model_name=MODEL_NAME)
+    assert mock_llm.generate_chat_response.call_count == 4
+    combine_prompt = mock_llm.generate_chat_response.call_args_list[-1][0][0][0]["content"]
+    expected_parts = "Part 1:\nAnswer from part-a\n\nPart 2:\nAnswer from part-b\n\nPart 3:\nAnswer from part-c"
+    assert combine_prompt == MAP_REDUCE_COMBINE_PROMPT_TEMPLATE.format(question="Question?", partial_answers=expected_parts)
+
+def test_map_reduce_answer_skips_failed_chunks():
+    """Tests that a failed chunk call does not fail the whole answer."""
+    mock_llm = MagicMock()
+    mock_llm.generate_chat_response.side_effect = [RuntimeError("API down"), "Only answer."]
+
+    with (
+        patch('core.answer_agent.chunk_text', return_value=["part-a", "part-b"]),
+        patch('core.answer_agent.estimate_token_count', return_value=10),
+    ):
+        answer = map_reduce_answer(mock_llm, "Q?", "Doc", lambda chunk: chunk, max_input_tokens=1000, max_workers=1)
+
+    # A single surviving partial answer is returned without a combine call
+    assert answer == "Only answer."
+    assert mock_llm.generate_chat_response.call_count == 2
+
+@pytest.mark.parametrize("num_chunks", [2, 5])
+def test_map_reduce_answer_combine_prompt_too_long(num_chunks):
+    """Tests that partial answers too long to combine even in pairs raise instead of being sent."""
+    mock_llm = MagicMock()
+    mock_llm.generate_chat_response.return_value = "Long partial answer."
+
+    def estimate(text, model_name=MODEL_NAME):
+        return 2000 if "PARTIAL ANSWERS" in text else 10
+
+    with (
+        patch('core.answer_agent.chunk_text', return_value=[f"part-{i}" for i in range(num_chunks)]),
+        patch('core.answer_agent.estimate_token_count', side_effect=estimate),
+    ):
+        with pytest.raises(ContextLengthError):
+            map_reduce_answer(mock_llm, "Q?", "Doc", lambda chunk: chunk, max_input_tokens=1000, max_workers=1)
+
+    # Only the chunk prompts were sent, no over-limit combine prompt
+    assert mock_llm.generate_chat_response.call_count == num_chunks
+
+def test_map_reduce_answer_no_room_for_document():
+    """Tests that a prompt without any room for document content raises ContextLengthError."""
+    with patch('core.answer_agent.estimate_token_count', return_value=1000):
+        with pytest.raises(ContextLengthError):
+            map_reduce_answer(MagicMock(), "Q?", "Doc", lambda chunk: chunk, max_input_tokens=1000)
+
+def test_ask_with_content_map_reduce_for_oversized_report(mock_dependencies):
+    """Tests that map-reduce mode answers an oversized report instead of rejecting it."""
+    _, mock_estimate, mock_llm = mock_dependencies
+    agent = ReportQAAgent(map_reduce=True)
+    mock_estimate.return_value = MAX_INPUT_TOKENS + 1
+
+    with patch('core.answer_agent.map_reduce_answer', return_value="Combined answer.") as mock_map_reduce:
+        answer = agent.ask_with_content("Query?", "Huge report.")
+
+    assert answer == "Combined answer."
+    args, kwargs = mock_map_reduce.call_args
+    assert args[:3] == (mock_llm, "Query?", "Huge report.")
+    assert args[3]("chunk") == ANSWER_PROMPT_TEMPLATE.format(report_content="chunk", user_query="Query?")
+    mock_llm.generate_chat_response.assert_not_called()
+
+def test_ask_question_uses_document_store(mock_dependencies):
+    """Tests that ask_question loads the report through the shared document store when given."""
+    mock_read, mock_estimate, mock_llm = mock_dependencies
+    mock_store = MagicMock()
+    mock_store.get.return_value = "Stored report."
+    agent = ReportQAAgent(document_store=mock_store)
+    mock_estimate.return_value = 100
+    mock_llm.generate_chat_response.return_value = "Answer."
+
+    assert agent.ask_question("Query?", "report.md") == "Answer."
+    mock_store.get.assert_called_once_with("report.md")
+    mock_read.assert_not_called()
+
+def test_init_uses_injected_llm_interface():
+    """Tests that an injected interface is used instead of the shared registry."""
+    shared_llm = MagicMock(spec=LLMInterface)
+    with patch('core.answer_agent.get_llm_interface') as mock_get_llm_interface:
+        agent = ReportQAAgent(llm_interface=shared_llm)
+
+    assert agent.llm_interface is shared_llm
+    mock_get_llm_interface.assert_not_called()
+
+def test_init_defaults_to_shared_registry_interface():
+    """Tests that agents without an injected interface share the registry's interface for MODEL_NAME."""
+    with patch('core.answer_agent.get_llm_interface') as mock_get_llm_interface:
+        first, second = ReportQAAgent(), ReportQAAgent()
+
+    assert first.llm_interface is second.llm_interface is mock_get_llm_interface.return_value
+    mock_get_llm_interface.assert_called_with(MODEL_NAME)
+
+def test_init_wraps_interface_errors():
+    """Tests that a failing interface lookup is reported as a RuntimeError."""
+    with patch('core.answer_agent.get_llm_interface', side_effect=ValueError("Model not found")):
+        with pytest.raises(RuntimeError, match="Could not initialize LLMInterface: Model not found"):
+            ReportQAAgent()
@@ -12,7 +12,7 @@ if src_path not in sys.path:
 # --- End sys.path Modification ---
 
 # Import the class and dependencies to test/mock
-from core.answer_agent_v3 import AnswerAgentV3, ContextLengthError, MAX_INPUT_TOKENS_V3, MODEL_NAME
+from core.answer_agent_v3 import AnswerAgentV3, ContextLengthError, MAX_INPUT_TOKENS_V3, MODEL_NAME, DEBATE_SUMMARY_SPEAKER
 from core.prompts import DEBATE_PARTICIPATION_PROMPT_TEMPLATE, ANSWER_PROMPT_TEMPLATE
 from core.llm_interface import LLMInterface # To mock the instance
 
@@ -23,7 +23,7 @@ def mock_dependencies_v3():
     """Mocks all external dependencies for AnswerAgentV3."""
     with (
         patch('core.answer_agent_v3.read_text_file') as mock_read,
-        patch('core.answer_agent_v3.estimate_token_count') as mock_estimate,
+        patch('core.answer_agent_v3.estimate_prompt_tokens') as mock_estimate,
         patch('core.answer_agent_v3.LLMInterface') as MockLLMInterface # Mock the class used in init
     ):
         # Create a mock instance that the agent's __init__ will receive
@@ -66,9 +66,9 @@ def test_ask_question_success_v3(agent_v3, mock_dependencies_v3):
     assert answer == expected_answer
     mock_read.assert_called_once_with(report_path)
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
     expected_messages = [{"role": "user", "content": expected_prompt}]
-    mock_llm.generate_chat_response.assert_called_once_with(expected_messages)
+    mock_llm.generate_chat_response.assert_called_once_with(expected_messages, estimated_prompt_tokens=estimated_tokens)
 
 def test_ask_question_file_not_found_v3(agent_v3, mock_dependencies_v3):
     """Tests ask_question file not found handling."""
@@ -109,7 +109,7 @@ def test_ask_question_context_limit_exceeded_v3(agent_v3, mock_dependencies_v3):
     
     mock_read.assert_called_once_with(report_path)
     expected_prompt = ANSWER_PROMPT_TEMPLATE.format(report_content=report_content, user_query=query)
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(ANSWER_PROMPT_TEMPLATE, model_name=MODEL_NAME, report_content=report_content, user_query=query)
 
 # --- Test Cases for participate_in_debate (V3 Specific) --- #
 
@@ -145,9 +145,12 @@ def test_participate_in_debate_success(agent_v3, mock_dependencies_v3):
         debate_history=expected_history_str,
         current_round=current_round
     )
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(
+        DEBATE_PARTICIPATION_PROMPT_TEMPLATE, model_name=MODEL_NAME, question=question,
+        document_context=doc_content, debate_history=expected_history_str, current_round=current_round
+    )
     # Verify generate_response was called
-    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt)
+    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt, estimated_prompt_tokens=estimated_tokens)
 
 def test_participate_in_debate_empty_history(agent_v3, mock_dependencies_v3):
     """Tests debate participation with empty history (should still work)."""
@@ -168,8 +171,21 @@ def test_participate_in_debate_empty_history(agent_v3, mock_dependencies_v3):
         question=question, document_context=doc_content, 
         debate_history=expected_history_str, current_round=current_round
     )
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
-    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt)
+    mock_estimate.assert_called_once_with(
+        DEBATE_PARTICIPATION_PROMPT_TEMPLATE, model_name=MODEL_NAME, question=question,
+        document_context=doc_content, debate_history=expected_history_str, current_round=current_round
+    )
+    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt, estimated_prompt_tokens=estimated_tokens)
+
+def test_format_debate_history_with_summary(agent_v3):
+    """Tests that a rolling summary entry is labelled with the rounds it covers."""
+    history = [
+        (DEBATE_SUMMARY_SPEAKER, 1, "Agents agree on revenue."),
+        ("Agent A", 2, "Margins fell."),
+    ]
+    assert agent_v3._format_debate_history(history) == (
+        "Summary of Rounds 0-1:\nAgents agree on revenue.\n---\nRound 2 - Agent A:\nMargins fell.\n---"
+    )
 
 def test_participate_in_debate_context_limit_exceeded(agent_v3, mock_dependencies_v3):
     """Tests debate participation context limit handling."""
@@ -191,7 +207,10 @@ def test_participate_in_debate_context_limit_exceeded(agent_v3, mock_dependencie
         question=question, document_context=doc_content, 
         debate_history=expected_history_str, current_round=current_round
     )
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(
+        DEBATE_PARTICIPATION_PROMPT_TEMPLATE, model_name=MODEL_NAME, question=question,
+        document_context=doc_content, debate_history=expected_history_str, current_round=current_round
+    )
 
 def test_participate_in_debate_token_estimation_error(agent_v3, mock_dependencies_v3):
     """Tests debate participation token estimation failure."""
@@ -210,7 +229,10 @@ def test_participate_in_debate_token_estimation_error(agent_v3, mock_dependencie
         question=question, document_context=doc_content, 
         debate_history=expected_history_str, current_round=current_round
     )
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(
+        DEBATE_PARTICIPATION_PROMPT_TEMPLATE, model_name=MODEL_NAME, question=question,
+        document_context=doc_content, debate_history=expected_history_str, current_round=current_round
+    )
 
 def test_participate_in_debate_llm_error(agent_v3, mock_dependencies_v3):
     """Tests debate participation LLM communication error."""
@@ -233,8 +255,11 @@ def test_participate_in_debate_llm_error(agent_v3, mock_dependencies_v3):
         question=question, document_context=doc_content, 
         debate_history=expected_history_str, current_round=current_round
     )
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
-    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt)
+    mock_estimate.assert_called_once_with(
+        DEBATE_PARTICIPATION_PROMPT_TEMPLATE, model_name=MODEL_NAME, question=question,
+        document_context=doc_content, debate_history=expected_history_str, current_round=current_round
+    )
+    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt, estimated_prompt_tokens=estimated_tokens)
 
 def test_participate_in_debate_empty_doc_content(agent_v3, mock_dependencies_v3):
     """Tests participate_in_debate with empty document content."""
@@ -245,4 +270,45 @@ def test_participate_in_debate_empty_doc_content(agent_v3, mock_dependencies_v3)
     
     assert "Document content cannot be empty" in str(excinfo.value)
 
+def test_participate_in_debate_retrieval_mode(mock_dependencies_v3):
+    """Tests that retrieval mode sends only the passages relevant to the question."""
+    _, mock_estimate, mock_llm = mock_dependencies_v3
+    agent = AnswerAgentV3(llm_interface=mock_llm, retrieval_top_k=5, retrieval_token_budget=800)
+    question = "Original question?"
+    doc_content = "Long document content."
+    mock_estimate.return_value = 300
+    mock_llm.generate_response.return_value = "Round 1 response."
+
+    with patch('core.answer_agent_v3.select_passages', return_value="Relevant passage.") as mock_select:
+        response = agent.participate_in_debate(question, [], doc_content, 1)
+
+    assert response == "Round 1 response."
+    mock_select.assert_called_once_with(doc_content, question, top_k=5, token_budget=800, model_name=MODEL_NAME)
+    expected_prompt = DEBATE_PARTICIPATION_PROMPT_TEMPLATE.format(
+        question=question,
+        document_context="Relevant passage.",
+        debate_history=agent._format_debate_history([]),
+        current_round=1
+    )
+    mock_llm.generate_response.assert_called_once_with(prompt=expected_prompt, estimated_prompt_tokens=300)
+
+def test_participate_in_debate_map_reduce_for_oversized_document(mock_dependencies_v3):
+    """Tests that map-reduce mode handles a debate prompt over the input limit."""
+    _, mock_estimate, mock_llm = mock_dependencies_v3
+    agent = AnswerAgentV3(llm_interface=mock_llm, map_reduce=True)
+    mock_estimate.return_value = MAX_INPUT_TOKENS_V3 + 1
+
+    with patch('core.answer_agent_v3.map_reduce_answer', return_value="Combined round response.") as mock_map_reduce:
+        response = agent.participate_in_debate("Question?", [], "Huge document.", 1)
+
+    assert response == "Combined round response."
+    args, kwargs = mock_map_reduce.call_args
+    assert args[:3] == (mock_llm, "Question?", "Huge document.")
+    assert args[3]("chunk") == DEBATE_PARTICIPATION_PROMPT_TEMPLATE.format(
+        question="Question?", document_context="chunk",
+        debate_history=agent._format_debate_history([]), current_round=1
+    )
+    assert kwargs["max_input_tokens"] == MAX_INPUT_TOKENS_V3
+    mock_llm.generate_response.assert_not_called()
+
 # ... potentially add more tests for edge cases ... 
\ No newline at end of file
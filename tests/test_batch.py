@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+# Add src directory to sys.path to allow importing core modules
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from core.batch import (
+    BatchJob, JOB_STATUS_FAILED, JOB_STATUS_OK, JOB_STATUS_PARTIAL, SUMMARY_FILE_NAME,
+    jobs_from_directory, load_manifest, run_batch, write_summary,
+)
+from src.utils.streaming import PartialMessage
+
+# --- Test Cases --- #
+
+def test_load_manifest_resolves_paths_and_names(tmp_path):
+    manifest = tmp_path / "jobs.json"
+    manifest.write_text(json.dumps([
+        {"question_doc": "q/acme report.md", "answer_docs": ["a1.md", "/abs/a2.md"]},
+        {"name": "acme report", "question_doc": "q2.md", "answer_docs": ["a1.md"]},
+    ]), encoding="utf-8")
+
+    jobs = load_manifest(str(manifest), "out")
+
+    assert jobs[0] == BatchJob("acme_report", str(tmp_path / "q/acme report.md"),
+                               [str(tmp_path / "a1.md"), "/abs/a2.md"], os.path.join("out", "acme_report.md"))
+    # Duplicate names get a suffix so result files don't collide
+    assert jobs[1].name == "acme_report-2"
+    assert jobs[1].output_path == os.path.join("out", "acme_report-2.md")
+
+@pytest.mark.parametrize("content, message", [
+    ("not json", "not valid JSON"),
+    ("[]", "non-empty list"),
+    ('[{"answer_docs": ["a.md"]}]', "question_doc"),
+    ('[{"question_doc": "q.md", "answer_docs": []}]', "answer_docs"),
+])
+def test_load_manifest_rejects_malformed(tmp_path, content, message):
+    manifest = tmp_path / "jobs.json"
+    manifest.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        load_manifest(str(manifest), "out")
+
+def test_jobs_from_directory(tmp_path):
+    for name in ("b.md", "a.txt", "notes.pdf"):
+        (tmp_path / name).write_text("report", encoding="utf-8")
+
+    jobs = jobs_from_directory(str(tmp_path), "out")
+    assert [job.name for job in jobs] == ["a", "b"]
+    # Without answer documents, each report answers its own questions
+    assert jobs[1].answer_docs == [str(tmp_path / "b.md")]
+
+    shared = jobs_from_directory(str(tmp_path), "out", answer_docs=["x.md", "y.md"])
+    assert all(job.answer_docs == ["x.md", "y.md"] for job in shared)
+
+def _jobs(n):
+    return [BatchJob(f"job{i}", f"q{i}.md", [f"a{i}.md"], f"out/job{i}.md") for i in range(n)]
+
+def test_run_batch_statuses():
+    def run_job(job):
+        if job.name == "job0":
+            yield "Synthesizer", PartialMessage("Par", "Par") # Streamed text is not an answer
+            yield "Synthesizer", "Final"
+            yield "Synthesizer", "Final 2"
+        elif job.name == "job1":
+            yield "System", "Error for Answer Agent V3 1: Report file not found"
+            yield "Synthesizer", "Final"
+        elif job.name == "job2":
+            yield "System", "Error generating initial questions: API down"
+        else:
+            raise RuntimeError("boom")
+
+    results = {r.name: r for r in run_batch(_jobs(4), run_job, max_workers=2)}
+
+    assert (results["job0"].status, results["job0"].questions_answered) == (JOB_STATUS_OK, 2)
+    assert (results["job1"].status, results["job1"].errors) == (JOB_STATUS_PARTIAL, ["Error for Answer Agent V3 1: Report file not found"])
+    assert results["job2"].status == JOB_STATUS_FAILED
+    assert results["job3"].status == JOB_STATUS_FAILED
+    assert "boom" in results["job3"].errors[0]
+
+def test_run_batch_runs_jobs_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    def run_job(job):
+        barrier.wait()
+        yield "Synthesizer", "Final"
+
+    results = list(run_batch(_jobs(3), run_job, max_workers=3))
+    assert all(r.status == JOB_STATUS_OK for r in results)
+
+def test_run_batch_invalid_workers():
+    with pytest.raises(ValueError):
+        list(run_batch(_jobs(1), lambda job: iter(()), max_workers=0))
+
+def test_write_summary(tmp_path):
+    results = list(run_batch(_jobs(2), lambda job: iter([("Synthesizer", "Final")]), max_workers=1))
+    path = write_summary(results, str(tmp_path), seconds=1.23456)
+
+    assert path == str(tmp_path / SUMMARY_FILE_NAME)
+    summary = json.loads((tmp_path / SUMMARY_FILE_NAME).read_text(encoding="utf-8"))
+    assert (summary["jobs"], summary["ok"], summary["failed"], summary["questions_answered"]) == (2, 2, 0, 2)
+    assert summary["seconds"] == 1.235
+    assert [r["name"] for r in summary["results"]] == ["job0", "job1"]
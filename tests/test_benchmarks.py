@@ -0,0 +1,107 @@
+import pytest
+import json
+import os
+import sys
+
+# Add project root and src directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+src_path = os.path.join(project_root, 'src')
+for path in (project_root, src_path):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks.orchestrator_bench import (
+    BenchmarkCase, build_matrix, build_report, compare_to_baseline, list_documents, load_baseline, percentile,
+    run_case, save_report,
+)
+
+FAST_FAKE_CONFIG = {"seed": 0, "time_scale": 0, "response_tokens": 40}
+
+
+def _result(name="v3-a1-r1-q1-doc", p50=1.0, llm_calls=10, prompt_tokens=1000):
+    return {"name": name, "p50_seconds": p50, "llm_calls": llm_calls, "prompt_tokens": prompt_tokens}
+
+# --- Test Cases --- #
+
+def test_percentile_interpolates():
+    """Tests percentiles on odd, even and single-value inputs."""
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([1, 2, 3, 4, 5], 95) == pytest.approx(4.8)
+    assert percentile([7.0], 95) == 7.0
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+def test_build_quick_matrix_varies_one_dimension_at_a_time():
+    """Tests the quick matrix: unique cases covering agents 1-16, rounds 0-5 and questions 1-50."""
+    cases = build_matrix("quick", ["small.md", "medium.md", "large.md"])
+
+    assert len(cases) == len(set(cases))
+    v3 = [c for c in cases if c.workflow == "v3"]
+    assert {c.agents for c in v3} == {1, 3, 4, 16}
+    assert {c.rounds for c in v3} == {0, 2, 5}
+    assert {c.questions for c in v3} == {1, 3, 10, 50}
+    assert {c.document for c in v3} == {"small.md", "medium.md", "large.md"}
+    assert all(c.rounds == 0 for c in cases if c.workflow == "v2")
+    assert BenchmarkCase("v3", 4, 2, 3, "medium.md").name == "v3-a4-r2-q3-medium"
+
+def test_build_full_matrix_and_validation():
+    """Tests the full matrix size and rejection of unknown matrices and workflows."""
+    assert len(build_matrix("full", ["a.md"], ["v3"])) == 5 * 6 * 5
+    with pytest.raises(ValueError, match="matrix"):
+        build_matrix("huge", ["a.md"])
+    with pytest.raises(ValueError, match="workflow"):
+        build_matrix("quick", ["a.md"], ["v4"])
+
+def test_list_documents_sorted_by_size():
+    """Tests that the report corpus is listed smallest first."""
+    documents = list_documents()
+    sizes = [os.path.getsize(os.path.join(project_root, "data", "reports", d)) for d in documents]
+    assert documents and sizes == sorted(sizes)
+
+@pytest.mark.parametrize("workflow, rounds, expected_calls", [
+    ("v2", 0, 1 + 2 * (2 + 1)),     # question generation + per question: each agent + synthesis
+    ("v3", 1, 1 + 2 * (2 * 2 + 1)), # question generation + per question: each agent per round + synthesis
+])
+def test_run_case_counts_llm_calls(workflow, rounds, expected_calls):
+    """Tests that a case runs end to end on the fake backend and reports deterministic counts."""
+    case = BenchmarkCase(workflow, 2, rounds, 2, list_documents()[0])
+    result = run_case(case, FAST_FAKE_CONFIG, repeats=2)
+
+    assert result["name"] == case.name
+    assert result["llm_calls"] == expected_calls
+    assert result["prompt_tokens"] > 0 and result["completion_tokens"] > 0
+    assert result["errors"] == 0
+    assert 0 <= result["p50_seconds"] <= result["p95_seconds"]
+    assert result["peak_rss_mb"] > 0
+    assert run_case(case, FAST_FAKE_CONFIG, repeats=1)["prompt_tokens"] == result["prompt_tokens"]
+
+def test_compare_to_baseline_flags_regressions():
+    """Tests that more calls/tokens or a large slowdown are regressions, and noise is not."""
+    baseline = {"cases": {"a": _result("a"), "b": _result("b"), "c": _result("c", p50=0.01)}}
+    results = [
+        _result("a", llm_calls=11),
+        _result("b", p50=1.6),
+        _result("c", p50=0.03), # 3x slower but below the noise floor
+        _result("new-case", p50=100),
+    ]
+
+    regressions = compare_to_baseline(results, baseline, time_tolerance=0.5)
+
+    assert regressions == ["a: llm_calls 10 -> 11", "b: p50 1.000s -> 1.600s (+60%)"]
+    assert compare_to_baseline([_result("a", p50=0.5, llm_calls=9)], baseline) == []
+
+def test_report_round_trip(tmp_path):
+    """Tests that a saved report loads as a baseline and other files are rejected."""
+    path = tmp_path / "baseline.json"
+    save_report(build_report([_result("a")], FAST_FAKE_CONFIG, repeats=3), str(path))
+
+    baseline = load_baseline(str(path))
+    assert baseline["cases"]["a"]["llm_calls"] == 10
+    assert baseline["repeats"] == 3
+    assert load_baseline(str(tmp_path / "missing.json")) is None
+
+    path.write_text(json.dumps({"cases": []}), encoding="utf-8")
+    with pytest.raises(ValueError, match="not a version"):
+        load_baseline(str(path))
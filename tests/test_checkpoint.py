@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from src.utils.checkpoint import CheckpointMismatchError, RunCheckpoint, default_checkpoint_path
+
+RUN_INFO = {"workflow": "orchestrate_v3", "answer_docs": ("a.md", "b.md"), "num_initial_questions": 2}
+
+# --- Test Cases --- #
+
+def test_default_checkpoint_path():
+    assert default_checkpoint_path("out/results.md") == "out/results.md.checkpoint.jsonl"
+
+def test_records_are_restored_on_resume(tmp_path):
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    checkpoint = RunCheckpoint(path)
+    assert checkpoint.start(RUN_INFO) is False
+    checkpoint.record_questions(["Q1?", "Q2?"])
+    checkpoint.record_response("Q1?", "Agent 1", 0, "A1")
+    checkpoint.record_response("Q1?", "Agent 1", 1, "A1 R1")
+    checkpoint.record_final_answer("Q1?", "Final 1")
+    checkpoint.close()
+
+    resumed = RunCheckpoint(path, resume=True)
+    assert resumed.start(RUN_INFO) is True
+    assert resumed.questions == ["Q1?", "Q2?"]
+    assert resumed.get_response("Q1?", "Agent 1", 1) == "A1 R1"
+    assert resumed.get_response("Q2?", "Agent 1", 0) is None
+    assert resumed.get_final_answer("Q1?") == "Final 1"
+    assert resumed.stats() == {"questions": 2, "responses": 2, "final_answers": 1}
+
+    # New records are appended to the existing journal
+    resumed.record_final_answer("Q2?", "Final 2")
+    resumed.close()
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records[0]["type"] == "run"
+    assert records[-1] == {"type": "final", "question": "Q2?", "final_answer": "Final 2"}
+
+def test_start_without_resume_overwrites(tmp_path):
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    first = RunCheckpoint(path)
+    first.start(RUN_INFO)
+    first.record_questions(["Q1?"])
+    first.close()
+
+    fresh = RunCheckpoint(path)
+    assert fresh.start(RUN_INFO) is False
+    assert fresh.questions is None
+    fresh.close()
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+def test_resume_without_journal_starts_fresh(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path / "missing.jsonl"), resume=True)
+    assert checkpoint.start(RUN_INFO) is False
+    checkpoint.close()
+
+def test_resume_rejects_different_run(tmp_path):
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    checkpoint = RunCheckpoint(path)
+    checkpoint.start(RUN_INFO)
+    checkpoint.close()
+
+    with pytest.raises(CheckpointMismatchError, match="different run"):
+        RunCheckpoint(path, resume=True).start(dict(RUN_INFO, num_initial_questions=5))
+
+def test_resume_ignores_truncated_last_record(tmp_path):
+    path = str(tmp_path / "run.checkpoint.jsonl")
+    checkpoint = RunCheckpoint(path)
+    checkpoint.start(RUN_INFO)
+    checkpoint.record_response("Q1?", "Agent 1", 0, "A1")
+    checkpoint.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "response", "question": "Q1?", "ag')
+
+    resumed = RunCheckpoint(path, resume=True)
+    assert resumed.start(RUN_INFO) is True
+    assert resumed.get_response("Q1?", "Agent 1", 0) == "A1"
+    resumed.close()
+
+def test_record_before_start_raises(tmp_path):
+    with pytest.raises(RuntimeError):
+        RunCheckpoint(str(tmp_path / "run.jsonl")).record_questions(["Q1?"])
@@ -0,0 +1,40 @@
+import threading
+import pytest
+
+from src.utils.concurrency import run_concurrently
+
+# --- Test Cases --- #
+
+def test_run_concurrently_sequential_preserves_order():
+    """Tests that max_workers=1 runs calls inline and in order."""
+    results = list(run_concurrently(lambda x: x * 2, [(1,), (2,), (3,)], max_workers=1))
+    assert results == [(0, 2, None), (1, 4, None), (2, 6, None)]
+
+def test_run_concurrently_runs_in_parallel():
+    """Tests that calls overlap when max_workers allows it."""
+    barrier = threading.Barrier(3, timeout=5)
+
+    def wait_and_return(x):
+        barrier.wait() # Only releases if all three calls are running at once
+        return x
+
+    results = list(run_concurrently(wait_and_return, [(1,), (2,), (3,)], max_workers=3))
+    assert sorted(r[1] for r in results) == [1, 2, 3]
+    assert all(r[2] is None for r in results)
+
+def test_run_concurrently_reports_errors_per_call():
+    """Tests that an exception in one call is returned, not raised."""
+    def maybe_fail(x):
+        if x == 2:
+            raise ValueError("boom")
+        return x
+
+    results = {idx: (res, err) for idx, res, err in run_concurrently(maybe_fail, [(1,), (2,)], max_workers=2)}
+    assert results[0] == (1, None)
+    assert results[1][0] is None
+    assert isinstance(results[1][1], ValueError)
+
+def test_run_concurrently_invalid_max_workers():
+    """Tests that max_workers below 1 is rejected."""
+    with pytest.raises(ValueError):
+        list(run_concurrently(lambda: None, [()], max_workers=0))
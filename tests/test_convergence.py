@@ -0,0 +1,39 @@
+import pytest
+
+from src.utils.convergence import response_similarity, responses_by_agent, round_convergence
+
+# --- Test Cases --- #
+
+def test_response_similarity_identical_and_disjoint():
+    assert response_similarity("Revenue grew 10% in 2024.", "Revenue grew 10% in 2024.") == pytest.approx(1.0)
+    assert response_similarity("Revenue grew strongly.", "Margins collapsed badly.") == 0.0
+
+def test_response_similarity_ignores_case_and_stopwords():
+    assert response_similarity("The revenue GREW", "revenue grew") == pytest.approx(1.0)
+
+def test_response_similarity_empty_responses():
+    assert response_similarity("", "") == 1.0
+    assert response_similarity("", "Revenue grew.") == 0.0
+
+def test_response_similarity_partial_overlap():
+    similarity = response_similarity("Revenue grew 10% driven by phones.", "Revenue grew 10% driven by services.")
+    assert 0.5 < similarity < 1.0
+
+def test_round_convergence_reports_minimum():
+    previous = {"A": "Revenue grew 10%.", "B": "Margins fell to 5%."}
+    current = {"A": "Revenue grew 10%.", "B": "Margins rose sharply."}
+    min_similarity, similarities = round_convergence(previous, current)
+    assert similarities["A"] == pytest.approx(1.0)
+    assert min_similarity == similarities["B"] < 1.0
+
+def test_round_convergence_undecidable_cases():
+    # Missing agent
+    assert round_convergence({"A": "x"}, {"A": "x", "B": "y"}) is None
+    # Error placeholders are not positions
+    assert round_convergence({"A": "Error: Failed to generate response"}, {"A": "Error: Failed to generate response"}) is None
+    assert round_convergence({}, {}) is None
+
+def test_responses_by_agent_selects_round():
+    history = [("A", 0, "a0"), ("B", 0, "b0"), ("A", 1, "a1")]
+    assert responses_by_agent(history, 0) == {"A": "a0", "B": "b0"}
+    assert responses_by_agent(history, 1) == {"A": "a1"}
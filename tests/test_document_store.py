@@ -0,0 +1,77 @@
+import os
+import threading
+
+import pytest
+
+from src.utils.document_store import DocumentStore
+
+# --- Test Cases --- #
+
+def test_get_reads_document_once(tmp_path):
+    path = tmp_path / "report.md"
+    path.write_text("Report content", encoding="utf-8")
+    store = DocumentStore()
+
+    first = store.get(str(path))
+    second = store.get(str(path))
+
+    assert first == "Report content"
+    # The same string object is handed out on every hit
+    assert second is first
+    assert store.stats() == {"reads": 1, "hits": 1, "documents": 1}
+
+def test_get_rereads_changed_document(tmp_path):
+    path = tmp_path / "report.md"
+    path.write_text("Old", encoding="utf-8")
+    store = DocumentStore()
+    assert store.get(str(path)) == "Old"
+
+    path.write_text("New content", encoding="utf-8")
+    stat = os.stat(path)
+    # Make sure the modification time differs even on coarse-grained filesystems
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.get(str(path)) == "New content"
+    assert store.reads == 2
+
+def test_get_same_file_via_different_paths(tmp_path, monkeypatch):
+    path = tmp_path / "report.md"
+    path.write_text("Content", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    store = DocumentStore()
+
+    store.get("report.md")
+    store.get(str(path))
+
+    assert store.reads == 1
+
+def test_get_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DocumentStore().get(str(tmp_path / "missing.md"))
+
+def test_concurrent_gets_read_once(tmp_path):
+    path = tmp_path / "report.md"
+    path.write_text("Shared", encoding="utf-8")
+    store = DocumentStore()
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(store.get(str(path)))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["Shared"] * 8
+    assert store.reads == 1
+
+def test_clear(tmp_path):
+    path = tmp_path / "report.md"
+    path.write_text("Content", encoding="utf-8")
+    store = DocumentStore()
+    store.get(str(path))
+
+    store.clear()
+
+    assert len(store) == 0
+    store.get(str(path))
+    assert store.reads == 2
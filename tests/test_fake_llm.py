@@ -0,0 +1,213 @@
+import pytest
+from unittest.mock import patch
+import asyncio
+import json
+import os
+import sys
+
+# Add src directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from openai import APITimeoutError, BadRequestError, InternalServerError, RateLimitError
+
+from model_manager import ModelManager
+from core.llm_interface import LLMInterface, AsyncLLMInterface
+from src.utils.fake_llm import ( # Same module object LLMInterface uses (shared backends)
+    AsyncFakeOpenAIClient, FakeLLMBackend, FakeLLMSettings, FakeOpenAIClient, LatencyDistribution,
+    get_fake_backend, reset_fake_backends,
+)
+from utils.retry import RetryPolicy, is_retryable
+
+MESSAGES = [{"role": "user", "content": "What was revenue growth in the quarter?"}]
+
+
+def _client(**settings):
+    settings.setdefault("time_scale", 0)
+    return FakeOpenAIClient(FakeLLMBackend(FakeLLMSettings(**settings), model_name="fake-o3"))
+
+def _create(client, **params):
+    return client.chat.completions.create(model="fake-o3", messages=MESSAGES, **params)
+
+# --- Test Cases --- #
+
+def test_responses_are_deterministic_per_seed():
+    """Tests that the same seed and request give the same text, and another seed does not."""
+    first = _create(_client(seed=1)).choices[0].message.content
+    again = _create(_client(seed=1)).choices[0].message.content
+    other = _create(_client(seed=2)).choices[0].message.content
+
+    assert first == again
+    assert first != other
+
+def test_max_tokens_caps_completion_and_usage_is_reported():
+    """Tests that max_tokens caps the completion length and usage adds up."""
+    response = _create(_client(response_tokens=50), max_tokens=10)
+
+    assert len(response.choices[0].message.content.split()) == 10
+    assert response.usage.completion_tokens == 10
+    assert response.usage.total_tokens == response.usage.prompt_tokens + 10
+
+def test_rate_limit_rate_raises_retryable_429_with_retry_after():
+    """Tests that rate-limited requests raise a retryable RateLimitError carrying Retry-After."""
+    with pytest.raises(RateLimitError) as exc_info:
+        _create(_client(rate_limit_rate=1.0, retry_after=2))
+
+    assert exc_info.value.response.headers["retry-after"] == "2"
+    assert is_retryable(exc_info.value)
+
+def test_context_limit_raises_non_retryable_error():
+    """Tests that prompts over the context limit get a 400 context_length_exceeded error."""
+    client = _client(context_limit=20)
+    with pytest.raises(BadRequestError) as exc_info:
+        _create(client, max_tokens=15)
+
+    assert exc_info.value.code == "context_length_exceeded"
+    assert not is_retryable(exc_info.value)
+    assert client.backend.stats()["context_errors"] == 1
+
+def test_error_draws_are_reproducible_across_retries():
+    """Tests that repeated sends of a request draw fresh but reproducible outcomes."""
+    def outcomes():
+        client = _client(seed=3, error_rate=0.5)
+        results = []
+        for _ in range(12):
+            try:
+                _create(client)
+                results.append("ok")
+            except InternalServerError:
+                results.append("500")
+        return results
+
+    first = outcomes()
+    assert first == outcomes()
+    assert {"ok", "500"} == set(first)
+
+def test_server_rpm_rejects_requests_over_the_window():
+    """Tests that the fake answers 429 once server_rpm requests arrived within a minute."""
+    client = _client(server_rpm=2)
+    _create(client)
+    _create(client)
+    with pytest.raises(RateLimitError):
+        _create(client)
+
+    assert client.backend.stats()["rate_limited"] == 1
+
+def test_latency_and_generation_time_are_simulated():
+    """Tests that a call waits for first-token latency plus generation time, scaled by time_scale."""
+    client = _client(latency=0.5, tokens_per_second=10, response_tokens=6, time_scale=2)
+    with patch('src.utils.fake_llm.time.sleep') as mock_sleep:
+        _create(client)
+
+    mock_sleep.assert_called_once_with(pytest.approx(2 * (0.5 + 5 / 10)))
+    assert client.backend.stats()["simulated_seconds"] == pytest.approx(2.0)
+
+def test_request_timeout_raises_api_timeout():
+    """Tests that a request whose simulated latency exceeds its timeout times out."""
+    client = _client(latency=5.0, time_scale=1)
+    with patch('src.utils.fake_llm.time.sleep') as mock_sleep:
+        with pytest.raises(APITimeoutError):
+            _create(client, timeout=1.5)
+
+    mock_sleep.assert_called_once_with(1.5)
+
+def test_stream_yields_same_text_as_completion():
+    """Tests that streamed chunks join to the non-streamed completion."""
+    client = _client(seed=5, response_tokens=8)
+    completion = _create(client).choices[0].message.content
+    chunks = list(_create(client, stream=True))
+
+    assert "".join(c.choices[0].delta.content or "" for c in chunks) == completion
+    assert chunks[-1].choices[0].finish_reason == "stop"
+
+def test_stream_include_usage_sends_usage_chunk():
+    """Tests that stream_options include_usage adds a final choice-less chunk with the usage."""
+    client = _client(seed=5, response_tokens=8)
+    usage = _create(client).usage
+    chunks = list(_create(client, stream=True, stream_options={"include_usage": True}))
+
+    assert chunks[-1].choices == []
+    assert chunks[-1].usage == usage
+    assert chunks[-2].choices[0].finish_reason == "stop"
+
+def test_list_prompts_get_numbered_lines():
+    """Tests that a prompt asking for a list of N items is answered with N numbered lines."""
+    client = _client(response_tokens=30)
+    response = client.chat.completions.create(
+        model="fake-o3", messages=[{"role": "user", "content": "Generate a list of 5 questions."}]
+    )
+    lines = response.choices[0].message.content.split("\n")
+
+    assert [line.split(".")[0] for line in lines] == ["1", "2", "3", "4", "5"]
+    assert all(line.endswith("?") for line in lines)
+    assert response.usage.completion_tokens == 30
+
+def test_async_client_matches_sync_client():
+    """Tests that the async client returns the same completion as the sync one."""
+    backend = FakeLLMBackend(FakeLLMSettings(seed=4, time_scale=0), model_name="fake-o3")
+    sync_text = FakeOpenAIClient(backend).chat.completions.create(model="fake-o3", messages=MESSAGES)
+    async_text = asyncio.run(
+        AsyncFakeOpenAIClient(backend).chat.completions.create(model="fake-o3", messages=MESSAGES)
+    )
+
+    assert async_text.choices[0].message.content == sync_text.choices[0].message.content
+
+def test_latency_distribution_config():
+    """Tests latency config parsing, sampling bounds and validation."""
+    import random
+    rng = random.Random(0)
+    assert LatencyDistribution.from_config(0.25).sample(rng) == 0.25
+    uniform = LatencyDistribution.from_config({"distribution": "uniform", "min": 0.1, "max": 0.2})
+    assert all(0.1 <= uniform.sample(rng) <= 0.2 for _ in range(50))
+    assert LatencyDistribution.from_config({"distribution": "normal", "mean": 0, "stddev": 1}).sample(rng) >= 0
+
+    with pytest.raises(ValueError, match="needs sigma"):
+        LatencyDistribution.from_config({"distribution": "lognormal", "median": 1})
+    with pytest.raises(ValueError, match="Unknown latency distribution"):
+        LatencyDistribution.from_config({"distribution": "pareto"})
+    with pytest.raises(ValueError, match="error_rate"):
+        FakeLLMSettings(error_rate=1.5)
+
+def test_fake_model_from_config_serves_llm_interface(tmp_path):
+    """Tests that a fake_llm config entry replaces the real model and is served offline."""
+    config = {"model": {
+        "api_llm": {"openai": {"api_key": "real-key", "models": {"gpt-o3-mini": {"name": "o3-mini"}}}},
+        "fake_llm": {"gpt-o3-mini": {"seed": 1, "time_scale": 0, "rate_limit_rate": 0.0, "rpm": 1000}},
+    }}
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    reset_fake_backends()
+
+    assert ModelManager(str(config_path)).get_model_config("gpt-o3-mini")["provider"] == "fake"
+    with patch.dict(os.environ, {"USE_LLM_PROXY": "false"}):
+        llm = LLMInterface(config_path=str(config_path), model_key="gpt-o3-mini")
+        async_llm = AsyncLLMInterface(config_path=str(config_path), model_key="gpt-o3-mini")
+
+    answer = llm.generate_chat_response(MESSAGES)
+    assert answer.startswith("[gpt-o3-mini:")
+    assert "".join(llm.generate_chat_response_stream(MESSAGES)) == answer
+    assert asyncio.run(async_llm.generate_chat_response(MESSAGES)) == answer
+    assert llm.rate_limiter is not None # "rpm" still configures the client-side limiter
+    assert get_fake_backend("gpt-o3-mini", {}).stats()["responses"] == 3
+    reset_fake_backends()
+
+def test_llm_interface_retries_fake_server_errors(tmp_path):
+    """Tests that fake 500s go through the interface's retry policy."""
+    config = {"model": {"fake_llm": {"fake-model": {"seed": 3, "time_scale": 0, "error_rate": 0.5}}}}
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    reset_fake_backends()
+    with patch.dict(os.environ, {"USE_LLM_PROXY": "false"}):
+        llm = LLMInterface(config_path=str(config_path), model_key="fake-model",
+                           retry_policy=RetryPolicy(max_retries=10, initial_backoff=0))
+
+    assert llm.generate_chat_response(MESSAGES)
+    stats = get_fake_backend("fake-model", {}).stats()
+    assert stats["responses"] == 1
+    assert stats["requests"] == stats["errors"] + 1
+    reset_fake_backends()
@@ -0,0 +1,372 @@
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+import os
+import sys
+import asyncio
+import threading
+import time
+
+import httpx
+from openai import APITimeoutError
+
+# --- Add src to sys.path --- #
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+# --- End sys.path Modification ---
+
+from core.llm_interface import (
+    LLMInterface, AsyncLLMInterface, get_shared_http_client, get_llm_interface, register_llm_interface,
+    reset_llm_interfaces,
+)
+from utils.response_cache import ResponseCache
+from utils.rate_limiter import reset_rate_limiters
+from utils.retry import RetryPolicy
+
+# --- Fixtures --- #
+
+MOCK_MODEL_CONFIG = {
+    "type": "api_llm",
+    "provider": "openai",
+    "config": {"name": "gpt-4o"},
+    "api_key": "test-key",
+}
+
+@pytest.fixture
+def mock_openai():
+    """Mocks ModelManager and the OpenAI client used by LLMInterface."""
+    with (
+        patch('core.llm_interface.ModelManager') as MockModelManager,
+        patch('core.llm_interface.OpenAI') as MockOpenAI,
+        patch.dict(os.environ, {"USE_LLM_PROXY": "false"})
+    ):
+        MockModelManager.return_value.get_model_config.return_value = MOCK_MODEL_CONFIG
+        mock_client = MockOpenAI.return_value
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = "Mock LLM response"
+        mock_client.chat.completions.create.return_value = mock_response
+        yield mock_client
+
+# --- Test Cases --- #
+
+def test_generate_chat_response_success(mock_openai):
+    """Tests a basic chat completion call."""
+    llm = LLMInterface(model_key="gpt-4o")
+    messages = [{"role": "user", "content": "Hello"}]
+
+    assert llm.generate_chat_response(messages) == "Mock LLM response"
+    mock_openai.chat.completions.create.assert_called_once_with(
+        model="gpt-4o", messages=messages, temperature=0.7
+    )
+
+def test_init_invalid_max_concurrent_requests(mock_openai):
+    """Tests that a non-positive request cap is rejected."""
+    with pytest.raises(ValueError, match="max_concurrent_requests"):
+        LLMInterface(model_key="gpt-4o", max_concurrent_requests=0)
+
+def test_max_concurrent_requests_caps_in_flight_calls(mock_openai):
+    """Tests that no more than max_concurrent_requests calls run at once."""
+    llm = LLMInterface(model_key="gpt-4o", max_concurrent_requests=2)
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+    response = mock_openai.chat.completions.create.return_value
+
+    def slow_create(**params):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["now"] -= 1
+        return response
+    mock_openai.chat.completions.create.side_effect = slow_create
+
+    threads = [
+        threading.Thread(target=llm.generate_chat_response, args=([{"role": "user", "content": "Hi"}],))
+        for _ in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert mock_openai.chat.completions.create.call_count == 6
+    assert in_flight["peak"] == 2
+
+def test_interfaces_share_pooled_http_client(mock_openai):
+    """Tests that separate interfaces are built on the same pooled HTTP client."""
+    with patch('core.llm_interface.OpenAI') as MockOpenAI:
+        LLMInterface(model_key="gpt-4o")
+        LLMInterface(model_key="gpt-4o")
+
+    shared_client = get_shared_http_client()
+    assert shared_client is get_shared_http_client()
+    assert MockOpenAI.call_count == 2
+    for call in MockOpenAI.call_args_list:
+        assert call.kwargs["http_client"] is shared_client
+
+def test_async_generate_response(mock_openai):
+    """Tests the async interface awaits the AsyncOpenAI client."""
+    with patch('core.llm_interface.AsyncOpenAI') as MockAsyncOpenAI:
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = " Async response "
+        create = AsyncMock(return_value=mock_response)
+        MockAsyncOpenAI.return_value.chat.completions.create = create
+
+        llm = AsyncLLMInterface(model_key="gpt-4o")
+        result = asyncio.run(llm.generate_response("Hello", system_prompt="Be brief"))
+
+    assert result == " Async response "
+    create.assert_awaited_once_with(
+        model="gpt-4o",
+        messages=[{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hello"}],
+        temperature=0.7,
+    )
+
+def test_response_cache_serves_repeated_requests(mock_openai, tmp_path):
+    """Tests that an identical request is answered from the cache without an API call."""
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    llm = LLMInterface(model_key="gpt-4o", response_cache=cache)
+    messages = [{"role": "user", "content": "Hello"}]
+
+    assert llm.generate_chat_response(messages) == "Mock LLM response"
+    assert llm.generate_chat_response(messages) == "Mock LLM response"
+    # A different temperature is a different request
+    llm.generate_chat_response(messages, temperature=0.1)
+
+    assert mock_openai.chat.completions.create.call_count == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 2
+    cache.close()
+
+def test_get_llm_interface_shares_one_instance_per_model_key(mock_openai):
+    """Tests that the registry builds one interface per model key and reuses it."""
+    reset_llm_interfaces()
+    with patch('core.llm_interface.OpenAI') as MockOpenAI:
+        first = get_llm_interface("gpt-4o", max_concurrent_requests=2)
+        second = get_llm_interface("gpt-4o", max_concurrent_requests=8)
+        other = get_llm_interface("gpt-4o-mini")
+
+    assert first is second
+    assert first.max_concurrent_requests == 2 # The first call's settings win
+    assert other is not first and other.current_model == "gpt-4o-mini"
+    assert MockOpenAI.call_count == 2
+
+    reset_llm_interfaces()
+    assert get_llm_interface("gpt-4o") is not first
+    reset_llm_interfaces()
+
+def test_get_llm_interface_does_not_register_failures(mock_openai):
+    """Tests that an unknown model key raises and leaves nothing registered."""
+    reset_llm_interfaces()
+    with patch('core.llm_interface.ModelManager') as MockModelManager:
+        MockModelManager.return_value.get_model_config.return_value = None
+        MockModelManager.return_value.available_models = {}
+        with pytest.raises(ValueError, match="not found"):
+            get_llm_interface("missing-model")
+
+    assert get_llm_interface("missing-model").current_model == "missing-model"
+    reset_llm_interfaces()
+
+def test_register_llm_interface_replaces_shared_instance(mock_openai):
+    """Tests that a pre-built interface becomes the shared one for its model key."""
+    reset_llm_interfaces()
+    llm = LLMInterface(model_key="gpt-4o", max_concurrent_requests=4)
+    register_llm_interface(llm)
+
+    assert get_llm_interface("gpt-4o") is llm
+    reset_llm_interfaces()
+
+def test_rate_limits_from_model_config(mock_openai):
+    """Tests that rpm/tpm from the model config enable a shared limiter that reserves tokens."""
+    reset_rate_limiters()
+    config = dict(MOCK_MODEL_CONFIG, config={"name": "gpt-4o", "rpm": 500, "tpm": 100000})
+    with patch('core.llm_interface.ModelManager') as MockModelManager:
+        MockModelManager.return_value.get_model_config.return_value = config
+        llm = LLMInterface(model_key="gpt-4o")
+        other = LLMInterface(model_key="gpt-4o")
+
+    assert llm.rate_limiter is not None
+    assert llm.rate_limiter is other.rate_limiter
+    mock_openai.chat.completions.create.return_value.usage.total_tokens = 150
+
+    with patch.object(llm.rate_limiter, 'acquire', wraps=llm.rate_limiter.acquire) as mock_acquire, \
+         patch.object(llm.rate_limiter, 'record_usage') as mock_record:
+        llm.generate_chat_response([{"role": "user", "content": "Hello"}],
+                                   max_tokens=50, estimated_prompt_tokens=120)
+
+    mock_acquire.assert_called_once_with(170, timeout=None)
+    mock_record.assert_called_once_with(170, 150)
+    reset_rate_limiters()
+
+def test_no_rate_limiter_without_config(mock_openai):
+    """Tests that no limiter is used when the model config has no limits."""
+    llm = LLMInterface(model_key="gpt-4o")
+    assert llm.rate_limiter is None
+
+def test_generate_chat_response_retries_transient_errors(mock_openai):
+    """Tests that a transient API error is retried and the deadline becomes a request timeout."""
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = mock_openai.chat.completions.create.return_value
+    mock_openai.chat.completions.create.side_effect = [APITimeoutError(request=request), response]
+    llm = LLMInterface(model_key="gpt-4o", retry_policy=RetryPolicy(max_retries=2, initial_backoff=0.0))
+    messages = [{"role": "user", "content": "Hello"}]
+
+    with patch('src.utils.retry.time.sleep') as mock_sleep:
+        assert llm.generate_chat_response(messages, deadline=30.0) == "Mock LLM response"
+
+    assert mock_openai.chat.completions.create.call_count == 2
+    mock_sleep.assert_called_once()
+    last_kwargs = mock_openai.chat.completions.create.call_args.kwargs
+    assert 0 < last_kwargs["timeout"] <= 30.0
+
+def test_generate_chat_response_deadline_covers_request_slot_wait(mock_openai):
+    """Tests that waiting for a max_concurrent_requests slot counts against the deadline."""
+    llm = LLMInterface(model_key="gpt-4o", max_concurrent_requests=1)
+    llm._request_semaphore.acquire() # Another call holds the only slot
+    messages = [{"role": "user", "content": "Hello"}]
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        llm.generate_chat_response(messages, deadline=0.1)
+    assert time.monotonic() - start < 1.0
+    mock_openai.chat.completions.create.assert_not_called()
+
+    llm._request_semaphore.release()
+    assert llm.generate_chat_response(messages, deadline=5.0) == "Mock LLM response" # The slot was not leaked
+
+def test_generate_chat_response_deadline_covers_rate_limit_wait(mock_openai):
+    """Tests that the request gets only the time left after queueing, and none once it is gone."""
+    llm = LLMInterface(model_key="gpt-4o")
+    llm.rate_limiter = MagicMock()
+    llm.rate_limiter.tokens_per_minute = 100000
+    messages = [{"role": "user", "content": "Hello"}]
+
+    llm.rate_limiter.acquire.side_effect = lambda tokens, timeout=None: time.sleep(0.05)
+    llm.generate_chat_response(messages, max_tokens=50, estimated_prompt_tokens=100, deadline=1.0)
+    assert mock_openai.chat.completions.create.call_args.kwargs["timeout"] <= 0.95
+
+    mock_openai.chat.completions.create.reset_mock()
+    llm.rate_limiter.acquire.side_effect = lambda tokens, timeout=None: time.sleep(0.15)
+    with pytest.raises(TimeoutError):
+        llm.generate_chat_response(messages, max_tokens=50, estimated_prompt_tokens=100, deadline=0.1)
+    mock_openai.chat.completions.create.assert_not_called()
+    llm.rate_limiter.record_usage.assert_called_with(150, 0) # The reservation is returned
+
+def test_generate_chat_response_deadline_bounds_rate_limit_wait(mock_openai):
+    """Tests that a call stops queueing for an exhausted TPM budget once its deadline passes."""
+    from src.utils.rate_limiter import TokenBucketRateLimiter
+    llm = LLMInterface(model_key="gpt-4o")
+    llm.rate_limiter = TokenBucketRateLimiter(tokens_per_minute=1000)
+    llm.rate_limiter.acquire(1000) # Drained: the next 1000 tokens take a minute to refill
+    messages = [{"role": "user", "content": "Hello"}]
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        llm.generate_chat_response(messages, max_tokens=500, estimated_prompt_tokens=100, deadline=0.2)
+    with pytest.raises(TimeoutError):
+        list(llm.generate_chat_response_stream(messages, max_tokens=500, estimated_prompt_tokens=100,
+                                               deadline=0.2))
+    assert time.monotonic() - start < 2.0
+    mock_openai.chat.completions.create.assert_not_called()
+    assert not llm.rate_limiter._queue
+
+def test_generate_chat_response_stream_deadline_covers_request_slot_wait(mock_openai):
+    """Tests that opening a stream gives up once the deadline passes while waiting for a slot."""
+    llm = LLMInterface(model_key="gpt-4o", max_concurrent_requests=1)
+    llm._request_semaphore.acquire()
+
+    with pytest.raises(TimeoutError):
+        list(llm.generate_chat_response_stream([{"role": "user", "content": "Hello"}], deadline=0.1))
+    mock_openai.chat.completions.create.assert_not_called()
+    llm._request_semaphore.release()
+    assert llm._request_semaphore.acquire(blocking=False)
+
+def test_generate_chat_response_no_retry_on_permanent_error(mock_openai):
+    """Tests that non-transient errors propagate after a single attempt."""
+    mock_openai.chat.completions.create.side_effect = ValueError("Bad request")
+    llm = LLMInterface(model_key="gpt-4o")
+
+    with pytest.raises(ValueError, match="Bad request"):
+        llm.generate_chat_response([{"role": "user", "content": "Hello"}])
+    assert mock_openai.chat.completions.create.call_count == 1
+
+def _chunk(text):
+    chunk = MagicMock()
+    chunk.choices[0].delta.content = text
+    return chunk
+
+def test_generate_chat_response_stream_yields_deltas(mock_openai):
+    """Tests the streaming variant yields deltas and requests a stream."""
+    mock_openai.chat.completions.create.return_value = [_chunk("Hel"), _chunk(None), _chunk("lo")]
+    llm = LLMInterface(model_key="gpt-4o")
+    messages = [{"role": "user", "content": "Hi"}]
+
+    assert list(llm.generate_chat_response_stream(messages)) == ["Hel", "lo"]
+    mock_openai.chat.completions.create.assert_called_once_with(
+        model="gpt-4o", messages=messages, temperature=0.7, stream=True
+    )
+
+def _usage_chunk(total_tokens):
+    chunk = MagicMock()
+    chunk.choices = []
+    chunk.usage.total_tokens = total_tokens
+    return chunk
+
+def test_generate_chat_response_stream_settles_rate_limit_reservation(mock_openai):
+    """Tests that a streamed call settles its TPM reservation from the usage chunk, or an estimate."""
+    llm = LLMInterface(model_key="gpt-4o")
+    llm.rate_limiter = MagicMock()
+    llm.rate_limiter.tokens_per_minute = 100000
+    messages = [{"role": "user", "content": "Hi"}]
+
+    mock_openai.chat.completions.create.return_value = [_chunk("Hel"), _chunk("lo"), _usage_chunk(42)]
+    list(llm.generate_chat_response_stream(messages, max_tokens=50, estimated_prompt_tokens=100))
+    assert mock_openai.chat.completions.create.call_args.kwargs["stream_options"] == {"include_usage": True}
+    llm.rate_limiter.record_usage.assert_called_once_with(150, 42)
+
+    # Without a usage chunk (or when the stream breaks off) the text received so far is estimated
+    llm.rate_limiter.record_usage.reset_mock()
+    def broken_stream():
+        yield _chunk("Hello")
+        raise APITimeoutError(request=httpx.Request("POST", "https://api.example.com/v1/chat/completions"))
+    mock_openai.chat.completions.create.return_value = broken_stream()
+    with pytest.raises(APITimeoutError):
+        list(llm.generate_chat_response_stream(messages, max_tokens=50, estimated_prompt_tokens=100))
+    llm.rate_limiter.record_usage.assert_called_once_with(150, 101)
+
+def test_async_generate_chat_response_stream_settles_rate_limit_reservation(mock_openai):
+    """Tests that the async streamed call settles its TPM reservation from the usage chunk."""
+    async def stream():
+        for chunk in (_chunk("Hi"), _usage_chunk(30)):
+            yield chunk
+
+    async def collect(llm):
+        return [delta async for delta in llm.generate_chat_response_stream(
+            [{"role": "user", "content": "Hi"}], max_tokens=50, estimated_prompt_tokens=100)]
+
+    with patch('core.llm_interface.AsyncOpenAI') as MockAsyncOpenAI:
+        MockAsyncOpenAI.return_value.chat.completions.create = AsyncMock(return_value=stream())
+        llm = AsyncLLMInterface(model_key="gpt-4o")
+    llm.rate_limiter = MagicMock()
+    llm.rate_limiter.tokens_per_minute = 100000
+
+    assert asyncio.run(collect(llm)) == ["Hi"]
+    llm.rate_limiter.record_usage.assert_called_once_with(150, 30)
+
+def test_generate_chat_response_streams_to_installed_callback(mock_openai):
+    """Tests that generate_chat_response streams when a delta callback is installed."""
+    from src.utils.streaming import stream_deltas
+    mock_openai.chat.completions.create.return_value = [_chunk("Hel"), _chunk("lo")]
+    llm = LLMInterface(model_key="gpt-4o")
+    received = []
+
+    with stream_deltas(received.append):
+        result = llm.generate_chat_response([{"role": "user", "content": "Hi"}])
+
+    assert result == "Hello"
+    assert received == ["Hel", "lo"]
@@ -0,0 +1,163 @@
+import pytest
+from unittest.mock import patch
+import json
+import os
+import sys
+
+# Add src directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.llm_interface import LLMInterface
+from src.utils.fake_llm import reset_fake_backends
+from src.utils.llm_metrics import ( # Same module object LLMInterface uses (shared caller tag)
+    CallTimer, MetricsAggregator, estimate_cost, get_llm_caller, llm_caller,
+)
+from src.utils.concurrency import run_concurrently
+from src.utils.streaming import stream_call
+from utils.response_cache import ResponseCache
+from utils.retry import RetryPolicy
+
+MESSAGES = [{"role": "user", "content": "What was revenue growth in the quarter?"}]
+
+
+def _record(caller="Synthesizer", latency=1.0, prompt_tokens=100, completion_tokens=20, error=None, model="m"):
+    timer = CallTimer(model)
+    timer.caller = caller
+    timer.attempts = 1
+    metrics = timer.finish(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           cost_usd=0.5, error=error)
+    return metrics._replace(latency_seconds=latency, ttfb_seconds=latency / 2)
+
+@pytest.fixture
+def fake_llm(tmp_path):
+    """Builds an LLMInterface factory on a priced fake model."""
+    config = {"model": {"fake_llm": {"fake-model": {
+        "seed": 1, "time_scale": 0, "response_tokens": 30,
+        "input_price_per_1m": 2.0, "output_price_per_1m": 10.0,
+    }}}}
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    reset_fake_backends()
+
+    def make(**kwargs):
+        with patch.dict(os.environ, {"USE_LLM_PROXY": "false"}):
+            return LLMInterface(config_path=str(config_path), model_key="fake-model", **kwargs)
+    yield make
+    reset_fake_backends()
+
+# --- Test Cases --- #
+
+def test_llm_caller_nests_and_resets():
+    """Tests that caller tags nest and are restored on exit."""
+    assert get_llm_caller() is None
+    with llm_caller("Answer Agent 1"):
+        with llm_caller("Synthesizer"):
+            assert get_llm_caller() == "Synthesizer"
+        assert get_llm_caller() == "Answer Agent 1"
+    assert get_llm_caller() is None
+
+def test_caller_tag_reaches_worker_threads():
+    """Tests that run_concurrently and stream_call carry the caller tag into their threads."""
+    with llm_caller("Answer Agent 2"):
+        results = {idx: result for idx, result, _ in run_concurrently(lambda _: get_llm_caller(), [(1,), (2,)], 2)}
+        gen = stream_call("speaker", get_llm_caller)
+        try:
+            while True:
+                next(gen)
+        except StopIteration as stop:
+            streamed = stop.value
+
+    assert results == {0: "Answer Agent 2", 1: "Answer Agent 2"}
+    assert streamed == "Answer Agent 2"
+
+def test_estimate_cost():
+    """Tests cost from per-million-token prices, and None for unpriced models."""
+    assert estimate_cost({"input_price_per_1m": 2.0, "output_price_per_1m": 10.0}, 1000, 500) == pytest.approx(0.007)
+    assert estimate_cost({"output_price_per_1m": 10.0}, 1000, None) == 0
+    assert estimate_cost({"name": "o3-mini"}, 1000, 500) is None
+
+def test_aggregator_groups_by_model_and_caller():
+    """Tests per-caller sums and percentiles, plus totals."""
+    aggregator = MetricsAggregator()
+    for latency in (1.0, 2.0, 3.0):
+        aggregator(_record("Answer Agent 1", latency=latency))
+    aggregator(_record(None, error=RuntimeError("boom"), prompt_tokens=None, completion_tokens=None))
+
+    snapshot = aggregator.snapshot()
+    by_caller = {group["caller"]: group for group in snapshot["callers"]}
+    assert by_caller["Answer Agent 1"]["calls"] == 3
+    assert by_caller["Answer Agent 1"]["prompt_tokens"] == 300
+    assert by_caller["Answer Agent 1"]["latency_seconds_p50"] == 2.0
+    assert by_caller["untagged"]["errors"] == 1
+    assert snapshot["totals"]["calls"] == 4
+    assert snapshot["totals"]["cost_usd"] == 2.0
+
+    aggregator.reset()
+    assert aggregator.snapshot()["callers"] == []
+
+def test_prometheus_and_json_exports(tmp_path):
+    """Tests the Prometheus text format, label escaping, and file output by extension."""
+    aggregator = MetricsAggregator()
+    aggregator(_record('Agent "A"', latency=2.0))
+
+    text = aggregator.to_prometheus()
+    assert '# TYPE llmdebater_llm_calls_total counter' in text
+    assert 'llmdebater_llm_calls_total{model="m",caller="Agent \\"A\\""} 1' in text
+    assert 'llmdebater_llm_latency_seconds{model="m",caller="Agent \\"A\\"",quantile="0.95"} 2.0' in text
+    assert 'llmdebater_llm_latency_seconds_count{model="m",caller="Agent \\"A\\""} 1' in text
+
+    aggregator.write(str(tmp_path / "metrics.prom"))
+    aggregator.write(str(tmp_path / "metrics.json"))
+    assert (tmp_path / "metrics.prom").read_text(encoding="utf-8") == text
+    assert json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))["totals"]["calls"] == 1
+
+def test_llm_interface_reports_call_metrics(fake_llm):
+    """Tests that a call reports its caller, timings, API-reported tokens and cost."""
+    records = []
+    llm = fake_llm(metrics_callbacks=[records.append])
+
+    with llm_caller("Answer Agent 3"):
+        llm.generate_chat_response(MESSAGES)
+
+    [metrics] = records
+    assert metrics.model == "fake-model"
+    assert metrics.caller == "Answer Agent 3"
+    assert metrics.attempts == 1 and metrics.error is None and not metrics.streamed
+    assert metrics.completion_tokens == 30 and metrics.prompt_tokens > 0 and not metrics.tokens_estimated
+    assert metrics.cost_usd == pytest.approx((metrics.prompt_tokens * 2.0 + 30 * 10.0) / 1_000_000)
+    assert 0 <= metrics.queue_wait_seconds <= metrics.latency_seconds
+    assert 0 <= metrics.ttfb_seconds <= metrics.latency_seconds
+
+def test_llm_interface_reports_streams_cache_hits_and_errors(fake_llm, tmp_path):
+    """Tests records for streamed calls (estimated tokens), cache hits and failed calls."""
+    records = []
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    llm = fake_llm(metrics_callbacks=[records.append], response_cache=cache,
+                   retry_policy=RetryPolicy(max_retries=1, initial_backoff=0))
+
+    text = "".join(llm.generate_chat_response_stream(MESSAGES))
+    assert llm.generate_chat_response(MESSAGES) == text
+    with patch.object(llm.client.chat.completions, "create", side_effect=ValueError("bad request")):
+        with pytest.raises(ValueError):
+            llm.generate_chat_response([{"role": "user", "content": "Another question?"}])
+
+    streamed, cached, failed = records
+    assert streamed.streamed and streamed.tokens_estimated and streamed.completion_tokens > 0
+    assert streamed.ttfb_seconds is not None
+    assert cached.cached and cached.attempts == 0 and cached.cost_usd is None
+    assert failed.error == "ValueError: bad request" and failed.prompt_tokens is None
+    cache.close()
+
+def test_failing_callback_does_not_break_the_call(fake_llm):
+    """Tests that an exception in a metrics callback is logged, not raised."""
+    aggregator = MetricsAggregator()
+    llm = fake_llm(metrics_callbacks=[lambda metrics: 1 / 0, aggregator])
+
+    assert llm.generate_chat_response(MESSAGES)
+    assert aggregator.snapshot()["totals"]["calls"] == 1
@@ -360,4 +360,129 @@ def test_write_output_io_error(mock_open):
     try:
         orchestrator._write_output("Q?", "Final Ans")
     except Exception as e:
-        pytest.fail(f"_write_output raised unexpected exception: {e}") 
\ No newline at end of file
+        pytest.fail(f"_write_output raised unexpected exception: {e}") 
+
+
+# --- Concurrent Fan-out Tests ---
+
+def test_orchestrator_v2_init_invalid_max_concurrency(mock_question_agent, mock_answer_agent_factory, mock_llm_interface):
+    """Tests ValueError if max_concurrency is less than 1."""
+    with pytest.raises(ValueError, match="max_concurrency must be at least 1"):
+        OrchestratorV2(
+            question_agent=mock_question_agent,
+            answer_agents=[mock_answer_agent_factory("AA1")],
+            output_file_path=FAKE_OUTPUT,
+            llm_interface=mock_llm_interface,
+            max_concurrency=0,
+        )
+
+def test_run_debate_interaction_concurrent_fan_out(
+    mock_question_agent, mock_answer_agent_factory, mock_llm_interface, mock_open
+):
+    """Tests that agents are asked in parallel and synthesis keeps agent order."""
+    import threading
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    mock_aa1 = mock_answer_agent_factory("AA1")
+    mock_aa2 = mock_answer_agent_factory("AA2")
+    # Both calls must be in flight at once for the barrier to release
+    barrier = threading.Barrier(2, timeout=5)
+    mock_aa1.ask_question.side_effect = lambda q, p: (barrier.wait(), "Answer from AA1")[1]
+    mock_aa2.ask_question.side_effect = lambda q, p: (barrier.wait(), "Answer from AA2")[1]
+    orchestrator = OrchestratorV2(
+        question_agent=mock_question_agent,
+        answer_agents=[mock_aa1, mock_aa2],
+        output_file_path=FAKE_OUTPUT,
+        llm_interface=mock_llm_interface,
+        max_concurrency=2,
+    )
+    with patch.object(orchestrator, '_synthesize_final_answer', return_value="Synth Final Answer") as mock_synth, patch.object(orchestrator, '_write_output') as mock_write:
+
+        results = list(orchestrator.run_debate_interaction(FAKE_Q_DOC, [FAKE_ANSWER_DOC_1, FAKE_ANSWER_DOC_2]))
+
+    mock_aa1.ask_question.assert_called_once_with("Q1?", FAKE_ANSWER_DOC_1)
+    mock_aa2.ask_question.assert_called_once_with("Q1?", FAKE_ANSWER_DOC_2)
+    mock_synth.assert_called_once_with("Q1?", ["Answer from AA1", "Answer from AA2"])
+    mock_write.assert_called_once_with("Q1?", "Synth Final Answer")
+    assert ("Answer Agent 1", "Answer from AA1") in results
+    assert ("Answer Agent 2", "Answer from AA2") in results
+
+def test_run_debate_interaction_concurrent_agent_error(
+    mock_question_agent, mock_answer_agent_factory, mock_llm_interface, mock_open
+):
+    """Tests that a failing agent in concurrent mode yields the same error placeholder."""
+    mock_aa1 = mock_answer_agent_factory("AA1")
+    mock_aa2 = mock_answer_agent_factory("AA2")
+    mock_aa2.ask_question.side_effect = ContextLengthError("Too long")
+    orchestrator = OrchestratorV2(
+        question_agent=mock_question_agent,
+        answer_agents=[mock_aa1, mock_aa2],
+        output_file_path=FAKE_OUTPUT,
+        llm_interface=mock_llm_interface,
+        max_concurrency=4,
+    )
+    with patch.object(orchestrator, '_synthesize_final_answer', return_value="Synth Final Answer") as mock_synth, patch.object(orchestrator, '_write_output'):
+
+        list(orchestrator.run_debate_interaction(FAKE_Q_DOC, [FAKE_ANSWER_DOC_1, FAKE_ANSWER_DOC_2]))
+
+    questions = mock_question_agent.generate_questions.return_value
+    expected_answers = [mock_aa1.ask_question.return_value, "Error: Context Length Error for Answer Agent 2."]
+    mock_synth.assert_has_calls([call(q, expected_answers) for q in questions])
+
+def test_run_debate_interaction_resumes_from_checkpoint(
+    mock_question_agent, mock_answer_agent_factory, mock_llm_interface, tmp_path
+):
+    """Tests that a resumed run reuses recorded questions, answers and syntheses."""
+    from src.utils.checkpoint import RunCheckpoint
+    checkpoint_path = str(tmp_path / "out.md.checkpoint.jsonl")
+    output_path = str(tmp_path / "out.md")
+    mock_aa1 = mock_answer_agent_factory("AA1")
+    mock_aa2 = mock_answer_agent_factory("AA2")
+    doc_paths = [FAKE_ANSWER_DOC_1, FAKE_ANSWER_DOC_2]
+
+    # First run dies while synthesizing Q2
+    mock_llm_interface.generate_response.side_effect = ["Final 1", KeyboardInterrupt()]
+    orchestrator = OrchestratorV2(mock_question_agent, [mock_aa1, mock_aa2], output_path, mock_llm_interface,
+                                  checkpoint=RunCheckpoint(checkpoint_path))
+    with pytest.raises(KeyboardInterrupt):
+        list(orchestrator.run_debate_interaction(FAKE_Q_DOC, doc_paths))
+    assert orchestrator.checkpoint._file is None # Closed despite the error
+
+    mock_question_agent.generate_questions.reset_mock()
+    mock_aa1.ask_question.reset_mock()
+    mock_aa2.ask_question.reset_mock()
+    mock_llm_interface.generate_response.side_effect = ["Final 2"]
+    resumed = OrchestratorV2(mock_question_agent, [mock_aa1, mock_aa2], output_path, mock_llm_interface,
+                             checkpoint=RunCheckpoint(checkpoint_path, resume=True))
+    results = list(resumed.run_debate_interaction(FAKE_Q_DOC, doc_paths))
+
+    # Only the missing synthesis is redone
+    mock_question_agent.generate_questions.assert_not_called()
+    mock_aa1.ask_question.assert_not_called()
+    mock_aa2.ask_question.assert_not_called()
+    assert ("Synthesizer", "Final 1") in results
+    assert ("Synthesizer", "Final 2") in results
+    with open(output_path, encoding="utf-8") as f:
+        output = f.read()
+    assert "Final 1" in output and "Final 2" in output
+
+def test_run_debate_interaction_does_not_checkpoint_failed_answers(
+    mock_question_agent, mock_answer_agent_factory, mock_llm_interface, tmp_path
+):
+    """Tests that error answers and syntheses built from them are recomputed on resume."""
+    from core.answer_agent import AgentErrorResponse
+    from src.utils.checkpoint import RunCheckpoint
+    checkpoint_path = str(tmp_path / "out.md.checkpoint.jsonl")
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    mock_aa1 = mock_answer_agent_factory("AA1")
+    mock_aa2 = mock_answer_agent_factory("AA2")
+    mock_aa2.ask_question.return_value = AgentErrorResponse("Error getting response from language model: timed out")
+    mock_llm_interface.generate_response.return_value = "Final 1"
+
+    checkpoint = RunCheckpoint(checkpoint_path)
+    orchestrator = OrchestratorV2(mock_question_agent, [mock_aa1, mock_aa2], str(tmp_path / "out.md"),
+                                  mock_llm_interface, checkpoint=checkpoint)
+    list(orchestrator.run_debate_interaction(FAKE_Q_DOC, [FAKE_ANSWER_DOC_1, FAKE_ANSWER_DOC_2]))
+
+    assert checkpoint.get_response("Q1?", "Answer Agent 1", 0) == mock_aa1.ask_question.return_value
+    assert checkpoint.get_response("Q1?", "Answer Agent 2", 0) is None
+    assert checkpoint.get_final_answer("Q1?") is None
@@ -64,6 +64,16 @@ def orchestrator_v3(mock_question_agent, mock_answer_agents_v3, mock_llm_interfa
         max_debate_rounds=1 # Default to 1 debate round for tests
     )
 
+@pytest.fixture
+def answer_doc_paths(tmp_path):
+    """Answer documents on disk (the orchestrator's document store stats them before reading)."""
+    paths = []
+    for i in (1, 2):
+        path = tmp_path / f"a{i}.md"
+        path.write_text(f"Doc {i} Content", encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
 # --- Test Cases --- #
 
 def test_orchestrator_v3_init_success(orchestrator_v3, mock_question_agent, mock_answer_agents_v3, mock_llm_interface):
@@ -85,10 +95,10 @@ def test_orchestrator_v3_init_negative_rounds():
     with pytest.raises(ValueError, match="Maximum debate rounds cannot be negative"):
         OrchestratorV3(MagicMock(), [MagicMock()], "out.md", MagicMock(), 2, -1)
 
-def test_run_full_debate_success_flow(orchestrator_v3, mock_question_agent, mock_answer_agents_v3, mock_llm_interface):
+def test_run_full_debate_success_flow(orchestrator_v3, mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths):
     """Tests the happy path of the run_full_debate generator."""
     q_doc_path = "q_doc.md"
-    a_doc_paths = ["a1.md", "a2.md"]
+    a_doc_paths = answer_doc_paths
     mock_agent1, mock_agent2 = mock_answer_agents_v3
 
     # Mock open for reading agent docs and writing output
@@ -106,6 +116,10 @@ def test_run_full_debate_success_flow(orchestrator_v3, mock_question_agent, mock
             # Fallback for unexpected open calls
             raise FileNotFoundError(f"Unexpected path in mock_open: {path}")
 
+    # Load the tokenizer (used for the results' token counts) before open is patched
+    from src.utils.token_utils import get_encoding
+    get_encoding("o3-mini")
+
     with patch('builtins.open', side_effect=mock_open_side_effect) as mock_file_open:
         # Consume the generator
         results = list(orchestrator_v3.run_full_debate(q_doc_path, a_doc_paths))
@@ -137,14 +151,15 @@ def test_run_full_debate_success_flow(orchestrator_v3, mock_question_agent, mock
     mock_llm_interface.generate_response.assert_called()
     assert mock_llm_interface.generate_response.call_count == 2 # Once per initial question
 
-    # Check output file writing
-    mock_file_open.assert_any_call(orchestrator_v3.output_file_path, "w", encoding="utf-8") # Header write
-    mock_file_open.assert_any_call(orchestrator_v3.output_file_path, "a", encoding="utf-8") # Append Q/A
-    # Check content written (basic check on final call)
+    # Check output file writing: opened once for the whole run
+    output_opens = [c for c in mock_file_open.call_args_list if c.args[0] == orchestrator_v3.output_file_path]
+    assert output_opens == [call(orchestrator_v3.output_file_path, "w", encoding="utf-8")]
+    # Check content written (basic check on final question)
     handle = mock_write() # Get the file handle mock used for writing
-    handle.write.assert_any_call("## Question:\nQ2?\n\n") # Check for last question
-    handle.write.assert_any_call("### Final Answer (Synthesized V3):\nSynthesized Final Answer\n\n") # Check for last answer
-    handle.write.assert_any_call("---\n\n")
+    written = "".join(c.args[0] for c in handle.write.call_args_list)
+    assert "## Question:\nQ2?\n\n" in written # Check for last question
+    assert "### Final Answer (Synthesized V3):\nSynthesized Final Answer\n\n---\n\n" in written # Check for last answer
+    handle.close.assert_called_once()
 
 def test_run_full_debate_agent_path_mismatch(orchestrator_v3):
     """Tests generator behavior when agent/path counts mismatch."""
@@ -195,10 +210,469 @@ def test_run_full_debate_file_init_error(orchestrator_v3):
     assert "Error creating/accessing output file" in results[-1][1]
     assert "Permission denied" in results[-1][1]
 
+def test_orchestrator_v3_init_invalid_max_concurrency():
+    """Tests initialization failure with max_concurrency below 1."""
+    with pytest.raises(ValueError, match="max_concurrency must be at least 1"):
+        OrchestratorV3(MagicMock(), [MagicMock()], "out.md", MagicMock(), 2, 1, max_concurrency=0)
+
+def test_run_full_debate_simultaneous_rounds(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths):
+    """Tests that simultaneous rounds run concurrently and only expose history through round N-1."""
+    import threading
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    mock_agent1, mock_agent2 = mock_answer_agents_v3
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path="mock_output_v3.md",
+        llm_interface=mock_llm_interface,
+        num_initial_questions=1,
+        max_debate_rounds=1,
+        max_concurrency=2,
+        simultaneous_rounds=True
+    )
+
+    # Both agents must be inside participate_in_debate at once to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    seen_histories = {}
+    def make_side_effect(name):
+        def _participate(question, debate_history, document_content, current_round):
+            seen_histories[name] = list(debate_history)
+            barrier.wait()
+            return f"{name} Debate Response"
+        return _participate
+    mock_agent1.participate_in_debate.side_effect = make_side_effect("Agent 1")
+    mock_agent2.participate_in_debate.side_effect = make_side_effect("Agent 2")
+
+    read_content = {answer_doc_paths[0]: "Doc 1 Content", answer_doc_paths[1]: "Doc 2 Content"}
+    def mock_open_side_effect(path, mode='r', encoding=None):
+        if mode in ('w', 'a'):
+            return mock_open().return_value
+        return mock_open(read_data=read_content[path]).return_value
+
+    with patch('builtins.open', side_effect=mock_open_side_effect):
+        results = list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    # Each agent only saw the two Round 0 answers, not its peer's Round 1 response
+    expected_r0 = [
+        ("Answer Agent V3 1", 0, "Agent 1 Initial Answer (R0)"),
+        ("Answer Agent V3 2", 0, "Agent 2 Initial Answer (R0)"),
+    ]
+    assert seen_histories["Agent 1"] == expected_r0
+    assert seen_histories["Agent 2"] == expected_r0
+
+    # Final history passed to synthesis is in agent order for every round
+    synth_history = mock_agent1._format_debate_history.call_args[0][0]
+    assert synth_history == expected_r0 + [
+        ("Answer Agent V3 1", 1, "Agent 1 Debate Response"),
+        ("Answer Agent V3 2", 1, "Agent 2 Debate Response"),
+    ]
+    assert ("Answer Agent V3 2", "Round 1: Agent 2 Debate Response") in results
+    assert results[-1][0] == "System"
+
+def test_run_full_debate_sequential_rounds_see_same_round(orchestrator_v3, mock_answer_agents_v3, answer_doc_paths):
+    """Tests that the default (sequential) mode keeps exposing earlier same-round responses."""
+    mock_agent1, mock_agent2 = mock_answer_agents_v3
+    seen_by_agent2 = []
+    mock_agent2.participate_in_debate.side_effect = lambda **kwargs: (seen_by_agent2.append(list(kwargs["debate_history"])), "Agent 2 Debate Response")[1]
+
+    def mock_open_side_effect(path, mode='r', encoding=None):
+        if mode in ('w', 'a'):
+            return mock_open().return_value
+        return mock_open(read_data="Doc Content").return_value
+
+    with patch('builtins.open', side_effect=mock_open_side_effect):
+        list(orchestrator_v3.run_full_debate("q_doc.md", answer_doc_paths))
+
+    assert ("Answer Agent V3 1", 1, "Agent 1 Debate Response") in seen_by_agent2[0]
+
+def test_run_full_debate_pipelined_questions_keep_order(mock_question_agent, mock_answer_agents_v3, mock_llm_interface):
+    """Tests that pipelined questions run concurrently but are released and written in order."""
+    import threading
+    mock_question_agent.generate_questions.return_value = ["Q1?", "Q2?"]
+    mock_agent1, mock_agent2 = mock_answer_agents_v3
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path="mock_output_v3.md",
+        llm_interface=mock_llm_interface,
+        num_initial_questions=2,
+        max_debate_rounds=0,
+        max_concurrent_questions=2
+    )
+
+    # Q1's answer only returns once Q2 has finished, so Q2 completes first
+    q2_done = threading.Event()
+    def agent1_answer(question, doc_path):
+        if question == "Q1?":
+            assert q2_done.wait(timeout=5)
+        return f"Agent 1 answer to {question}"
+    mock_agent1.ask_question.side_effect = agent1_answer
+    mock_llm_interface.generate_response.side_effect = lambda prompt: (q2_done.set() if "Q2?" in prompt else None, "Synth")[1]
+    mock_agent1._format_debate_history.side_effect = lambda history: str(history)
+
+    written_questions = []
+    with patch('builtins.open', mock_open()), \
+         patch.object(orchestrator, '_write_output', side_effect=lambda q, h, a, **kwargs: written_questions.append(q)):
+        results = list(orchestrator.run_full_debate("q_doc.md", ["a1.md", "a2.md"]))
+
+    assert written_questions == ["Q1?", "Q2?"]
+    question_msgs = [msg for speaker, msg in results if speaker == "Question Agent" and msg in ("Q1?", "Q2?")]
+    assert question_msgs == ["Q1?", "Q2?"]
+    # All of Q1's messages are released before any of Q2's
+    q1_pos = results.index(("Answer Agent V3 1", "Initial Answer (R0): Agent 1 answer to Q1?"))
+    q2_pos = results.index(("Answer Agent V3 1", "Initial Answer (R0): Agent 1 answer to Q2?"))
+    assert q1_pos < q2_pos
+    assert results[-1][0] == "System"
+
+def test_run_full_debate_streams_partial_messages(mock_question_agent, mock_answer_agents_v3, mock_llm_interface):
+    """Tests that streamed deltas are yielded as PartialMessage events before the full message."""
+    from src.utils.streaming import PartialMessage, get_delta_callback
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    mock_agent1, _ = mock_answer_agents_v3
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path="mock_output_v3.md",
+        llm_interface=mock_llm_interface,
+        num_initial_questions=1,
+        max_debate_rounds=0,
+        stream_partial_messages=True
+    )
+
+    def streaming_answer(question, doc_path):
+        # Stands in for LLMInterface reporting deltas to the installed callback
+        on_delta = get_delta_callback()
+        for delta in ["Agent 1 ", "streamed"]:
+            on_delta(delta)
+        return "Agent 1 streamed"
+    mock_agent1.ask_question.side_effect = streaming_answer
+
+    with patch('builtins.open', mock_open()), patch.object(orchestrator, '_write_output'):
+        results = list(orchestrator.run_full_debate("q_doc.md", ["a1.md", "a2.md"]))
+
+    partials = [(speaker, msg) for speaker, msg in results if isinstance(msg, PartialMessage)]
+    assert partials == [("Answer Agent V3 1", "Agent 1 "), ("Answer Agent V3 1", "Agent 1 streamed")]
+    assert partials[1][1].delta == "streamed"
+    full_pos = results.index(("Answer Agent V3 1", "Initial Answer (R0): Agent 1 streamed"))
+    assert results.index(partials[-1]) < full_pos
+    # Agent 2 produced no deltas, so it only yields its complete message
+    assert ("Answer Agent V3 2", "Initial Answer (R0): Agent 2 Initial Answer (R0)") in results
+    assert ("Synthesizer", "Synthesized Final Answer") in results
+
+def test_run_full_debate_reads_each_document_once(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that debate rounds reuse the shared document store instead of re-reading files."""
+    from src.utils.document_store import DocumentStore
+    store = DocumentStore()
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path=str(tmp_path / "out.md"),
+        llm_interface=mock_llm_interface,
+        num_initial_questions=2,
+        max_debate_rounds=2,
+        document_store=store
+    )
+
+    list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    # 2 questions x 2 rounds x 2 agents, served from 2 reads
+    assert mock_answer_agents_v3[0].participate_in_debate.call_count == 4
+    assert store.stats() == {"reads": 2, "hits": 6, "documents": 2}
+    assert mock_answer_agents_v3[0].participate_in_debate.call_args.kwargs["document_content"] == "Doc 1 Content"
+
+def test_run_full_debate_compress_history(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that compressed history keeps the last round verbatim and summarizes older rounds once per round."""
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path=str(tmp_path / "out.md"),
+        llm_interface=mock_llm_interface,
+        num_initial_questions=1,
+        max_debate_rounds=3,
+        max_concurrency=2,
+        simultaneous_rounds=True,
+        compress_history=True
+    )
+    seen_histories = []
+    def _participate(question, debate_history, document_content, current_round):
+        seen_histories.append((current_round, list(debate_history)))
+        return f"Response R{current_round}"
+    for agent in mock_answer_agents_v3:
+        agent.participate_in_debate.side_effect = _participate
+    summaries = iter(["Summary through R0", "Summary through R1"])
+    def _generate(prompt):
+        return next(summaries) if "Updated Summary:" in prompt else "Synthesized Final Answer"
+    mock_llm_interface.generate_response.side_effect = _generate
+
+    results = list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    # One summary call per round from round 2 on, plus the synthesis
+    assert mock_llm_interface.generate_response.call_count == 3
+    second_summary_prompt = mock_llm_interface.generate_response.call_args_list[1].kwargs["prompt"]
+    assert "Summary through R0" in second_summary_prompt
+    # Only the newly aged round is sent to be folded in
+    assert "Formatted: [('Answer Agent V3 1', 1, 'Response R1'), ('Answer Agent V3 2', 1, 'Response R1')]" in second_summary_prompt
+
+    by_round = {}
+    for round_num, history in seen_histories:
+        by_round.setdefault(round_num, []).append(history)
+    assert by_round[2][0] == [("Debate Summary", 0, "Summary through R0"),
+                              ("Answer Agent V3 1", 1, "Response R1"), ("Answer Agent V3 2", 1, "Response R1")]
+    assert by_round[3][0] == [("Debate Summary", 1, "Summary through R1"),
+                              ("Answer Agent V3 1", 2, "Response R2"), ("Answer Agent V3 2", 2, "Response R2")]
+    # All agents of a round share the same summary
+    assert by_round[3][0] == by_round[3][1]
+
+    # Synthesis still gets the full history
+    synth_history = mock_answer_agents_v3[0]._format_debate_history.call_args[0][0]
+    assert len(synth_history) == 8
+    assert ("Synthesizer", "Synthesized Final Answer") in results
+
+def test_run_full_debate_compress_history_summary_failure_keeps_rounds(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that a failed summary call leaves the older rounds verbatim in the agents' history."""
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path=str(tmp_path / "out.md"),
+        llm_interface=mock_llm_interface,
+        num_initial_questions=1,
+        max_debate_rounds=2,
+        compress_history=True
+    )
+    def _generate(prompt):
+        if "Updated Summary:" in prompt:
+            raise RuntimeError("API down")
+        return "Synthesized Final Answer"
+    mock_llm_interface.generate_response.side_effect = _generate
+
+    results = list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    round2_history = mock_answer_agents_v3[0].participate_in_debate.call_args.kwargs["debate_history"]
+    assert round2_history[:2] == [
+        ("Answer Agent V3 1", 0, "Agent 1 Initial Answer (R0)"),
+        ("Answer Agent V3 2", 0, "Agent 2 Initial Answer (R0)"),
+    ]
+    assert any(speaker == "System" and "Keeping those rounds verbatim" in message for speaker, message in results)
+    assert ("Synthesizer", "Synthesized Final Answer") in results
+
+def test_orchestrator_v3_init_invalid_convergence_threshold(mock_question_agent, mock_answer_agents_v3, mock_llm_interface):
+    with pytest.raises(ValueError, match="convergence_threshold must be between 0 and 1."):
+        OrchestratorV3(mock_question_agent, mock_answer_agents_v3, "out.md", mock_llm_interface, convergence_threshold=1.5)
+
+def test_run_full_debate_adaptive_rounds_stops_on_convergence(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that a question's debate stops once agents repeat their positions, recording why."""
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path=str(tmp_path / "out.md"),
+        llm_interface=mock_llm_interface,
+        num_initial_questions=1,
+        max_debate_rounds=3,
+        adaptive_rounds=True
+    )
+    # Round 1 changes positions, round 2 repeats them
+    mock_answer_agents_v3[0].participate_in_debate.side_effect = ["Revenue grew 10%.", "Revenue grew 10%."]
+    mock_answer_agents_v3[1].participate_in_debate.side_effect = ["Margins fell to 5%.", "Margins fell to 5%."]
+
+    results = list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    assert mock_answer_agents_v3[0].participate_in_debate.call_count == 2
+    assert ("Orchestrator V3", "--- Starting Debate Round 3/3 ---") not in results
+    synth_history = mock_answer_agents_v3[0]._format_debate_history.call_args[0][0]
+    speaker, round_num, reason = synth_history[-1]
+    assert (speaker, round_num) == ("Orchestrator V3", 2)
+    assert reason.startswith("Debate stopped early after round 2 of 3: agents converged")
+    assert ("Orchestrator V3", reason) in results
+    assert "Debate stopped early after round 2 of 3" in (tmp_path / "out.md").read_text(encoding="utf-8")
+
+def test_run_full_debate_adaptive_rounds_records_max_rounds(orchestrator_v3, answer_doc_paths, tmp_path):
+    """Tests that a debate that never converges records that it ran all rounds."""
+    from src.utils.results_sink import MarkdownResultsSink
+    orchestrator_v3.adaptive_rounds = True
+    orchestrator_v3.results_sink = MarkdownResultsSink(str(tmp_path / "out.md"))
+
+    results = list(orchestrator_v3.run_full_debate("q_doc.md", answer_doc_paths))
+
+    assert ("Orchestrator V3", "Debate ran all 1 rounds without converging.") in results
+
+def test_run_full_debate_resumes_from_checkpoint(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that a resumed run only calls agents for responses missing from the checkpoint."""
+    from src.utils.checkpoint import RunCheckpoint
+    checkpoint_path = str(tmp_path / "out.md.checkpoint.jsonl")
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    mock_agent1, mock_agent2 = mock_answer_agents_v3
+
+    def make_orchestrator(resume):
+        return OrchestratorV3(
+            question_agent=mock_question_agent,
+            answer_agents=mock_answer_agents_v3,
+            output_file_path=str(tmp_path / "out.md"),
+            llm_interface=mock_llm_interface,
+            num_initial_questions=1,
+            max_debate_rounds=1,
+            checkpoint=RunCheckpoint(checkpoint_path, resume=resume)
+        )
+
+    # First run is interrupted while agent 2 answers in round 1
+    mock_agent2.participate_in_debate.side_effect = KeyboardInterrupt()
+    with pytest.raises(KeyboardInterrupt):
+        list(make_orchestrator(resume=False).run_full_debate("q_doc.md", answer_doc_paths))
+
+    mock_question_agent.generate_questions.reset_mock()
+    for agent in mock_answer_agents_v3:
+        agent.ask_question.reset_mock()
+        agent.participate_in_debate.reset_mock()
+    mock_agent2.participate_in_debate.side_effect = None
+
+    results = list(make_orchestrator(resume=True).run_full_debate("q_doc.md", answer_doc_paths))
+
+    mock_question_agent.generate_questions.assert_not_called()
+    mock_agent1.ask_question.assert_not_called()
+    mock_agent2.ask_question.assert_not_called()
+    mock_agent1.participate_in_debate.assert_not_called()
+    mock_agent2.participate_in_debate.assert_called_once()
+    # The restored history is identical to an uninterrupted run
+    synth_history = mock_agent1._format_debate_history.call_args[0][0]
+    assert synth_history == [
+        ("Answer Agent V3 1", 0, "Agent 1 Initial Answer (R0)"),
+        ("Answer Agent V3 2", 0, "Agent 2 Initial Answer (R0)"),
+        ("Answer Agent V3 1", 1, "Agent 1 Debate Response"),
+        ("Answer Agent V3 2", 1, "Agent 2 Debate Response"),
+    ]
+    assert ("Synthesizer", "Synthesized Final Answer") in results
+
+def test_run_full_debate_does_not_checkpoint_failed_answers(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that error responses and syntheses built from them are recomputed on resume."""
+    from core.answer_agent import AgentErrorResponse
+    from src.utils.checkpoint import RunCheckpoint
+    checkpoint_path = str(tmp_path / "out.md.checkpoint.jsonl")
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+    mock_agent1, mock_agent2 = mock_answer_agents_v3
+    mock_agent2.ask_question.return_value = AgentErrorResponse("Error getting initial response from language model: timed out")
+
+    def run(resume):
+        checkpoint = RunCheckpoint(checkpoint_path, resume=resume)
+        orchestrator = OrchestratorV3(mock_question_agent, mock_answer_agents_v3, str(tmp_path / "out.md"),
+                                      mock_llm_interface, num_initial_questions=1, max_debate_rounds=1,
+                                      checkpoint=checkpoint)
+        return list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths)), checkpoint
+
+    _, checkpoint = run(resume=False)
+    assert checkpoint.get_response("Q1?", "Answer Agent V3 1", 0) == "Agent 1 Initial Answer (R0)"
+    assert checkpoint.get_response("Q1?", "Answer Agent V3 2", 0) is None
+    assert checkpoint.get_final_answer("Q1?") is None
+
+    mock_agent1.ask_question.reset_mock()
+    mock_agent2.ask_question.reset_mock()
+    mock_agent2.ask_question.return_value = "Agent 2 Initial Answer (R0)"
+    results, checkpoint = run(resume=True)
+
+    mock_agent1.ask_question.assert_not_called()
+    mock_agent2.ask_question.assert_called_once()
+    assert ("Synthesizer", "Synthesized Final Answer") in results
+    assert checkpoint.get_final_answer("Q1?") == "Synthesized Final Answer"
+
+def test_run_full_debate_checkpoint_detects_changed_settings(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that resuming with different history compression or adaptive rounds is rejected."""
+    from src.utils.checkpoint import RunCheckpoint
+    checkpoint_path = str(tmp_path / "out.md.checkpoint.jsonl")
+    mock_question_agent.generate_questions.return_value = ["Q1?"]
+
+    def run(resume, **settings):
+        orchestrator = OrchestratorV3(mock_question_agent, mock_answer_agents_v3, str(tmp_path / "out.md"),
+                                      mock_llm_interface, num_initial_questions=1, max_debate_rounds=1,
+                                      checkpoint=RunCheckpoint(checkpoint_path, resume=resume), **settings)
+        return list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    run(resume=False)
+    for settings in ({"compress_history": True}, {"adaptive_rounds": True}):
+        results = run(resume=True, **settings)
+        assert "Error opening checkpoint" in results[-1][1]
+
+def test_run_full_debate_checkpoint_mismatch_stops(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that resuming with a checkpoint from a different run stops with an error."""
+    from src.utils.checkpoint import RunCheckpoint
+    checkpoint_path = str(tmp_path / "out.md.checkpoint.jsonl")
+    old = RunCheckpoint(checkpoint_path)
+    old.start({"workflow": "orchestrate_v2"})
+    old.close()
+    orchestrator = OrchestratorV3(mock_question_agent, mock_answer_agents_v3, str(tmp_path / "out.md"), mock_llm_interface,
+                                  checkpoint=RunCheckpoint(checkpoint_path, resume=True))
+
+    results = list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    assert results[-1][0] == "System"
+    assert "Error opening checkpoint" in results[-1][1]
+    mock_question_agent.generate_questions.assert_not_called()
+
+def test_run_full_debate_writes_jsonl_records(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that each question is sent to the results sink as one structured record."""
+    import json
+    from src.utils.results_sink import build_results_sink
+    jsonl_path = tmp_path / "out.jsonl"
+    orchestrator = OrchestratorV3(
+        question_agent=mock_question_agent,
+        answer_agents=mock_answer_agents_v3,
+        output_file_path=str(tmp_path / "out.md"),
+        llm_interface=mock_llm_interface,
+        num_initial_questions=2,
+        max_debate_rounds=1,
+        results_sink=build_results_sink(str(tmp_path / "out.md"), str(jsonl_path))
+    )
+
+    list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+
+    header, first, second = [json.loads(line) for line in jsonl_path.read_text(encoding="utf-8").splitlines()]
+    assert header["type"] == "run" and header["max_debate_rounds"] == 1
+    assert (first["index"], first["question"], second["question"]) == (1, "Q1?", "Q2?")
+    assert [r["round"] for r in first["rounds"]] == [0, 1]
+    assert first["rounds"][1]["responses"][1] == {
+        "agent": "Answer Agent V3 2", "response": "Agent 2 Debate Response", "tokens": 5
+    }
+    assert all(r["seconds"] >= 0 for r in first["rounds"])
+    assert first["final_answer"] == "Synthesized Final Answer"
+    assert first["timings"]["total_seconds"] >= first["timings"]["synthesis_seconds"] >= 0
+    assert first["tokens"]["final_answer"] > 0
+    assert first["tokens"]["responses"] == sum(e["tokens"] for r in first["rounds"] for e in r["responses"])
+    # The markdown log is rendered from the same records
+    assert "### Final Answer (Synthesized V3):\nSynthesized Final Answer" in (tmp_path / "out.md").read_text(encoding="utf-8")
+
 # --- TODO: Add More Tests --- #
 # - Test error handling within Round 0 (ask_question fails)
 # - Test error handling within Debate Rounds (participate_in_debate fails)
 # - Test error handling during synthesis (LLM generate_response fails)
 # - Test error handling during final file write (_write_output fails)
 # - Test behavior with max_debate_rounds = 0
-# - Test complex yield sequence verification 
\ No newline at end of file
+# - Test complex yield sequence verification 
+
+def test_run_full_debate_closes_outputs_when_stopped_early(mock_question_agent, mock_answer_agents_v3, mock_llm_interface, answer_doc_paths, tmp_path):
+    """Tests that the results sink and checkpoint are closed when the run is abandoned or fails."""
+    sink = MagicMock()
+    checkpoint = MagicMock()
+    checkpoint.start.return_value = False
+    checkpoint.questions = None
+    checkpoint.get_response.return_value = None
+    checkpoint.get_final_answer.return_value = None
+    orchestrator = OrchestratorV3(mock_question_agent, mock_answer_agents_v3, str(tmp_path / "out.md"), mock_llm_interface,
+                                  results_sink=sink, checkpoint=checkpoint)
+
+    # The consumer stops reading after the sink was opened
+    events = orchestrator.run_full_debate("q_doc.md", answer_doc_paths)
+    for speaker, message in events:
+        if message.startswith("Initialized output log file"):
+            break
+    events.close()
+    sink.close.assert_called()
+    checkpoint.close.assert_called()
+
+    # An agent raises an exception that is not caught per question
+    sink.reset_mock()
+    checkpoint.reset_mock()
+    mock_answer_agents_v3[1].participate_in_debate.side_effect = KeyboardInterrupt()
+    with pytest.raises(KeyboardInterrupt):
+        list(orchestrator.run_full_debate("q_doc.md", answer_doc_paths))
+    sink.close.assert_called()
+    checkpoint.close.assert_called()
@@ -35,7 +35,7 @@ def mock_dependencies_q():
     # Target paths based on where they are used in core.question_agent
     with (
         patch('core.question_agent.LLMInterface') as MockLLMInterface,
-        patch('core.question_agent.estimate_token_count') as mock_estimate,
+        patch('core.question_agent.estimate_prompt_tokens') as mock_estimate,
         patch('core.question_agent.read_text_file') as mock_read # Used in generate_questions(file)
     ):
         mock_llm_instance = MockLLMInterface.return_value
@@ -95,11 +95,11 @@ def test_generate_questions_success(q_agent, mock_dependencies_q, raw_llm_output
         num_questions=num_q,
         document_content=DOC_CONTENT
     )
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(QUESTION_PROMPT_TEMPLATE, model_name=MODEL_NAME, num_questions=num_q, document_content=DOC_CONTENT)
     
     # Check LLM call
     expected_messages = [{"role": "user", "content": expected_prompt}]
-    mock_llm.generate_chat_response.assert_called_once_with(expected_messages)
+    mock_llm.generate_chat_response.assert_called_once_with(expected_messages, estimated_prompt_tokens=estimated_tokens)
 
 def test_generate_questions_empty_content(q_agent):
     """Tests that an error is raised for empty content."""
@@ -164,9 +164,9 @@ def test_generate_questions_file_success(q_agent, mock_dependencies_q):
     mock_read.assert_called_once_with(FAKE_PATH)
     # Verify estimate and LLM call were made (via the content method)
     expected_prompt = QUESTION_PROMPT_TEMPLATE.format(num_questions=num_q, document_content=DOC_CONTENT)
-    mock_estimate.assert_called_once_with(expected_prompt, model_name=MODEL_NAME)
+    mock_estimate.assert_called_once_with(QUESTION_PROMPT_TEMPLATE, model_name=MODEL_NAME, num_questions=num_q, document_content=DOC_CONTENT)
     expected_messages = [{"role": "user", "content": expected_prompt}]
-    mock_llm.generate_chat_response.assert_called_once_with(expected_messages)
+    mock_llm.generate_chat_response.assert_called_once_with(expected_messages, estimated_prompt_tokens=500)
 
 def test_generate_questions_file_not_found(q_agent, mock_dependencies_q):
     """Tests that FileNotFoundError is raised."""
@@ -0,0 +1,123 @@
+import pytest
+import threading
+import time
+
+from src.utils.rate_limiter import TokenBucketRateLimiter, get_rate_limiter, reset_rate_limiters
+
+# --- Fixtures --- #
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Ensures each test starts with an empty limiter registry."""
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+# --- Test Cases --- #
+
+def test_invalid_limits():
+    """Tests that non-positive limits are rejected."""
+    with pytest.raises(ValueError, match="requests_per_minute"):
+        TokenBucketRateLimiter(requests_per_minute=0)
+    with pytest.raises(ValueError, match="tokens_per_minute"):
+        TokenBucketRateLimiter(tokens_per_minute=-5)
+
+def test_burst_within_budget_does_not_wait():
+    """Tests that requests within the bucket capacity are not delayed."""
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(requests_per_minute=60, tokens_per_minute=1000, clock=clock)
+    for _ in range(3):
+        assert limiter.acquire(100) == 0.0
+    assert limiter._time_until_available(100, clock.now) == 0.0
+
+def test_time_until_available_reflects_both_buckets():
+    """Tests RPM and TPM budgets are both enforced, with the longer wait winning."""
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(requests_per_minute=60, tokens_per_minute=600, burst_seconds=1, clock=clock)
+    # Capacity: 1 request, 10 tokens; refill 1 request/s and 10 tokens/s
+    limiter.acquire(10)
+    assert limiter._time_until_available(5, clock.now) == pytest.approx(1.0) # request bucket
+    clock.now = 1.0
+    assert limiter._time_until_available(10, clock.now) == pytest.approx(0.0)
+    limiter.acquire(10)
+    clock.now = 1.5
+    assert limiter._time_until_available(10, clock.now) == pytest.approx(0.5)
+
+def test_oversized_request_is_clamped_to_capacity():
+    """Tests that a request larger than the TPM bucket eventually runs instead of blocking forever."""
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(tokens_per_minute=600, burst_seconds=1, clock=clock)
+    assert limiter.acquire(10_000) == 0.0
+
+def test_record_usage_refunds_unused_tokens():
+    """Tests that over-reserved tokens are returned to the budget."""
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(tokens_per_minute=600, burst_seconds=1, clock=clock)
+    limiter.acquire(10)
+    assert limiter._time_until_available(10, clock.now) > 0
+    limiter.record_usage(reserved_tokens=10, actual_tokens=2)
+    assert limiter._time_until_available(8, clock.now) == 0.0
+
+def test_record_usage_of_oversized_reservation_charges_overrun():
+    """Tests that a reservation clamped to capacity is settled against the clamped amount."""
+    clock = FakeClock()
+    limiter = TokenBucketRateLimiter(tokens_per_minute=1000, burst_seconds=60, clock=clock)
+    limiter.acquire(5000) # Takes the whole bucket (1000)
+    limiter.record_usage(reserved_tokens=5000, actual_tokens=3000)
+    assert limiter._tokens.level == pytest.approx(-2000) # Used 2000 more than it took
+
+    limiter = TokenBucketRateLimiter(tokens_per_minute=1000, burst_seconds=60, clock=clock)
+    limiter.acquire(5000)
+    limiter.record_usage(reserved_tokens=5000, actual_tokens=0) # Failed attempt: full refund
+    assert limiter._tokens.level == pytest.approx(1000)
+
+def test_acquire_blocks_and_serves_callers_in_order():
+    """Tests that concurrent callers queue rather than fail, in arrival order."""
+    # 1200 RPM with a 50ms burst = 1 request of capacity, refilled every 50ms
+    limiter = TokenBucketRateLimiter(requests_per_minute=1200, burst_seconds=0.05)
+    order = []
+    lock = threading.Lock()
+
+    def worker(n):
+        limiter.acquire()
+        with lock:
+            order.append(n)
+
+    start = time.monotonic()
+    threads = []
+    for n in range(5):
+        t = threading.Thread(target=worker, args=(n,))
+        t.start()
+        threads.append(t)
+        time.sleep(0.005) # Stagger arrivals so the expected order is well defined
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    assert order == [0, 1, 2, 3, 4]
+    assert elapsed >= 0.15 # 4 waits of ~50ms after the first request
+
+def test_acquire_timeout_leaves_queue_without_reserving():
+    """Tests that a caller giving up on an exhausted budget leaves the queue and reserves nothing."""
+    limiter = TokenBucketRateLimiter(tokens_per_minute=1000)
+    limiter.acquire(1000)
+    level = limiter._tokens.level
+
+    with pytest.raises(TimeoutError):
+        limiter.acquire(500, timeout=0.05)
+    assert not limiter._queue
+    assert limiter._tokens.level >= level # Only refilled, nothing consumed
+
+def test_get_rate_limiter_shared_per_model_key():
+    """Tests the process-wide registry."""
+    assert get_rate_limiter("gpt-4o") is None # No limits configured
+    limiter = get_rate_limiter("gpt-4o", requests_per_minute=60)
+    assert get_rate_limiter("gpt-4o", requests_per_minute=60) is limiter
+    assert get_rate_limiter("gpt-4o-mini", requests_per_minute=60) is not limiter
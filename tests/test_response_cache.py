@@ -0,0 +1,119 @@
+import pytest
+import threading
+from unittest.mock import patch
+
+from src.utils.response_cache import ResponseCache, make_cache_key
+
+# --- Fixtures --- #
+
+@pytest.fixture
+def cache(tmp_path):
+    """Provides a ResponseCache backed by a temporary SQLite file."""
+    response_cache = ResponseCache(str(tmp_path / "cache" / "responses.sqlite3"))
+    yield response_cache
+    response_cache.close()
+
+# --- Test Cases --- #
+
+def test_make_cache_key_normalizes_messages():
+    """Tests that whitespace/line-ending differences and extra fields don't change the key."""
+    key_a = make_cache_key("gpt-4o", [{"role": "user", "content": "Hello\r\nworld "}], 0.7, None)
+    key_b = make_cache_key("gpt-4o", [{"role": "user", "content": "Hello\nworld", "name": "x"}], 0.7, None)
+    assert key_a == key_b
+
+def test_make_cache_key_depends_on_request_params():
+    """Tests that model, temperature and max_tokens are part of the key."""
+    messages = [{"role": "user", "content": "Hello"}]
+    base = make_cache_key("gpt-4o", messages, 0.7, None)
+    assert base != make_cache_key("gpt-4o-mini", messages, 0.7, None)
+    assert base != make_cache_key("gpt-4o", messages, 0.2, None)
+    assert base != make_cache_key("gpt-4o", messages, 0.7, 100)
+
+def test_get_put_and_counters(cache):
+    """Tests a miss, a store and a hit, and the resulting stats."""
+    assert cache.get("k1") is None
+    cache.put("k1", "answer", model_name="gpt-4o")
+    assert cache.get("k1") == "answer"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["stores"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] == len("answer")
+    assert stats["hit_rate"] == 0.5
+
+def test_cache_persists_across_instances(tmp_path):
+    """Tests that responses survive reopening the cache file."""
+    path = str(tmp_path / "responses.sqlite3")
+    first = ResponseCache(path)
+    first.put("k1", "persisted")
+    first.close()
+
+    second = ResponseCache(path)
+    assert second.get("k1") == "persisted"
+    second.close()
+
+def test_ttl_expiry(tmp_path):
+    """Tests that entries older than the TTL are treated as misses and removed."""
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl_seconds=10)
+    with patch('src.utils.response_cache.time.time', return_value=1000.0):
+        cache.put("k1", "old")
+    with patch('src.utils.response_cache.time.time', return_value=1005.0):
+        assert cache.get("k1") == "old"
+    with patch('src.utils.response_cache.time.time', return_value=1011.0):
+        assert cache.get("k1") is None
+    assert len(cache) == 0
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+def test_max_entries_evicts_least_recently_used(tmp_path):
+    """Tests LRU eviction once max_entries is exceeded."""
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=2)
+    with patch('src.utils.response_cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.put("a", "A")
+        cache.put("b", "B")
+        assert cache.get("a") == "A" # 'a' is now more recently used than 'b'
+        cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+def test_max_bytes_evicts_until_under_limit(tmp_path):
+    """Tests size-based eviction."""
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_bytes=10)
+    with patch('src.utils.response_cache.time.time', side_effect=[1.0, 2.0, 3.0]):
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.put("c", "123")
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 10
+    cache.close()
+
+def test_invalid_limits(tmp_path):
+    """Tests that non-positive limits are rejected."""
+    with pytest.raises(ValueError, match="ttl_seconds"):
+        ResponseCache(str(tmp_path / "a.sqlite3"), ttl_seconds=0)
+    with pytest.raises(ValueError, match="max_entries"):
+        ResponseCache(str(tmp_path / "b.sqlite3"), max_entries=0)
+
+def test_concurrent_access(cache):
+    """Tests that the cache can be shared by several threads."""
+    def worker(n):
+        for i in range(20):
+            cache.put(f"{n}-{i}", f"value {i}")
+            assert cache.get(f"{n}-{i}") == f"value {i}"
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cache) == 80
+    assert cache.stats()["hits"] == 80
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from src.utils.results_sink import (
+    ResultsSink, JSONLResultsSink, MarkdownResultsSink, MultiResultsSink, build_results_sink, render_markdown_record,
+)
+
+RUN_INFO = {"workflow": "orchestrate_v3", "question_doc": "q.md", "max_debate_rounds": 1, "answer_agents": 2}
+RECORD = {
+    "type": "question",
+    "index": 1,
+    "question": "Q1?",
+    "rounds": [
+        {"round": 0, "seconds": 1.5, "responses": [{"agent": "Agent 1", "response": "Line 1\nLine 2", "tokens": 4}]},
+        {"round": 1, "seconds": 0.5, "responses": [{"agent": "Agent 1", "response": "R1", "tokens": 1}]},
+    ],
+    "final_answer": "Final",
+    "timings": {"synthesis_seconds": 0.2, "total_seconds": 2.2},
+    "tokens": {"responses": 5, "final_answer": 1},
+}
+
+# --- Test Cases --- #
+
+def test_jsonl_sink_writes_header_and_records(tmp_path):
+    path = tmp_path / "results.jsonl"
+    sink = JSONLResultsSink(str(path))
+    sink.open(RUN_INFO)
+    sink.write(RECORD)
+    sink.write(dict(RECORD, index=2, question="Q2?"))
+    sink.close()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert lines[0] == {"type": "run", **RUN_INFO}
+    assert lines[1] == RECORD
+    assert lines[2]["question"] == "Q2?"
+
+def test_sink_flushes_each_record(tmp_path):
+    path = tmp_path / "results.jsonl"
+    sink = JSONLResultsSink(str(path))
+    sink.open(RUN_INFO)
+    sink.write(RECORD)
+    # Readable before the sink is closed
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+    sink.close()
+
+def test_write_before_open_raises(tmp_path):
+    with pytest.raises(RuntimeError):
+        JSONLResultsSink(str(tmp_path / "r.jsonl")).write(RECORD)
+
+def test_results_sink_requires_write():
+    with pytest.raises(TypeError):
+        ResultsSink()
+
+    class NoWriteSink(ResultsSink):
+        pass
+    with pytest.raises(TypeError):
+        NoWriteSink()
+
+def test_render_markdown_record():
+    rendered = render_markdown_record(RECORD)
+    assert rendered.startswith("## Question:\nQ1?\n\n### Debate History (2 entries):\n\n")
+    assert "\n#### Round 0:\n\n> **Agent 1:**\n\n> Line 1\n> Line 2\n\n>\n\n" in rendered
+    assert rendered.endswith("### Final Answer (Synthesized V3):\nFinal\n\n---\n\n")
+
+def test_render_markdown_record_without_history():
+    rendered = render_markdown_record(dict(RECORD, rounds=[]))
+    assert "### Debate History (0 entries):\n\n(No history recorded)\n\n" in rendered
+
+def test_markdown_sink_header(tmp_path):
+    path = tmp_path / "out" / "results.md"
+    sink = MarkdownResultsSink(str(path))
+    sink.open(RUN_INFO)
+    sink.write(RECORD)
+    sink.close()
+    content = path.read_text(encoding="utf-8")
+    assert content.startswith("# Multi-Round Debate Log (V3) for q.md\n* Max Rounds: 1\n* Answer Agents: 2\n\n## Question:")
+
+def test_build_results_sink(tmp_path):
+    md_path, jsonl_path = str(tmp_path / "r.md"), str(tmp_path / "r.jsonl")
+    assert isinstance(build_results_sink(md_path), MarkdownResultsSink)
+    sink = build_results_sink(md_path, jsonl_path)
+    assert isinstance(sink, MultiResultsSink)
+    sink.open(RUN_INFO)
+    sink.write(RECORD)
+    sink.close()
+    assert "Q1?" in (tmp_path / "r.md").read_text(encoding="utf-8")
+    assert len((tmp_path / "r.jsonl").read_text(encoding="utf-8").splitlines()) == 2
@@ -0,0 +1,87 @@
+import pytest
+
+from src.utils.retrieval import (
+    BM25Index, PASSAGE_SEPARATOR, chunk_text, get_index, select_passages, tokenize,
+)
+from src.utils.token_utils import estimate_token_count
+
+# --- Test Data --- #
+
+REPORT = "\n\n".join([
+    "# Market Overview\nThe smartphone market grew slowly in 2024 across all regions.",
+    "Battery life is the most requested feature among surveyed users, ahead of camera quality.",
+    "Xiaomi's Net Promoter Score is 41, the highest among its listed competitors.",
+    "Pricing strategy: Xiaomi keeps hardware margins below five percent to grow its ecosystem.",
+    "The supply chain relies on contract manufacturers in several provinces.",
+] * 20)
+
+# --- Test Cases --- #
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("What is the NPS of Xiaomi?") == ["nps", "xiaomi"]
+
+def test_tokenize_splits_cjk_characters():
+    assert tokenize("小米 loyalty") == ["小", "米", "loyalty"]
+
+def test_chunk_text_respects_token_limit():
+    chunks = chunk_text(REPORT, max_tokens=60)
+    assert len(chunks) > 1
+    assert all(estimate_token_count(c) <= 60 for c in chunks)
+    # Paragraphs are kept intact and in order
+    assert chunks[0].startswith("# Market Overview")
+
+def test_chunk_text_splits_oversized_paragraph():
+    paragraph = " ".join(f"word{i}." for i in range(400))
+    chunks = chunk_text(paragraph, max_tokens=50)
+    assert len(chunks) > 1
+    assert "".join(chunks).replace("\n\n", " ").count("word") == 400
+
+def test_chunk_text_empty_and_invalid():
+    assert chunk_text("") == []
+    assert chunk_text("   \n\n  ") == []
+    with pytest.raises(ValueError):
+        chunk_text("text", max_tokens=0)
+
+def test_bm25_ranks_matching_chunk_first():
+    chunks = [
+        "Revenue grew by ten percent.",
+        "Battery life and battery capacity improved.",
+        "The camera has a new sensor.",
+    ]
+    index = BM25Index(chunks)
+    results = index.search("battery improvements", top_k=2)
+    assert results[0][0] == 1
+    # Chunks without any query term are not returned
+    assert [idx for idx, _ in results] == [1]
+
+def test_bm25_search_no_match_and_empty_index():
+    assert BM25Index(["alpha beta"]).search("gamma") == []
+    assert BM25Index([]).search("anything") == []
+
+def test_get_index_is_cached_per_document():
+    assert get_index(REPORT, chunk_tokens=80) is get_index(REPORT, chunk_tokens=80)
+    assert get_index(REPORT, chunk_tokens=80) is not get_index(REPORT, chunk_tokens=90)
+
+def test_select_passages_returns_relevant_passages_within_budget():
+    context = select_passages(REPORT, "What is Xiaomi's Net Promoter Score?", top_k=3,
+                              token_budget=200, chunk_tokens=60)
+    assert context is not None
+    assert "Net Promoter Score" in context
+    assert estimate_token_count(context) < estimate_token_count(REPORT)
+    assert context.count(PASSAGE_SEPARATOR) <= 2
+
+def test_select_passages_keeps_document_order():
+    index = get_index(REPORT, chunk_tokens=60)
+    context = select_passages(REPORT, "battery pricing", top_k=4, token_budget=1000, chunk_tokens=60)
+    positions = [index.chunks.index(p) for p in context.split(PASSAGE_SEPARATOR)]
+    assert positions == sorted(positions)
+
+def test_select_passages_small_document_returned_whole():
+    assert select_passages("Short report.", "anything", token_budget=100) == "Short report."
+
+def test_select_passages_no_match_returns_none():
+    assert select_passages(REPORT, "quantum entanglement", top_k=3, token_budget=50, chunk_tokens=60) is None
+
+def test_select_passages_invalid_top_k():
+    with pytest.raises(ValueError):
+        select_passages(REPORT, "battery", top_k=0)
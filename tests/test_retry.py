@@ -0,0 +1,143 @@
+import pytest
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+from openai import APITimeoutError, BadRequestError, InternalServerError, RateLimitError
+
+from src.utils.retry import (
+    RetryPolicy, DeadlineExceededError, call_with_retry, async_call_with_retry,
+    is_retryable, retry_after_seconds,
+)
+
+# --- Helpers --- #
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+
+def _status_error(cls, status_code, headers=None):
+    response = httpx.Response(status_code, headers=headers or {}, request=REQUEST)
+    return cls(f"HTTP {status_code}", response=response, body=None)
+
+class FakeClock:
+    """Clock advanced by the fake sleep function."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    def __call__(self):
+        return self.now
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+# --- Test Cases --- #
+
+def test_is_retryable():
+    """Tests classification of transient vs permanent errors."""
+    assert is_retryable(APITimeoutError(request=REQUEST))
+    assert is_retryable(_status_error(RateLimitError, 429))
+    assert is_retryable(_status_error(InternalServerError, 503))
+    assert not is_retryable(_status_error(BadRequestError, 400))
+    assert not is_retryable(ValueError("bad input"))
+
+def test_retry_after_seconds_parsing():
+    """Tests Retry-After in seconds, retry-after-ms, and missing headers."""
+    assert retry_after_seconds(_status_error(RateLimitError, 429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(_status_error(RateLimitError, 429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_status_error(RateLimitError, 429)) is None
+    assert retry_after_seconds(ValueError("no response")) is None
+
+def test_backoff_exponential_without_jitter():
+    """Tests exponential growth capped at max_backoff."""
+    policy = RetryPolicy(initial_backoff=1.0, multiplier=2.0, max_backoff=5.0, jitter=False)
+    assert [policy.backoff(n) for n in range(4)] == [1.0, 2.0, 4.0, 5.0]
+
+def test_backoff_with_jitter_stays_in_range():
+    """Tests full jitter draws from [0, exponential delay]."""
+    policy = RetryPolicy(initial_backoff=1.0, multiplier=2.0, max_backoff=30.0)
+    with patch('src.utils.retry.random.uniform', return_value=0.3) as mock_uniform:
+        assert policy.backoff(2) == 0.3
+    mock_uniform.assert_called_once_with(0, 4.0)
+
+def test_backoff_honours_retry_after():
+    """Tests that Retry-After overrides the computed delay (capped at max_backoff)."""
+    policy = RetryPolicy(max_backoff=10.0)
+    assert policy.backoff(0, _status_error(RateLimitError, 429, {"retry-after": "4"})) == 4.0
+    assert policy.backoff(0, _status_error(RateLimitError, 429, {"retry-after": "60"})) == 10.0
+
+def test_call_with_retry_recovers_from_transient_errors():
+    """Tests that transient errors are retried until success."""
+    clock = FakeClock()
+    func = MagicMock(side_effect=[_status_error(InternalServerError, 500), APITimeoutError(request=REQUEST), "ok"])
+    policy = RetryPolicy(max_retries=3, initial_backoff=1.0, jitter=False)
+
+    assert call_with_retry(func, policy, sleep=clock.sleep, clock=clock) == "ok"
+    assert func.call_count == 3
+    assert clock.sleeps == [1.0, 2.0]
+    func.assert_called_with(None) # No deadline -> no per-request timeout
+
+def test_call_with_retry_does_not_retry_permanent_errors():
+    """Tests that non-transient errors are raised immediately."""
+    clock = FakeClock()
+    func = MagicMock(side_effect=_status_error(BadRequestError, 400))
+    with pytest.raises(BadRequestError):
+        call_with_retry(func, RetryPolicy(), sleep=clock.sleep, clock=clock)
+    assert func.call_count == 1
+
+def test_call_with_retry_gives_up_after_max_retries():
+    """Tests that the last error is raised once retries are exhausted."""
+    clock = FakeClock()
+    func = MagicMock(side_effect=_status_error(InternalServerError, 502))
+    with pytest.raises(InternalServerError):
+        call_with_retry(func, RetryPolicy(max_retries=2, jitter=False), sleep=clock.sleep, clock=clock)
+    assert func.call_count == 3
+
+def test_call_with_retry_respects_deadline():
+    """Tests that the remaining budget is passed on and no backoff crosses the deadline."""
+    clock = FakeClock()
+    timeouts = []
+    def func(timeout):
+        timeouts.append(timeout)
+        clock.now += 2.0 # Each attempt takes 2s and fails
+        raise APITimeoutError(request=REQUEST)
+
+    policy = RetryPolicy(max_retries=10, initial_backoff=1.0, jitter=False)
+    with pytest.raises(APITimeoutError):
+        call_with_retry(func, policy, deadline=8.0, sleep=clock.sleep, clock=clock)
+    # Attempts at t=0, t=3 and t=7; a 4s backoff at t=9 would pass the deadline
+    assert timeouts == [8.0, 5.0, 1.0]
+
+def test_call_with_retry_deadline_passed_during_backoff():
+    """Tests DeadlineExceededError when the deadline passes before the next attempt starts."""
+    clock = FakeClock()
+    func = MagicMock(side_effect=APITimeoutError(request=REQUEST))
+    def oversleep(seconds):
+        clock.now += seconds + 20.0 # e.g. the process was suspended
+
+    policy = RetryPolicy(max_retries=3, initial_backoff=1.0, jitter=False, deadline=10.0)
+    with pytest.raises(DeadlineExceededError):
+        call_with_retry(func, policy, sleep=oversleep, clock=clock)
+    assert func.call_count == 1
+
+def test_invalid_policy():
+    """Tests validation of policy settings."""
+    with pytest.raises(ValueError):
+        RetryPolicy(max_retries=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(deadline=0)
+
+def test_async_call_with_retry():
+    """Tests the async variant retries and returns the result."""
+    attempts = []
+    async def func(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 2:
+            raise _status_error(RateLimitError, 429, {"retry-after-ms": "1"})
+        return "ok"
+
+    result = asyncio.run(async_call_with_retry(func, RetryPolicy(max_retries=2)))
+    assert result == "ok"
+    assert len(attempts) == 2
+
+def test_deadline_exceeded_is_timeout_error():
+    """Tests DeadlineExceededError can be caught as a TimeoutError."""
+    assert issubclass(DeadlineExceededError, TimeoutError)
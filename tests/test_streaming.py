@@ -0,0 +1,122 @@
+import pytest
+import threading
+
+from src.utils.streaming import (
+    BackgroundGenerator, PartialMessage, stream_deltas, get_delta_callback, stream_call, call_maybe_streaming,
+)
+
+# --- Helpers --- #
+
+def _run(gen):
+    """Drains a generator, returning (events, return value)."""
+    events = []
+    while True:
+        try:
+            events.append(next(gen))
+        except StopIteration as stop:
+            return events, stop.value
+
+def _emit(*deltas):
+    on_delta = get_delta_callback()
+    for delta in deltas:
+        on_delta(delta)
+    return "".join(deltas).upper()
+
+# --- Test Cases --- #
+
+def test_partial_message_is_a_str():
+    """Tests PartialMessage behaves like the text so far and carries the delta."""
+    msg = PartialMessage("Hello wor", delta="wor")
+    assert msg == "Hello wor"
+    assert isinstance(msg, str)
+    assert msg.delta == "wor"
+
+def test_stream_deltas_sets_and_resets_callback():
+    """Tests the callback is only installed within the block."""
+    assert get_delta_callback() is None
+    received = []
+    with stream_deltas(received.append):
+        get_delta_callback()("x")
+    assert get_delta_callback() is None
+    assert received == ["x"]
+
+def test_stream_call_yields_partials_and_returns_result():
+    """Tests stream_call accumulates deltas into PartialMessage events."""
+    events, result = _run(stream_call("Agent", _emit, "a", "b", "c"))
+    assert [msg for _, msg in events] == ["a", "ab", "abc"]
+    assert all(speaker == "Agent" for speaker, _ in events)
+    assert [msg.delta for _, msg in events] == ["a", "b", "c"]
+    assert result == "ABC"
+
+def test_stream_call_runs_in_another_thread_and_propagates_errors():
+    """Tests errors raised by the streamed call reach the consumer."""
+    caller = threading.get_ident()
+    def failing():
+        assert threading.get_ident() != caller
+        get_delta_callback()("partial")
+        raise RuntimeError("boom")
+
+    gen = stream_call("Agent", failing)
+    assert next(gen) == ("Agent", "partial")
+    with pytest.raises(RuntimeError, match="boom"):
+        next(gen)
+
+def test_call_maybe_streaming_disabled_calls_directly():
+    """Tests that without streaming no events are yielded and no callback is installed."""
+    def no_callback():
+        assert get_delta_callback() is None
+        return 42
+    events, result = _run(call_maybe_streaming(False, "Agent", no_callback))
+    assert events == []
+    assert result == 42
+
+def _drain_all(worker):
+    items = []
+    while not worker.done:
+        items.extend(worker.drain(timeout=1))
+    return items
+
+def test_background_generator_drains_in_batches():
+    """Tests that items produced on the worker thread are drained in order, in bounded batches."""
+    release = threading.Event()
+    def events():
+        yield from range(5)
+        release.wait(1)
+        yield from range(5, 8)
+
+    worker = BackgroundGenerator(events())
+    first = []
+    while len(first) < 5:
+        batch = worker.drain(max_items=3, timeout=1)
+        assert len(batch) <= 3
+        first.extend(batch)
+    assert worker.drain() == [] and not worker.done
+    release.set()
+
+    assert first + _drain_all(worker) == list(range(8))
+    assert worker.error is None and worker.drain() == []
+
+def test_background_generator_reports_errors_and_stops():
+    """Tests that a failing generator sets error, and stop() closes the generator early."""
+    def failing():
+        yield "step"
+        raise RuntimeError("boom")
+
+    worker = BackgroundGenerator(failing())
+    assert _drain_all(worker) == ["step"]
+    assert isinstance(worker.error, RuntimeError)
+
+    closed = threading.Event()
+    def endless():
+        try:
+            while True:
+                yield "tick"
+        finally:
+            closed.set()
+
+    worker = BackgroundGenerator(endless())
+    worker.stop()
+    worker.join(1)
+    assert closed.is_set()
+    assert set(_drain_all(worker)) <= {"tick"} and worker.error is None
+
@@ -1,9 +1,19 @@
+import base64
+import os
+import random
+import re
+import string
+
 import pytest
 from unittest.mock import patch
 import tiktoken
 
 # Ensure imports work correctly based on project structure
-from src.utils.token_utils import estimate_token_count, DEFAULT_ENCODING, MODEL_TO_ENCODING
+from src.utils.token_utils import (
+    estimate_token_count, DEFAULT_ENCODING, MODEL_TO_ENCODING,
+    count_tokens_cached, estimate_prompt_tokens, clear_token_cache, estimate_token_counts, get_encoding,
+    approximate_token_count, check_token_limit, TokenEstimate,
+)
 
 # --- Test Cases --- #
 
@@ -67,7 +77,8 @@ def test_estimate_token_count_encoding_critical_error(caplog):
     """Tests error handling if even the default encoding fails."""
     text = "Critical failure test."
     
-    # Mock tiktoken.get_encoding to always fail
+    # Drop encodings loaded by earlier tests, then mock tiktoken.get_encoding to always fail
+    clear_token_cache()
     with patch('src.utils.token_utils.tiktoken.get_encoding', side_effect=ValueError("All encodings failed")):
         count = estimate_token_count(text)
         assert count == -1 # Function should return -1 on critical error
@@ -83,4 +94,176 @@ def test_estimate_token_count_encode_error(caplog):
         mock_encode.side_effect = Exception("Encoding process failed")
         count = estimate_token_count(text)
         assert count == -1 # Function should return -1 on encoding error
-        assert "Error encoding text" in caplog.text 
\ No newline at end of file
+        assert "Error encoding text" in caplog.text 
+
+# --- Encoding Cache and Batch Tests --- #
+
+def test_get_encoding_is_loaded_once():
+    """Tests that the Encoding object is cached instead of looked up on every call."""
+    clear_token_cache()
+    with patch('src.utils.token_utils.tiktoken.get_encoding', wraps=tiktoken.get_encoding) as mock_get:
+        first = get_encoding("o3-mini")
+        estimate_token_count("Some text.")
+        estimate_token_count("More text.")
+    assert first is get_encoding("o3-mini")
+    mock_get.assert_called_once_with(DEFAULT_ENCODING)
+
+def test_estimate_token_counts_matches_single_counts():
+    texts = ["Hello world! This is a test.", "", None, "Another test string.", "收入增长了百分之十。"]
+    counts = estimate_token_counts(texts)
+    assert counts == [estimate_token_count(t) for t in texts]
+
+def test_estimate_token_counts_empty_list():
+    assert estimate_token_counts([]) == []
+
+def test_estimate_token_counts_special_tokens_as_text():
+    """Tests that special-token markers are counted as ordinary text instead of failing."""
+    assert estimate_token_counts(["end <|endoftext|>"])[0] > 1
+
+def test_estimate_token_counts_error(caplog):
+    with patch('src.utils.token_utils.tiktoken.Encoding.encode_ordinary_batch', side_effect=Exception("boom")):
+        assert estimate_token_counts(["a", "b"]) == [-1, -1]
+    assert "Error batch encoding" in caplog.text
+
+# --- Segment Cache Tests --- #
+
+TEMPLATE = "Report:\n{report}\n\nQuestion: {question}\nAnswer:"
+REPORT = "Revenue grew by ten percent while margins held steady. " * 40
+
+def test_count_tokens_cached_memoizes():
+    """Tests that a segment is encoded only once."""
+    clear_token_cache()
+    with patch('src.utils.token_utils.estimate_token_count', wraps=estimate_token_count) as mock_count:
+        first = count_tokens_cached(REPORT)
+        second = count_tokens_cached(REPORT)
+    assert first == second == estimate_token_count(REPORT)
+    assert mock_count.call_count == 1
+
+def test_count_tokens_cached_does_not_cache_errors():
+    clear_token_cache()
+    with patch('src.utils.token_utils.estimate_token_count', return_value=-1):
+        assert count_tokens_cached(REPORT) == -1
+    assert count_tokens_cached(REPORT) == estimate_token_count(REPORT)
+
+def test_estimate_prompt_tokens_close_to_exact():
+    """Tests that summed segment counts stay within a few tokens of encoding the full prompt."""
+    fields = {"report": REPORT, "question": "How did revenue develop?"}
+    exact = estimate_token_count(TEMPLATE.format(**fields))
+    estimate = estimate_prompt_tokens(TEMPLATE, **fields)
+    assert abs(estimate - exact) <= 5
+
+def test_estimate_prompt_tokens_encodes_only_variable_parts_after_first_call():
+    """Tests that the report and static text are served from the cache on repeat calls."""
+    clear_token_cache()
+    estimate_prompt_tokens(TEMPLATE, report=REPORT, question="First?")
+    with patch('src.utils.token_utils.estimate_token_count', wraps=estimate_token_count) as mock_count:
+        estimate_prompt_tokens(TEMPLATE, report=REPORT, question="Second?")
+    mock_count.assert_called_once_with("Second?", model_name="o3-mini")
+
+def test_estimate_prompt_tokens_escaped_braces_and_format_spec():
+    template = "Literal {{braces}} and {value:>5}"
+    exact = estimate_token_count(template.format(value=42))
+    assert abs(estimate_prompt_tokens(template, value=42) - exact) <= 2
+
+def test_estimate_prompt_tokens_missing_field():
+    with pytest.raises(KeyError):
+        estimate_prompt_tokens(TEMPLATE, report=REPORT)
+
+def test_estimate_prompt_tokens_error():
+    with patch('src.utils.token_utils.count_tokens_cached', return_value=-1):
+        assert estimate_prompt_tokens(TEMPLATE, report=REPORT, question="Q?") == -1
+
+# --- Approximate Estimator Tests --- #
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reports")
+
+def _report_samples():
+    """Paragraphs and whole documents of the calibration corpus, plus a long concatenation."""
+    docs = []
+    for name in sorted(os.listdir(REPORTS_DIR)):
+        with open(os.path.join(REPORTS_DIR, name), encoding="utf-8") as f:
+            docs.append(f.read())
+    paragraphs = [p for d in docs for p in re.split(r"\n\s*\n", d) if p.strip()]
+    return paragraphs + docs + ["\n\n".join(docs * 3)]
+
+def test_approximate_token_count_within_margin_on_reports():
+    """Tests that the exact cl100k_base count lies within the reported error bounds."""
+    for text in _report_samples():
+        approx = approximate_token_count(text)
+        exact = estimate_token_count(text)
+        assert approx.lower_bound <= exact <= approx.upper_bound, text[:80]
+
+def test_approximate_token_count_cjk():
+    text = "小米集团的品牌忠诚度主要来自其高性价比策略、完善的生态系统以及活跃的用户社区。" * 5
+    approx = approximate_token_count(text)
+    assert approx.lower_bound <= estimate_token_count(text) <= approx.upper_bound
+
+_RANDOM = random.Random(0)
+RUSSIAN_TEXT = "Выручка компании выросла на десять процентов за счёт продаж смартфонов и умных устройств. " * 60
+ADVERSARIAL_SAMPLES = {
+    "numeric_table": "| 2021 | 1,234.56 | 7.89% | -0.12 |\n" * 500,
+    "russian": RUSSIAN_TEXT,
+    "accents": "é" * 2000,
+    "hiragana": "".join(chr(_RANDOM.randrange(0x3041, 0x3097)) for _ in range(1200)),
+    "hangul": "".join(chr(_RANDOM.randrange(0xAC00, 0xD7A4)) for _ in range(1200)),
+    "emoji": "😀🚀📈🎉" * 250,
+    "hex": "".join(_RANDOM.choice("0123456789abcdef") for _ in range(6000)),
+    "base64": base64.b64encode(_RANDOM.randbytes(5000)).decode("ascii"),
+    "letters": " ".join("".join(_RANDOM.choice(string.ascii_letters) for _ in range(8)) for _ in range(500)),
+}
+
+@pytest.mark.parametrize("name", sorted(ADVERSARIAL_SAMPLES))
+def test_approximate_token_count_within_margin_on_adversarial_text(name):
+    """Tests the bounds on text far from report prose (numbers, non-Latin scripts, encoded blobs)."""
+    text = ADVERSARIAL_SAMPLES[name]
+    approx = approximate_token_count(text)
+    assert approx.lower_bound <= estimate_token_count(text) <= approx.upper_bound
+
+def test_approximate_token_count_within_margin_on_mixed_long_text():
+    """Tests the bounds on a long (sampled) report with embedded blobs and non-English text."""
+    docs = _report_samples()[-1]
+    text = docs[:20000] + ADVERSARIAL_SAMPLES["base64"] + docs[20000:40000] + RUSSIAN_TEXT + docs[40000:]
+    approx = approximate_token_count(text)
+    assert approx.lower_bound <= estimate_token_count(text) <= approx.upper_bound
+
+@pytest.mark.parametrize("unit", [" ", "\n", "\t", "\r\n", "deadbeef", "0123456789abcdef"])
+@pytest.mark.parametrize("length", [5000, 40000]) # Fully scanned and sampled
+def test_approximate_token_count_within_margin_on_long_runs(unit, length):
+    """Tests the bounds on long whitespace and hex runs, which cl100k splits into many tokens."""
+    text = (unit * (length // len(unit) + 1))[:length]
+    if unit.isalnum():
+        text = "0x" + text
+    approx = approximate_token_count(text)
+    assert approx.lower_bound <= estimate_token_count(text) <= approx.upper_bound
+
+def test_check_token_limit_long_whitespace():
+    text = " " * 5000
+    assert check_token_limit(text, 20) == (False, estimate_token_count(text))
+
+def test_check_token_limit_non_english_text():
+    exact = estimate_token_count(RUSSIAN_TEXT)
+    assert exact > 2000
+    assert check_token_limit(RUSSIAN_TEXT, 2000) == (False, exact)
+
+def test_approximate_token_count_empty():
+    assert approximate_token_count("") == TokenEstimate(0, 0)
+
+def test_check_token_limit_far_from_limit_skips_encoding():
+    text = "Revenue grew by ten percent. " * 100
+    with patch('src.utils.token_utils.estimate_token_count') as mock_exact:
+        fits, tokens = check_token_limit(text, 100_000)
+        assert fits and tokens == approximate_token_count(text).upper_bound
+        fits, tokens = check_token_limit(text, 10)
+        assert not fits and tokens == approximate_token_count(text).lower_bound
+    mock_exact.assert_not_called()
+
+def test_check_token_limit_near_limit_encodes_exactly():
+    text = "Revenue grew by ten percent. " * 100
+    exact = estimate_token_count(text)
+    assert check_token_limit(text, exact) == (True, exact)
+    assert check_token_limit(text, exact - 1) == (False, exact)
+
+def test_check_token_limit_encoding_error():
+    text = "Revenue grew by ten percent. " * 100
+    with patch('src.utils.token_utils.estimate_token_count', return_value=-1):
+        assert check_token_limit(text, estimate_token_count(text)) == (False, -1)
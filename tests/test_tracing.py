@@ -0,0 +1,261 @@
+import pytest
+from unittest.mock import patch
+import asyncio
+import json
+import os
+import sys
+
+# Add src directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.llm_interface import LLMInterface
+from src.utils.concurrency import run_concurrently
+from src.utils.fake_llm import reset_fake_backends
+from src.utils.llm_metrics import llm_caller
+from src.utils.token_utils import estimate_token_count
+from src.utils.tracing import ( # Same module object the instrumented code uses (shared tracer)
+    Tracer, end_span, get_tracer, span, start_span, start_tracing, stop_tracing, traced,
+)
+
+
+@pytest.fixture
+def tracer():
+    """Traces the test and stops tracing afterwards."""
+    tracer = start_tracing()
+    yield tracer
+    stop_tracing()
+
+def _by_name(tracer):
+    return {s.name: s for s in tracer.spans()}
+
+# --- Test Cases --- #
+
+def test_spans_nest_and_record_errors(tracer):
+    """Tests parent links, attributes, the caller tag and error capture."""
+    with span("outer", "orchestrator", question=1):
+        with llm_caller("Answer Agent 2"):
+            with span("inner"):
+                pass
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+
+    spans = _by_name(tracer)
+    assert spans["inner"].parent is spans["outer"]
+    assert spans["inner"].attributes == {"caller": "Answer Agent 2"}
+    assert spans["outer"].attributes == {"question": 1}
+    assert spans["failing"].error == "ValueError: boom"
+    assert spans["outer"].duration_seconds >= spans["inner"].duration_seconds
+
+def test_tracing_off_records_nothing():
+    """Tests that spans and decorated functions are no-ops without a tracer."""
+    @traced()
+    def double(x):
+        return 2 * x
+
+    assert get_tracer() is None
+    with span("ignored") as current:
+        assert current is None
+    assert double(2) == 4
+    assert start_span("ignored") is None
+
+def test_traced_generators_and_unended_children(tracer):
+    """Tests that a traced generator spans its whole iteration and pops children left open."""
+    @traced(category="orchestrator")
+    def debate():
+        start_span("Round 1", "round") # Never ended, e.g. skipped by an exception
+        yield "a"
+        yield "b"
+        return "done"
+
+    def consume():
+        result = yield from debate()
+        return result
+
+    gen = consume()
+    assert list(gen) == ["a", "b"]
+    with span("after"):
+        pass
+
+    spans = _by_name(tracer)
+    assert "Round 1" not in spans
+    assert spans["test_traced_generators_and_unended_children.<locals>.debate"].category == "orchestrator"
+    assert spans["after"].parent is None
+
+def test_suspended_traced_generator_is_not_current(tracer):
+    """Tests that a traced generator's span is current only while the generator runs."""
+    @traced()
+    def produce():
+        with span("inside"):
+            yield 1
+            with span("nested after yield"):
+                pass
+        sent = yield 2
+        with span("after send"):
+            yield sent
+
+    with span("consumer"):
+        gen = produce()
+        assert next(gen) == 1
+        with span("between"):
+            pass
+        assert next(gen) == 2
+        assert gen.send("x") == "x"
+        gen.close()
+
+    spans = _by_name(tracer)
+    generator_span = spans["test_suspended_traced_generator_is_not_current.<locals>.produce"]
+    assert spans["between"].parent is spans["consumer"]
+    assert spans["inside"].parent is generator_span
+    assert spans["nested after yield"].parent is spans["inside"]
+    assert spans["after send"].parent is generator_span
+    assert generator_span.parent is spans["consumer"]
+
+def test_traced_generator_close_is_not_an_error(tracer):
+    """Tests that closing a traced generator early ends its span without an error, unlike a failure."""
+    @traced(name="closed")
+    def closed():
+        yield 1
+        yield 2
+
+    @traced(name="failing")
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    @traced(name="recovering")
+    def recovering():
+        try:
+            yield 1
+        except KeyError:
+            yield "recovered"
+
+    gen = closed()
+    next(gen)
+    gen.close()
+    with pytest.raises(ValueError):
+        list(failing())
+    gen = recovering()
+    next(gen)
+    assert gen.throw(KeyError("k")) == "recovered"
+    gen.close()
+
+    spans = _by_name(tracer)
+    assert spans["closed"].end_ns is not None and spans["closed"].error is None
+    assert spans["failing"].error == "ValueError: boom"
+    assert spans["recovering"].error is None
+
+def test_suspended_traced_async_generator_is_not_current(tracer):
+    """Tests the same for async generators, including an early aclose()."""
+    @traced(name="produce")
+    async def produce():
+        with span("inside"):
+            yield 1
+        yield 2
+
+    async def main():
+        with span("consumer"):
+            gen = produce()
+            assert await gen.__anext__() == 1
+            with span("between"):
+                pass
+            await gen.aclose()
+
+    asyncio.run(main())
+    spans = _by_name(tracer)
+    assert spans["between"].parent is spans["consumer"]
+    assert spans["inside"].parent is spans["produce"]
+    assert spans["produce"].error is None
+    assert spans["inside"].error is None
+
+def test_context_propagates_to_worker_threads(tracer):
+    """Tests that spans in run_concurrently workers nest under the caller's span, with flow arrows."""
+    @traced()
+    def work(x):
+        return x
+
+    with span("round"):
+        results = sorted(result for _, result, _ in run_concurrently(work, [(1,), (2,)], max_workers=2))
+
+    assert results == [1, 2]
+    spans = tracer.spans()
+    round_span = next(s for s in spans if s.name == "round")
+    workers = [s for s in spans if s.name.endswith("work")]
+    assert [s.parent for s in workers] == [round_span, round_span]
+
+    events = tracer.to_chrome_trace()["traceEvents"]
+    flows = [e for e in events if e["ph"] in ("s", "f")]
+    assert len(flows) == 2 * sum(s.lane != round_span.lane for s in workers)
+
+def test_context_propagates_to_async_tasks(tracer):
+    """Tests that coroutines and tasks nest under the span that started them, each task in its own lane."""
+    @traced()
+    async def call(x):
+        await asyncio.sleep(0)
+        return x
+
+    async def main():
+        with span("gather"):
+            return await asyncio.gather(call(1), call(2))
+
+    assert asyncio.run(main()) == [1, 2]
+    spans = tracer.spans()
+    gather = next(s for s in spans if s.name == "gather")
+    calls = [s for s in spans if s.name.endswith("call")]
+    assert len(calls) == 2 and all(s.parent is gather for s in calls)
+    assert calls[0].lane != calls[1].lane
+
+def test_chrome_trace_export(tracer, tmp_path):
+    """Tests the trace-event document: lane names and complete events in microseconds."""
+    with span("outer", "orchestrator"):
+        end_span(start_span("inner", "llm", model="m"))
+    path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(str(path))
+
+    document = json.loads(path.read_text(encoding="utf-8"))
+    events = document["traceEvents"]
+    assert document["otherData"] == {"spans": 2, "dropped_spans": 0}
+    assert events[0]["ph"] == "M" and events[0]["args"]["name"] == "MainThread"
+    outer, inner = [e for e in events if e["ph"] == "X"]
+    assert (outer["name"], outer["cat"], inner["cat"]) == ("outer", "orchestrator", "llm")
+    assert inner["args"]["model"] == "m" and inner["args"]["parent_id"] == outer["args"]["span_id"]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+def test_max_spans_drops_extra_spans():
+    """Tests that spans past max_spans are counted, not kept."""
+    tracer = start_tracing(Tracer(max_spans=2))
+    try:
+        for _ in range(3):
+            with span("s"):
+                pass
+    finally:
+        stop_tracing()
+    assert len(tracer.spans()) == 2 and tracer.dropped == 1
+
+def test_llm_calls_and_token_estimates_are_traced(tracer, tmp_path):
+    """Tests the LLMInterface span (model, caller) and token estimation spans."""
+    config = {"model": {"fake_llm": {"fake-model": {"seed": 1, "time_scale": 0}}}}
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    reset_fake_backends()
+    with patch.dict(os.environ, {"USE_LLM_PROXY": "false"}):
+        llm = LLMInterface(config_path=str(config_path), model_key="fake-model")
+
+    with llm_caller("Synthesizer"):
+        llm.generate_response("Summarize the debate.")
+        with span("estimate"):
+            estimate_token_count("Hello world")
+    reset_fake_backends()
+
+    spans = _by_name(tracer)
+    call = spans["LLMInterface.generate_chat_response"]
+    assert call.category == "llm"
+    assert call.attributes == {"caller": "Synthesizer", "model": "fake-model"}
+    assert spans["estimate_token_count"].parent is spans["estimate"]
+    assert spans["estimate_token_count"].category == "tokens"